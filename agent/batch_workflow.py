@@ -0,0 +1,251 @@
+"""
+批量运行：多个项目（或 project × provider 矩阵）在进程池中并行执行 workflow.run_project。
+
+- 每个组合一个独立进程，运行日志只写各自的日志文件（agent/result/_logs），不同项目互不干扰；
+- --workers 为全局并发上限（默认等于组合数，整批耗时约等于最慢的项目）；
+  同一 provider 的并发进程平分其 rpm / tpm；
+- --token-budget 为全部组合共享的 token 预算，耗尽后在途项目的后续 LLM 调用被跳过，
+  未开始的组合不再启动；
+- 组合按项目 .ets 文件数从多到少提交，避免最大的项目最后才开始；
+- 结束后写出汇总报告（token、耗时、边数、校验丢弃数），并打印总表。
+
+用法:
+    python agent/batch_workflow.py [--providers deepseek,gpt] [--projects all|A,B] [--workers N] [--token-budget N]
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from config import LLM_CONFIG, PROJECT_CONFIG, get_project_config
+from agent.utils.token_budget import SharedTokenBudget
+
+BATCH_REPORT_DIR = _REPO_ROOT / "agent" / "result" / "_batch"
+
+# 工作进程内的共享预算（由 initializer 注入）。
+_WORKER_BUDGET: Optional[SharedTokenBudget] = None
+
+
+def _init_worker(budget_total: int, counter: Any) -> None:
+    global _WORKER_BUDGET
+    load_dotenv(dotenv_path=_REPO_ROOT / ".env")
+    _WORKER_BUDGET = SharedTokenBudget(budget_total, counter)
+
+
+def _run_job(provider: str, project: str, rate_limit_share: float) -> Dict[str, Any]:
+    """工作进程入口：运行一个组合，返回可序列化的汇总（不含 PTG 本体）。"""
+    from agent.workflow import run_project
+
+    t0 = time.perf_counter()
+    try:
+        result = run_project(
+            provider,
+            project,
+            echo_log=False,
+            sync_ptg_ets=False,
+            rate_limit_share=rate_limit_share,
+            shared_budget=_WORKER_BUDGET,
+        )
+    except Exception as ex:
+        return {
+            "provider": provider,
+            "project": project,
+            "status": "error",
+            "error": f"{type(ex).__name__}: {ex}",
+            "traceback": traceback.format_exc(),
+            "wall_seconds": round(time.perf_counter() - t0, 3),
+        }
+    report = result.get("report") or {}
+    drops = dict(report.get("drop_reasons") or {})
+    return {
+        "provider": provider,
+        "project": project,
+        "status": "ok",
+        "model": result.get("model", ""),
+        "wall_seconds": result.get("wall_seconds", round(time.perf_counter() - t0, 3)),
+        "token_usage": result.get("token_usage") or {},
+        "edges_raw": int(result.get("edges_raw") or 0),
+        "edges_validated": int(report.get("edges_out") or 0),
+        "validation_dropped": sum(int(v or 0) for v in drops.values()),
+        "validation_drop_reasons": drops,
+        "empty_pages": len(report.get("empty_pages") or []),
+        "output_path": result.get("output_path", ""),
+        "log_path": result.get("log_path", ""),
+    }
+
+
+def _project_size(project: str) -> int:
+    """提交顺序的估算依据：项目 ets 目录下的文件数（目录不存在时为 0）。"""
+    ets_root = Path(get_project_config(project)["projectPath"]) / "src" / "main" / "ets"
+    if not ets_root.is_dir():
+        return 0
+    return sum(1 for _ in ets_root.rglob("*.ets"))
+
+
+def _resolve_names(raw: str, known: List[str], kind: str) -> List[str]:
+    if not raw or raw.strip().lower() == "all":
+        return list(known)
+    lookup = {k.lower(): k for k in known}
+    out: List[str] = []
+    for name in (x.strip() for x in raw.split(",")):
+        if not name:
+            continue
+        if name.lower() not in lookup:
+            raise SystemExit(f'Unknown {kind} "{name}". Supported: {", ".join(known)}')
+        out.append(lookup[name.lower()])
+    return out
+
+
+def _rate_limit_shares(jobs: List[Tuple[str, str]], workers: int) -> Dict[str, float]:
+    """同一 provider 最多同时运行 min(workers, 该 provider 组合数) 个进程，平分其限流额度。"""
+    counts: Dict[str, int] = {}
+    for provider, _ in jobs:
+        counts[provider] = counts.get(provider, 0) + 1
+    return {p: 1.0 / max(1, min(workers, n)) for p, n in counts.items()}
+
+
+def run_batch(
+    *,
+    providers: List[str],
+    projects: List[str],
+    workers: int = 0,
+    token_budget: int = 0,
+) -> Dict[str, Any]:
+    """在进程池中运行 providers × projects，返回汇总报告。"""
+    jobs = [(prov, proj) for prov in providers for proj in projects]
+    sizes = {proj: _project_size(proj) for proj in projects}
+    jobs.sort(key=lambda j: -sizes[j[1]])
+    workers = max(1, min(int(workers) or len(jobs), len(jobs))) if jobs else 1
+    shares = _rate_limit_shares(jobs, workers)
+
+    print(
+        f"[Batch] Start: jobs={len(jobs)}, workers={workers}, token_budget={token_budget or 'unlimited'}, "
+        f"providers={providers}, projects={projects}"
+    )
+    results: List[Dict[str, Any]] = []
+    t0 = time.perf_counter()
+    ctx = multiprocessing.get_context("spawn")
+    # 计数器须与进程池使用同一个 multiprocessing context 创建。
+    budget = SharedTokenBudget(token_budget, ctx.Value("q", 0))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(int(token_budget), budget.counter),
+    ) as pool:
+        pending = list(jobs)
+        running: Dict[Future, Tuple[str, str]] = {}
+        while pending or running:
+            while pending and len(running) < workers:
+                prov, proj = pending.pop(0)
+                if budget.exhausted():
+                    results.append({"provider": prov, "project": proj, "status": "skipped", "error": "token budget"})
+                    continue
+                running[pool.submit(_run_job, prov, proj, shares[prov])] = (prov, proj)
+            if not running:
+                continue
+            done, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+            for fut in done:
+                prov, proj = running.pop(fut)
+                try:
+                    row = fut.result()
+                except Exception as ex:
+                    row = {"provider": prov, "project": proj, "status": "error", "error": f"{type(ex).__name__}: {ex}"}
+                results.append(row)
+                print(
+                    f"[Batch] Done: {prov}/{proj} status={row['status']} "
+                    f"seconds={row.get('wall_seconds', '-')} "
+                    f"tokens={(row.get('token_usage') or {}).get('total', '-')} "
+                    f"edges={row.get('edges_validated', '-')}"
+                    + (f" error={row['error']}" if row.get("error") else "")
+                )
+    wall = time.perf_counter() - t0
+
+    order = {job: i for i, job in enumerate((p, q) for p in providers for q in projects)}
+    results.sort(key=lambda r: order.get((r["provider"], r["project"]), len(order)))
+    ok = [r for r in results if r["status"] == "ok"]
+    job_seconds = [float(r.get("wall_seconds") or 0) for r in results]
+    return {
+        "providers": providers,
+        "projects": projects,
+        "workers": workers,
+        "token_budget": int(token_budget),
+        "totals": {
+            "jobs": len(jobs),
+            "ok": len(ok),
+            "errors": sum(1 for r in results if r["status"] == "error"),
+            "skipped": sum(1 for r in results if r["status"] == "skipped"),
+            "wall_seconds": round(wall, 3),
+            "sum_job_seconds": round(sum(job_seconds), 3),
+            "slowest_job_seconds": round(max(job_seconds, default=0.0), 3),
+            "tokens": {
+                k: sum(int((r.get("token_usage") or {}).get(k) or 0) for r in ok)
+                for k in ("calls", "prompt", "completion", "total")
+            },
+            "shared_budget_used": budget.used(),
+            "edges_raw": sum(int(r.get("edges_raw") or 0) for r in ok),
+            "edges_validated": sum(int(r.get("edges_validated") or 0) for r in ok),
+            "validation_dropped": sum(int(r.get("validation_dropped") or 0) for r in ok),
+        },
+        "results": results,
+    }
+
+
+def _print_table(report: Dict[str, Any]) -> None:
+    header = f"{'provider':<10} {'project':<28} {'status':<8} {'seconds':>9} {'tokens':>10} {'edges':>7} {'dropped':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in report["results"]:
+        tokens = (r.get("token_usage") or {}).get("total", "")
+        print(
+            f"{r['provider']:<10} {r['project']:<28} {r['status']:<8} {str(r.get('wall_seconds', '')):>9} "
+            f"{str(tokens):>10} {str(r.get('edges_validated', '')):>7} {str(r.get('validation_dropped', '')):>8}"
+        )
+    t = report["totals"]
+    print(
+        f"[Batch] Total: wall={t['wall_seconds']}s, sum_of_jobs={t['sum_job_seconds']}s, "
+        f"slowest={t['slowest_job_seconds']}s, tokens={t['tokens']['total']}, edges={t['edges_validated']}, "
+        f"dropped={t['validation_dropped']}, ok={t['ok']}/{t['jobs']}"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--providers", default="deepseek", help="逗号分隔，或 all")
+    ap.add_argument("--projects", default="all", help="逗号分隔，或 all")
+    ap.add_argument("--workers", type=int, default=0, help="全局并发进程数；0 表示等于组合数")
+    ap.add_argument("--token-budget", type=int, default=0, help="全部组合共享的 token 预算；0 表示不限")
+    ap.add_argument("--report", default="", help="汇总报告路径；默认写入 agent/result/_batch")
+    args = ap.parse_args()
+
+    load_dotenv(dotenv_path=_REPO_ROOT / ".env")
+    report = run_batch(
+        providers=_resolve_names(args.providers, list(LLM_CONFIG.keys()), "provider"),
+        projects=_resolve_names(args.projects, list(PROJECT_CONFIG.keys()), "project"),
+        workers=args.workers,
+        token_budget=args.token_budget,
+    )
+    out_path = Path(args.report) if args.report else (
+        BATCH_REPORT_DIR / f"batch_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    _print_table(report)
+    print(f"[Batch] Report saved: {str(out_path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -60,6 +60,21 @@ class PTGMemory:
         self.ptg[src] = existing
         return True
 
+    def merge(self, other: "PTGMemory") -> int:
+        """按 other 中的页面与边顺序合并，返回新增边数量（沿用 add_edge 去重）。"""
+        added = 0
+        for src, edges in other.ptg.items():
+            self.ensure_page(src)
+            for e in edges:
+                if self.add_edge(
+                    source_page=src,
+                    component_type=str(((e.get("component") or {}).get("type")) or ""),
+                    event=str(e.get("event") or ""),
+                    target=str(e.get("target") or ""),
+                ):
+                    added += 1
+        return added
+
     def to_json_obj(self) -> PTG:
         return self.ptg
 
@@ -18,6 +18,10 @@ def _read_prompt_md(filename: str) -> str:
 CENSUS_SYSTEM_PROMPT = _read_prompt_md("census_system_prompt.md")
 COVERAGE_RETRY_SYSTEM_PROMPT = _read_prompt_md("edge_construct_system_prompt.md")
 TRIGGER_REFINE_SYSTEM_PROMPT = _read_prompt_md("trigger_refine_system_prompt.md")
+# 多文件批量 census：沿用单文件 census 规则，追加分文件输出约束。
+CENSUS_BATCH_SYSTEM_PROMPT = CENSUS_SYSTEM_PROMPT + "\n\n" + _read_prompt_md("census_batch_system_prompt.md")
+# 小文件单次调用：census 与构边合并为一次请求。
+CENSUS_CONSTRUCT_SYSTEM_PROMPT = _read_prompt_md("census_construct_system_prompt.md")
 
 
 def build_census_user_prompt(
@@ -57,6 +61,42 @@ def build_census_user_prompt(
     )
 
 
+def build_census_batch_user_prompt(*, files: Sequence[Mapping[str, object]]) -> str:
+    """
+    多文件批量 census 的 user prompt；files 每项包含 file_id / file_path / code，
+    可选 dependency_chain / resolved_import_files。
+    """
+    context_rows = []
+    sections = []
+    for f in files or []:
+        file_id = str(f.get("file_id") or "")
+        file_path = str(f.get("file_path") or "")
+        context_rows.append(
+            {
+                "file_id": file_id,
+                "file_path": file_path,
+                "dependency_chain": [str(x) for x in (f.get("dependency_chain") or []) if str(x).strip()],
+                "resolved_import_files": [str(x) for x in (f.get("resolved_import_files") or []) if str(x).strip()],
+            }
+        )
+        code = str(f.get("code") or "")
+        sections.append(f'<file id="{file_id}" path="{file_path}">\n<code>\n{code}\n</code>\n</file>\n')
+    return (
+        "Task: Build a router/navigation call census for EACH file section below, independently.\n"
+        "Extract every route call and the best local trigger clues for each call, using only its own file section.\n"
+        "If the final trigger owner is not visible in that file, keep unresolved trace clues instead of guessing.\n"
+        "Return ONLY a JSON array; every row must carry the file_id of the file section it was found in.\n\n"
+        "Context field semantics (per file):\n"
+        "- file_id: id of the <file> section; copy it into each output row.\n"
+        "- file_path: file being analyzed.\n"
+        "- dependency_chain: import/component traversal chain from source page to this file.\n"
+        "- resolved_import_files: deterministically resolved dependency files for symbol grounding.\n\n"
+        "Files context (JSON):\n"
+        f"{json.dumps(context_rows, ensure_ascii=False)}\n\n"
+        + "\n".join(sections)
+    )
+
+
 def build_coverage_retry_user_prompt(
     *,
     file_path: str,
@@ -66,12 +106,19 @@ def build_coverage_retry_user_prompt(
     resolved_import_files: Sequence[str] | None = None,
     route_constant_map: Mapping[str, str] | None = None,
     census_calls: Sequence[Mapping[str, str]] | None = None,
+    code_is_slice: bool = False,
 ) -> str:
     pages = [_p for _p in (main_pages or []) if str(_p).strip()]
     chain = [str(x) for x in (dependency_chain or []) if str(x).strip()]
     imports = [str(x) for x in (resolved_import_files or []) if str(x).strip()]
     rc_map = dict(route_constant_map or {})
     calls = [dict(x) for x in (census_calls or []) if isinstance(x, Mapping)]
+    # 压缩模式下只发送 census 调用所在的语法区域，被省略的行以 `// ... (N lines omitted)` 标记。
+    code_heading = (
+        "Source code (only the regions around the census calls; `// ... (N lines omitted)` marks elided lines):\n"
+        if code_is_slice
+        else "Source code:\n"
+    )
 
     context_obj = {
         "file_path": file_path,
@@ -95,6 +142,45 @@ def build_coverage_retry_user_prompt(
         "- census_calls: evidence anchors to construct one edge per actionable call when possible.\n\n"
         "Context (JSON):\n"
         f"{json.dumps(context_obj, ensure_ascii=False)}\n\n"
+        f"{code_heading}<code>\n"
+        f"{code}\n"
+        "</code>\n"
+    )
+
+
+def build_census_construct_user_prompt(
+    *,
+    file_path: str,
+    code: str,
+    main_pages: Iterable[str],
+    dependency_chain: Sequence[str] | None = None,
+    resolved_import_files: Sequence[str] | None = None,
+    route_constant_map: Mapping[str, str] | None = None,
+) -> str:
+    pages = [_p for _p in (main_pages or []) if str(_p).strip()]
+    chain = [str(x) for x in (dependency_chain or []) if str(x).strip()]
+    imports = [str(x) for x in (resolved_import_files or []) if str(x).strip()]
+    context_obj = {
+        "file_path": file_path,
+        "dependency_chain": chain,
+        "resolved_import_files": imports,
+        "main_pages": pages,
+        "route_constant_map": dict(route_constant_map or {}),
+    }
+    return (
+        "Task: In one pass, build the router/navigation call census for this file and construct navigation edges "
+        "from those calls.\n"
+        "Every edge must reference a census call_id. "
+        "If a call's trigger owner needs another file, mark needs_cross_file_resolution instead of guessing.\n"
+        'Return ONLY a JSON object: {"census": [...], "edges": [...]}.\n\n'
+        "Context field semantics:\n"
+        "- file_path: current file being analyzed.\n"
+        "- dependency_chain: import/component traversal chain from source page to current file.\n"
+        "- resolved_import_files: deterministically resolved dependency files for symbol grounding.\n"
+        "- main_pages: allowed page namespace for target validation.\n"
+        "- route_constant_map: known route constant -> page path mappings.\n\n"
+        "Context (JSON):\n"
+        f"{json.dumps(context_obj, ensure_ascii=False)}\n\n"
         "Source code:\n<code>\n"
         f"{code}\n"
         "</code>\n"
@@ -108,8 +194,16 @@ def build_trigger_refine_user_prompt(
     component_file_path: str,
     component_code: str,
     dependency_chain: Sequence[str] | None = None,
+    component_code_is_slice: bool = False,
 ) -> str:
     chain = [str(x) for x in (dependency_chain or []) if str(x).strip()]
+    # 切片模式下只发送组件 struct 中与回调相关的区域，被省略的行以 `// ... (N lines omitted)` 标记。
+    code_heading = (
+        "Relevant regions of the imported component file (the struct, the callback property and the handlers "
+        "that invoke it; `// ... (N lines omitted)` marks elided lines):\n"
+        if component_code_is_slice
+        else "Source code of imported component file:\n"
+    )
     context_obj = {
         "file_path": file_path,
         "dependency_chain": chain,
@@ -130,7 +224,7 @@ def build_trigger_refine_user_prompt(
         "First-pass route call snippet:\n<route_call_snippet>\n"
         f"{str(call.get('snippet') or '')}\n"
         "</route_call_snippet>\n\n"
-        "Source code of imported component file:\n<component_code>\n"
+        f"{code_heading}<component_code>\n"
         f"{component_code}\n"
         "</component_code>\n"
     )
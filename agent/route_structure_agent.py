@@ -9,33 +9,52 @@ from __future__ import annotations
 # 3) 做 target 合法性过滤后写入 PTGMemory。
 
 import asyncio
+import contextvars
 import hashlib
 import json
 import re
 import sys
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, TypedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, TypedDict, TypeVar
 
-from langchain_openai import ChatOpenAI
-from llm_usage import extract_token_usage
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from llm_rate_limit import ainvoke_with_rate_limit_retry, get_rate_limiter, is_rate_limit_error
+from llm_usage import estimate_tokens, extract_token_usage
 
 from agent.memory import PTGMemory
 from agent.prompt.route_structure_prompt import (
+    CENSUS_BATCH_SYSTEM_PROMPT,
+    CENSUS_CONSTRUCT_SYSTEM_PROMPT,
     CENSUS_SYSTEM_PROMPT,
     COVERAGE_RETRY_SYSTEM_PROMPT,
     TRIGGER_REFINE_SYSTEM_PROMPT,
     build_coverage_retry_user_prompt,
+    build_census_batch_user_prompt,
+    build_census_construct_user_prompt,
     build_census_user_prompt,
     build_trigger_refine_user_prompt,
 )
 from agent.tools.import_resolver import ImportResolver
+from agent.tools.ast_cache import AstCache
+from agent.tools.code_chunker import SyntaxChunker
+from agent.tools.code_slicer import slice_component
+from agent.tools.construct_prompt_compactor import ConstructPromptCompactor
+from agent.tools.project_file_table import ProjectFileTable
+from agent.tools.project_index_cache import ProjectIndexCache
 from agent.tools.project_reader import ProjectReader
 from agent.tools.route_constant_resolver import RouteConstantResolver
-from agent.tools.route_tool_calling import RouteToolCallingResolver
-from agent.utils.llm_json import parse_llm_json_list
+from agent.tools.route_tool_calling import TOOL_CALLING_SYSTEM_PROMPT, RouteToolCallingResolver, ToolCallingBatch
+from agent.tools.static_route_extractor import StaticExtraction, StaticRouteExtractor
+from agent.utils.llm_cache import LLMResponseCache
+from agent.utils.run_manifest import FileRecord, RunManifest, content_hash, json_hash
+from agent.utils.llm_json import parse_llm_json_list, parse_llm_json_object
+from agent.utils.llm_stream import JsonArrayStreamDecoder
 from agent.utils.route_utils import is_invalid_target, normalize_path, strip_ets
+from agent.utils.token_budget import SharedTokenBudget
 from llm_server import build_chat_model
 
 try:
@@ -53,6 +72,8 @@ _ACTIONABLE_ROUTER_CALL_RE = re.compile(
 )
 # 仅把明确的路由动作 API 视作可执行线索，避免普通 router 文本误触发分析。
 
+_T = TypeVar("_T")
+
 
 def _ensure_ets(p: str) -> str:
     """
@@ -68,6 +89,11 @@ def _ensure_ets(p: str) -> str:
     return t if (not t or t.endswith(".ets")) else f"{t}.ets"
 
 
+def _looks_like_census_row(row: Dict[str, Any]) -> bool:
+    """流式 census 的格式检查：带 call_id 且有 snippet 或 method。"""
+    return bool(str(row.get("call_id") or "").strip()) and ("snippet" in row or "method" in row)
+
+
 @dataclass
 class RouteStructureAgentConfig:
     """RouteStructureAgent 的运行配置。"""
@@ -87,11 +113,52 @@ class RouteStructureAgentConfig:
     chunk_trigger_lines: int = 320
     chunk_size_lines: int = 220
     chunk_overlap_lines: int = 50
+    # 长文件分块策略：lines（固定行窗口）| syntax（按 struct / 方法 / build 子树边界打包，每块不超过 chunk_target_tokens）。
+    # syntax 模式下只有单个语法单元超过目标时才按行窗口切分，并重叠 chunk_overlap_lines 行。
+    chunk_strategy: str = "lines"
+    chunk_target_tokens: int = 3000
+    # 构边 prompt 压缩：只带本文件引用的路由常量、项目相对文件 ID，源码切片为 census 调用所在的语法区域。
+    compact_construct_prompt: bool = False
+    # trigger refine 只发送组件文件中 component_ref_symbol 对应 struct 里与 callback_ref 相关的区域。
+    slice_refine_component: bool = False
+    # tool-calling 补解析的会话粒度：file（每个文件一次会话）| page（确定性解析后的剩余边按 main page 合并为一次会话）。
+    tool_calling_scope: str = "file"
+    # census / 构边请求改用流式接口，JSON 数组元素一闭合即解析；构边结果逐条过滤后立即写入当前页面的 PTG。
+    stream_llm_json: bool = False
+    # 流式输出连续这么多个元素不符合 schema（或迟迟没有 JSON 数组）时提前取消该请求。
+    stream_max_invalid_items: int = 3
     enable_router_census_probe: bool = True
     llm_skip_dirs: Optional[List[str]] = None
     max_llm_calls: int = 3000
     token_budget_total: int = 0
-    llm_call_pause_seconds: float = 2.0
+    # 调用节奏由 provider 级限流器（LLM_CONFIG.rateLimit）控制；该固定停顿仅作手动兜底。
+    llm_call_pause_seconds: float = 0.0
+    rate_limit_retries: int = 2
+    # LLM 响应磁盘缓存（SQLite）；为空表示禁用。
+    llm_cache_path: str = ""
+    llm_cache_max_mb: int = 512
+    # 同时分析的 main page 数量上限；1 表示保持原有顺序执行。
+    main_page_concurrency: int = 1
+    # 单个文件内 census 分块请求与跨文件 trigger refine 请求的并发上限；1 表示逐个等待。
+    intra_file_concurrency: int = 4
+    # per_main_page：逐页递归分析（默认）；whole_project：每个文件只分析一次，边归属到所有可达的 main page。
+    analysis_mode: str = "per_main_page"
+    # 非空时启用增量模式（强制 whole_project）：读取上次清单，仅对变更文件重跑 LLM，结束后写回清单。
+    incremental_manifest_path: str = ""
+    # 非空时把 alias 映射 / 模块导出索引 / 路由常量表持久化到该文件，按文件 size+mtime 失效。
+    project_index_cache_path: str = ""
+    # 启动时并行遍历项目目录树的线程数。
+    file_table_workers: int = 8
+    # 共享 AST 缓存的估算内存上限（MB）。
+    ast_cache_max_mb: int = 256
+    # >0 时启用多文件批量 census：把多个小的准入文件打包进一次请求，单次请求估算 token 不超过该值。
+    census_batch_max_tokens: int = 0
+    census_batch_max_files: int = 8
+    # >0 时，行数不超过该值的准入文件用一次调用同时完成 census 与构边；出现跨文件补解析需求时回退两阶段。
+    fused_census_max_lines: int = 0
+    # 静态快速路径：off 关闭；on 字面量/常量路由调用直接由 AST 构边，只有歧义调用走 LLM；
+    # shadow 照常走 LLM，同时对比静态结果并统计一致率。
+    static_fast_path: str = "off"
 
 
 class RouteState(str, Enum):
@@ -133,6 +200,55 @@ class StateContext:
     coverage_calls: int = 0
     constructed_edges: int = 0
     invalid_target_dropped: int = 0
+    # 进入 current_state 的时间（perf_counter）；0 表示未在计时。
+    state_entered: float = 0.0
+
+
+@dataclass
+class MainPageRun:
+    """单个 main page 的遍历上下文（并发时每个任务独立持有）。"""
+
+    main_page: str
+    visited: Set[str] = field(default_factory=set)
+    count: int = 0
+    state_ctx: StateContext = field(default_factory=StateContext)
+    # 本页面的边先写入独立缓冲，结束后按 main_pages 顺序合并，保证与顺序执行结果一致。
+    memory: PTGMemory = field(default_factory=PTGMemory)
+    # tool_calling_scope=page 时本页各文件遗留的未解析边，页面结束时统一补解析。
+    tool_batch: Optional[ToolCallingBatch] = None
+    # batch 中有待补解析的边后，后续文件的边按遍历顺序暂存，补解析结束后逐文件写入（补出的边紧跟所属文件）。
+    deferred_writes: List[Tuple[str, List[Dict[str, str]]]] = field(default_factory=list)
+    # whole_project 模式下逐文件抽取用的临时上下文不直接产出 PTG，流式构边不提前写边。
+    writes_ptg: bool = True
+
+
+@dataclass
+class FileContext:
+    """单个源码文件的导入解析结果（与 main page 无关，可跨页面复用）。"""
+
+    path: Path
+    key: str
+    code: str
+    imports: Dict[str, str]
+    resolved_map: Dict[str, str]
+    resolved_files: List[str]
+    nested: List[str]
+
+
+@dataclass
+class FileAnalysis:
+    """单文件 LLM 抽取结果：census 调用与已完成 target 解析/过滤的边。"""
+
+    admissible: bool = False
+    census_calls: List[Dict[str, Any]] = field(default_factory=list)
+    edges: List[Dict[str, str]] = field(default_factory=list)
+
+
+# 当前 asyncio 任务所属的 main page 上下文；asyncio 任务创建时会复制 context，天然按任务隔离。
+_CURRENT_RUN: contextvars.ContextVar[Optional[MainPageRun]] = contextvars.ContextVar(
+    "route_structure_current_run",
+    default=None,
+)
 
 
 class RouteGraphState(TypedDict, total=False):
@@ -152,9 +268,30 @@ class RouteGraphState(TypedDict, total=False):
 class RouteStructureAgent:
     """路由结构抽取 Agent。"""
 
-    def __init__(self, config: RouteStructureAgentConfig) -> None:
+    def __init__(
+        self,
+        config: RouteStructureAgentConfig,
+        *,
+        shared_budget: Optional[SharedTokenBudget] = None,
+        llm: Optional[BaseChatModel] = None,
+    ) -> None:
         self.config = config
-        self.llm: ChatOpenAI = build_chat_model(config.llm_provider_config, config.llm_model_name)
+        # 批量运行时多个项目共同消耗的 token 预算（在 token_budget_total 之外另行检查）。
+        self.shared_budget = shared_budget
+        # llm 用于注入替代模型（基准测试的模拟模型等）；默认按 provider 配置构造。
+        self.llm: BaseChatModel = llm if llm is not None else build_chat_model(
+            config.llm_provider_config, config.llm_model_name
+        )
+        self.rate_limiter = get_rate_limiter(config.llm_provider_config)
+        self.llm_cache: Optional[LLMResponseCache] = None
+        if str(config.llm_cache_path or "").strip():
+            self.llm_cache = LLMResponseCache(
+                path=str(config.llm_cache_path),
+                provider_config=config.llm_provider_config,
+                model_name=config.llm_model_name,
+                max_bytes=int(config.llm_cache_max_mb) * 1024 * 1024,
+            )
+            print(f"[RouteStructureAgent] LLM cache enabled: {self.llm_cache.path}")
 
         ets_root = config.ets_root or str(Path(config.project_path) / "src" / "main" / "ets")
         self.ets_root = Path(ets_root)
@@ -169,13 +306,38 @@ class RouteStructureAgent:
         else:
             print("[RouteStructureAgent] Import alias map is empty.")
 
+        self.index_cache: Optional[ProjectIndexCache] = None
+        if str(config.project_index_cache_path or "").strip():
+            self.index_cache = ProjectIndexCache(str(config.project_index_cache_path))
+
+        # 所有解析器共用一张文件表：目录树只遍历一次，文本按需加载并缓存。
+        self.file_table = ProjectFileTable([self.ets_root], max_workers=int(config.file_table_workers))
+        self.ast_cache = AstCache(max_bytes=int(config.ast_cache_max_mb) * 1024 * 1024)
+
         self.memory = PTGMemory()
-        self.reader = ProjectReader(ets_root=str(self.ets_root))
-        self.import_resolver = ImportResolver(reader=self.reader, import_alias_map=self.import_alias_map)
+        self.reader = ProjectReader(ets_root=str(self.ets_root), file_table=self.file_table)
+        self.import_resolver = ImportResolver(
+            reader=self.reader,
+            import_alias_map=self.import_alias_map,
+            index_cache=self.index_cache,
+            file_table=self.file_table,
+            ast_cache=self.ast_cache,
+        )
         self.route_const_resolver = RouteConstantResolver(
             ets_root=str(self.ets_root),
             max_files=int(self.config.max_route_files),
             max_chars_per_file=int(self.config.max_route_file_chars),
+            index_cache=self.index_cache,
+            file_table=self.file_table,
+            ast_cache=self.ast_cache,
+        )
+        self.static_extractor = StaticRouteExtractor(
+            ast_cache=self.ast_cache,
+            route_const_resolver=self.route_const_resolver,
+        )
+        self.construct_compactor = ConstructPromptCompactor(
+            ets_root=self.file_table.canonical(self.ets_root),
+            project_root=self.file_table.canonical(self.project_root),
         )
         # tool-calling 仅用于“表达式/常量补解析”，不负责主抽取。
         self.tool_calling_resolver = RouteToolCallingResolver(
@@ -183,38 +345,186 @@ class RouteStructureAgent:
             import_resolver=self.import_resolver,
             route_const_resolver=self.route_const_resolver,
             token_reporter=self._record_token_usage_numbers,
+            rate_limit_retries=int(self.config.rate_limit_retries),
+            llm_cache=self.llm_cache,
         )
         # 仅针对 LLM 分析的目录跳过名单（不影响 import 解析与递归依赖发现）。
         skip_dirs = config.llm_skip_dirs or ["http", "route"]
         self._llm_skip_dirs: Set[str] = {str(x).strip().lower() for x in skip_dirs if str(x).strip()}
 
         self.dependency_graph: Dict[str, List[str]] = {}
-        self._visited: Set[str] = set()
-        self._count = 0
         self._main_page_ids: Set[str] = set()
         self.goal = AgentGoal(
             max_llm_calls=int(self.config.max_llm_calls),
             token_budget_total=int(self.config.token_budget_total),
         )
         self.state_ctx = StateContext()
+        # 各状态累计耗时与进入次数；并发任务分别计时，合计可能超过墙钟时间。
+        self._state_seconds: Dict[str, float] = {}
+        self._state_entries: Dict[str, int] = {}
+        self._active_runs = 0
         self._token_prompt = 0
         self._token_completion = 0
         self._token_total = 0
         self._token_calls = 0
+        # 已发出但尚未返回的 LLM 调用数；并发时计入调用预算，避免多个任务同时越过预算检查。
+        self._llm_inflight = 0
+        self._project_stats: Dict[str, Any] = {}
+        # 批量 census 预取结果：file key -> (源码哈希, census 调用)；源码变化时不复用。
+        self._census_prefetch: Dict[str, Tuple[str, List[Dict[str, Any]]]] = {}
+        self._census_prefetch_pending: Set[str] = set()
+        self._census_batch_contexts: Dict[str, Optional[FileContext]] = {}
+        self._census_stats: Dict[str, Any] = {
+            "single_requests": 0,
+            "single_seconds": 0.0,
+            "batch_requests": 0,
+            "batch_seconds": 0.0,
+            "batched_files": 0,
+            "fallback_files": 0,
+            "dropped_rows": 0,
+            "prefetch_wall_seconds": 0.0,
+        }
+        self._fused_stats: Dict[str, Any] = {
+            "requests": 0,
+            "single_call_files": 0,
+            "fallback_cross_file": 0,
+            "failed": 0,
+            "prompt_tokens_estimate": 0,
+            # 以下两项只统计单次调用完成的文件，用于与两阶段对比。
+            "single_call_prompt_tokens_estimate": 0,
+            "two_stage_prompt_tokens_estimate": 0,
+        }
+        self._static_stats: Dict[str, Any] = {
+            "files": 0,
+            "calls_total": 0,
+            "calls_static": 0,
+            "ambiguous_reasons": {},
+            "shadow_files": 0,
+            "shadow_static_edges": 0,
+            "shadow_agree": 0,
+            "shadow_target_agree": 0,
+            "shadow_missing_in_llm": 0,
+            "shadow_mismatches": [],
+        }
+        # 逐页模式下同一文件会被多次分析，静态统计与 shadow 对比按 (文件, 内容哈希) 只计一次。
+        self._static_counted: Set[Tuple[str, str]] = set()
+        self._static_compared: Set[Tuple[str, str]] = set()
+        self._static_skipped: Set[str] = set()
+        self._chunk_stats: Dict[str, Any] = {
+            "files": 0,
+            "chunks": 0,
+            "chunk_tokens": 0,
+            "line_mode_chunks": 0,
+            "line_mode_tokens": 0,
+        }
+        self._chunk_counted: Set[str] = set()
+        self._fan_out_stats: Dict[str, Any] = {
+            "census_files": 0,
+            "census_requests": 0,
+            "census_call_seconds": 0.0,
+            "census_wall_seconds": 0.0,
+            "refine_files": 0,
+            "refine_calls": 0,
+            "refine_requests": 0,
+            "refine_deduplicated": 0,
+            "refine_call_seconds": 0.0,
+            "refine_wall_seconds": 0.0,
+        }
+        self._stream_stats: Dict[str, Any] = {
+            "requests": 0,
+            "items": 0,
+            "invalid_items": 0,
+            "missing_usage": 0,
+            "cancelled": 0,
+            "cancel_reasons": {},
+            "completion_tokens_cancelled_estimate": 0,
+            "first_item_samples": 0,
+            "first_item_seconds": 0.0,
+            "response_seconds": 0.0,
+            "early_edges": 0,
+        }
+        self._run_started = time.perf_counter()
+        self._first_edge_seconds: Optional[float] = None
+        self._refine_slice_stats: Dict[str, int] = {
+            "requests": 0,
+            "sliced_requests": 0,
+            "component_lines_total": 0,
+            "component_lines_kept": 0,
+            "prompt_tokens_full_estimate": 0,
+            "prompt_tokens_sliced_estimate": 0,
+        }
+        self._compaction_stats: Dict[str, int] = {
+            "requests": 0,
+            "sliced_requests": 0,
+            "unlocated_calls": 0,
+            "prompt_tokens_full_estimate": 0,
+            "prompt_tokens_compact_estimate": 0,
+            "route_constants_total": 0,
+            "route_constants_kept": 0,
+            "code_lines_total": 0,
+            "code_lines_kept": 0,
+        }
+
+    def _active_state_ctx(self) -> StateContext:
+        """返回当前任务的状态上下文；不在 main page 任务内时返回全局上下文。"""
+        run = _CURRENT_RUN.get()
+        return run.state_ctx if run is not None else self.state_ctx
+
+    def _bump_state_counter(self, name: str, value: int) -> None:
+        """同时累加全局与当前 main page 的统计计数。"""
+        setattr(self.state_ctx, name, int(getattr(self.state_ctx, name)) + int(value))
+        run = _CURRENT_RUN.get()
+        if run is not None:
+            setattr(run.state_ctx, name, int(getattr(run.state_ctx, name)) + int(value))
 
     def _set_state(self, state: RouteState, *, main_page: str = "", file_path: str = "") -> None:
         """状态切换并打印运行日志。"""
-        self.state_ctx.current_state = state.value
+        ctx = self._active_state_ctx()
+        now = time.perf_counter()
+        self._stop_state_timer(ctx, now)
+        ctx.current_state = state.value
+        ctx.state_entered = now
+        self._state_entries[state.value] = self._state_entries.get(state.value, 0) + 1
         if main_page:
-            self.state_ctx.current_main_page = main_page
+            ctx.current_main_page = main_page
         if file_path:
-            self.state_ctx.current_file = normalize_path(file_path)
+            ctx.current_file = normalize_path(file_path)
         print(
             "[RouteStructureAgent] State => "
-            f"{self.state_ctx.current_state} | main_page={self.state_ctx.current_main_page or '-'} "
-            f"| file={self.state_ctx.current_file or '-'}"
+            f"{ctx.current_state} | main_page={ctx.current_main_page or '-'} "
+            f"| file={ctx.current_file or '-'}"
         )
 
+    def _stop_state_timer(self, ctx: StateContext, now: Optional[float] = None) -> None:
+        """把 ctx 当前状态已持续的时间计入该状态，并停止计时。"""
+        if ctx.state_entered <= 0:
+            return
+        now = time.perf_counter() if now is None else now
+        key = ctx.current_state
+        self._state_seconds[key] = self._state_seconds.get(key, 0.0) + max(0.0, now - ctx.state_entered)
+        ctx.state_entered = 0.0
+
+    def _enter_run(self, run: MainPageRun) -> contextvars.Token:
+        """进入 main page / 文件任务上下文；有任务在运行时全局上下文暂停计时，避免与任务内状态重复计时。"""
+        if self._active_runs == 0:
+            self._stop_state_timer(self.state_ctx)
+        self._active_runs += 1
+        return _CURRENT_RUN.set(run)
+
+    def _exit_run(self, run: MainPageRun, token: contextvars.Token) -> None:
+        _CURRENT_RUN.reset(token)
+        self._stop_state_timer(run.state_ctx)
+        self._active_runs -= 1
+        if self._active_runs == 0:
+            self.state_ctx.state_entered = time.perf_counter()
+
+    def _state_timing_snapshot(self) -> Dict[str, Any]:
+        """各状态累计耗时（秒）与进入次数。"""
+        return {
+            "seconds": {k: round(v, 3) for k, v in sorted(self._state_seconds.items())},
+            "entries": dict(sorted(self._state_entries.items())),
+        }
+
     def _record_decision(self, *, state: RouteState, action: str, detail: Dict[str, Any]) -> None:
         """记录局部自主决策轨迹（用于复盘与论文分析）。"""
         row = {
@@ -228,11 +538,13 @@ class RouteStructureAgent:
         )
 
     def _llm_budget_exhausted(self) -> bool:
-        """检查是否触达 LLM 调用预算。"""
-        if self.goal.max_llm_calls > 0 and self._token_calls >= self.goal.max_llm_calls:
+        """检查是否触达 LLM 调用预算（在途调用同样占用调用数）。"""
+        if self.goal.max_llm_calls > 0 and self._token_calls + self._llm_inflight >= self.goal.max_llm_calls:
             return True
         if self.goal.token_budget_total > 0 and self._token_total >= self.goal.token_budget_total:
             return True
+        if self.shared_budget is not None and self.shared_budget.exhausted():
+            return True
         return False
 
     def _record_token_usage_numbers(self, stage: str, prompt: int, completion: int, total: int) -> None:
@@ -241,10 +553,18 @@ class RouteStructureAgent:
         self._token_prompt += int(prompt or 0)
         self._token_completion += int(completion or 0)
         self._token_total += int(total or 0)
+        if self.shared_budget is not None:
+            self.shared_budget.add(int(total or 0))
         self.state_ctx.llm_calls = self._token_calls
         self.state_ctx.token_prompt = self._token_prompt
         self.state_ctx.token_completion = self._token_completion
         self.state_ctx.token_total = self._token_total
+        run = _CURRENT_RUN.get()
+        if run is not None:
+            run.state_ctx.llm_calls += 1
+            run.state_ctx.token_prompt += int(prompt or 0)
+            run.state_ctx.token_completion += int(completion or 0)
+            run.state_ctx.token_total += int(total or 0)
         print(
             f"[RouteStructureAgent] Token usage | {stage}: "
             f"prompt={int(prompt or 0)}, completion={int(completion or 0)}, total={int(total or 0)}"
@@ -262,7 +582,43 @@ class RouteStructureAgent:
         state: RouteState,
         messages: List[tuple[str, str]],
     ) -> Any:
-        """带状态与预算检查的统一 LLM 调用入口。"""
+        """带状态、缓存与预算检查的统一 LLM 调用入口。"""
+        cache_key, cached = self._llm_cache_lookup(stage=stage, messages=messages)
+        if cached is not None:
+            return cached
+        self._raise_if_llm_budget_exhausted(state)
+        self._llm_inflight += 1
+        try:
+            msg = await ainvoke_with_rate_limit_retry(
+                self.llm,
+                messages,
+                retries=int(self.config.rate_limit_retries),
+            )
+            self._record_token_usage(stage=stage, msg=msg)
+        finally:
+            self._llm_inflight -= 1
+        if self.llm_cache is not None and cache_key:
+            self.llm_cache.put(cache_key, stage=stage, message=msg)
+        await self._llm_call_pause()
+        return msg
+
+    def _llm_cache_lookup(self, *, stage: str, messages: List[tuple[str, str]]) -> Tuple[str, Any]:
+        """返回 (缓存 key, 命中的消息或 None)。"""
+        if self.llm_cache is None:
+            return "", None
+        cache_key = self.llm_cache.make_key(messages)
+        cached = self.llm_cache.get(cache_key, stage=stage)
+        if cached is not None:
+            # 命中缓存不消耗 token，也不占用调用预算。
+            print(f"[RouteStructureAgent] LLM cache hit | {stage}")
+        return cache_key, cached
+
+    async def _llm_call_pause(self) -> None:
+        pause_sec = max(0.0, float(self.config.llm_call_pause_seconds))
+        if pause_sec > 0:
+            await asyncio.sleep(pause_sec)
+
+    def _raise_if_llm_budget_exhausted(self, state: RouteState) -> None:
         if self._llm_budget_exhausted():
             self._record_decision(
                 state=state,
@@ -275,12 +631,141 @@ class RouteStructureAgent:
                 },
             )
             raise RuntimeError("LLM budget exhausted")
-        msg = await self.llm.ainvoke(messages)
-        self._record_token_usage(stage=stage, msg=msg)
-        pause_sec = max(0.0, float(self.config.llm_call_pause_seconds))
-        if pause_sec > 0:
-            await asyncio.sleep(pause_sec)
-        return msg
+
+    async def _ainvoke_json_list(
+        self,
+        *,
+        stage: str,
+        state: RouteState,
+        messages: List[tuple[str, str]],
+        looks_valid: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        on_item: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        请求一个 JSON 对象数组。stream_llm_json 开启时走流式接口，元素一闭合即回调 on_item；
+        looks_valid 只用于判断输出是否已偏离格式（决定是否提前取消），不过滤结果。
+        """
+        if not bool(self.config.stream_llm_json):
+            msg = await self._ainvoke_with_state(stage=stage, state=state, messages=messages)
+            rows = parse_llm_json_list(str(getattr(msg, "content", "") or ""))
+            for row in rows if on_item is not None else []:
+                on_item(row)
+            return rows
+        return await self._astream_json_list(
+            stage=stage,
+            state=state,
+            messages=messages,
+            looks_valid=looks_valid,
+            on_item=on_item,
+        )
+
+    async def _astream_json_list(
+        self,
+        *,
+        stage: str,
+        state: RouteState,
+        messages: List[tuple[str, str]],
+        looks_valid: Optional[Callable[[Dict[str, Any]], bool]],
+        on_item: Optional[Callable[[Dict[str, Any]], None]],
+    ) -> List[Dict[str, Any]]:
+        """
+        流式请求并增量解码 JSON 数组。数组闭合后继续读完流（不再解码），以收到末尾的 usage 分片；
+        偏离格式时取消请求并返回已解析的元素。
+
+        缓存只保存完整（未被取消）的响应；拿不到 usage 时按已收到的文本估算 token，并从限流器的 TPM 额度中扣减。
+        """
+        cache_key, cached = self._llm_cache_lookup(stage=stage, messages=messages)
+        if cached is not None:
+            rows = parse_llm_json_list(str(getattr(cached, "content", "") or ""))
+            for row in rows if on_item is not None else []:
+                on_item(row)
+            return rows
+        self._raise_if_llm_budget_exhausted(state)
+
+        decoder = JsonArrayStreamDecoder(
+            looks_valid=looks_valid,
+            max_invalid_items=int(self.config.stream_max_invalid_items),
+        )
+        rows: List[Dict[str, Any]] = []
+        final: Any = None
+        first_item = -1.0
+        attempt = 0
+        retries = int(self.config.rate_limit_retries)
+        t0 = time.perf_counter()
+        self._llm_inflight += 1
+        try:
+            while True:
+                stream = self.llm.astream(messages)
+                try:
+                    async for chunk in stream:
+                        final = chunk if final is None else final + chunk
+                        for row in decoder.feed(str(getattr(chunk, "content", "") or "")):
+                            if first_item < 0:
+                                first_item = time.perf_counter() - t0
+                            rows.append(row)
+                            if on_item is not None:
+                                on_item(row)
+                        if decoder.off_schema:
+                            break
+                    break
+                except Exception as ex:
+                    # 已收到输出后不再重试；限流错误发生在首个分片之前。
+                    if final is not None or attempt >= max(0, retries) or not is_rate_limit_error(ex):
+                        raise
+                    attempt += 1
+                    print(f"[RateLimiter] Rate limited, retry {attempt}/{retries}: {ex}")
+                finally:
+                    await stream.aclose()
+        finally:
+            self._llm_inflight -= 1
+
+        text = decoder.text
+        msg = AIMessage(content=text, usage_metadata=getattr(final, "usage_metadata", None))
+        if any(extract_token_usage(msg)):
+            self._record_token_usage(stage=stage, msg=msg)
+        else:
+            # 被取消的流收不到 usage 分片，限流回调也不会扣减 TPM：按 prompt 与已收到的文本估算并补记。
+            prompt = sum(estimate_tokens(str(content)) for _, content in messages)
+            completion = estimate_tokens(text)
+            self._record_token_usage_numbers(stage, prompt, completion, prompt + completion)
+            self.rate_limiter.record_tokens(prompt + completion)
+
+        st = self._stream_stats
+        st["requests"] += 1
+        st["items"] += decoder.items
+        st["invalid_items"] += decoder.invalid_items
+        st["response_seconds"] += time.perf_counter() - t0
+        if first_item >= 0:
+            st["first_item_samples"] += 1
+            st["first_item_seconds"] += first_item
+        if decoder.off_schema:
+            st["cancelled"] += 1
+            st["cancel_reasons"][decoder.off_schema] = st["cancel_reasons"].get(decoder.off_schema, 0) + 1
+            st["completion_tokens_cancelled_estimate"] += estimate_tokens(text)
+            print(
+                "[RouteStructureAgent] LLM stream cancelled: "
+                f"stage={stage}, reason={decoder.off_schema}, items={decoder.items}, chars={len(text)}"
+            )
+        else:
+            if getattr(final, "usage_metadata", None) is None:
+                st["missing_usage"] += 1
+            if self.llm_cache is not None and cache_key:
+                self.llm_cache.put(cache_key, stage=stage, message=msg)
+        await self._llm_call_pause()
+        return rows
+
+    def _streaming_snapshot(self) -> Dict[str, Any]:
+        """流式解析统计：首个元素 / 首条边的耗时、提前取消的请求与估算浪费的 completion token；未开启时为空。"""
+        if not bool(self.config.stream_llm_json):
+            return {}
+        st: Dict[str, Any] = dict(self._stream_stats)
+        st["cancel_reasons"] = dict(st["cancel_reasons"])
+        samples = int(st.pop("first_item_samples"))
+        requests = int(st["requests"])
+        st["avg_first_item_seconds"] = round(st.pop("first_item_seconds") / samples, 3) if samples else None
+        st["avg_response_seconds"] = round(st.pop("response_seconds") / requests, 3) if requests else None
+        st["first_edge_seconds"] = round(self._first_edge_seconds, 3) if self._first_edge_seconds is not None else None
+        return st
 
     def _normalize_import_alias_map(self, raw_map: Optional[Dict[str, str]]) -> Dict[str, str]:
         """
@@ -316,7 +801,7 @@ class RouteStructureAgent:
         """
         p = Path(file_path)
         try:
-            return p.exists() and p.is_file() and p.suffix.lower() == ".ets"
+            return p.suffix.lower() == ".ets" and self.file_table.is_file(p)
         except Exception:
             return False
 
@@ -355,34 +840,38 @@ class RouteStructureAgent:
             lines.append(ln)
         return "\n".join(lines)
 
-    def _is_llm_admissible_file(self, *, file_path: Path, code: str) -> bool:
+    def _is_llm_admissible_file(self, *, file_path: Path, code: str, log: bool = True) -> bool:
         """
         判断文件是否允许进入 LLM 分析。
 
         Args:
             file_path: 当前文件路径（建议为规范绝对路径）。
             code: 当前文件源码。
+            log: 是否打印跳过原因（批量预取时的预判不打印）。
 
         Returns:
             True 表示允许进入 LLM 分析；False 表示仅做依赖递归，不进行 LLM 抽取。
         """
         try:
-            rel = file_path.resolve().relative_to(self.ets_root.resolve())
+            rel = Path(self.file_table.canonical(file_path)).relative_to(self.file_table.canonical(self.ets_root))
             if any((part or "").lower() in self._llm_skip_dirs for part in rel.parts):
-                print(f"[RouteStructureAgent] LLM admission skip (dir): {normalize_path(str(file_path))}")
+                if log:
+                    print(f"[RouteStructureAgent] LLM admission skip (dir): {normalize_path(str(file_path))}")
                 return False
         except Exception:
             pass
 
         runtime_code = self._to_runtime_code_for_admission(code)
         ok = self._has_router_hints(runtime_code)
-        if not ok:
+        if not ok and log:
             print(f"[RouteStructureAgent] LLM admission skip (no actionable router call): {normalize_path(str(file_path))}")
         return ok
 
     def _split_code_chunks(self, code: str) -> List[str]:
         """
-        长文件按行分块，降低单轮上下文过长造成的漏检。
+        长文件分块，降低单轮上下文过长造成的漏检。
+
+        syntax 策略按语法单元边界打包（见 agent/tools/code_chunker.py），lines 策略为固定行窗口。
 
         Args:
             code: 文件完整源码。
@@ -390,12 +879,43 @@ class RouteStructureAgent:
         Returns:
             分块后的代码列表；短文件返回单元素列表 [code]。
         """
-        lines = (code or "").splitlines()
-        total = len(lines)
+        total = len((code or "").splitlines())
         trigger = max(1, int(self.config.chunk_trigger_lines))
         if total <= trigger:
             return [code]
 
+        line_chunks = self._split_code_chunks_by_lines(code)
+        if str(self.config.chunk_strategy or "").strip().lower() != "syntax":
+            print(
+                "[RouteStructureAgent] Long file chunking: "
+                f"lines={total}, trigger={trigger}, strategy=lines, chunks={len(line_chunks)}"
+            )
+            return line_chunks
+
+        target = int(self.config.chunk_target_tokens)
+        chunks = SyntaxChunker(token_target=target, overlap_lines=int(self.config.chunk_overlap_lines)).split(code)
+        chunk_tokens = sum(estimate_tokens(c.text) for c in chunks)
+        line_tokens = sum(estimate_tokens(c) for c in line_chunks)
+        digest = content_hash(code)
+        if digest not in self._chunk_counted:
+            self._chunk_counted.add(digest)
+            st = self._chunk_stats
+            st["files"] += 1
+            st["chunks"] += len(chunks)
+            st["chunk_tokens"] += chunk_tokens
+            st["line_mode_chunks"] += len(line_chunks)
+            st["line_mode_tokens"] += line_tokens
+        print(
+            "[RouteStructureAgent] Long file chunking: "
+            f"lines={total}, trigger={trigger}, strategy=syntax, target_tokens={target}, chunks={len(chunks)}, "
+            f"tokens={chunk_tokens} (lines strategy: chunks={len(line_chunks)}, tokens={line_tokens})"
+        )
+        return [c.text for c in chunks]
+
+    def _split_code_chunks_by_lines(self, code: str) -> List[str]:
+        """固定行窗口分块（chunk_size_lines 行一块，相邻块重叠 chunk_overlap_lines 行）。"""
+        lines = (code or "").splitlines()
+        total = len(lines)
         size = max(50, int(self.config.chunk_size_lines))
         overlap = max(0, min(int(self.config.chunk_overlap_lines), size - 1))
         step = max(1, size - overlap)
@@ -407,12 +927,22 @@ class RouteStructureAgent:
             if chunk.strip():
                 chunks.append(chunk)
             i += step
-        print(
-            "[RouteStructureAgent] Long file chunking: "
-            f"lines={total}, trigger={trigger}, chunk_size={size}, overlap={overlap}, chunks={len(chunks)}"
-        )
         return chunks
 
+    def _chunking_snapshot(self) -> Dict[str, Any]:
+        """语法分块与固定行窗口的块数 / 估算 token 对比；lines 策略或没有长文件时为空。"""
+        st = self._chunk_stats
+        if not int(st["files"]):
+            return {}
+        line_tokens = int(st["line_mode_tokens"])
+        return {
+            "strategy": "syntax",
+            "target_tokens": int(self.config.chunk_target_tokens),
+            **st,
+            "chunks_saved": int(st["line_mode_chunks"]) - int(st["chunks"]),
+            "token_ratio": round(int(st["chunk_tokens"]) / line_tokens, 4) if line_tokens else None,
+        }
+
     @staticmethod
     def _normalize_bool_flag(v: Any) -> bool:
         if isinstance(v, bool):
@@ -504,9 +1034,17 @@ class RouteStructureAgent:
         *,
         file_key: str,
         calls: List[Dict[str, str]],
+        id_map: Optional[Dict[str, str]] = None,
     ) -> List[Dict[str, str]]:
+        """
+        按 (method, target_expr, snippet) 去重并分配文件内稳定的 call_id。
+
+        Args:
+            id_map: 非空时填入“去重前 call_id -> 最终 call_id”的映射。
+        """
         merged: Dict[tuple[str, str, str], Dict[str, str]] = {}
         order: List[tuple[str, str, str]] = []
+        raw_keys: List[Tuple[str, tuple[str, str, str]]] = []
         for idx, call in enumerate(calls, start=1):
             method = str(call.get("method") or "").strip() or "other_router"
             norm_snippet = self._normalize_census_snippet(str(call.get("snippet") or ""))
@@ -519,13 +1057,20 @@ class RouteStructureAgent:
                 merged[dedupe_key] = candidate
             if dedupe_key not in order:
                 order.append(dedupe_key)
+            raw_keys.append((str(call.get("call_id") or ""), dedupe_key))
 
         out: List[Dict[str, str]] = []
+        final_ids: Dict[tuple[str, str, str], str] = {}
         for i, key in enumerate(order, start=1):
             row = dict(merged[key])
             digest = hashlib.md5(f"{file_key}|{key[0]}|{key[1]}|{key[2]}".encode("utf-8")).hexdigest()[:10]
             row["call_id"] = f"rc_{i}_{digest}"
+            final_ids[key] = row["call_id"]
             out.append(row)
+        if id_map is not None:
+            for raw_id, key in raw_keys:
+                if raw_id:
+                    id_map.setdefault(raw_id, final_ids[key])
         if len(out) != len(calls):
             print(
                 "[RouteStructureAgent] Census dedupe summary: "
@@ -533,6 +1078,91 @@ class RouteStructureAgent:
             )
         return out
 
+    async def _gather_bounded(self, factories: List[Callable[[], Awaitable[_T]]]) -> List[_T]:
+        """以 intra_file_concurrency 为上限并发执行，结果按输入顺序返回（与逐个等待的合并顺序一致）。"""
+        limit = max(1, int(self.config.intra_file_concurrency))
+        if limit == 1 or len(factories) <= 1:
+            return [await f() for f in factories]
+        sem = asyncio.Semaphore(limit)
+
+        async def _one(f: Callable[[], Awaitable[_T]]) -> _T:
+            async with sem:
+                return await f()
+
+        return list(await asyncio.gather(*[_one(f) for f in factories]))
+
+    def _fan_out_snapshot(self) -> Dict[str, Any]:
+        """文件内并发统计：各请求耗时之和与实际墙钟时间；没有多请求文件时为空。"""
+        st = self._fan_out_stats
+        if not int(st["census_files"]) and not int(st["refine_files"]):
+            return {}
+        out: Dict[str, Any] = {"concurrency": max(1, int(self.config.intra_file_concurrency))}
+        for k, v in st.items():
+            out[k] = round(v, 4) if isinstance(v, float) else v
+        return out
+
+    def _build_refine_user_prompt(
+        self,
+        *,
+        file_key: str,
+        call: Dict[str, str],
+        component_file: str,
+        component_code: str,
+        chain: List[str],
+    ) -> str:
+        """构建 trigger refine user prompt；slice_refine_component 开启时只发送组件中与回调相关的区域。"""
+        full_prompt = build_trigger_refine_user_prompt(
+            file_path=file_key,
+            call=call,
+            component_file_path=normalize_path(component_file),
+            component_code=component_code,
+            dependency_chain=chain,
+        )
+        if not bool(self.config.slice_refine_component):
+            return full_prompt
+        sliced = slice_component(
+            component_code,
+            component_symbol=str(call.get("component_ref_symbol") or ""),
+            callback_ref=str(call.get("callback_ref") or ""),
+        )
+        prompt = build_trigger_refine_user_prompt(
+            file_path=file_key,
+            call=call,
+            component_file_path=normalize_path(component_file),
+            component_code=sliced.text,
+            dependency_chain=chain,
+            component_code_is_slice=sliced.sliced,
+        )
+        st = self._refine_slice_stats
+        st["requests"] += 1
+        st["sliced_requests"] += int(sliced.sliced)
+        st["component_lines_total"] += sliced.total_lines
+        st["component_lines_kept"] += sliced.kept_lines
+        st["prompt_tokens_full_estimate"] += estimate_tokens(full_prompt)
+        st["prompt_tokens_sliced_estimate"] += estimate_tokens(prompt)
+        return prompt
+
+    def _refine_slicing_snapshot(self) -> Dict[str, Any]:
+        """trigger refine 组件切片前后的估算 token 对比；未开启时为空。"""
+        if not bool(self.config.slice_refine_component):
+            return {}
+        st: Dict[str, Any] = dict(self._refine_slice_stats)
+        full = int(st["prompt_tokens_full_estimate"])
+        requests = int(st["requests"])
+        st["prompt_tokens_per_refine_full"] = round(full / requests, 1) if requests else None
+        st["prompt_tokens_per_refine_sliced"] = (
+            round(int(st["prompt_tokens_sliced_estimate"]) / requests, 1) if requests else None
+        )
+        st["prompt_token_ratio"] = round(int(st["prompt_tokens_sliced_estimate"]) / full, 4) if full else None
+        return st
+
+    def _tool_calling_snapshot(self) -> Dict[str, Any]:
+        """确定性解析与 tool-calling 会话统计；没有任何候选边时为空。"""
+        st: Dict[str, Any] = self.tool_calling_resolver.snapshot()
+        if not st.get("edges_seen"):
+            return {}
+        return {"scope": str(self.config.tool_calling_scope or "file"), **st}
+
     async def _refine_cross_file_census_calls(
         self,
         *,
@@ -544,13 +1174,15 @@ class RouteStructureAgent:
         census_calls: List[Dict[str, str]],
     ) -> List[Dict[str, str]]:
         file_key = normalize_path(str(file_path))
-        traced: List[Dict[str, str]] = []
+        # 每个调用对应的 refine 请求 key；同一组件文件 + 同一 callback_ref 的请求只发一次。
+        plan: List[Tuple[Dict[str, str], Optional[Tuple[str, ...]]]] = []
+        jobs: Dict[Tuple[str, ...], Tuple[Dict[str, str], str, str]] = {}
         for call in census_calls:
             merged = dict(call)
             component_ref_symbol = str(call.get("component_ref_symbol") or "").strip()
             needs_cross = self._normalize_bool_flag(call.get("needs_cross_file_resolution"))
             if not needs_cross or not component_ref_symbol:
-                traced.append(merged)
+                plan.append((merged, None))
                 continue
             component_file = self._resolve_component_ref_file(
                 component_ref_symbol=component_ref_symbol,
@@ -559,23 +1191,34 @@ class RouteStructureAgent:
                 current_file_path=file_key,
             )
             if not component_file:
-                traced.append(merged)
+                plan.append((merged, None))
                 continue
             try:
                 component_code = self.reader.read_source_file(component_file)
             except Exception:
-                traced.append(merged)
+                plan.append((merged, None))
                 continue
             if not component_code.strip():
-                traced.append(merged)
+                plan.append((merged, None))
                 continue
-            user_prompt = build_trigger_refine_user_prompt(
-                file_path=file_key,
-                call=merged,
-                component_file_path=normalize_path(component_file),
+            callback_ref = str(call.get("callback_ref") or "").strip()
+            key = (
+                (normalize_path(component_file), callback_ref)
+                if callback_ref
+                else (normalize_path(component_file), "", str(call.get("call_id") or ""), str(len(plan)))
+            )
+            jobs.setdefault(key, (merged, component_file, component_code))
+            plan.append((merged, key))
+
+        async def _refine(call: Dict[str, str], component_file: str, component_code: str) -> Tuple[Dict[str, Any], float]:
+            user_prompt = self._build_refine_user_prompt(
+                file_key=file_key,
+                call=call,
+                component_file=component_file,
                 component_code=component_code,
-                dependency_chain=chain,
+                chain=chain,
             )
+            t0 = time.perf_counter()
             try:
                 self._set_state(RouteState.TRIGGER_REFINE, file_path=file_key)
                 msg = await self._ainvoke_with_state(
@@ -587,7 +1230,27 @@ class RouteStructureAgent:
             except Exception as ex:
                 print(f"[RouteStructureAgent] Trigger refine failed: {ex}")
                 rows = []
-            row = rows[0] if rows else {}
+            return (rows[0] if rows else {}), time.perf_counter() - t0
+
+        keys = list(jobs.keys())
+        t_wall = time.perf_counter()
+        results = await self._gather_bounded([lambda k=k: _refine(*jobs[k]) for k in keys])
+        refined = {k: row for k, (row, _) in zip(keys, results)}
+        if keys:
+            st = self._fan_out_stats
+            st["refine_files"] += 1
+            st["refine_calls"] += sum(1 for _, k in plan if k is not None)
+            st["refine_requests"] += len(keys)
+            st["refine_deduplicated"] += sum(1 for _, k in plan if k is not None) - len(keys)
+            st["refine_call_seconds"] += sum(sec for _, sec in results)
+            st["refine_wall_seconds"] += time.perf_counter() - t_wall
+
+        traced: List[Dict[str, str]] = []
+        for merged, key in plan:
+            if key is None:
+                traced.append(merged)
+                continue
+            row = refined.get(key) or {}
             refined_component = str(row.get("component_hint") or "").strip()
             refined_event = str(row.get("event_hint") or "").strip()
             resolved = self._normalize_bool_flag(row.get("resolved"))
@@ -602,7 +1265,7 @@ class RouteStructureAgent:
                 print(
                     "[RouteStructureAgent] Trigger refine resolved: "
                     f"call_id={str(merged.get('call_id') or '').strip()}, "
-                    f"symbol={component_ref_symbol}, "
+                    f"symbol={str(merged.get('component_ref_symbol') or '').strip()}, "
                     f"component={merged.get('component_hint')}, event={merged.get('event_hint')}"
                 )
             else:
@@ -645,12 +1308,15 @@ class RouteStructureAgent:
             return []
         if not self._has_router_hints(code):
             return []
+        prefetched = self._census_prefetch.get(file_key)
+        if prefetched is not None and prefetched[0] == content_hash(code):
+            print(f"[RouteStructureAgent] Census from batch: calls={len(prefetched[1])}, file={file_key}")
+            return [dict(c) for c in prefetched[1]]
 
         chunks = self._split_code_chunks(code)
-        calls: List[Dict[str, str]] = []
-        for idx, chunk in enumerate(chunks, start=1):
-            if not self._has_router_hints(chunk):
-                continue
+        jobs = [(idx, chunk) for idx, chunk in enumerate(chunks, start=1) if self._has_router_hints(chunk)]
+
+        async def _census_chunk(idx: int, chunk: str) -> Tuple[List[Dict[str, Any]], float]:
             self._set_state(RouteState.ROUTER_CENSUS, file_path=file_key)
             user_prompt = build_census_user_prompt(
                 file_path=file_key,
@@ -660,45 +1326,223 @@ class RouteStructureAgent:
                 dependency_chain=chain,
                 resolved_import_files=resolved_files,
             )
+            t0 = time.perf_counter()
             try:
-                msg = await self._ainvoke_with_state(
+                rows = await self._ainvoke_json_list(
                     stage="census",
                     state=RouteState.ROUTER_CENSUS,
                     messages=[("system", CENSUS_SYSTEM_PROMPT), ("user", user_prompt)],
+                    looks_valid=_looks_like_census_row,
                 )
-                rows = parse_llm_json_list(str(getattr(msg, "content", "") or ""))
                 print('[RouteStructureAgent] Census rows', rows)
             except Exception as ex:
                 print(f"[RouteStructureAgent] Census failed: {ex}")
                 rows = []
-            for i, r in enumerate(rows, start=1):
-                method = str(r.get("method") or "").strip() or "other_router"
-                line_hint = str(r.get("line_hint") or "").strip() or "unknown"
-                snippet = str(r.get("snippet") or "").strip()
-                component_hint = str(r.get("component_hint") or "").strip() or "__Common__"
-                event_hint = str(r.get("event_hint") or "").strip() or "onClick"
-                needs_cross_file_resolution = self._normalize_bool_flag(r.get("needs_cross_file_resolution"))
-                component_ref_symbol = str(r.get("component_ref_symbol") or "").strip()
-                callback_ref = str(r.get("callback_ref") or "").strip()
-                cross_file_reason = str(r.get("cross_file_reason") or "").strip()
-                if not snippet:
-                    continue
-                calls.append(
-                    {
-                        "call_id": f"chunk_{idx}_row_{i}",
-                        "method": method,
-                        "line_hint": line_hint,
-                        "snippet": snippet,
-                        "component_hint": component_hint,
-                        "event_hint": event_hint,
-                        "needs_cross_file_resolution": needs_cross_file_resolution,
-                        "component_ref_symbol": component_ref_symbol,
-                        "callback_ref": callback_ref,
-                        "cross_file_reason": cross_file_reason,
-                    }
-                )
+            return rows, time.perf_counter() - t0
+
+        t_wall = time.perf_counter()
+        results = await self._gather_bounded([lambda i=i, c=c: _census_chunk(i, c) for i, c in jobs])
+        calls: List[Dict[str, str]] = []
+        for (idx, _), (rows, seconds) in zip(jobs, results):
+            self._census_stats["single_requests"] += 1
+            self._census_stats["single_seconds"] += seconds
+            calls.extend(self._census_rows_to_calls(rows, chunk_index=idx))
+        if len(jobs) > 1:
+            st = self._fan_out_stats
+            st["census_files"] += 1
+            st["census_requests"] += len(jobs)
+            st["census_call_seconds"] += sum(sec for _, sec in results)
+            st["census_wall_seconds"] += time.perf_counter() - t_wall
         return self._normalize_and_dedupe_census_calls(file_key=file_key, calls=calls)
 
+    def _census_rows_to_calls(self, rows: List[Dict[str, Any]], *, chunk_index: int) -> List[Dict[str, Any]]:
+        """把 census 原始行规范化为调用记录（缺 snippet 的行丢弃）。"""
+        calls: List[Dict[str, Any]] = []
+        for i, r in enumerate(rows, start=1):
+            method = str(r.get("method") or "").strip() or "other_router"
+            line_hint = str(r.get("line_hint") or "").strip() or "unknown"
+            snippet = str(r.get("snippet") or "").strip()
+            component_hint = str(r.get("component_hint") or "").strip() or "__Common__"
+            event_hint = str(r.get("event_hint") or "").strip() or "onClick"
+            needs_cross_file_resolution = self._normalize_bool_flag(r.get("needs_cross_file_resolution"))
+            component_ref_symbol = str(r.get("component_ref_symbol") or "").strip()
+            callback_ref = str(r.get("callback_ref") or "").strip()
+            cross_file_reason = str(r.get("cross_file_reason") or "").strip()
+            if not snippet:
+                continue
+            calls.append(
+                {
+                    "call_id": f"chunk_{chunk_index}_row_{i}",
+                    "method": method,
+                    "line_hint": line_hint,
+                    "snippet": snippet,
+                    "component_hint": component_hint,
+                    "event_hint": event_hint,
+                    "needs_cross_file_resolution": needs_cross_file_resolution,
+                    "component_ref_symbol": component_ref_symbol,
+                    "callback_ref": callback_ref,
+                    "cross_file_reason": cross_file_reason,
+                }
+            )
+        return calls
+
+    def _census_batch_enabled(self) -> bool:
+        return bool(self.config.enable_router_census_probe) and int(self.config.census_batch_max_tokens) > 0
+
+    def _census_batch_section(self, ctx: FileContext, chain: List[str]) -> Dict[str, Any]:
+        return {
+            "file_id": "",
+            "file_path": ctx.key,
+            "code": ctx.code,
+            "dependency_chain": list(chain),
+            "resolved_import_files": list(ctx.resolved_files),
+        }
+
+    def _pack_census_batches(
+        self,
+        candidates: List[Tuple[FileContext, List[str]]],
+    ) -> List[List[Tuple[FileContext, List[str]]]]:
+        """
+        按估算 token 上限把候选文件顺序装箱。
+
+        只有整文件不分块、且单独成段不超过可用预算一半的“小文件”参与批量；
+        装不满两个文件的批次丢弃，这些文件仍走逐文件 census。
+        """
+        max_tokens = int(self.config.census_batch_max_tokens)
+        max_files = max(2, int(self.config.census_batch_max_files))
+        trigger = max(1, int(self.config.chunk_trigger_lines))
+        base = estimate_tokens(CENSUS_BATCH_SYSTEM_PROMPT) + estimate_tokens(build_census_batch_user_prompt(files=[]))
+        room = max_tokens - base
+        batches: List[List[Tuple[FileContext, List[str]]]] = []
+        cur: List[Tuple[FileContext, List[str]]] = []
+        used = 0
+        for ctx, chain in candidates:
+            if len(ctx.code.splitlines()) > trigger:
+                continue
+            cost = estimate_tokens(build_census_batch_user_prompt(files=[self._census_batch_section(ctx, chain)]))
+            if cost > room // 2:
+                continue
+            if cur and (used + cost > room or len(cur) >= max_files):
+                batches.append(cur)
+                cur, used = [], 0
+            cur.append((ctx, chain))
+            used += cost
+        if cur:
+            batches.append(cur)
+        return [b for b in batches if len(b) >= 2]
+
+    async def _prefetch_batched_census(self, files: List[Tuple[FileContext, List[str]]]) -> None:
+        """
+        对即将分析的文件预先执行批量 census，结果按文件拆分后存入预取表，_extract_router_census 直接复用。
+
+        批量请求失败、或某个文件在响应中没有任何行时，该文件不写入预取表，分析时回退到逐文件 census。
+        """
+        if not self._census_batch_enabled():
+            return
+        candidates: List[Tuple[FileContext, List[str]]] = []
+        for ctx, chain in files:
+            if ctx.key in self._census_prefetch or ctx.key in self._census_prefetch_pending:
+                continue
+            if not self._has_router_hints(ctx.code):
+                continue
+            if not self._is_llm_admissible_file(file_path=ctx.path, code=ctx.code, log=False):
+                continue
+            if self._static_mode() == "on" and self.static_extractor.extract(
+                ctx.code, imports=ctx.imports, resolved_imports=ctx.resolved_map
+            ).fully_resolved:
+                continue
+            candidates.append((ctx, chain))
+        batches = self._pack_census_batches(candidates)
+        if not batches:
+            return
+        for batch in batches:
+            self._census_prefetch_pending.update(ctx.key for ctx, _ in batch)
+        print(
+            "[RouteStructureAgent] Census batch prefetch: "
+            f"batches={len(batches)}, files={sum(len(b) for b in batches)}, candidates={len(candidates)}"
+        )
+        sem = asyncio.Semaphore(max(1, int(self.config.main_page_concurrency)))
+
+        async def _one(batch: List[Tuple[FileContext, List[str]]]) -> None:
+            async with sem:
+                await self._run_census_batch(batch)
+
+        t0 = time.perf_counter()
+        try:
+            await asyncio.gather(*[_one(b) for b in batches])
+        finally:
+            for batch in batches:
+                self._census_prefetch_pending.difference_update(ctx.key for ctx, _ in batch)
+            self._census_stats["prefetch_wall_seconds"] += time.perf_counter() - t0
+
+    async def _run_census_batch(self, batch: List[Tuple[FileContext, List[str]]]) -> None:
+        """执行一次多文件 census 请求，并按 file_id 拆分回各文件。"""
+        sections: List[Dict[str, Any]] = []
+        by_id: Dict[str, FileContext] = {}
+        for i, (ctx, chain) in enumerate(batch, start=1):
+            section = self._census_batch_section(ctx, chain)
+            section["file_id"] = f"f{i}"
+            sections.append(section)
+            by_id[section["file_id"]] = ctx
+        user_prompt = build_census_batch_user_prompt(files=sections)
+        self._set_state(RouteState.ROUTER_CENSUS, file_path=batch[0][0].key)
+        t0 = time.perf_counter()
+        try:
+            rows = await self._ainvoke_json_list(
+                stage="census_batch",
+                state=RouteState.ROUTER_CENSUS,
+                messages=[("system", CENSUS_BATCH_SYSTEM_PROMPT), ("user", user_prompt)],
+                looks_valid=lambda r: _looks_like_census_row(r) and str(r.get("file_id") or "").strip() in by_id,
+            )
+        except Exception as ex:
+            print(f"[RouteStructureAgent] Census batch failed, fallback to per-file census: {ex}")
+            rows = []
+        self._census_stats["batch_requests"] += 1
+        self._census_stats["batch_seconds"] += time.perf_counter() - t0
+
+        grouped: Dict[str, List[Dict[str, Any]]] = {fid: [] for fid in by_id}
+        for r in rows:
+            fid = str(r.get("file_id") or "").strip()
+            if fid not in grouped:
+                self._census_stats["dropped_rows"] += 1
+                continue
+            grouped[fid].append(r)
+        for fid, ctx in by_id.items():
+            calls = self._census_rows_to_calls(grouped[fid], chunk_index=1)
+            if not calls:
+                self._census_stats["fallback_files"] += 1
+                continue
+            self._census_prefetch[ctx.key] = (
+                content_hash(ctx.code),
+                self._normalize_and_dedupe_census_calls(file_key=ctx.key, calls=calls),
+            )
+            self._census_stats["batched_files"] += 1
+        print(
+            "[RouteStructureAgent] Census batch done: "
+            f"files={len(batch)}, rows={len(rows)}, "
+            f"split={sum(1 for fid in by_id if by_id[fid].key in self._census_prefetch)}"
+        )
+
+    def _census_batch_snapshot(self) -> Dict[str, Any]:
+        """批量 census 与逐文件模式的请求数 / 耗时对比；未启用时为空。"""
+        if not self._census_batch_enabled():
+            return {}
+        st = self._census_stats
+        single = int(st["single_requests"])
+        batched_files = int(st["batched_files"])
+        avg_single = float(st["single_seconds"]) / single if single else None
+        return {
+            "max_tokens": int(self.config.census_batch_max_tokens),
+            **{k: (round(v, 4) if isinstance(v, float) else v) for k, v in st.items()},
+            "census_requests": single + int(st["batch_requests"]),
+            # 逐文件模式下：已批量的小文件各需一次请求，其余请求不变。
+            "per_file_mode_requests": single + batched_files,
+            "requests_saved": batched_files - int(st["batch_requests"]),
+            "per_file_mode_seconds_estimate": (
+                round(float(st["single_seconds"]) + avg_single * batched_files, 4) if avg_single is not None else None
+            ),
+        }
+
     @staticmethod
     def _is_actionable_census_call(call: Dict[str, str]) -> bool:
         """
@@ -746,12 +1590,15 @@ class RouteStructureAgent:
         chain: List[str],
         resolved_files: List[str],
         actionable_census_calls: List[Dict[str, str]],
+        early_write: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         基于 census 调用点直接构建边：
         - 仅处理 actionable census calls（已剔除 back）；
         - 用 call_id、target 合法性、源码弱证据收紧构边结果；
         - 结合 tool-calling 做 target_expr 补解析后再去重合并。
+
+        early_write 且开启 stream_llm_json 时，流式返回的边逐条通过与最终过滤相同的检查后立即写入当前页面的 PTG。
         """
         file_key = normalize_path(str(file_path))
         if not actionable_census_calls:
@@ -761,124 +1608,408 @@ class RouteStructureAgent:
             "[RouteStructureAgent] Edge construct start: "
             f"calls={len(actionable_census_calls)}, file: {file_key}"
         )
-        user_prompt = build_coverage_retry_user_prompt(
-            file_path=file_key,
+        user_prompt = self._build_construct_user_prompt(
+            file_key=file_key,
             code=code,
             main_pages=main_pages,
-            dependency_chain=chain,
-            resolved_import_files=resolved_files,
-            route_constant_map=self.route_const_resolver.full_map,
+            chain=chain,
+            resolved_files=resolved_files,
             census_calls=actionable_census_calls,
+            record=True,
+        )
+        actionable_ids = {str(c.get("call_id") or "").strip() for c in actionable_census_calls}
+        on_edge = (
+            self._early_edge_writer(
+                code=code,
+                imports=imports,
+                resolved_map=resolved_map,
+                actionable_ids=actionable_ids,
+            )
+            if early_write and bool(self.config.stream_llm_json)
+            else None
         )
         try:
             self._set_state(RouteState.EDGE_CONSTRUCT, file_path=file_key)
-            msg = await self._ainvoke_with_state(
+            constructed_edges = await self._ainvoke_json_list(
                 stage="construct",
                 state=RouteState.EDGE_CONSTRUCT,
                 messages=[("system", COVERAGE_RETRY_SYSTEM_PROMPT), ("user", user_prompt)],
+                looks_valid=lambda r: str(r.get("call_id") or "").strip() in actionable_ids and "target" in r,
+                on_item=on_edge,
             )
-            print('[RouteStructureAgent] Edge construct raw', str(getattr(msg, "content", "") or ""))
-            constructed_edges = parse_llm_json_list(str(getattr(msg, "content", "") or ""))
+            print('[RouteStructureAgent] Edge construct raw', json.dumps(constructed_edges, ensure_ascii=False))
         except Exception as ex:
             print(f"[RouteStructureAgent] Edge construct failed: {ex}")
             constructed_edges = []
-
-        actionable_ids = {str(x.get("call_id") or "").strip() for x in actionable_census_calls}
-        prefiltered_edges: List[Dict[str, Any]] = []
-        pre_seen = set()
-        invalid_targets = 0
-        invalid_call_id = 0
-        for e in constructed_edges:
-            call_id = str(e.get("call_id") or "").strip()
-            if not call_id or call_id not in actionable_ids:
-                invalid_call_id += 1
-                continue
-            target = str(e.get("target") or "").strip()
-            if is_invalid_target(target):
-                invalid_targets += 1
-                continue
-            k = self._edge_key_for_merge(e)
-            if not k[2] or k in pre_seen:
-                continue
-            pre_seen.add(k)
-            prefiltered_edges.append(e)
-        if invalid_targets > 0 or invalid_call_id > 0:
-            print(
-                "[RouteStructureAgent] Edge construct filtered: "
-                f"file={file_key}, invalid_call_id={invalid_call_id}, invalid_target={invalid_targets}"
-            )
-
-        patched_edges = await self.tool_calling_resolver.supplement_edges(
-            file_path=file_key,
+        return await self._filter_constructed_edges(
+            file_key=file_key,
+            code=code,
             imports=imports,
-            resolved_imports=resolved_map,
-            llm_edges=prefiltered_edges,
+            resolved_map=resolved_map,
+            constructed_edges=constructed_edges,
             actionable_census_calls=actionable_census_calls,
         )
-        out: List[Dict[str, Any]] = []
-        merged_seen = set()
-        for e in [*prefiltered_edges, *patched_edges]:
-            t = str(e.get("target") or "").strip()
-            if is_invalid_target(t):
-                continue
-            target_expr = str(e.get("target_expr") or "").strip()
-            # 弱证据命中：target_expr 命中源码，或 target 命中源码，或 target 形似页面路径。
-            has_evidence = (target_expr and target_expr in code) or (t and t in code) or ("/" in t)
-            if not has_evidence:
-                continue
-            k = self._edge_key_for_merge(e)
-            if not k[2] or k in merged_seen:
-                continue
-            merged_seen.add(k)
-            out.append(e)
-        print(
-            "[RouteStructureAgent] Edge construct done: "
-            f"raw={len(constructed_edges)}, prefiltered={len(prefiltered_edges)}, "
-            f"patched={len(patched_edges)}, constructed={len(out)}, file: {file_key}"
-        )
-        return out
 
-    async def _analyze_file(
+    def _early_edge_writer(
         self,
         *,
-        main_page_key: str,
-        file_path: Path,
-        main_pages: List[str],
-        depth: int,
-        chain: List[str],
-    ) -> None:
+        code: str,
+        imports: Dict[str, str],
+        resolved_map: Dict[str, str],
+        actionable_ids: Set[str],
+    ) -> Optional[Callable[[Dict[str, Any]], None]]:
         """
-        递归分析单个文件，并把合法边写入 memory。
+        流式构边的逐条写入回调：依次做 call_id / 非法 target / 去重 / 弱证据 / target 解析检查，
+        与 _filter_constructed_edges + _extract_file_edges 对 LLM 边的处理一致，因此提前写入的边是最终结果的前缀。
+        """
+        run = _CURRENT_RUN.get()
+        if run is None or not run.writes_ptg or self._run_defers_writes(run):
+            return None
+        seen: Set[Tuple[str, str, str]] = set()
+
+        def _on_edge(e: Dict[str, Any]) -> None:
+            if str(e.get("call_id") or "").strip() not in actionable_ids:
+                return
+            if is_invalid_target(str(e.get("target") or "").strip()):
+                return
+            k = self._edge_key_for_merge(e)
+            if not k[2] or k in seen or not self._has_edge_evidence(e, code):
+                return
+            seen.add(k)
+            raw_target = str(e.get("target") or "").strip()
+            target = self.route_const_resolver.resolve_target_by_symbol(
+                target=raw_target,
+                target_expr=str(e.get("target_expr") or raw_target).strip(),
+                imports=imports,
+                resolved_imports=resolved_map,
+            )
+            if is_invalid_target(target) or not target:
+                return
+            self._stream_stats["early_edges"] += 1
+            edge = {
+                "component_type": str(e.get("component_type") or "__Common__"),
+                "event": str(e.get("event") or "onClick"),
+                "target": target,
+            }
+            self._write_edges(run.memory, main_page_key=run.main_page, edges=[edge])
+
+        return _on_edge
+
+    def _build_construct_user_prompt(
+        self,
+        *,
+        file_key: str,
+        code: str,
+        main_pages: List[str],
+        chain: List[str],
+        resolved_files: List[str],
+        census_calls: List[Dict[str, str]],
+        record: bool = False,
+    ) -> str:
+        """
+        构建构边 user prompt；compact_construct_prompt 开启时使用压缩后的上下文。
 
-        Args:
-            main_page_key: 当前归属的入口页面 key（source_page）。
-            file_path: 当前待分析文件路径。
-            main_pages: main_pages 列表（去 .ets 后）。
-            depth: 当前递归深度。
-            chain: 当前依赖链。
+        record=True 时累计压缩前后的估算 token 与保留比例（仅实际发出的请求记录）。
+        """
+        full_prompt = build_coverage_retry_user_prompt(
+            file_path=file_key,
+            code=code,
+            main_pages=main_pages,
+            dependency_chain=chain,
+            resolved_import_files=resolved_files,
+            route_constant_map=self.route_const_resolver.full_map,
+            census_calls=census_calls,
+        )
+        if not bool(self.config.compact_construct_prompt):
+            return full_prompt
+        compact = self.construct_compactor.compact(
+            file_path=file_key,
+            code=code,
+            dependency_chain=chain,
+            resolved_import_files=resolved_files,
+            route_constant_map=self.route_const_resolver.full_map,
+            census_calls=census_calls,
+        )
+        prompt = build_coverage_retry_user_prompt(
+            file_path=compact.file_path,
+            code=compact.code,
+            main_pages=main_pages,
+            dependency_chain=compact.dependency_chain,
+            resolved_import_files=compact.resolved_import_files,
+            route_constant_map=compact.route_constant_map,
+            census_calls=census_calls,
+            code_is_slice=compact.code_is_slice,
+        )
+        if record:
+            st = self._compaction_stats
+            st["requests"] += 1
+            st["sliced_requests"] += compact.stats["sliced"]
+            st["unlocated_calls"] += compact.stats["unlocated_calls"]
+            st["prompt_tokens_full_estimate"] += estimate_tokens(full_prompt)
+            st["prompt_tokens_compact_estimate"] += estimate_tokens(prompt)
+            for k in ("route_constants_total", "route_constants_kept", "code_lines_total", "code_lines_kept"):
+                st[k] += compact.stats[k]
+        return prompt
+
+    def _construct_compaction_snapshot(self) -> Dict[str, Any]:
+        """构边 prompt 压缩前后的估算 token 对比；未开启时为空。"""
+        if not bool(self.config.compact_construct_prompt):
+            return {}
+        st = dict(self._compaction_stats)
+        full = int(st["prompt_tokens_full_estimate"])
+        st["prompt_tokens_saved_estimate"] = full - int(st["prompt_tokens_compact_estimate"])
+        st["prompt_token_ratio"] = round(int(st["prompt_tokens_compact_estimate"]) / full, 4) if full else None
+        return st
+
+    async def _filter_constructed_edges(
+        self,
+        *,
+        file_key: str,
+        code: str,
+        imports: Dict[str, str],
+        resolved_map: Dict[str, str],
+        constructed_edges: List[Dict[str, Any]],
+        actionable_census_calls: List[Dict[str, str]],
+    ) -> List[Dict[str, Any]]:
+        """
+        LLM 构边结果的统一后处理：call_id 必须来自 actionable census、剔除非法 target、
+        tool-calling 补解析 target_expr，再按源码弱证据过滤并去重。
+        """
+        actionable_ids = {str(x.get("call_id") or "").strip() for x in actionable_census_calls}
+        prefiltered_edges: List[Dict[str, Any]] = []
+        pre_seen = set()
+        invalid_targets = 0
+        invalid_call_id = 0
+        for e in constructed_edges:
+            call_id = str(e.get("call_id") or "").strip()
+            if not call_id or call_id not in actionable_ids:
+                invalid_call_id += 1
+                continue
+            target = str(e.get("target") or "").strip()
+            if is_invalid_target(target):
+                invalid_targets += 1
+                continue
+            k = self._edge_key_for_merge(e)
+            if not k[2] or k in pre_seen:
+                continue
+            pre_seen.add(k)
+            prefiltered_edges.append(e)
+        if invalid_targets > 0 or invalid_call_id > 0:
+            print(
+                "[RouteStructureAgent] Edge construct filtered: "
+                f"file={file_key}, invalid_call_id={invalid_call_id}, invalid_target={invalid_targets}"
+            )
+
+        run = _CURRENT_RUN.get()
+        patched_edges = await self.tool_calling_resolver.supplement_edges(
+            file_path=file_key,
+            imports=imports,
+            resolved_imports=resolved_map,
+            llm_edges=prefiltered_edges,
+            actionable_census_calls=actionable_census_calls,
+            code=code,
+            batch=run.tool_batch if run is not None else None,
+        )
+        out: List[Dict[str, Any]] = []
+        merged_seen = set()
+        for e in [*prefiltered_edges, *patched_edges]:
+            if not self._has_edge_evidence(e, code):
+                continue
+            k = self._edge_key_for_merge(e)
+            if not k[2] or k in merged_seen:
+                continue
+            merged_seen.add(k)
+            out.append(e)
+        print(
+            "[RouteStructureAgent] Edge construct done: "
+            f"raw={len(constructed_edges)}, prefiltered={len(prefiltered_edges)}, "
+            f"patched={len(patched_edges)}, constructed={len(out)}, file: {file_key}"
+        )
+        return out
+
+    @staticmethod
+    def _has_edge_evidence(e: Dict[str, Any], code: str) -> bool:
+        """弱证据命中：target_expr 命中源码，或 target 命中源码，或 target 形似页面路径。"""
+        t = str(e.get("target") or "").strip()
+        if is_invalid_target(t):
+            return False
+        target_expr = str(e.get("target_expr") or "").strip()
+        return bool((target_expr and target_expr in code) or (t and t in code) or ("/" in t))
+
+    @staticmethod
+    def _run_defers_writes(run: MainPageRun) -> bool:
+        """本页 batch 已有待补解析的边时，后续写入需等补解析结束，才能保持逐文件的边顺序。"""
+        return run.tool_batch is not None and bool(run.tool_batch.edges)
+
+    def _new_tool_batch(self) -> Optional[ToolCallingBatch]:
+        return ToolCallingBatch() if str(self.config.tool_calling_scope or "file") == "page" else None
+
+    async def _flush_tool_batch(self, batch: Optional[ToolCallingBatch]) -> Dict[str, List[Dict[str, str]]]:
+        """
+        对 main page 批次执行一次 tool-calling 会话，补出的边按文件做与逐文件路径相同的证据过滤与 target 解析。
 
         Returns:
-            无返回值。副作用：更新 memory / dependency_graph / visited。
+            文件 key -> 合法边（component_type / event / target）。
         """
-        if self._count >= int(self.config.max_files):
-            return
-        if depth > int(self.config.max_depth):
-            return
+        if batch is None or not batch.edges:
+            return {}
+        patched = await self.tool_calling_resolver.resolve_batch(batch)
+        out: Dict[str, List[Dict[str, str]]] = {}
+        for fp, edges in patched.items():
+            code = batch.code_of(fp)
+            entry = batch.files[fp]
+            for e in edges:
+                if not self._has_edge_evidence(e, code):
+                    continue
+                raw_target = str(e.get("target") or "").strip()
+                target = self.route_const_resolver.resolve_target_by_symbol(
+                    target=raw_target,
+                    target_expr=str(e.get("target_expr") or raw_target).strip(),
+                    imports=entry.imports,
+                    resolved_imports=entry.resolved_imports,
+                )
+                if is_invalid_target(target) or not target:
+                    self._bump_state_counter("invalid_target_dropped", 1)
+                    continue
+                component_type = str(e.get("component_type") or "__Common__")
+                event = str(e.get("event") or "onClick")
+                out.setdefault(fp, []).append({"component_type": component_type, "event": event, "target": target})
+        return out
+
+    def _fused_census_applies(self, ctx: FileContext) -> bool:
+        """小文件单次调用的适用条件：已启用、整文件不分块、未被批量 census 预取。"""
+        limit = int(self.config.fused_census_max_lines)
+        if limit <= 0 or not bool(self.config.enable_router_census_probe):
+            return False
+        if len(ctx.code.splitlines()) > min(limit, max(1, int(self.config.chunk_trigger_lines))):
+            return False
+        prefetched = self._census_prefetch.get(ctx.key)
+        return not (prefetched is not None and prefetched[0] == content_hash(ctx.code))
+
+    async def _fused_census_construct(
+        self,
+        *,
+        ctx: FileContext,
+        main_pages: List[str],
+        chain: List[str],
+    ) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]]:
+        """
+        小文件一次调用同时返回 census 与边。
+
+        census 行走与两阶段相同的规范化/去重；边上的模型 call_id 映射为去重后的 call_id，
+        无法映射的置空，交由 _filter_constructed_edges 按非法 call_id 丢弃。
+
+        Returns:
+            (census 调用, 构边原始结果, 估算 prompt token)；调用失败或响应不含 census 时返回 None（回退两阶段）。
+        """
+        if not self._fused_census_applies(ctx):
+            return None
+        user_prompt = build_census_construct_user_prompt(
+            file_path=ctx.key,
+            code=ctx.code,
+            main_pages=main_pages,
+            dependency_chain=chain,
+            resolved_import_files=ctx.resolved_files,
+            route_constant_map=self.route_const_resolver.full_map,
+        )
+        self._set_state(RouteState.ROUTER_CENSUS, file_path=ctx.key)
+        try:
+            msg = await self._ainvoke_with_state(
+                stage="census_construct",
+                state=RouteState.ROUTER_CENSUS,
+                messages=[("system", CENSUS_CONSTRUCT_SYSTEM_PROMPT), ("user", user_prompt)],
+            )
+            obj = parse_llm_json_object(str(getattr(msg, "content", "") or ""))
+        except Exception as ex:
+            print(f"[RouteStructureAgent] Census+construct failed, fallback to two-stage: {ex}")
+            obj = {}
+        self._fused_stats["requests"] += 1
+        if not isinstance(obj.get("census"), list):
+            self._fused_stats["failed"] += 1
+            return None
+        prompt_tokens = estimate_tokens(CENSUS_CONSTRUCT_SYSTEM_PROMPT) + estimate_tokens(user_prompt)
+        self._fused_stats["prompt_tokens_estimate"] += prompt_tokens
+
+        rows = [r for r in obj["census"] if isinstance(r, dict)]
+        id_map: Dict[str, str] = {}
+        calls = self._normalize_and_dedupe_census_calls(
+            file_key=ctx.key,
+            calls=self._census_rows_to_calls(rows, chunk_index=1),
+            id_map=id_map,
+        )
+        model_ids: Dict[str, str] = {}
+        for i, r in enumerate(rows, start=1):
+            model_id = str(r.get("call_id") or "").strip()
+            final_id = id_map.get(f"chunk_1_row_{i}")
+            if model_id and final_id:
+                model_ids.setdefault(model_id, final_id)
+        edges: List[Dict[str, Any]] = []
+        for e in obj.get("edges") or []:
+            if not isinstance(e, dict):
+                continue
+            row = dict(e)
+            row["call_id"] = model_ids.get(str(e.get("call_id") or "").strip(), "")
+            edges.append(row)
+        print(
+            "[RouteStructureAgent] Census+construct: "
+            f"census={len(calls)}, edges={len(edges)}, file={ctx.key}"
+        )
+        return calls, edges, prompt_tokens
+
+    def _estimate_two_stage_prompt_tokens(
+        self,
+        *,
+        ctx: FileContext,
+        main_pages: List[str],
+        chain: List[str],
+        actionable_census_calls: List[Dict[str, str]],
+    ) -> int:
+        """估算同一文件走 census + construct 两次请求时的 prompt token，用于单次调用模式的对比统计。"""
+        census_prompt = build_census_user_prompt(
+            file_path=ctx.key,
+            code=ctx.code,
+            chunk_index=1,
+            chunk_total=1,
+            dependency_chain=chain,
+            resolved_import_files=ctx.resolved_files,
+        )
+        total = estimate_tokens(CENSUS_SYSTEM_PROMPT) + estimate_tokens(census_prompt)
+        if actionable_census_calls:
+            construct_prompt = self._build_construct_user_prompt(
+                file_key=ctx.key,
+                code=ctx.code,
+                main_pages=main_pages,
+                chain=chain,
+                resolved_files=ctx.resolved_files,
+                census_calls=actionable_census_calls,
+            )
+            total += estimate_tokens(COVERAGE_RETRY_SYSTEM_PROMPT) + estimate_tokens(construct_prompt)
+        return total
 
+    def _fused_census_snapshot(self) -> Dict[str, Any]:
+        """单次调用模式统计；未启用时为空。"""
+        if int(self.config.fused_census_max_lines) <= 0:
+            return {}
+        st = dict(self._fused_stats)
+        fused_tokens = int(st["single_call_prompt_tokens_estimate"])
+        two_stage = int(st["two_stage_prompt_tokens_estimate"])
+        st["max_lines"] = int(self.config.fused_census_max_lines)
+        st["prompt_token_ratio"] = round(fused_tokens / two_stage, 4) if two_stage else None
+        return st
+
+    def _canonical_file_key(self, file_path: Path) -> tuple[Path, str]:
+        """返回 (规范绝对路径, 规范化字符串 key)；realpath 结果经文件表缓存。"""
         try:
-            canonical_file = file_path.resolve()
+            canonical_file = Path(self.file_table.canonical(file_path))
         except Exception:
             canonical_file = Path(normalize_path(str(file_path)))
-        fp = normalize_path(str(canonical_file))
-        if fp in self._visited:
-            return
-        self._visited.add(fp)
-        self._count += 1
-        self._set_state(RouteState.EXPAND_IMPORTS, main_page=main_page_key, file_path=fp)
+        return canonical_file, normalize_path(str(canonical_file))
 
+    def _load_file_context(self, canonical_file: Path, fp: str) -> Optional[FileContext]:
+        """读取源码并解析 imports / 依赖文件；空文件返回 None。副作用：更新 dependency_graph。"""
         code = self.reader.read_source_file(str(canonical_file))
         if not code.strip():
-            return
+            return None
 
         imports = self.import_resolver.extract_imports(code)
         resolved_map = self.import_resolver.resolve_imports_to_files(
@@ -890,48 +2021,80 @@ class RouteStructureAgent:
 
         self.dependency_graph[fp] = [normalize_path(x) for x in resolved_files]
 
+        nested = self.import_resolver.find_nested_component_files(
+            imports=imports,
+            current_file_path=str(canonical_file),
+        )
+        nested = [nf for nf in nested if self._is_readable_ets_file(nf)]
+        return FileContext(
+            path=canonical_file,
+            key=fp,
+            code=code,
+            imports=imports,
+            resolved_map=resolved_map,
+            resolved_files=resolved_files,
+            nested=nested,
+        )
+
+    async def _extract_file_edges(
+        self,
+        *,
+        ctx: FileContext,
+        main_page_key: str,
+        main_pages: List[str],
+        chain: List[str],
+    ) -> FileAnalysis:
+        """
+        对单个文件执行准入 -> census -> refine -> construct -> target 过滤。
+
+        Args:
+            ctx: 文件上下文。
+            main_page_key: 当前归属的入口页面 key（仅用于状态日志）。
+            main_pages: main_pages 列表（去 .ets 后）。
+            chain: 当前依赖链。
+
+        Returns:
+            FileAnalysis：census 调用与已解析 target 的合法边。
+        """
+        fp = ctx.key
+        out = FileAnalysis()
+
         # 仅对通过准入门的文件执行 LLM；其余文件只参与 import 递归。
         merged_edges: List[Dict[str, Any]] = []
         self._set_state(RouteState.ADMISSION_CHECK, main_page=main_page_key, file_path=fp)
-        admissible = self._is_llm_admissible_file(file_path=canonical_file, code=code)
+        admissible = self._is_llm_admissible_file(file_path=ctx.path, code=ctx.code)
+        out.admissible = admissible
         self._record_decision(
             state=RouteState.ADMISSION_CHECK,
             action="llm_admission",
             detail={"admissible": admissible, "file": fp},
         )
+        static: Optional[StaticExtraction] = None
         if admissible:
-            census_calls = await self._extract_router_census(
-                file_path=canonical_file,
-                code=code,
-                chain=chain,
-                resolved_files=resolved_files,
-            )
-            census_calls = await self._refine_cross_file_census_calls(
-                file_path=canonical_file,
-                code=code,
-                imports=imports,
-                resolved_map=resolved_map,
-                chain=chain,
-                census_calls=census_calls,
-            )
-            actionable_census_calls = [c for c in census_calls if self._is_actionable_census_call(c)]
-            self.state_ctx.coverage_calls += len(actionable_census_calls)
-            print(
-                "[RouteStructureAgent] Router census summary: "
-                f"total_calls={len(census_calls)}, actionable_calls={len(actionable_census_calls)}, file: {fp}"
-            )
-
-            merged_edges = await self._construct_edges_from_census(
-                file_path=canonical_file,
-                code=code,
-                imports=imports,
-                resolved_map=resolved_map,
-                main_pages=main_pages,
-                chain=chain,
-                resolved_files=resolved_files,
-                actionable_census_calls=actionable_census_calls,
-            )
-            self.state_ctx.constructed_edges += len(merged_edges)
+            static = self._static_extract(ctx)
+            if static is not None and self._static_mode() == "on" and static.fully_resolved:
+                # 全部调用均可静态判定：不调用 LLM。
+                merged_edges = static.edges()
+                out.census_calls = self._static_census_calls(static)
+                self._static_skipped.add(fp)
+                self._bump_state_counter("coverage_calls", len(static.resolved_calls))
+                self._record_decision(
+                    state=RouteState.ROUTER_CENSUS,
+                    action="static_fast_path",
+                    detail={"file": fp, "calls": len(static.resolved_calls)},
+                )
+            else:
+                covered = self._static_covered_keys(static) if self._static_mode() == "on" else set()
+                merged_edges = await self._extract_llm_edges(
+                    ctx=ctx,
+                    main_pages=main_pages,
+                    chain=chain,
+                    out=out,
+                    static_covered=covered,
+                )
+                if covered:
+                    merged_edges = self._dedupe_edges([*static.edges(), *merged_edges])
+            self._bump_state_counter("constructed_edges", len(merged_edges))
 
         # 入库前统一做 target 合法性过滤，避免脏边进入最终 PTG。
         self._set_state(RouteState.NORMALIZE_AND_FILTER, main_page=main_page_key, file_path=fp)
@@ -945,35 +2108,323 @@ class RouteStructureAgent:
             target = self.route_const_resolver.resolve_target_by_symbol(
                 target=raw_target,
                 target_expr=target_expr,
-                imports=imports,
-                resolved_imports=resolved_map,
+                imports=ctx.imports,
+                resolved_imports=ctx.resolved_map,
             )
             if is_invalid_target(target) or not target:
                 invalid_target_dropped += 1
                 continue
-
-            if self.memory.add_edge(
-                source_page=main_page_key,
-                component_type=component_type,
-                event=event,
-                target=target,
-            ):
-                print(f"Found route: {main_page_key} -> {target}")
+            out.edges.append({"component_type": component_type, "event": event, "target": target})
         if invalid_target_dropped > 0:
-            self.state_ctx.invalid_target_dropped += invalid_target_dropped
+            self._bump_state_counter("invalid_target_dropped", invalid_target_dropped)
             print(
                 "[RouteStructureAgent] Invalid target dropped: "
                 f"dropped={invalid_target_dropped}, merged_edges={len(merged_edges)}, file: {fp}"
             )
+        if static is not None and self._static_mode() == "shadow":
+            self._compare_static_shadow(fp, ctx.code, static, out.edges)
+        return out
 
-        self._set_state(RouteState.WRITE_PTG, main_page=main_page_key, file_path=fp)
-        nested = self.import_resolver.find_nested_component_files(
-            imports=imports,
-            current_file_path=str(canonical_file),
+    async def _extract_llm_edges(
+        self,
+        *,
+        ctx: FileContext,
+        main_pages: List[str],
+        chain: List[str],
+        out: FileAnalysis,
+        static_covered: Set[Tuple[str, str]],
+    ) -> List[Dict[str, Any]]:
+        """
+        LLM 抽取：census（或单次调用）-> refine -> construct。
+
+        Args:
+            out: 写入 census_calls。
+            static_covered: 已由静态快速路径构边的 (method, target_expr)；对应 census 调用不再构边。
+
+        Returns:
+            构边结果（target 尚未做符号解析）。
+        """
+        fp = ctx.key
+        fused_edges: Optional[List[Dict[str, Any]]] = None
+        fused_prompt_tokens = 0
+        fused = await self._fused_census_construct(ctx=ctx, main_pages=main_pages, chain=chain)
+        if fused is not None:
+            census_calls, fused_edges, fused_prompt_tokens = fused
+            if any(self._normalize_bool_flag(c.get("needs_cross_file_resolution")) for c in census_calls):
+                # 需要跨文件补解析：沿用本次 census，构边回到 refine -> construct 两阶段。
+                fused_edges = None
+                self._fused_stats["fallback_cross_file"] += 1
+        else:
+            census_calls = await self._extract_router_census(
+                file_path=ctx.path,
+                code=ctx.code,
+                chain=chain,
+                resolved_files=ctx.resolved_files,
+            )
+        census_calls = await self._refine_cross_file_census_calls(
+            file_path=ctx.path,
+            code=ctx.code,
+            imports=ctx.imports,
+            resolved_map=ctx.resolved_map,
+            chain=chain,
+            census_calls=census_calls,
         )
-        nested = [nf for nf in nested if self._is_readable_ets_file(nf)]
+        out.census_calls = census_calls
+        actionable_census_calls = [c for c in census_calls if self._is_actionable_census_call(c)]
+        if static_covered:
+            actionable_census_calls = [
+                c for c in actionable_census_calls if self._census_call_static_key(c) not in static_covered
+            ]
+        self._bump_state_counter("coverage_calls", len(actionable_census_calls))
+        print(
+            "[RouteStructureAgent] Router census summary: "
+            f"total_calls={len(census_calls)}, actionable_calls={len(actionable_census_calls)}, file: {fp}"
+        )
+
+        if fused_edges is not None:
+            self._fused_stats["single_call_files"] += 1
+            self._fused_stats["single_call_prompt_tokens_estimate"] += fused_prompt_tokens
+            self._fused_stats["two_stage_prompt_tokens_estimate"] += self._estimate_two_stage_prompt_tokens(
+                ctx=ctx,
+                main_pages=main_pages,
+                chain=chain,
+                actionable_census_calls=actionable_census_calls,
+            )
+            if not actionable_census_calls:
+                return []
+            return await self._filter_constructed_edges(
+                file_key=fp,
+                code=ctx.code,
+                imports=ctx.imports,
+                resolved_map=ctx.resolved_map,
+                constructed_edges=fused_edges,
+                actionable_census_calls=actionable_census_calls,
+            )
+        return await self._construct_edges_from_census(
+            file_path=ctx.path,
+            code=ctx.code,
+            imports=ctx.imports,
+            resolved_map=ctx.resolved_map,
+            main_pages=main_pages,
+            chain=chain,
+            resolved_files=ctx.resolved_files,
+            actionable_census_calls=actionable_census_calls,
+            # 静态边在最终结果中排在 LLM 边之前，有静态边时不提前写入，保持写入顺序不变。
+            early_write=not static_covered,
+        )
+
+    # ---------- 静态快速路径 ----------
+
+    def _static_mode(self) -> str:
+        mode = str(self.config.static_fast_path or "off").strip().lower()
+        return mode if mode in {"on", "shadow"} else "off"
+
+    def _static_extract(self, ctx: FileContext) -> Optional[StaticExtraction]:
+        """对准入文件执行静态抽取并累计解析率；关闭时返回 None。"""
+        if self._static_mode() == "off":
+            return None
+        static = self.static_extractor.extract(ctx.code, imports=ctx.imports, resolved_imports=ctx.resolved_map)
+        key = (ctx.key, content_hash(ctx.code))
+        if key in self._static_counted:
+            return static
+        self._static_counted.add(key)
+        self._static_stats["files"] += 1
+        self._static_stats["calls_total"] += static.total_actionable
+        self._static_stats["calls_static"] += len(static.resolved_calls)
+        reasons = self._static_stats["ambiguous_reasons"]
+        for c in static.calls:
+            if c.reason:
+                reasons[c.reason] = int(reasons.get(c.reason, 0)) + 1
+        missed = static.total_actionable - len(static.calls)
+        if missed > 0:
+            reasons["not_in_ast"] = int(reasons.get("not_in_ast", 0)) + missed
+        print(
+            "[RouteStructureAgent] Static fast path: "
+            f"calls={static.total_actionable}, static={len(static.resolved_calls)}, "
+            f"ambiguous={static.ambiguous_count}, file={ctx.key}"
+        )
+        return static
+
+    @staticmethod
+    def _static_census_calls(static: StaticExtraction) -> List[Dict[str, Any]]:
+        """静态解析的调用以 census 记录形式保存（供增量清单与复盘）。"""
+        return [
+            {
+                "call_id": f"static_{i}",
+                "method": c.method,
+                "line_hint": "unknown",
+                "snippet": re.sub(r"\s+", " ", c.snippet).strip(),
+                "component_hint": c.component_type,
+                "event_hint": c.event,
+                "needs_cross_file_resolution": False,
+                "resolved": True,
+                "resolution_kind": "static",
+            }
+            for i, c in enumerate(static.resolved_calls, start=1)
+        ]
+
+    def _static_covered_keys(self, static: Optional[StaticExtraction]) -> Set[Tuple[str, str]]:
+        """
+        可由静态结果覆盖的 (method, target_expr)。
+
+        同一 (method, target_expr) 在文件中出现多次且并非全部静态解析时不算覆盖，避免误删歧义调用。
+        """
+        if static is None:
+            return set()
+        resolved: Dict[Tuple[str, str], bool] = {}
+        for c in static.calls:
+            key = (c.method, self._normalize_census_snippet(c.target_expr))
+            resolved[key] = resolved.get(key, True) and c.resolved
+        return {k for k, ok in resolved.items() if ok}
+
+    def _census_call_static_key(self, call: Dict[str, Any]) -> Tuple[str, str]:
+        snippet = self._normalize_census_snippet(str(call.get("snippet") or ""))
+        target_expr = self._normalize_census_snippet(self._extract_target_expr_from_census_snippet(snippet))
+        return str(call.get("method") or "").strip(), target_expr
+
+    def _dedupe_edges(self, edges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        seen: Set[tuple[str, str, str]] = set()
+        out: List[Dict[str, Any]] = []
+        for e in edges:
+            k = self._edge_key_for_merge(e)
+            if not k[2] or k in seen:
+                continue
+            seen.add(k)
+            out.append(e)
+        return out
+
+    def _compare_static_shadow(
+        self,
+        fp: str,
+        static_code: str,
+        static: StaticExtraction,
+        llm_edges: List[Dict[str, str]],
+    ) -> None:
+        """shadow 模式：静态边与 LLM 最终边逐条对比（完全一致 / 仅 target 一致 / LLM 未产出）。"""
+        key = (fp, content_hash(static_code))
+        if key in self._static_compared:
+            return
+        self._static_compared.add(key)
+        st = self._static_stats
+        st["shadow_files"] += 1
+        llm_keys = {self._edge_key_for_merge(e) for e in llm_edges}
+        llm_targets = {k[2] for k in llm_keys}
+        for e in self._dedupe_edges(static.edges()):
+            st["shadow_static_edges"] += 1
+            key = self._edge_key_for_merge(e)
+            if key in llm_keys:
+                st["shadow_agree"] += 1
+                continue
+            if key[2] in llm_targets:
+                st["shadow_target_agree"] += 1
+            else:
+                st["shadow_missing_in_llm"] += 1
+            if len(st["shadow_mismatches"]) < 20:
+                st["shadow_mismatches"].append(
+                    {
+                        "file": fp,
+                        "static": {"component_type": key[0], "event": key[1], "target": key[2]},
+                        "llm": [
+                            {"component_type": k[0], "event": k[1], "target": k[2]}
+                            for k in sorted(llm_keys)
+                            if k[2] == key[2]
+                        ],
+                    }
+                )
+
+    def _static_snapshot(self) -> Dict[str, Any]:
+        """静态快速路径统计（含项目级静态解析率）；关闭时为空。"""
+        if self._static_mode() == "off":
+            return {}
+        st = self._static_stats
+        total = int(st["calls_total"])
+        out: Dict[str, Any] = {
+            "mode": self._static_mode(),
+            **{k: v for k, v in st.items() if not k.startswith("shadow_")},
+            "files_llm_skipped": len(self._static_skipped),
+            "static_resolution_ratio": round(int(st["calls_static"]) / total, 4) if total else 0.0,
+        }
+        if self._static_mode() == "shadow":
+            compared = int(st["shadow_static_edges"])
+            out["shadow"] = {
+                "files": st["shadow_files"],
+                "static_edges": compared,
+                "agree": st["shadow_agree"],
+                "target_agree_only": st["shadow_target_agree"],
+                "missing_in_llm": st["shadow_missing_in_llm"],
+                "agreement_ratio": round(int(st["shadow_agree"]) / compared, 4) if compared else None,
+                "mismatches": list(st["shadow_mismatches"]),
+            }
+        return out
+
+    def _write_edges(self, memory: PTGMemory, *, main_page_key: str, edges: List[Dict[str, str]]) -> None:
+        """把已过滤的边写入指定 PTGMemory（自动去重）。"""
+        for e in edges:
+            if memory.add_edge(
+                source_page=main_page_key,
+                component_type=e["component_type"],
+                event=e["event"],
+                target=e["target"],
+            ):
+                if self._first_edge_seconds is None:
+                    self._first_edge_seconds = time.perf_counter() - self._run_started
+                print(f"Found route: {main_page_key} -> {e['target']}")
+
+    async def _analyze_file(
+        self,
+        *,
+        main_page_key: str,
+        file_path: Path,
+        main_pages: List[str],
+        depth: int,
+        chain: List[str],
+    ) -> None:
+        """
+        递归分析单个文件，并把合法边写入 memory。
+
+        Args:
+            main_page_key: 当前归属的入口页面 key（source_page）。
+            file_path: 当前待分析文件路径。
+            main_pages: main_pages 列表（去 .ets 后）。
+            depth: 当前递归深度。
+            chain: 当前依赖链。
+
+        Returns:
+            无返回值。副作用：更新 memory / dependency_graph / visited。
+        """
+        run = _CURRENT_RUN.get()
+        if run is None:
+            raise RuntimeError("_analyze_file must run inside a main page task.")
+        if run.count >= int(self.config.max_files):
+            return
+        if depth > int(self.config.max_depth):
+            return
+
+        canonical_file, fp = self._canonical_file_key(file_path)
+        if fp in run.visited:
+            return
+        run.visited.add(fp)
+        run.count += 1
+        self._set_state(RouteState.EXPAND_IMPORTS, main_page=main_page_key, file_path=fp)
+
+        ctx = self._load_file_context(canonical_file, fp)
+        if ctx is None:
+            return
+
+        analysis = await self._extract_file_edges(
+            ctx=ctx,
+            main_page_key=main_page_key,
+            main_pages=main_pages,
+            chain=chain,
+        )
+        if self._run_defers_writes(run):
+            run.deferred_writes.append((fp, list(analysis.edges)))
+        else:
+            self._write_edges(run.memory, main_page_key=main_page_key, edges=analysis.edges)
+
+        self._set_state(RouteState.WRITE_PTG, main_page=main_page_key, file_path=fp)
         next_chain = [*chain, fp]
-        for nf in nested:
+        for nf in ctx.nested:
             await self._analyze_file(
                 main_page_key=main_page_key,
                 file_path=Path(nf),
@@ -982,6 +2433,309 @@ class RouteStructureAgent:
                 chain=next_chain,
             )
 
+    def _collect_import_closure(
+        self,
+        *,
+        main_page_key: str,
+        main_page_file: Path,
+        contexts: Dict[str, Optional[FileContext]],
+        first_seen: Dict[str, Tuple[str, List[str]]],
+    ) -> List[str]:
+        """
+        按 _analyze_file 相同的遍历规则（DFS 先序、visited、max_files、max_depth）计算 main page 的导入闭包。
+
+        Args:
+            main_page_key: 入口页面 key。
+            main_page_file: 入口页面文件。
+            contexts: 跨页面共享的文件上下文缓存（fp -> FileContext / None）。
+            first_seen: 文件首次被发现时的 (main_page, dependency_chain)，用于单次分析时的 prompt 上下文。
+
+        Returns:
+            闭包内文件 key 列表（遍历顺序）。
+        """
+        visited: Set[str] = set()
+        order: List[str] = []
+
+        def _walk(file_path: Path, depth: int, chain: List[str]) -> None:
+            if len(order) >= int(self.config.max_files):
+                return
+            if depth > int(self.config.max_depth):
+                return
+            canonical_file, fp = self._canonical_file_key(file_path)
+            if fp in visited:
+                return
+            visited.add(fp)
+            order.append(fp)
+            if fp not in first_seen:
+                first_seen[fp] = (main_page_key, list(chain))
+            if fp not in contexts:
+                self._set_state(RouteState.EXPAND_IMPORTS, main_page=main_page_key, file_path=fp)
+                contexts[fp] = self._load_file_context(canonical_file, fp)
+            ctx = contexts[fp]
+            if ctx is None:
+                return
+            next_chain = [*chain, fp]
+            for nf in ctx.nested:
+                _walk(Path(nf), depth + 1, next_chain)
+
+        _walk(main_page_file, 0, [main_page_key])
+        return order
+
+    async def _run_whole_project(self, entries: List[Tuple[str, Path]], main_pages: List[str]) -> None:
+        """
+        whole_project 模式：先计算每个 main page 的导入闭包，再对闭包并集中的每个文件只执行一次 LLM 抽取，
+        最后把文件的边归属到所有闭包包含该文件的 main page（按各自闭包顺序写入，与逐页模式的写入顺序一致）。
+        """
+        contexts: Dict[str, Optional[FileContext]] = {}
+        first_seen: Dict[str, Tuple[str, List[str]]] = {}
+        closures: Dict[str, List[str]] = {}
+        for mp_id, mp_file in entries:
+            self._set_state(RouteState.DISCOVER_MAIN_PAGE, main_page=mp_id, file_path=str(mp_file))
+            closures[mp_id] = self._collect_import_closure(
+                main_page_key=mp_id,
+                main_page_file=mp_file,
+                contexts=contexts,
+                first_seen=first_seen,
+            )
+
+        unique_files = [fp for fp in first_seen.keys() if contexts.get(fp) is not None]
+        manifest_path = str(self.config.incremental_manifest_path or "").strip()
+        file_hashes: Dict[str, str] = {}
+        reused: Dict[str, FileAnalysis] = {}
+        incremental_stats: Dict[str, Any] = {}
+        if manifest_path:
+            file_hashes = self._collect_file_hashes(unique_files, contexts)
+            reused, incremental_stats = self._reuse_from_manifest(
+                manifest_path=manifest_path,
+                unique_files=unique_files,
+                file_hashes=file_hashes,
+                main_pages=main_pages,
+            )
+
+        pending = [fp for fp in unique_files if fp not in reused]
+        await self._prefetch_batched_census([(contexts[fp], first_seen[fp][1]) for fp in pending])
+        file_results = dict(reused)
+        file_results.update(await self._analyze_project_files(pending, contexts, first_seen, main_pages))
+
+        for mp_id, _ in entries:
+            self._set_state(RouteState.WRITE_PTG, main_page=mp_id)
+            for fp in closures.get(mp_id, []):
+                analysis = file_results.get(fp)
+                if analysis is not None:
+                    self._write_edges(self.memory, main_page_key=mp_id, edges=analysis.edges)
+
+        page_visits = sum(len(v) for v in closures.values())
+        self._project_stats = {
+            "main_pages": len(closures),
+            "page_file_visits": page_visits,
+            "unique_files": len(unique_files),
+            "llm_files": sum(1 for fp in pending if file_results[fp].admissible),
+            "page_llm_file_visits": sum(
+                1 for fps in closures.values() for fp in fps if fp in file_results and file_results[fp].admissible
+            ),
+        }
+        if manifest_path:
+            self._project_stats["incremental"] = incremental_stats
+            self._build_manifest(
+                unique_files=unique_files,
+                file_hashes=file_hashes,
+                file_results=file_results,
+                main_pages=main_pages,
+            ).save(manifest_path)
+        print("[RouteStructureAgent] Whole-project summary: " + json.dumps(self._project_stats, ensure_ascii=False))
+
+    def _collect_file_hashes(
+        self,
+        unique_files: List[str],
+        contexts: Dict[str, Optional[FileContext]],
+    ) -> Dict[str, str]:
+        """计算闭包内文件及其直接依赖的内容哈希。"""
+        hashes: Dict[str, str] = {}
+        for fp in unique_files:
+            ctx = contexts[fp]
+            hashes[fp] = content_hash(ctx.code)
+        for fp in unique_files:
+            for dep in self._canonical_deps(fp):
+                if dep not in hashes:
+                    hashes[dep] = self.file_table.content_hash(dep)
+        return hashes
+
+    def _canonical_deps(self, fp: str) -> List[str]:
+        """dependency_graph 中的直接依赖，统一为与文件 key 相同的规范路径。"""
+        return sorted({self._canonical_file_key(Path(dep))[1] for dep in self.dependency_graph.get(fp, [])})
+
+    def _manifest_keys(self, main_pages: List[str]) -> Dict[str, str]:
+        return {
+            "model": str(self.config.llm_model_name or ""),
+            "main_pages_hash": json_hash(list(main_pages)),
+            "route_const_hash": json_hash(self.route_const_resolver.full_map),
+            "prompts_hash": json_hash(
+                [
+                    CENSUS_SYSTEM_PROMPT,
+                    CENSUS_BATCH_SYSTEM_PROMPT,
+                    CENSUS_CONSTRUCT_SYSTEM_PROMPT,
+                    COVERAGE_RETRY_SYSTEM_PROMPT,
+                    TRIGGER_REFINE_SYSTEM_PROMPT,
+                    TOOL_CALLING_SYSTEM_PROMPT,
+                ]
+            ),
+            "settings_hash": json_hash(self._extraction_settings()),
+        }
+
+    def _extraction_settings(self) -> Dict[str, Any]:
+        """影响单文件 census / 构边结果的配置；任一变化时清单中的文件级记录不可复用。"""
+        cfg = self.config
+        provider = cfg.llm_provider_config or {}
+        return {
+            "base_url": str(provider.get("baseURL") or ""),
+            "chat_options": dict(provider.get("chatOptions") or {}),
+            "static_fast_path": str(cfg.static_fast_path),
+            "census_batch_max_tokens": int(cfg.census_batch_max_tokens),
+            "census_batch_max_files": int(cfg.census_batch_max_files),
+            "fused_census_max_lines": int(cfg.fused_census_max_lines),
+            "compact_construct_prompt": bool(cfg.compact_construct_prompt),
+            "slice_refine_component": bool(cfg.slice_refine_component),
+            "chunk_strategy": str(cfg.chunk_strategy),
+            "chunk_target_tokens": int(cfg.chunk_target_tokens),
+            "chunk_trigger_lines": int(cfg.chunk_trigger_lines),
+            "chunk_size_lines": int(cfg.chunk_size_lines),
+            "chunk_overlap_lines": int(cfg.chunk_overlap_lines),
+            "tool_calling_scope": str(cfg.tool_calling_scope),
+            "enable_router_census_probe": bool(cfg.enable_router_census_probe),
+            "llm_skip_dirs": sorted(str(d) for d in (cfg.llm_skip_dirs or [])),
+        }
+
+    def _reuse_from_manifest(
+        self,
+        *,
+        manifest_path: str,
+        unique_files: List[str],
+        file_hashes: Dict[str, str],
+        main_pages: List[str],
+    ) -> Tuple[Dict[str, FileAnalysis], Dict[str, Any]]:
+        """
+        从上次清单中取出可复用的文件分析结果。
+
+        文件自身、直接依赖均未变化，且模型 / main_pages / 路由常量表 / prompt / 抽取配置一致时复用；
+        其余文件重新走 LLM。失效只按文件与其直接依赖判断，不沿依赖图向上传播到 main page。
+
+        Returns:
+            (可复用结果, 增量统计)。
+        """
+        prev = RunManifest.load(manifest_path)
+        stats: Dict[str, Any] = {"manifest": manifest_path, "previous_manifest": prev is not None}
+        if prev is None:
+            print(f"[RouteStructureAgent] Incremental: no previous manifest, full run: {manifest_path}")
+            return {}, stats
+        if not prev.is_compatible(**self._manifest_keys(main_pages)):
+            stats["invalidated"] = "model/main_pages/route_constants/prompts/settings changed"
+            print(
+                "[RouteStructureAgent] Incremental: manifest invalidated "
+                "(model/main_pages/route constants/prompts/settings changed)."
+            )
+            return {}, stats
+
+        reused: Dict[str, FileAnalysis] = {}
+        for fp in unique_files:
+            rec = prev.reusable_record(
+                fp,
+                file_hash=file_hashes[fp],
+                deps=self._canonical_deps(fp),
+                dep_hashes=file_hashes,
+            )
+            if rec is None:
+                continue
+            reused[fp] = FileAnalysis(
+                admissible=rec.admissible,
+                census_calls=list(rec.census_calls),
+                edges=[dict(e) for e in rec.edges],
+            )
+
+        stats.update(
+            {
+                "reused_files": len(reused),
+                "reanalyzed_files": len(unique_files) - len(reused),
+            }
+        )
+        print(
+            "[RouteStructureAgent] Incremental: "
+            f"reused_files={len(reused)}, reanalyzed_files={len(unique_files) - len(reused)}"
+        )
+        return reused, stats
+
+    def _build_manifest(
+        self,
+        *,
+        unique_files: List[str],
+        file_hashes: Dict[str, str],
+        file_results: Dict[str, FileAnalysis],
+        main_pages: List[str],
+    ) -> RunManifest:
+        manifest = RunManifest(**self._manifest_keys(main_pages))
+        for fp in unique_files:
+            analysis = file_results.get(fp)
+            if analysis is None:
+                continue
+            manifest.files[fp] = FileRecord(
+                hash=file_hashes[fp],
+                deps=self._canonical_deps(fp),
+                admissible=analysis.admissible,
+                census_calls=analysis.census_calls,
+                edges=analysis.edges,
+            )
+        manifest.file_hashes = {fp: h for fp, h in file_hashes.items() if fp not in manifest.files}
+        return manifest
+
+    async def _analyze_project_files(
+        self,
+        files: List[str],
+        contexts: Dict[str, Optional[FileContext]],
+        first_seen: Dict[str, Tuple[str, List[str]]],
+        main_pages: List[str],
+    ) -> Dict[str, FileAnalysis]:
+        """
+        对文件列表逐个执行一次 LLM 抽取（并发上限沿用 main_page_concurrency），结果按文件 key 返回。
+
+        tool_calling_scope=page 时各文件遗留的未解析边按首次发现它的 main page 分批，全部抽取结束后每批一次会话。
+        """
+        limit = max(1, int(self.config.main_page_concurrency))
+        sem = asyncio.Semaphore(limit)
+        batches: Dict[str, Optional[ToolCallingBatch]] = {}
+
+        async def _one(fp: str) -> FileAnalysis:
+            ctx = contexts[fp]
+            owner, chain = first_seen[fp]
+            if owner not in batches:
+                batches[owner] = self._new_tool_batch()
+            async with sem:
+                run = MainPageRun(main_page=owner, tool_batch=batches[owner], writes_ptg=False)
+                token = self._enter_run(run)
+                try:
+                    return await self._extract_file_edges(
+                        ctx=ctx,
+                        main_page_key=owner,
+                        main_pages=main_pages,
+                        chain=chain,
+                    )
+                finally:
+                    self._exit_run(run, token)
+
+        results = await asyncio.gather(*[_one(fp) for fp in files], return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+        out: Dict[str, FileAnalysis] = dict(zip(files, results))
+        flushed = await asyncio.gather(*[self._flush_tool_batch(b) for b in batches.values()])
+        for patched in flushed:
+            for fp, edges in patched.items():
+                seen = {(e["component_type"], e["event"], e["target"]) for e in out[fp].edges}
+                for e in edges:
+                    k = (e["component_type"], e["event"], e["target"])
+                    if k not in seen:
+                        seen.add(k)
+                        out[fp].edges.append(e)
+        return out
+
     def _prepare_main_pages(self) -> tuple[List[str], List[str]]:
         """读取 main_pages 并完成运行前初始化。"""
         self._set_state(RouteState.INIT)
@@ -991,14 +2745,28 @@ class RouteStructureAgent:
         self._main_page_ids = {p for p in main_page_ids if p}
         self.memory.init_from_main_pages(sorted(self._main_page_ids))
         self.route_const_resolver.build()
+        self._save_index_cache()
         return main_pages, main_page_ids
 
+    def _save_index_cache(self) -> None:
+        if self.index_cache is None:
+            return
+        try:
+            self.index_cache.prune_files(self.file_table.is_file)
+            self.index_cache.save()
+        except Exception as ex:
+            print(f"[RouteStructureAgent] Project index cache save failed: {ex}")
+
     def get_finalize_snapshot(self) -> Dict[str, Any]:
         """提供 workflow 最终落盘所需的汇总信息。"""
         unresolved_summary = self.import_resolver.get_unresolved_imports_summary(top_n=20)
         self._set_state(RouteState.FINALIZE)
+        self._stop_state_timer(self.state_ctx)
+        # 模块导出索引在分析过程中按需构建，收尾时再落盘一次。
+        self._save_index_cache()
         return {
             "unresolved_imports_summary": unresolved_summary,
+            "ambiguous_symbols_summary": self.import_resolver.get_ambiguous_symbols_summary(top_n=20),
             "token_usage": {
                 "calls": self._token_calls,
                 "prompt": self._token_prompt,
@@ -1010,11 +2778,31 @@ class RouteStructureAgent:
                 "constructed_edges": self.state_ctx.constructed_edges,
                 "invalid_target_dropped": self.state_ctx.invalid_target_dropped,
             },
+            "rate_limiter": self.rate_limiter.snapshot(),
+            "llm_cache": self.llm_cache.snapshot() if self.llm_cache is not None else {},
+            "whole_project": dict(self._project_stats),
+            "project_index_cache": self.index_cache.snapshot() if self.index_cache is not None else {},
+            "file_table": self.file_table.snapshot(),
+            "ast_cache": {**self.ast_cache.snapshot(), "imports_memo": self.import_resolver.get_imports_memo_stats()},
+            "census_batch": self._census_batch_snapshot(),
+            "fused_census": self._fused_census_snapshot(),
+            "static_fast_path": self._static_snapshot(),
+            "chunking": self._chunking_snapshot(),
+            "construct_compaction": self._construct_compaction_snapshot(),
+            "intra_file_fan_out": self._fan_out_snapshot(),
+            "refine_slicing": self._refine_slicing_snapshot(),
+            "tool_calling": self._tool_calling_snapshot(),
+            "llm_streaming": self._streaming_snapshot(),
+            "state_timing": self._state_timing_snapshot(),
         }
 
-    async def _run_legacy(self) -> Dict[str, List[Dict[str, Any]]]:
-        """原始顺序编排执行器（LangGraph 不可用时回退）。"""
-        main_pages, main_page_ids = self._prepare_main_pages()
+    def _collect_main_page_entries(
+        self,
+        main_pages: List[str],
+        main_page_ids: List[str],
+    ) -> List[Tuple[str, Path]]:
+        """按 main_pages 顺序列出可处理的 (main_page_id, 入口文件)。"""
+        entries: List[Tuple[str, Path]] = []
         for mp_raw, mp_id in zip(main_pages, main_page_ids):
             if not mp_id:
                 continue
@@ -1023,15 +2811,116 @@ class RouteStructureAgent:
             if not mp_file.exists():
                 print(f"[RouteStructureAgent] Main page file not found: {str(mp_file)}")
                 continue
-            self._visited = set()
-            self._count = 0
+            entries.append((mp_id, mp_file))
+        return entries
+
+    async def _process_main_page(
+        self,
+        *,
+        main_page_id: str,
+        main_page_file: Path,
+        main_pages: List[str],
+    ) -> MainPageRun:
+        """在独立的 MainPageRun 上下文中递归分析一个 main page。"""
+        run = MainPageRun(main_page=main_page_id, tool_batch=self._new_tool_batch())
+        token = self._enter_run(run)
+        try:
+            if self._census_batch_enabled():
+                await self._prefetch_main_page_census(main_page_id=main_page_id, main_page_file=main_page_file)
             await self._analyze_file(
-                main_page_key=mp_id,
-                file_path=mp_file,
-                main_pages=main_page_ids,
+                main_page_key=main_page_id,
+                file_path=main_page_file,
+                main_pages=main_pages,
                 depth=0,
-                chain=[mp_id],
+                chain=[main_page_id],
             )
+            # 本页遗留的未解析边合并为一次 tool-calling 会话；暂存的边按遍历顺序写入，补出的边紧跟所属文件，
+            # 与逐文件会话的写入顺序一致。
+            patched = await self._flush_tool_batch(run.tool_batch)
+            for fp, edges in run.deferred_writes:
+                self._write_edges(run.memory, main_page_key=main_page_id, edges=[*edges, *patched.pop(fp, [])])
+            for edges in patched.values():
+                self._write_edges(run.memory, main_page_key=main_page_id, edges=edges)
+        finally:
+            self._exit_run(run, token)
+        return run
+
+    async def _prefetch_main_page_census(self, *, main_page_id: str, main_page_file: Path) -> None:
+        """逐页模式：先按遍历规则算出本页导入闭包，对闭包内的小文件批量预取 census。"""
+        first_seen: Dict[str, Tuple[str, List[str]]] = {}
+        order = self._collect_import_closure(
+            main_page_key=main_page_id,
+            main_page_file=main_page_file,
+            contexts=self._census_batch_contexts,
+            first_seen=first_seen,
+        )
+        files = [
+            (self._census_batch_contexts[fp], first_seen[fp][1])
+            for fp in order
+            if self._census_batch_contexts.get(fp) is not None
+        ]
+        await self._prefetch_batched_census(files)
+
+    def _merge_main_page_run(self, run: MainPageRun) -> None:
+        """把单页缓冲合并进全局 PTGMemory。"""
+        added = self.memory.merge(run.memory)
+        print(
+            "[RouteStructureAgent] Main page done: "
+            f"main_page={run.main_page}, files={run.count}, llm_calls={run.state_ctx.llm_calls}, "
+            f"tokens={run.state_ctx.token_total}, edges_added={added}"
+        )
+
+    async def _process_main_pages_concurrently(
+        self,
+        entries: List[Tuple[str, Path]],
+        main_pages: List[str],
+    ) -> None:
+        """
+        以 main_page_concurrency 为上限并发分析多个 main page。
+
+        每个任务持有独立的 visited/count/StateContext 与边缓冲；全部完成后按 main_pages 顺序合并，
+        因此合并结果与顺序执行一致。
+        """
+        limit = max(1, int(self.config.main_page_concurrency))
+        sem = asyncio.Semaphore(limit)
+        print(f"[RouteStructureAgent] Concurrent main page processing: pages={len(entries)}, concurrency={limit}")
+
+        async def _one(mp_id: str, mp_file: Path) -> MainPageRun:
+            async with sem:
+                return await self._process_main_page(main_page_id=mp_id, main_page_file=mp_file, main_pages=main_pages)
+
+        results = await asyncio.gather(*[_one(mp_id, mp_file) for mp_id, mp_file in entries], return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+        for run in results:
+            self._merge_main_page_run(run)
+
+    def _uses_batch_runner(self) -> bool:
+        """是否一次性处理全部 main page（并发或 whole_project），而非逐页状态循环。"""
+        return self._is_whole_project_mode() or int(self.config.main_page_concurrency) > 1
+
+    def _is_whole_project_mode(self) -> bool:
+        if str(self.config.incremental_manifest_path or "").strip():
+            return True
+        return str(self.config.analysis_mode or "").strip().lower() == "whole_project"
+
+    async def _process_entries(self, entries: List[Tuple[str, Path]], main_pages: List[str]) -> None:
+        if self._is_whole_project_mode():
+            await self._run_whole_project(entries, main_pages)
+        else:
+            await self._process_main_pages_concurrently(entries, main_pages)
+
+    async def _run_legacy(self) -> Dict[str, List[Dict[str, Any]]]:
+        """原始顺序编排执行器（LangGraph 不可用时回退）。"""
+        main_pages, main_page_ids = self._prepare_main_pages()
+        entries = self._collect_main_page_entries(main_pages, main_page_ids)
+        if self._uses_batch_runner():
+            await self._process_entries(entries, main_page_ids)
+            return self.memory.to_json_obj()
+        for mp_id, mp_file in entries:
+            run = await self._process_main_page(main_page_id=mp_id, main_page_file=mp_file, main_pages=main_page_ids)
+            self._merge_main_page_run(run)
         return self.memory.to_json_obj()
 
     async def _graph_node_init(self, _: RouteGraphState) -> RouteGraphState:
@@ -1077,17 +2966,17 @@ class RouteStructureAgent:
         if not mp_id or not mp_file:
             return {}
 
-        self._visited = set()
-        self._count = 0
-        await self._analyze_file(
-            main_page_key=mp_id,
-            file_path=Path(mp_file),
-            main_pages=main_page_ids,
-            depth=0,
-            chain=[mp_id],
-        )
+        run = await self._process_main_page(main_page_id=mp_id, main_page_file=Path(mp_file), main_pages=main_page_ids)
+        self._merge_main_page_run(run)
         return {}
 
+    async def _graph_node_process_all(self, state: RouteGraphState) -> RouteGraphState:
+        main_pages = [str(x) for x in (state.get("main_pages") or [])]
+        main_page_ids = [str(x) for x in (state.get("main_page_ids") or [])]
+        entries = self._collect_main_page_entries(main_pages, main_page_ids)
+        await self._process_entries(entries, main_page_ids)
+        return {"done": True}
+
     async def _graph_node_advance(self, state: RouteGraphState) -> RouteGraphState:
         idx = int(state.get("main_idx", 0))
         return {"main_idx": idx + 1}
@@ -1095,6 +2984,9 @@ class RouteStructureAgent:
     async def _graph_node_finalize(self, _: RouteGraphState) -> RouteGraphState:
         return {"ptg": self.memory.to_json_obj()}
 
+    def _graph_route_after_init(self, _: RouteGraphState) -> str:
+        return "process_all" if self._uses_batch_runner() else "discover"
+
     def _graph_route_after_discover(self, state: RouteGraphState) -> str:
         if bool(state.get("done", False)):
             return "finalize"
@@ -1114,16 +3006,22 @@ class RouteStructureAgent:
         graph.add_node("init", self._graph_node_init)
         graph.add_node("discover", self._graph_node_discover)
         graph.add_node("process", self._graph_node_process)
+        graph.add_node("process_all", self._graph_node_process_all)
         graph.add_node("advance", self._graph_node_advance)
         graph.add_node("finalize", self._graph_node_finalize)
         graph.set_entry_point("init")
-        graph.add_edge("init", "discover")
+        graph.add_conditional_edges(
+            "init",
+            self._graph_route_after_init,
+            {"discover": "discover", "process_all": "process_all"},
+        )
         graph.add_conditional_edges(
             "discover",
             self._graph_route_after_discover,
             {"process": "process", "advance": "advance", "finalize": "finalize"},
         )
         graph.add_edge("process", "advance")
+        graph.add_edge("process_all", "finalize")
         graph.add_conditional_edges(
             "advance",
             self._graph_route_after_advance,
@@ -1139,6 +3037,8 @@ class RouteStructureAgent:
         Returns:
             PTG 的 JSON 对象表示（source_page -> edges）。
         """
+        self._run_started = time.perf_counter()
+        self._first_edge_seconds = None
         if _HAS_LANGGRAPH:
             try:
                 app = self._build_state_graph()
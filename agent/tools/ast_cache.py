@@ -0,0 +1,135 @@
+"""共享的 tree-sitter AST 缓存。
+
+按源码内容哈希缓存解析树与源码字节（LRU，按估算内存上限淘汰）。
+ImportResolver / RouteConstantResolver 以及后续需要 AST 的模块共用同一实例，同一文件只解析一次。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+try:
+    from tree_sitter import Language, Parser  # type: ignore
+    from tree_sitter_typescript import language_typescript  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    Language = None  # type: ignore
+    Parser = None  # type: ignore
+    language_typescript = None  # type: ignore
+
+# 解析树内存约为源码字节数的若干倍，用于估算缓存占用。
+_TREE_BYTES_FACTOR = 10
+
+
+def build_ts_parser() -> Optional[Any]:
+    """构造 TS/ArkTS AST 解析器，失败时返回 None。"""
+    if Parser is None or language_typescript is None:
+        return None
+    try:
+        parser = Parser()
+        ts_lang = language_typescript()
+        if Language is not None:
+            try:
+                ts_lang = Language(ts_lang)  # tree-sitter>=0.25: capsule -> Language
+            except Exception:
+                pass
+        if hasattr(parser, "language"):
+            parser.language = ts_lang
+        else:
+            parser.set_language(ts_lang)
+        return parser
+    except Exception:
+        return None
+
+
+@dataclass
+class ParsedSource:
+    """解析结果：语法树与对应的源码字节（节点偏移基于该字节串）。"""
+
+    tree: Any
+    src_bytes: bytes
+    size: int
+
+
+class AstCache:
+    """内容哈希 -> ParsedSource 的 LRU 缓存（线程安全）。"""
+
+    def __init__(self, *, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self._parser = build_ts_parser()
+        self._entries: "OrderedDict[str, ParsedSource]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.parse_seconds = 0.0
+        self.saved_seconds = 0.0
+        self._avg_parse_seconds_per_byte = 0.0
+
+    @property
+    def available(self) -> bool:
+        return self._parser is not None
+
+    @staticmethod
+    def content_key(src_bytes: bytes) -> str:
+        return hashlib.sha256(src_bytes).hexdigest()
+
+    def parse(self, source_code: str) -> Optional[ParsedSource]:
+        """解析源码（命中缓存时直接返回）；解析器不可用或解析失败时返回 None。"""
+        if self._parser is None:
+            return None
+        src_bytes = (source_code or "").encode("utf-8", errors="ignore")
+        key = self.content_key(src_bytes)
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += self._avg_parse_seconds_per_byte * len(src_bytes)
+                return hit
+            self.misses += 1
+            # tree-sitter Parser 不可并发使用，解析过程持锁。
+            t0 = time.perf_counter()
+            try:
+                tree = self._parser.parse(src_bytes)
+            except Exception:
+                tree = None
+            cost = time.perf_counter() - t0
+            self.parse_seconds += cost
+            if src_bytes:
+                rate = cost / len(src_bytes)
+                n = self.misses
+                self._avg_parse_seconds_per_byte += (rate - self._avg_parse_seconds_per_byte) / n
+            if tree is None or tree.root_node is None:
+                return None
+            entry = ParsedSource(tree=tree, src_bytes=src_bytes, size=len(src_bytes) * (1 + _TREE_BYTES_FACTOR))
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict_locked()
+            return entry
+
+    def _evict_locked(self) -> None:
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.size
+            self.evictions += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "approx_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "parse_seconds": round(self.parse_seconds, 4),
+                "estimated_saved_seconds": round(self.saved_seconds, 4),
+            }
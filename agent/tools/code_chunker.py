@@ -0,0 +1,297 @@
+"""长文件按语法边界分块。
+
+按 struct / class / 方法 / build 子树等语法单元切分，每块不超过 token 目标；
+只有单个语法单元本身超过目标时才退化为带重叠的按行窗口。
+
+ArkTS 的 struct 与尾随闭包（`Column() { ... }.onClick(...)`）不是合法 TS，tree-sitter 会产生大量 ERROR 节点，
+因此边界由词法扫描得到：跳过字符串、模板字符串与注释后，按 {}()[] 的嵌套深度划分语法单元。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Sequence, Tuple
+
+from llm_usage import estimate_tokens
+
+_OPENERS = "{(["
+_CLOSERS = "})]"
+
+
+@dataclass
+class LineDepth:
+    """单行的嵌套深度：行首深度、行尾深度、行内最小深度。"""
+
+    start: int
+    end: int
+    low: int
+
+
+@dataclass
+class CodeChunk:
+    """分块结果；start_line / end_line 为 0 起始、左闭右开的源码行区间（不含上下文头）。"""
+
+    text: str
+    start_line: int
+    end_line: int
+    tokens: int
+    # 块所在语法单元的外层声明行（如 `struct Foo {`、`build() {`），作为上下文放在块首。
+    context_lines: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _Leaf:
+    start: int
+    end: int
+    tokens: int
+    headers: Tuple[int, ...] = ()
+
+
+def scan_line_depths(code: str) -> List[LineDepth]:
+    """
+    词法扫描：返回每一行的嵌套深度（{}()[] 合计），字符串、模板字符串与注释内的括号不计。
+
+    模板字符串中的 `${ ... }` 按代码处理。未闭合的结构按已扫描到的深度截断，不抛异常。
+    """
+    lines = (code or "").split("\n")
+    out: List[LineDepth] = []
+    depth = 0
+    # 词法状态栈：'code' / 'tpl'（模板字符串）；每个 'code' 帧记录进入时的深度，用于识别 `${}` 的结束。
+    modes: List[Tuple[str, int]] = [("code", 0)]
+    in_block_comment = False
+    for line in lines:
+        start = depth
+        low = depth
+        i = 0
+        n = len(line)
+        while i < n:
+            ch = line[i]
+            mode = modes[-1][0]
+            if in_block_comment:
+                end = line.find("*/", i)
+                if end < 0:
+                    i = n
+                    break
+                in_block_comment = False
+                i = end + 2
+                continue
+            if mode == "tpl":
+                if ch == "\\":
+                    i += 2
+                    continue
+                if ch == "`":
+                    modes.pop()
+                    i += 1
+                    continue
+                if ch == "$" and i + 1 < n and line[i + 1] == "{":
+                    modes.append(("code", depth))
+                    depth += 1
+                    i += 2
+                    continue
+                i += 1
+                continue
+            # code
+            if ch == "/" and i + 1 < n and line[i + 1] == "/":
+                break
+            if ch == "/" and i + 1 < n and line[i + 1] == "*":
+                in_block_comment = True
+                i += 2
+                continue
+            if ch in "'\"":
+                j = i + 1
+                while j < n and line[j] != ch:
+                    j += 2 if line[j] == "\\" else 1
+                i = j + 1
+                continue
+            if ch == "`":
+                modes.append(("tpl", depth))
+                i += 1
+                continue
+            if ch in _OPENERS:
+                depth += 1
+            elif ch in _CLOSERS:
+                depth = max(0, depth - 1)
+                low = min(low, depth)
+                if ch == "}" and len(modes) > 1 and modes[-1][0] == "code" and depth == modes[-1][1]:
+                    modes.pop()
+            i += 1
+        out.append(LineDepth(start=start, end=depth, low=low))
+    return out
+
+
+def _is_continuation(line: str) -> bool:
+    """链式属性调用（`.onClick(...)`）等以运算符开头的行属于上一个语法单元。"""
+    return line.lstrip().startswith((".", "?.", "&&", "||", "?", ":"))
+
+
+_DECORATOR_ONLY_RE = re.compile(r"^@[\w.]+(?:\(.*\))?$")
+
+
+def is_prefix_line(line: str) -> bool:
+    """单独成行的装饰器与注释行归属到其后的语法单元（`@Prop title: string = ''` 这类带声明的行不算）。"""
+    s = line.strip()
+    return s.startswith(("//", "/*", "*")) or bool(_DECORATOR_ONLY_RE.match(s))
+
+
+def segment_ranges(
+    lines: Sequence[str],
+    depths: Sequence[LineDepth],
+    lo: int,
+    hi: int,
+    level: int,
+) -> List[Tuple[int, int]]:
+    """把 [lo, hi) 按“回到 level 深度”切成同级语法单元（左闭右开行区间）；链式属性行与前置装饰器/注释并入所属单元。"""
+    segs: List[Tuple[int, int]] = []
+    i = lo
+    while i < hi:
+        j = i
+        while j < hi:
+            closed = depths[j].end <= level
+            nxt = j + 1
+            if closed and (nxt >= hi or not _is_continuation(lines[nxt])) and not (
+                is_prefix_line(lines[j]) and depths[j].start == depths[j].end and nxt < hi
+            ):
+                break
+            j += 1
+        j = min(j, hi - 1)
+        segs.append((i, j + 1))
+        i = j + 1
+    return segs
+
+
+class SyntaxChunker:
+    """按语法单元打包分块。"""
+
+    def __init__(self, *, token_target: int, overlap_lines: int = 20) -> None:
+        self.token_target = max(64, int(token_target))
+        self.overlap_lines = max(0, int(overlap_lines))
+
+    def split(self, code: str) -> List[CodeChunk]:
+        lines = (code or "").split("\n")
+        if not lines:
+            return []
+        depths = scan_line_depths(code)
+        line_tokens = [estimate_tokens(ln + "\n") for ln in lines]
+        leaves: List[_Leaf] = []
+        self._split_range(lines, depths, line_tokens, 0, len(lines), (), leaves)
+        return self._pack(lines, line_tokens, leaves)
+
+    # ---------- 语法单元 ----------
+
+    def _split_range(
+        self,
+        lines: Sequence[str],
+        depths: Sequence[LineDepth],
+        line_tokens: Sequence[int],
+        lo: int,
+        hi: int,
+        headers: Tuple[int, ...],
+        out: List[_Leaf],
+    ) -> None:
+        level = min((depths[k].start for k in range(lo, hi)), default=0)
+        for s, e in segment_ranges(lines, depths, lo, hi, level):
+            tokens = sum(line_tokens[s:e])
+            if tokens <= self.token_target or e - s == 1:
+                out.append(_Leaf(s, e, tokens, headers))
+                continue
+            self._split_segment(lines, depths, line_tokens, s, e, level, headers, out)
+
+    def _split_segment(
+        self,
+        lines: Sequence[str],
+        depths: Sequence[LineDepth],
+        line_tokens: Sequence[int],
+        s: int,
+        e: int,
+        level: int,
+        headers: Tuple[int, ...],
+        out: List[_Leaf],
+    ) -> None:
+        """超出目标的单元：外框行（声明行、收尾行、链式属性行）单独成叶，内部主体按下一层递归。"""
+        def _is_frame(k: int) -> bool:
+            # 外框行：从本层开始，或行内回到本层（如 `}.onClick(() => {`）；首行总视为外框。
+            return k == s or depths[k].start <= level or depths[k].low <= level
+
+        k = s
+        found_body = False
+        while k < e:
+            if _is_frame(k):
+                out.append(_Leaf(k, k + 1, line_tokens[k], headers))
+                k += 1
+                continue
+            body_start = k
+            while k < e and not _is_frame(k):
+                k += 1
+            found_body = True
+            header = self._header_line(lines, body_start, s)
+            body_headers = headers + ((header,) if header >= 0 else ())
+            if body_start < k:
+                self._split_range(lines, depths, line_tokens, body_start, k, body_headers, out)
+        if not found_body:
+            # 单个语法单元内部没有可再分的结构：整体换成带重叠的按行窗口。
+            del out[len(out) - (e - s) :]
+            self._window(line_tokens, s, e, headers, out)
+
+    @staticmethod
+    def _header_line(lines: Sequence[str], body_start: int, seg_start: int) -> int:
+        """主体之前最近的非空声明行。"""
+        k = body_start - 1
+        while k >= seg_start and not lines[k].strip():
+            k -= 1
+        return k if k >= seg_start else -1
+
+    def _window(
+        self,
+        line_tokens: Sequence[int],
+        s: int,
+        e: int,
+        headers: Tuple[int, ...],
+        out: List[_Leaf],
+    ) -> None:
+        i = s
+        while i < e:
+            j = i
+            used = 0
+            while j < e and (j == i or used + line_tokens[j] <= self.token_target):
+                used += line_tokens[j]
+                j += 1
+            out.append(_Leaf(i, j, used, headers))
+            if j >= e:
+                break
+            overlap = min(self.overlap_lines, max(0, (j - i) // 4))
+            i = max(i + 1, j - overlap)
+
+    # ---------- 打包 ----------
+
+    def _pack(self, lines: Sequence[str], line_tokens: Sequence[int], leaves: List[_Leaf]) -> List[CodeChunk]:
+        chunks: List[CodeChunk] = []
+        cur: List[_Leaf] = []
+        used = 0
+
+        def _context(first: _Leaf) -> List[int]:
+            return [h for h in first.headers if h < first.start]
+
+        def _flush() -> None:
+            nonlocal cur, used
+            if not cur:
+                return
+            start, end = cur[0].start, max(x.end for x in cur)
+            ctx = _context(cur[0])
+            ctx_lines = [lines[h] for h in ctx if not (start <= h < end)]
+            body = "\n".join(lines[start:end])
+            text = "\n".join([*ctx_lines, body]) if ctx_lines else body
+            tokens = sum(line_tokens[start:end]) + sum(line_tokens[h] for h in ctx if not (start <= h < end))
+            chunks.append(CodeChunk(text=text, start_line=start, end_line=end, tokens=tokens, context_lines=ctx_lines))
+            cur, used = [], 0
+
+        for leaf in leaves:
+            overlapping = bool(cur) and leaf.start < max(x.end for x in cur)
+            if cur and (overlapping or used + leaf.tokens > self.token_target):
+                _flush()
+            if not cur:
+                used = sum(line_tokens[h] for h in _context(leaf))
+            cur.append(leaf)
+            used += leaf.tokens
+        _flush()
+        return [c for c in chunks if c.text.strip()]
@@ -0,0 +1,282 @@
+"""按语法区域切片源码，只把与锚点（路由调用等）相关的部分发给 LLM。
+
+区域的确定沿用 code_chunker 的括号深度扫描：从锚点行逐层向外，取第一个以组件调用（`Button(...)`、
+`ForEach(...)` 等首字母大写的调用）或方法/函数声明开头的语法单元，即事件归属的组件子树或所在方法；
+锚点落在方法内时再带上调用该方法的组件区域。外层 struct / build / 容器的声明行与 import 一并保留，
+其余行折叠为 `// ...` 标记。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Sequence, Set, Tuple
+
+from agent.tools.code_chunker import LineDepth, is_prefix_line, scan_line_depths, segment_ranges
+
+_COMPONENT_START_RE = re.compile(r"^\s*(?:[A-Z][\w$]*|ForEach|LazyForEach|Repeat)\s*\(")
+_DECL_RE = re.compile(
+    r"^\s*(?:(?:export|default|private|public|protected|static|async|function)\s+)*"
+    r"(?P<name>[A-Za-z_$][\w$]*)\s*(?:<[^>]*>)?\s*"
+    r"(?:\([^;]*\)\s*(?::\s*[^={;]+)?\{|=\s*(?:async\s*)?\([^)]*\)\s*(?::\s*[^=]+)?=>)"
+)
+_CONTROL_WORDS = {"if", "for", "while", "switch", "catch", "return", "else", "do", "try", "with"}
+_LINE_HINT_RE = re.compile(r"(\d+)")
+# 切片后仍保留了这个比例以上的行时直接发送全文，折叠标记得不偿失。
+_MIN_SAVING_RATIO = 0.8
+
+
+@dataclass
+class CodeSlice:
+    """切片结果；sliced 为 False 时 text 即原文。"""
+
+    text: str
+    total_lines: int
+    kept_lines: int
+    sliced: bool
+    anchors: List[int] = field(default_factory=list)
+    missing_anchors: int = 0
+
+
+def _declared_name(line: str) -> str:
+    m = _DECL_RE.match(line)
+    if not m or m.group("name") in _CONTROL_WORDS:
+        return ""
+    return m.group("name")
+
+
+def locate_snippet_lines(code: str, snippet: str, line_hint: str = "") -> List[int]:
+    """
+    按去空白后的片段前缀在源码中定位调用所在行（0 起始，可能多处）；定位失败时参考 line_hint。
+
+    census 会把相同片段去重为一条，因此所有命中位置都返回。
+    """
+    lines = (code or "").split("\n")
+    probe = re.sub(r"\s+", "", str(snippet or "").split("...")[0])[:60]
+    hits: List[int] = []
+    if len(probe) >= 8:
+        compact_chars: List[str] = []
+        owners: List[int] = []
+        for idx, line in enumerate(lines):
+            for ch in line:
+                if not ch.isspace():
+                    compact_chars.append(ch)
+                    owners.append(idx)
+        compact = "".join(compact_chars)
+        pos = compact.find(probe)
+        while pos >= 0:
+            if owners[pos] not in hits:
+                hits.append(owners[pos])
+            pos = compact.find(probe, pos + 1)
+    if hits:
+        return hits
+    m = _LINE_HINT_RE.search(str(line_hint or ""))
+    if m:
+        idx = int(m.group(1)) - 1
+        for k in (idx, idx - 1, idx + 1, idx - 2, idx + 2):
+            if 0 <= k < len(lines) and "router" in lines[k].lower():
+                return [k]
+    return []
+
+
+class CodeSlicer:
+    """单文件切片器（扫描结果在实例内复用）。"""
+
+    def __init__(self, code: str) -> None:
+        self.code = code or ""
+        self.lines = self.code.split("\n")
+        self.depths: List[LineDepth] = scan_line_depths(self.code)
+
+    def enclosing_segments(self, idx: int) -> List[Tuple[int, int]]:
+        """由内向外列出包含 idx 行的各层语法单元（左闭右开区间）。"""
+        out: List[Tuple[int, int]] = []
+        n = len(self.lines)
+        for level in range(self.depths[idx].start, -1, -1):
+            lo = idx
+            while lo > 0 and self.depths[lo - 1].start >= level:
+                lo -= 1
+            hi = idx + 1
+            while hi < n and self.depths[hi].start >= level:
+                hi += 1
+            for s, e in segment_ranges(self.lines, self.depths, lo, hi, level):
+                if s <= idx < e and (not out or (s, e) != out[-1]):
+                    out.append((s, e))
+                    break
+        return out
+
+    def _first_code_line(self, s: int, e: int) -> int:
+        k = s
+        while k < e - 1 and (not self.lines[k].strip() or is_prefix_line(self.lines[k])):
+            k += 1
+        return k
+
+    def owner_region(self, idx: int) -> Tuple[Tuple[int, int], List[int], str]:
+        """
+        返回 (区域, 外层声明行及其装饰器, 区域为方法时的方法名)。
+
+        区域为包含 idx 的最内层组件子树或方法/函数；都找不到时为最内层顶层单元。
+        """
+        segments = self.enclosing_segments(idx)
+        region = segments[-1] if segments else (idx, idx + 1)
+        method = ""
+        pos = len(segments) - 1
+        for i, (s, e) in enumerate(segments):
+            head = self.lines[self._first_code_line(s, e)]
+            if _COMPONENT_START_RE.match(head):
+                region, pos = (s, e), i
+                break
+            name = _declared_name(head)
+            if name and e - s > 1:
+                region, pos, method = (s, e), i, name
+                break
+        return region, self._headers(segments[pos + 1 :]), method
+
+    def _headers(self, segments: Sequence[Tuple[int, int]]) -> List[int]:
+        """各外层单元的声明行，连同其前置装饰器（@Entry / @Component 等）。"""
+        headers: List[int] = []
+        for s, e in segments:
+            headers.extend(k for k in range(s, self._first_code_line(s, e) + 1) if self.lines[k].strip())
+        return headers
+
+    def member_lines(self, idx: int) -> List[int]:
+        """idx 所在的单条语句（含装饰器）及其外层声明行，用于属性声明这类不需要扩展到归属区域的锚点。"""
+        segments = self.enclosing_segments(idx)
+        if not segments:
+            return [idx]
+        return [*range(*segments[0]), *self._headers(segments[1:])]
+
+    def _call_sites(self, method: str, exclude: Tuple[int, int]) -> List[int]:
+        pattern = re.compile(rf"\bthis\.{re.escape(method)}\b|(?<![\w$.]){re.escape(method)}\s*\(")
+        out: List[int] = []
+        for k, line in enumerate(self.lines):
+            if exclude[0] <= k < exclude[1]:
+                continue
+            stripped = line.strip()
+            if stripped.startswith(("//", "*", "import ")) or not pattern.search(line):
+                continue
+            if _declared_name(line) == method:
+                continue
+            out.append(k)
+        return out
+
+    def slice(
+        self,
+        anchors: Iterable[int],
+        *,
+        missing_anchors: int = 0,
+        max_call_sites: int = 5,
+        extra_lines: Iterable[int] = (),
+    ) -> CodeSlice:
+        """
+        保留各锚点的归属区域、外层声明行、extra_lines 与 import；任一锚点未定位、
+        没有任何锚点或节省不足时返回全文。
+        """
+        anchors = sorted({a for a in anchors if 0 <= a < len(self.lines)})
+        total = len(self.lines)
+        keep: Set[int] = {k for k in extra_lines if 0 <= k < total}
+        if missing_anchors or not (anchors or keep):
+            return CodeSlice(self.code, total, total, False, anchors, missing_anchors)
+        pending = list(anchors)
+        expanded: Set[str] = set()
+        while pending:
+            idx = pending.pop()
+            (s, e), headers, method = self.owner_region(idx)
+            keep.update(range(s, e))
+            keep.update(headers)
+            if method and method not in expanded:
+                expanded.add(method)
+                pending.extend(self._call_sites(method, (s, e))[:max_call_sites])
+        keep.update(self._import_lines())
+        if len(keep) >= total * _MIN_SAVING_RATIO:
+            return CodeSlice(self.code, total, total, False, anchors, 0)
+        return CodeSlice(self._render(sorted(keep)), total, len(keep), True, anchors, 0)
+
+    def _import_lines(self) -> List[int]:
+        out: List[int] = []
+        for s, e in segment_ranges(self.lines, self.depths, 0, len(self.lines), 0):
+            if self.lines[self._first_code_line(s, e)].lstrip().startswith("import "):
+                out.extend(range(s, e))
+        return out
+
+    def _render(self, keep: Sequence[int]) -> str:
+        out: List[str] = []
+        prev = -1
+        for k in keep:
+            gap = k - prev - 1
+            if gap > 0:
+                out.append(f"// ... ({gap} lines omitted)")
+            out.append(self.lines[k])
+            prev = k
+        tail = len(self.lines) - prev - 1
+        if tail > 0 and any(ln.strip() for ln in self.lines[prev + 1 :]):
+            out.append(f"// ... ({tail} lines omitted)")
+        return "\n".join(out)
+
+
+def _callback_name(callback_ref: str) -> str:
+    """`this.onItemClick(item)` / `onItemClick` -> `onItemClick`。"""
+    for word in re.findall(r"[A-Za-z_$][\w$]*", str(callback_ref or "")):
+        if word != "this":
+            return word
+    return ""
+
+
+def slice_component(code: str, *, component_symbol: str, callback_ref: str) -> CodeSlice:
+    """
+    跨文件 trigger refine 用的组件切片：定位 component_symbol 对应的 struct（或 @Builder 函数），
+    保留 callback_ref 属性声明（含 @BuilderParam 等装饰器）与 struct 内调用/转发该回调的事件区域及其外层。
+
+    找不到 struct 时返回全文；callback_ref 为空或在 struct 内找不到引用时只保留该 struct。
+    """
+    slicer = CodeSlicer(code)
+    total = len(slicer.lines)
+    symbol = _callback_name(component_symbol)
+    decl_re = re.compile(
+        rf"^\s*(?:export\s+)?(?:default\s+)?(?:struct|class|function)\s+{re.escape(symbol)}\b"
+    ) if symbol else None
+    decl = next((k for k, ln in enumerate(slicer.lines) if decl_re and decl_re.match(ln)), -1)
+    if decl < 0:
+        return CodeSlice(slicer.code, total, total, False)
+    segments = slicer.enclosing_segments(decl)
+    s, e = segments[-1] if segments else (decl, decl + 1)
+
+    callback = _callback_name(callback_ref)
+    declared: List[int] = []
+    anchors: List[int] = []
+    if callback:
+        prop_re = re.compile(
+            rf"^\s*(?:@\w+(?:\([^)]*\))?\s+)*(?:(?:private|public|protected|readonly|static)\s+)*"
+            rf"{re.escape(callback)}\s*[?!]?\s*[:=]"
+        )
+        use_re = re.compile(rf"\bthis\.{re.escape(callback)}\b")
+        for k in range(s, e):
+            line = slicer.lines[k]
+            if prop_re.match(line):
+                declared.extend(slicer.member_lines(k))
+            elif use_re.search(line):
+                anchors.append(k)
+    if not anchors and not declared:
+        keep = sorted(set(range(s, e)) | set(slicer._import_lines()))
+        if len(keep) >= total * _MIN_SAVING_RATIO:
+            return CodeSlice(slicer.code, total, total, False)
+        return CodeSlice(slicer._render(keep), total, len(keep), True)
+    return slicer.slice(anchors, extra_lines=declared)
+
+
+def slice_code_around(code: str, anchor_lines: Iterable[int], *, missing_anchors: int = 0) -> CodeSlice:
+    """便捷入口：对 code 按锚点行切片。"""
+    return CodeSlicer(code).slice(anchor_lines, missing_anchors=missing_anchors)
+
+
+def locate_all(code: str, calls: Sequence[dict]) -> Tuple[List[int], int]:
+    """定位一组 census 调用，返回 (锚点行, 未定位的调用数)。"""
+    anchors: List[int] = []
+    missing = 0
+    for call in calls or []:
+        hits = locate_snippet_lines(code, str(call.get("snippet") or ""), str(call.get("line_hint") or ""))
+        if hits:
+            anchors.extend(hits)
+        else:
+            missing += 1
+    return anchors, missing
+
@@ -0,0 +1,98 @@
+"""构边（construct）prompt 压缩。
+
+原始构边 prompt 每次都携带整份源码、全量 route_constant_map、依赖文件的绝对路径。压缩阶段：
+- route_constant_map 只保留本文件实际引用的常量（`Sym.Key` 出现在源码中；或 `.Key` 出现且 `Sym` 被导入/改名导入）；
+- 文件路径替换为相对 ets 根目录（其次为工程根目录）的短 ID；
+- 源码切片为各 census 调用所在的语法区域（见 code_slicer），任一调用无法在源码中定位时发送全文。
+
+构边输出只引用 call_id 与页面 target，不引用文件路径，因此短 ID 不需要反向映射。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Sequence
+
+from agent.tools.code_slicer import CodeSlicer, locate_all
+from agent.utils.route_utils import normalize_path
+
+_MEMBER_PAIR_RE = re.compile(r"(?=([A-Za-z_$][\w$]*)\s*\.\s*([A-Za-z_$][\w$]*))")
+_WORD_RE = re.compile(r"[A-Za-z_$][\w$]*")
+
+
+@dataclass
+class CompactConstructInput:
+    """压缩后的构边输入，字段与 build_coverage_retry_user_prompt 的参数对应。"""
+
+    file_path: str
+    code: str
+    code_is_slice: bool
+    dependency_chain: List[str]
+    resolved_import_files: List[str]
+    route_constant_map: Dict[str, str]
+    stats: Dict[str, int] = field(default_factory=dict)
+
+
+class ConstructPromptCompactor:
+    """把构边 prompt 的上下文压缩到与本文件 census 调用相关的部分。"""
+
+    def __init__(self, *, ets_root: str, project_root: str) -> None:
+        self._roots = [
+            normalize_path(os.path.abspath(str(r))).rstrip("/") + "/" for r in (ets_root, project_root) if str(r or "")
+        ]
+
+    def file_id(self, path: str) -> str:
+        """项目内的短文件 ID（相对 ets 根目录优先）；项目外路径原样返回。"""
+        p = normalize_path(str(path or ""))
+        for root in self._roots:
+            if p.startswith(root):
+                return p[len(root) :]
+        return p
+
+    @staticmethod
+    def referenced_constants(route_constant_map: Mapping[str, str], code: str) -> Dict[str, str]:
+        """本文件引用到的路由常量（保持原映射顺序）。"""
+        pairs = {(a, b) for a, b in _MEMBER_PAIR_RE.findall(code or "")}
+        members = {b for _, b in pairs}
+        words = set(_WORD_RE.findall(code or ""))
+        out: Dict[str, str] = {}
+        for key, value in (route_constant_map or {}).items():
+            sym, _, member = str(key).rpartition(".")
+            if not sym:
+                continue
+            head = sym.rpartition(".")[2]
+            if (head, member) in pairs or (member in members and head in words):
+                out[key] = value
+        return out
+
+    def compact(
+        self,
+        *,
+        file_path: str,
+        code: str,
+        dependency_chain: Sequence[str],
+        resolved_import_files: Sequence[str],
+        route_constant_map: Mapping[str, str],
+        census_calls: Sequence[Mapping[str, Any]],
+    ) -> CompactConstructInput:
+        anchors, missing = locate_all(code, [dict(c) for c in census_calls or []])
+        sliced = CodeSlicer(code).slice(anchors, missing_anchors=missing)
+        constants = self.referenced_constants(route_constant_map, code)
+        return CompactConstructInput(
+            file_path=self.file_id(file_path),
+            code=sliced.text,
+            code_is_slice=sliced.sliced,
+            dependency_chain=[self.file_id(x) for x in dependency_chain or []],
+            resolved_import_files=[self.file_id(x) for x in resolved_import_files or []],
+            route_constant_map=constants,
+            stats={
+                "route_constants_total": len(route_constant_map or {}),
+                "route_constants_kept": len(constants),
+                "code_lines_total": sliced.total_lines,
+                "code_lines_kept": sliced.kept_lines,
+                "sliced": int(sliced.sliced),
+                "unlocated_calls": missing,
+            },
+        )
@@ -0,0 +1,120 @@
+"""文件系统探测缓存：目录列表缓存 + 规范路径缓存。
+
+用于 ProjectFileTable 根目录之外的零散探测（如 alias 指向的模块、相对路径跳出 ets_root 的导入），
+以及 Path.resolve() 的记忆化。网络挂载的检出目录上每次 stat 都很慢，这里按目录一次 scandir，
+之后同目录下的所有存在性判断都从内存回答，并统计避免的系统调用次数。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+
+class DirListingCache:
+    """目录 -> {文件名: (is_dir, size, mtime_ns)} 的缓存；每个目录只 scandir 一次。"""
+
+    def __init__(self) -> None:
+        self._listings: Dict[str, Optional[Dict[str, Tuple[bool, int, int]]]] = {}
+        self._lock = threading.Lock()
+        self.scandir_calls = 0
+        self.stat_calls = 0
+        self.queries = 0
+        self.avoided_stat_calls = 0
+
+    def _listing(self, directory: str) -> Optional[Dict[str, Tuple[bool, int, int]]]:
+        with self._lock:
+            if directory in self._listings:
+                return self._listings[directory]
+        listing: Optional[Dict[str, Tuple[bool, int, int]]] = None
+        scandir_calls = 0
+        stat_calls = 0
+        try:
+            scandir_calls += 1
+            with os.scandir(directory) as it:
+                listing = {}
+                for e in it:
+                    try:
+                        if e.is_dir():
+                            listing[e.name] = (True, 0, 0)
+                        elif e.is_file():
+                            st = e.stat()
+                            stat_calls += 1
+                            listing[e.name] = (False, int(st.st_size), int(st.st_mtime_ns))
+                    except OSError:
+                        continue
+        except OSError:
+            listing = None
+        with self._lock:
+            self.scandir_calls += scandir_calls
+            self.stat_calls += stat_calls
+            self._listings[directory] = listing
+        return listing
+
+    def lookup(self, path: str) -> Optional[Tuple[bool, int, int]]:
+        """
+        查询 path（已规范化的绝对路径）的 (is_dir, size, mtime_ns)；不存在时返回 None。
+
+        父目录已缓存时不触发任何系统调用（计入 avoided_stat_calls）。
+        """
+        parent, name = os.path.split(path)
+        with self._lock:
+            self.queries += 1
+            if parent in self._listings:
+                self.avoided_stat_calls += 1
+        if not name:
+            return (True, 0, 0) if os.path.isdir(path) else None
+        listing = self._listing(parent)
+        if listing is None:
+            return None
+        return listing.get(name)
+
+    def invalidate(self, directory: str) -> None:
+        with self._lock:
+            self._listings.pop(directory, None)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "dirs_listed": len(self._listings),
+                "scandir_calls": self.scandir_calls,
+                "stat_calls": self.stat_calls,
+                "queries": self.queries,
+                "avoided_stat_calls": self.avoided_stat_calls,
+            }
+
+
+class CanonicalPathCache:
+    """Path.resolve()（os.path.realpath）的记忆化缓存。"""
+
+    def __init__(self) -> None:
+        self._cache: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # realpath 对每一级路径做一次 lstat；命中时按路径层级数估算避免的调用。
+        self.avoided_lstat_calls = 0
+
+    def canonical(self, path: str) -> str:
+        key = os.path.abspath(path)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self.hits += 1
+                self.avoided_lstat_calls += max(1, key.count(os.sep))
+                return hit
+        resolved = os.path.realpath(key)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = resolved
+        return resolved
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "avoided_lstat_calls": self.avoided_lstat_calls,
+            }
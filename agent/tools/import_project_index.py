@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import re
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Set
 
+from agent.tools.project_file_table import FileEntry, ProjectFileTable
+from agent.tools.project_index_cache import ProjectIndexCache, file_stat
 from agent.utils.route_utils import normalize_path
 
 _OH_PACKAGE_DEP_FILE_RE = re.compile(
@@ -23,19 +26,69 @@ _SYSTEM_OHOS_MODULES = {
 }
 
 
+@dataclass
+class ModuleSymbolIndex:
+    """单个模块目录的符号索引：导出符号 -> 文件列表、文件名(stem) -> 文件列表，均按路径排序。"""
+
+    module_dir: str
+    exports: Dict[str, List[str]] = field(default_factory=dict)
+    stems: Dict[str, List[str]] = field(default_factory=dict)
+    # 参与导出索引的文件（受 800 文件上限约束）及其导出符号
+    export_files: Dict[str, List[str]] = field(default_factory=dict)
+
+    def add_file(self, path: str, *, stem: str, symbols: Optional[List[str]]) -> None:
+        _insert_sorted(self.stems.setdefault(stem, []), path)
+        if symbols is None:
+            return
+        self.export_files[path] = list(symbols)
+        for sym in symbols:
+            if sym:
+                _insert_sorted(self.exports.setdefault(sym, []), path)
+
+    def remove_file(self, path: str) -> None:
+        for table in (self.stems, self.exports):
+            for key in [k for k, paths in table.items() if path in paths]:
+                table[key] = [p for p in table[key] if p != path]
+                if not table[key]:
+                    del table[key]
+        self.export_files.pop(path, None)
+
+    def export_map(self) -> Dict[str, str]:
+        """兼容旧接口：符号 -> 第一个（按路径排序）导出文件。"""
+        return {sym: paths[0] for sym, paths in self.exports.items() if paths}
+
+
+def _insert_sorted(paths: List[str], path: str) -> None:
+    if path in paths:
+        return
+    paths.append(path)
+    paths.sort()
+
+
 class ImportProjectIndex:
     """维护项目级导入索引：alias 映射、模块目录定位、导出符号索引。"""
 
-    def __init__(self, *, ets_root: str, manual_alias_map: Optional[Dict[str, str]] = None) -> None:
+    def __init__(
+        self,
+        *,
+        ets_root: str,
+        manual_alias_map: Optional[Dict[str, str]] = None,
+        index_cache: Optional[ProjectIndexCache] = None,
+        file_table: Optional[ProjectFileTable] = None,
+    ) -> None:
         """初始化项目索引，构建自动 alias 与统一 alias 视图。"""
         self.ets_root = Path(ets_root)
         self.manual_alias_map = dict(manual_alias_map or {})
+        self._index_cache = index_cache
+        self.file_table = file_table if file_table is not None else ProjectFileTable()
         self.project_roots = self._discover_project_roots(self.ets_root)
-        self.auto_alias_map = self._discover_alias_map_from_project(self.project_roots)
+        self.auto_alias_map = self._discover_alias_map_cached(self.project_roots)
         self.all_alias_map = dict(self.auto_alias_map)
         # 手工配置优先级更高
         self.all_alias_map.update(self.manual_alias_map)
-        self._module_export_cache: Dict[str, Dict[str, str]] = {}
+        # alias 指向的模块目录在启动时一并遍历进文件表。
+        self.file_table.add_roots(sorted({v for v in self.all_alias_map.values() if v and Path(v).is_dir()}))
+        self._module_indexes: Dict[str, ModuleSymbolIndex] = {}
 
     @staticmethod
     def is_system_ohos_import(import_path: str) -> bool:
@@ -49,9 +102,8 @@ class ImportProjectIndex:
         mod = (parts[1] or "").strip().lower()
         return mod in _SYSTEM_OHOS_MODULES
 
-    @staticmethod
-    def probe_ets_file(base: Path) -> Optional[str]:
-        """按常见候选规则探测 .ets 文件。"""
+    def probe_ets_file(self, base: Path) -> Optional[str]:
+        """按常见候选规则探测 .ets 文件（查询文件表）。"""
         candidates = [
             base,
             base.with_suffix(".ets"),
@@ -60,7 +112,7 @@ class ImportProjectIndex:
         ]
         for c in candidates:
             try:
-                if c.exists() and c.is_file() and c.suffix.lower() == ".ets":
+                if c.suffix.lower() == ".ets" and self.file_table.is_file(c):
                     return str(c)
             except Exception:
                 continue
@@ -84,17 +136,17 @@ class ImportProjectIndex:
             elif tail == "src/main/ets" and normalize_path(str(alias_base)).endswith("/src/main/ets"):
                 tail = ""
             base = alias_base / tail if tail else alias_base
-            if base.is_file():
+            if self.file_table.is_file(base):
                 return str(base.parent)
-            if base.exists() and base.is_dir():
+            if self.file_table.is_dir(base):
                 return str(base)
             return str(base.parent if tail else base)
 
         if ip.startswith("./") or ip.startswith("../"):
-            base = (cur.parent / ip).resolve()
-            if base.is_file():
+            base = Path(self.file_table.canonical(cur.parent / ip))
+            if self.file_table.is_file(base):
                 return str(base.parent)
-            if base.exists() and base.is_dir():
+            if self.file_table.is_dir(base):
                 return str(base)
             return str(base.parent)
 
@@ -105,10 +157,10 @@ class ImportProjectIndex:
                 return None
             for root in self.project_roots:
                 for base in [root / "feature" / mod, root / "features" / mod, root / mod]:
-                    if not base.exists() or not base.is_dir():
+                    if not self.file_table.is_dir(base):
                         continue
                     ets_base = base / "src" / "main" / "ets"
-                    if ets_base.exists() and ets_base.is_dir():
+                    if self.file_table.is_dir(ets_base):
                         return str(ets_base)
                     return str(base)
         return None
@@ -129,10 +181,10 @@ class ImportProjectIndex:
 
         for root in self.project_roots:
             for base in [root / "feature" / module, root / "features" / module, root / module]:
-                if not base.exists() or not base.is_dir():
+                if not self.file_table.is_dir(base):
                     continue
                 ets_base = base / "src" / "main" / "ets"
-                b = ets_base if (ets_base.exists() and ets_base.is_dir()) else base
+                b = ets_base if self.file_table.is_dir(ets_base) else base
 
                 norm_tail = tail
                 if norm_tail.startswith("src/main/ets/"):
@@ -144,29 +196,55 @@ class ImportProjectIndex:
         return None
 
     def build_module_export_map(self, module_dir: str) -> Dict[str, str]:
-        """扫描模块目录，建立导出符号到文件路径的索引。"""
+        """扫描模块目录，建立导出符号到文件路径的索引（同名符号取路径排序第一个）。"""
+        return self.get_module_index(module_dir).export_map()
+
+    def get_module_index(self, module_dir: str) -> ModuleSymbolIndex:
+        """获取（首次访问时构建）模块目录的符号索引；之后的符号/文件名查询均为 O(1)。"""
         key = normalize_path(module_dir)
-        cached = self._module_export_cache.get(key)
-        if cached is not None:
-            return cached
+        idx = self._module_indexes.get(key)
+        if idx is not None:
+            return idx
+        idx = ModuleSymbolIndex(module_dir=key)
+        files = self.file_table.files_under(module_dir, suffixes={".ets"})
+        for i, f in enumerate(files):
+            # 导出索引沿用 800 文件上限；文件名索引不读文件内容，覆盖全部文件。
+            idx.add_file(f.path, stem=f.stem, symbols=self._file_exported_symbols(f) if i < 800 else None)
+        self._module_indexes[key] = idx
+        return idx
+
+    def lookup_symbol(self, module_dir: str, symbol: str) -> List[str]:
+        """返回模块目录内导出该符号的所有文件（按路径排序）。"""
+        return list(self.get_module_index(module_dir).exports.get(symbol, []))
+
+    def lookup_stem(self, module_dir: str, stem: str) -> List[str]:
+        """返回模块目录内文件名（不含后缀）等于 stem 的所有 .ets 文件（按路径排序）。"""
+        return list(self.get_module_index(module_dir).stems.get(stem, []))
+
+    def refresh_file(self, file_path: str) -> None:
+        """文件新增/修改/删除后刷新文件表与所有包含该文件的模块索引。"""
+        entry = self.file_table.refresh(file_path)
+        path = entry.path if entry is not None else str(Path(file_path).absolute())
+        for key, idx in self._module_indexes.items():
+            if not normalize_path(path).startswith(key.rstrip("/") + "/"):
+                continue
+            had_exports = path in idx.export_files
+            idx.remove_file(path)
+            if entry is None or entry.suffix != ".ets":
+                continue
+            in_export_cap = had_exports or len(idx.export_files) < 800
+            idx.add_file(path, stem=entry.stem, symbols=self._file_exported_symbols(entry) if in_export_cap else None)
 
-        out: Dict[str, str] = {}
-        root = Path(module_dir)
-        if not root.exists() or not root.is_dir():
-            self._module_export_cache[key] = out
-            return out
+    def _file_exported_symbols(self, entry: FileEntry) -> List[str]:
+        """读取单个文件的导出符号；启用磁盘缓存时仅在文件变化后重新读取。"""
 
-        files = list(root.rglob("*.ets"))[:800]
-        for f in files:
-            try:
-                text = f.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                continue
-            for sym in self._extract_exported_symbols(text):
-                if sym and sym not in out:
-                    out[sym] = str(f)
-        self._module_export_cache[key] = out
-        return out
+        def _read(p: Path) -> List[str]:
+            return sorted(self._extract_exported_symbols(self.file_table.read_text(p)))
+
+        if self._index_cache is None:
+            return _read(Path(entry.path))
+        symbols, _ = self._index_cache.file_entry("export_symbols", Path(entry.path), _read, stat=entry.stat)
+        return list(symbols or [])
 
     @staticmethod
     def _extract_exported_symbols(text: str) -> Set[str]:
@@ -217,6 +295,23 @@ class ImportProjectIndex:
             out.append(r)
         return out
 
+    def _discover_alias_map_cached(self, project_roots: List[Path]) -> Dict[str, str]:
+        """带磁盘缓存的 alias 发现：各候选配置文件的 size/mtime 均未变化时直接复用。"""
+        if self._index_cache is None:
+            return self._discover_alias_map_from_project(project_roots)
+        key = "|".join(normalize_path(str(r)) for r in project_roots)
+        entry = self._index_cache.get("alias_map", key)
+        if isinstance(entry, dict) and self._index_cache.stats_match(entry.get("stats") or {}):
+            return dict(entry.get("alias_map") or {})
+        alias_map = self._discover_alias_map_from_project(project_roots)
+        stats = {
+            str(root / name): file_stat(root / name)
+            for root in project_roots
+            for name in ("build-profile.json5", "oh-package.json5")
+        }
+        self._index_cache.put("alias_map", key, {"stats": stats, "alias_map": alias_map})
+        return alias_map
+
     def _discover_alias_map_from_project(self, project_roots: List[Path]) -> Dict[str, str]:
         """从工程配置文件自动发现 alias 映射。"""
         alias_map: Dict[str, str] = {}
@@ -1,69 +1,93 @@
 from __future__ import annotations
 
 import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+from agent.tools.ast_cache import AstCache
 from agent.tools.import_project_index import ImportProjectIndex
+from agent.tools.project_file_table import ProjectFileTable
+from agent.tools.project_index_cache import ProjectIndexCache
 from agent.tools.project_reader import ProjectReader
 from agent.utils.route_utils import normalize_path
 
-try:
-    from tree_sitter import Language, Parser  # type: ignore
-    from tree_sitter_typescript import language_typescript  # type: ignore
-except Exception:  # pragma: no cover - optional dependency
-    Language = None  # type: ignore
-    Parser = None  # type: ignore
-    language_typescript = None  # type: ignore
-
-
 _IMPORT_RE = re.compile(r"""import\s+(.+?)\s+from\s+(['\"])(.+?)\2\s*;?""", re.IGNORECASE | re.DOTALL)
 _EXPORT_FROM_RE = re.compile(
     r"""export\s+(type\s+)?(\*|\{[\s\S]*?\})\s+from\s+(['\"])(.+?)\3\s*;?""",
     re.IGNORECASE | re.DOTALL,
 )
-
-
-def _build_ts_parser() -> Optional[Any]:
-    """构造 TS/ArkTS AST 解析器，失败时返回 None。"""
-    if Parser is None or language_typescript is None:
-        return None
-    try:
-        parser = Parser()
-        ts_lang = language_typescript()
-        if Language is not None:
-            try:
-                ts_lang = Language(ts_lang)  # tree-sitter>=0.25: capsule -> Language
-            except Exception:
-                pass
-        if hasattr(parser, "language"):
-            parser.language = ts_lang
-        else:
-            parser.set_language(ts_lang)
-        return parser
-    except Exception:
-        return None
+# extract_imports 记忆化的条目上限（LRU）；每条只是符号 -> 模块路径的小字典。
+_IMPORTS_MEMO_MAX_ENTRIES = 20000
 
 
 class ImportResolver:
     """导入解析器：提取 import/export，并解析为可分析的 .ets 文件。"""
 
-    def __init__(self, *, reader: ProjectReader, import_alias_map: Optional[Dict[str, str]] = None) -> None:
+    def __init__(
+        self,
+        *,
+        reader: ProjectReader,
+        import_alias_map: Optional[Dict[str, str]] = None,
+        index_cache: Optional[ProjectIndexCache] = None,
+        file_table: Optional[ProjectFileTable] = None,
+        ast_cache: Optional[AstCache] = None,
+    ) -> None:
         """初始化解析器与项目索引。"""
         self.reader = reader
         self.import_alias_map = dict(import_alias_map or {})
-        self._project_index = ImportProjectIndex(ets_root=str(reader.ets_root), manual_alias_map=self.import_alias_map)
+        self._project_index = ImportProjectIndex(
+            ets_root=str(reader.ets_root),
+            manual_alias_map=self.import_alias_map,
+            index_cache=index_cache,
+            file_table=file_table,
+        )
+        self._files = self._project_index.file_table
         self._auto_alias_map = dict(self._project_index.auto_alias_map)
         self._all_alias_map = dict(self._project_index.all_alias_map)
         self._unresolved_log_once: Set[str] = set()
         self._unresolved_stats: Dict[str, Tuple[int, Set[str]]] = {}
+        self._ambiguous_symbols: Dict[str, Dict[str, Any]] = {}
         if self._auto_alias_map:
             print("[ImportResolver] Auto alias discovered: " + ", ".join(sorted(self._auto_alias_map.keys())))
-        self._ts_parser = _build_ts_parser()
+        self._ast_cache = ast_cache if ast_cache is not None else AstCache()
+        # extract_imports 结果按源码内容哈希记忆化（同一文件被多个 main page 访问时不重复提取）。
+        self._imports_memo: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self.imports_memo_hits = 0
+        self.imports_memo_misses = 0
+        self.imports_memo_evictions = 0
+        # 公开方法持锁执行：tool-calling 在工作线程中调用解析器，与事件循环线程共用记忆化、模块索引与统计。
+        self._lock = threading.RLock()
 
     def extract_imports(self, source_code: str) -> Dict[str, str]:
         """从源码提取导入符号映射：symbol_alias -> module_path。"""
-        code = source_code or ""
+        with self._lock:
+            code = source_code or ""
+            key = AstCache.content_key(code.encode("utf-8", errors="ignore"))
+            memo = self._imports_memo.get(key)
+            if memo is not None:
+                self._imports_memo.move_to_end(key)
+                self.imports_memo_hits += 1
+                return dict(memo)
+            self.imports_memo_misses += 1
+            out = self._extract_imports_uncached(code)
+            self._imports_memo[key] = dict(out)
+            while len(self._imports_memo) > _IMPORTS_MEMO_MAX_ENTRIES:
+                self._imports_memo.popitem(last=False)
+                self.imports_memo_evictions += 1
+            return out
+
+    def get_imports_memo_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._imports_memo),
+                "hits": self.imports_memo_hits,
+                "misses": self.imports_memo_misses,
+                "evictions": self.imports_memo_evictions,
+            }
+
+    def _extract_imports_uncached(self, code: str) -> Dict[str, str]:
         statements = self._extract_import_statements_ast(code)
         if statements is None:
             return self._extract_imports_regex(code)
@@ -82,22 +106,23 @@ class ImportResolver:
 
     def resolve_imports_to_files(self, *, imports: Dict[str, str], current_file_path: str) -> Dict[str, str]:
         """把导入映射解析成文件映射：symbol_alias -> .ets 文件路径。"""
-        out: Dict[str, str] = {}
-        for alias, mod in (imports or {}).items():
-            if not alias or not mod:
-                continue
-            resolved = self._resolve_import_to_ets(mod, current_file_path=current_file_path)
-            if not resolved:
-                resolved = self._resolve_import_by_symbol(
-                    symbol_alias=alias,
-                    import_path=mod,
-                    current_file_path=current_file_path,
-                )
-            if resolved:
-                out[alias] = resolved
-            elif self._should_track_unresolved_import(mod):
-                self._record_unresolved_import(mod, current_file_path=current_file_path)
-        return out
+        with self._lock:
+            out: Dict[str, str] = {}
+            for alias, mod in (imports or {}).items():
+                if not alias or not mod:
+                    continue
+                resolved = self._resolve_import_to_ets(mod, current_file_path=current_file_path)
+                if not resolved:
+                    resolved = self._resolve_import_by_symbol(
+                        symbol_alias=alias,
+                        import_path=mod,
+                        current_file_path=current_file_path,
+                    )
+                if resolved:
+                    out[alias] = resolved
+                elif self._should_track_unresolved_import(mod):
+                    self._record_unresolved_import(mod, current_file_path=current_file_path)
+            return out
 
     def resolve_import_path(
         self,
@@ -107,20 +132,21 @@ class ImportResolver:
         symbol_alias: str = "",
     ) -> Optional[str]:
         """解析单个 import_path 到 .ets 文件，可选结合 symbol_alias 做符号反查。"""
-        ip = normalize_path(import_path)
-        sa = (symbol_alias or "").strip()
-        if not ip:
+        with self._lock:
+            ip = normalize_path(import_path)
+            sa = (symbol_alias or "").strip()
+            if not ip:
+                return None
+            resolved = self._resolve_import_to_ets(ip, current_file_path=current_file_path)
+            if resolved:
+                return resolved
+            if sa:
+                return self._resolve_import_by_symbol(
+                    symbol_alias=sa,
+                    import_path=ip,
+                    current_file_path=current_file_path,
+                )
             return None
-        resolved = self._resolve_import_to_ets(ip, current_file_path=current_file_path)
-        if resolved:
-            return resolved
-        if sa:
-            return self._resolve_import_by_symbol(
-                symbol_alias=sa,
-                import_path=ip,
-                current_file_path=current_file_path,
-            )
-        return None
 
     def find_nested_component_files(self, *, imports: Dict[str, str], current_file_path: str) -> List[str]:
         """返回当前文件可递归进入的依赖文件列表（去重）。"""
@@ -135,20 +161,26 @@ class ImportResolver:
             out.append(file_path)
         return out
 
+    def refresh_file(self, file_path: str) -> None:
+        """文件变更后刷新文件表与模块符号索引（长驻/增量场景使用）。"""
+        with self._lock:
+            self._project_index.refresh_file(file_path)
+
     def get_unresolved_imports_summary(self, *, top_n: int = 20) -> List[Dict[str, Any]]:
         """获取未解析 import 的统计摘要。"""
-        rows: List[Dict[str, Any]] = []
-        for ip, (cnt, files) in self._unresolved_stats.items():
-            rows.append(
-                {
-                    "import_path": ip,
-                    "count": int(cnt),
-                    "files_count": len(files),
-                    "sample_files": sorted(list(files))[:3],
-                }
-            )
-        rows.sort(key=lambda x: (-int(x["count"]), str(x["import_path"])))
-        return rows[: max(1, int(top_n))]
+        with self._lock:
+            rows: List[Dict[str, Any]] = []
+            for ip, (cnt, files) in self._unresolved_stats.items():
+                rows.append(
+                    {
+                        "import_path": ip,
+                        "count": int(cnt),
+                        "files_count": len(files),
+                        "sample_files": sorted(list(files))[:3],
+                    }
+                )
+            rows.sort(key=lambda x: (-int(x["count"]), str(x["import_path"])))
+            return rows[: max(1, int(top_n))]
 
     @staticmethod
     def _should_track_unresolved_import(import_path: str) -> bool:
@@ -222,7 +254,7 @@ class ImportResolver:
         else:
             base = self.reader.ets_root / ip
 
-        resolved = ImportProjectIndex.probe_ets_file(base)
+        resolved = self._project_index.probe_ets_file(base)
         if resolved:
             if alias_hit:
                 print(f"[ImportResolver] Alias hit: {alias_hit} | {ip} -> {resolved}")
@@ -231,7 +263,7 @@ class ImportResolver:
         # 命中模块目录但没有 index.ets：后续交给符号级解析，不算错误。
         if alias_hit and alias_base is not None:
             module_dir = alias_base / tail if tail else alias_base
-            if module_dir.exists() and module_dir.is_dir():
+            if self._files.is_dir(module_dir):
                 return None
 
         if alias_hit:
@@ -258,30 +290,78 @@ class ImportResolver:
         if not module_dir:
             return None
 
-        export_map = self._project_index.build_module_export_map(module_dir)
-        hit = export_map.get(sym)
-        if hit:
-            print(f"[ImportResolver] Symbol resolve: {sym} <- {ip} -> {hit}")
-            return hit
+        exporters = self._project_index.lookup_symbol(module_dir, sym)
+        if exporters:
+            hit = self._pick_symbol_file(sym, ip, exporters, kind="export")
+            if hit:
+                print(f"[ImportResolver] Symbol resolve: {sym} <- {ip} -> {hit}")
+                return hit
 
         # 文件名兜底
-        for p in Path(module_dir).rglob("*.ets"):
-            if p.stem == sym:
-                print(f"[ImportResolver] Symbol fallback by filename: {sym} <- {ip} -> {str(p)}")
-                return str(p)
+        same_stem = self._project_index.lookup_stem(module_dir, sym)
+        if same_stem:
+            hit = self._pick_symbol_file(sym, ip, same_stem, kind="filename")
+            if hit:
+                print(f"[ImportResolver] Symbol fallback by filename: {sym} <- {ip} -> {hit}")
+                return hit
         return None
 
+    def _pick_symbol_file(self, symbol: str, import_path: str, candidates: List[str], *, kind: str) -> Optional[str]:
+        """
+        从多个候选文件中选出符号定义文件。
+
+        - 唯一候选直接返回；
+        - 多个导出同名符号时，优先文件名与符号一致的唯一候选，否则取路径排序第一个；
+        - 文件名兜底出现多个同名文件时同样取路径排序第一个，保证结果确定；
+        - 存在多个候选时均记录歧义，便于事后核对。
+        """
+        if len(candidates) == 1:
+            return candidates[0]
+        ordered = sorted(candidates)
+        same_stem = [c for c in ordered if Path(c).stem == symbol]
+        chosen = same_stem[0] if kind == "export" and len(same_stem) == 1 else ordered[0]
+        self._record_ambiguous_symbol(symbol, import_path, candidates, kind=kind, chosen=chosen)
+        return chosen
+
+    def _record_ambiguous_symbol(
+        self,
+        symbol: str,
+        import_path: str,
+        candidates: List[str],
+        *,
+        kind: str,
+        chosen: Optional[str],
+    ) -> None:
+        key = f"{kind}|{import_path}|{symbol}"
+        row = self._ambiguous_symbols.get(key)
+        if row is None:
+            row = {
+                "kind": kind,
+                "import_path": import_path,
+                "symbol": symbol,
+                "candidates": [normalize_path(c) for c in candidates],
+                "chosen": normalize_path(chosen) if chosen else "",
+                "count": 0,
+            }
+            self._ambiguous_symbols[key] = row
+            print(
+                f"[ImportResolver] Ambiguous symbol ({kind}): {symbol} <- {import_path} | "
+                f"candidates={len(candidates)}, chosen={row['chosen'] or '-'}"
+            )
+        row["count"] += 1
+
+    def get_ambiguous_symbols_summary(self, *, top_n: int = 20) -> List[Dict[str, Any]]:
+        """获取符号歧义（多个文件导出同名符号 / 多个同名文件）的统计摘要。"""
+        with self._lock:
+            rows = sorted(self._ambiguous_symbols.values(), key=lambda r: (-int(r["count"]), r["symbol"]))
+            return [dict(r) for r in rows[: max(1, int(top_n))]]
+
     def _extract_import_statements_ast(self, source_code: str) -> Optional[List[str]]:
         """用 AST 提取 import/export 语句文本，失败返回 None。"""
-        if self._ts_parser is None:
-            return None
-        src_bytes = (source_code or "").encode("utf-8", errors="ignore")
-        try:
-            tree = self._ts_parser.parse(src_bytes)
-        except Exception:
-            return None
-        if tree is None or tree.root_node is None:
+        parsed = self._ast_cache.parse(source_code or "")
+        if parsed is None:
             return None
+        tree, src_bytes = parsed.tree, parsed.src_bytes
 
         statements: List[str] = []
         stack = [tree.root_node]
@@ -0,0 +1,314 @@
+"""项目文件表：启动时并行遍历一次目录树，供各解析器查询，替代分散的 rglob / exists / read_text。
+
+表中每个文件记录 path / stem / suffix / size / mtime，文本与内容哈希按需加载并缓存。
+与 rglob 一致，遍历不进入指向目录的符号链接（oh_modules 等链接目录不会重复收录或形成环）。
+列目录 / 按文件名查找的目录不在已遍历的根目录下时，把该目录作为新根遍历一次；
+根目录之外的单个文件/目录存在性查询走目录列表缓存（每个父目录一次 scandir），规范路径走 realpath 缓存。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import stat as stat_module
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from agent.tools.fs_cache import CanonicalPathCache, DirListingCache
+
+PathLike = Union[str, Path]
+
+
+def _norm(path: PathLike) -> str:
+    """规范化为绝对路径字符串（纯字符串运算，不触发系统调用）。"""
+    return os.path.normpath(os.path.abspath(str(path)))
+
+
+@dataclass
+class FileEntry:
+    path: str
+    stem: str
+    suffix: str
+    size: int
+    mtime_ns: int
+
+    @property
+    def stat(self) -> List[int]:
+        return [self.size, self.mtime_ns]
+
+
+class ProjectFileTable:
+    """内存文件表（线程安全）。"""
+
+    def __init__(
+        self,
+        roots: Iterable[PathLike] = (),
+        *,
+        max_workers: int = 8,
+        max_text_cache_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.max_text_cache_bytes = max(0, int(max_text_cache_bytes))
+        self._roots: List[str] = []
+        self._files: Dict[str, FileEntry] = {}
+        self._dirs: Set[str] = set()
+        # 目录 -> 直接子文件（按文件名排序后的 FileEntry 列表）
+        self._children: Dict[str, List[FileEntry]] = {}
+        self._subdirs: Dict[str, List[str]] = {}
+        self._stem_index: Dict[str, List[FileEntry]] = {}
+        # 根目录之外的零散查询
+        self.listings = DirListingCache()
+        self.canonical_paths = CanonicalPathCache()
+        self._texts: Dict[str, str] = {}
+        self._hashes: Dict[str, str] = {}
+        self._text_bytes = 0
+        self._lock = threading.RLock()
+        self.stats: Dict[str, Any] = {
+            "roots": 0,
+            "dirs": 0,
+            "files": 0,
+            "scandir_calls": 0,
+            # scandir 条目上的 stat（DirEntry.stat）次数
+            "stat_calls": 0,
+            "walk_seconds": 0.0,
+            "text_reads": 0,
+            "text_hits": 0,
+            "hashes": 0,
+            # 根目录内由内存直接回答的存在性查询（每次相当于省去一次 stat）
+            "avoided_stat_calls": 0,
+        }
+        self.add_roots(roots)
+
+    # ---------- 遍历 ----------
+
+    def add_roots(self, roots: Iterable[PathLike]) -> None:
+        """遍历尚未覆盖的根目录（已被其它根覆盖的目录直接跳过）。"""
+        for r in roots:
+            root = _norm(r)
+            if self._covered(root):
+                continue
+            self._walk(root)
+
+    def _covered(self, path: str) -> bool:
+        with self._lock:
+            for r in self._roots:
+                if path == r or path.startswith(r.rstrip(os.sep) + os.sep):
+                    return True
+        return False
+
+    @staticmethod
+    def _scan_dir(path: str) -> Tuple[List[str], List[FileEntry], int]:
+        subdirs: List[str] = []
+        files: List[FileEntry] = []
+        stat_calls = 0
+        try:
+            with os.scandir(path) as it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            subdirs.append(e.path)
+                        elif e.is_file():
+                            st = e.stat()
+                            stat_calls += 1
+                            stem, suffix = os.path.splitext(e.name)
+                            files.append(
+                                FileEntry(
+                                    path=e.path,
+                                    stem=stem,
+                                    suffix=suffix.lower(),
+                                    size=int(st.st_size),
+                                    mtime_ns=int(st.st_mtime_ns),
+                                )
+                            )
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        subdirs.sort()
+        files.sort(key=lambda f: f.path)
+        return subdirs, files, stat_calls
+
+    def _walk(self, root: str) -> None:
+        """按层并行 scandir，构建文件表。"""
+        t0 = time.perf_counter()
+        if not os.path.isdir(root):
+            return
+        frontier = [root]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while frontier:
+                results = list(pool.map(self._scan_dir, frontier))
+                next_frontier: List[str] = []
+                with self._lock:
+                    for d, (subdirs, files, stat_calls) in zip(frontier, results):
+                        self.stats["scandir_calls"] += 1
+                        self.stats["stat_calls"] += stat_calls
+                        self._dirs.add(d)
+                        self._subdirs[d] = subdirs
+                        self._children[d] = files
+                        for f in files:
+                            self._files[f.path] = f
+                            self._stem_index.setdefault(f.stem, []).append(f)
+                        next_frontier.extend(subdirs)
+                frontier = next_frontier
+        with self._lock:
+            # 新根可能覆盖旧根：保留最外层即可。
+            self._roots = [r for r in self._roots if not r.startswith(root.rstrip(os.sep) + os.sep)] + [root]
+            self.stats["roots"] = len(self._roots)
+            self.stats["dirs"] = len(self._dirs)
+            self.stats["files"] = len(self._files)
+            self.stats["walk_seconds"] = round(self.stats["walk_seconds"] + time.perf_counter() - t0, 6)
+
+    @staticmethod
+    def _stat_entry(path: str) -> Optional[FileEntry]:
+        """对单个路径做一次 stat，是普通文件时返回 FileEntry。"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat_module.S_ISREG(st.st_mode):
+            return None
+        stem, suffix = os.path.splitext(os.path.basename(path))
+        return FileEntry(path=path, stem=stem, suffix=suffix.lower(), size=int(st.st_size), mtime_ns=int(st.st_mtime_ns))
+
+    def refresh(self, path: PathLike) -> Optional[FileEntry]:
+        """
+        单个文件变更（新增/修改/删除）后刷新表项，并丢弃其文本与哈希缓存。
+
+        Returns:
+            刷新后的 FileEntry；文件已不存在时返回 None。
+        """
+        p = _norm(path)
+        parent = os.path.dirname(p)
+        entry = self._stat_entry(p)
+        with self._lock:
+            old = self._files.pop(p, None)
+            if old is not None:
+                self._stem_index[old.stem] = [f for f in self._stem_index.get(old.stem, []) if f.path != p]
+                self._children[parent] = [f for f in self._children.get(parent, []) if f.path != p]
+            text = self._texts.pop(p, None)
+            if text is not None:
+                self._text_bytes -= len(text)
+            self._hashes.pop(p, None)
+            if not self._covered(p):
+                self.listings.invalidate(parent)
+                return entry
+            if entry is not None:
+                self._files[p] = entry
+                self._stem_index.setdefault(entry.stem, []).append(entry)
+                siblings = self._children.setdefault(parent, [])
+                siblings.append(entry)
+                siblings.sort(key=lambda f: f.path)
+            self.stats["files"] = len(self._files)
+        return entry
+
+    # ---------- 查询 ----------
+
+    def get(self, path: PathLike) -> Optional[FileEntry]:
+        """查询单个文件；不在已遍历根目录下的路径走目录列表缓存。"""
+        p = _norm(path)
+        if self._covered(p):
+            self.stats["avoided_stat_calls"] += 1
+            return self._files.get(p)
+        info = self.listings.lookup(p)
+        if info is None or info[0]:
+            return None
+        stem, suffix = os.path.splitext(os.path.basename(p))
+        return FileEntry(path=p, stem=stem, suffix=suffix.lower(), size=info[1], mtime_ns=info[2])
+
+    def is_file(self, path: PathLike) -> bool:
+        return self.get(path) is not None
+
+    def is_dir(self, path: PathLike) -> bool:
+        p = _norm(path)
+        if self._covered(p):
+            self.stats["avoided_stat_calls"] += 1
+            return p in self._dirs
+        info = self.listings.lookup(p)
+        return info is not None and info[0]
+
+    def canonical(self, path: PathLike) -> str:
+        """等价于 str(Path(path).resolve())，结果缓存。"""
+        return self.canonical_paths.canonical(str(path))
+
+    def _walked_dir(self, directory: PathLike) -> Optional[str]:
+        """返回已遍历的规范目录路径；目录在根目录之外时先遍历它。"""
+        d = _norm(directory)
+        if not self._covered(d):
+            if not self.is_dir(d):
+                return None
+            self._walk(d)
+        return d if d in self._dirs else None
+
+    def exists(self, path: PathLike) -> bool:
+        return self.is_file(path) or self.is_dir(path)
+
+    def files_under(self, directory: PathLike, *, suffixes: Optional[Iterable[str]] = None) -> List[FileEntry]:
+        """列出目录下（递归）指定后缀的文件，顺序为按路径排序的深度优先。"""
+        d = self._walked_dir(directory)
+        if d is None:
+            return []
+        wanted = {s.lower() for s in suffixes} if suffixes is not None else None
+        out: List[FileEntry] = []
+        stack = [d]
+        while stack:
+            cur = stack.pop()
+            for f in self._children.get(cur, []):
+                if wanted is None or f.suffix in wanted:
+                    out.append(f)
+            stack.extend(reversed(self._subdirs.get(cur, [])))
+        return out
+
+    def find_by_stem(self, stem: str, *, under: PathLike, suffix: str = ".ets") -> Optional[FileEntry]:
+        """在 under 目录下按文件名（不含后缀）查找文件，返回排序后的第一个。"""
+        d = self._walked_dir(under)
+        if d is None:
+            return None
+        prefix = d.rstrip(os.sep) + os.sep
+        hits = [f for f in self._stem_index.get(stem, []) if f.suffix == suffix and f.path.startswith(prefix)]
+        return min(hits, key=lambda f: f.path) if hits else None
+
+    def read_text(self, path: PathLike) -> str:
+        """读取文件文本（按需加载并缓存；超过缓存上限后不再缓存新文本）。"""
+        p = _norm(path)
+        cached = self._texts.get(p)
+        if cached is not None:
+            self.stats["text_hits"] += 1
+            return cached
+        try:
+            with open(p, "r", encoding="utf-8", errors="ignore") as fh:
+                text = fh.read()
+        except OSError:
+            return ""
+        self.stats["text_reads"] += 1
+        size = len(text)
+        with self._lock:
+            if self._text_bytes + size <= self.max_text_cache_bytes:
+                self._texts[p] = text
+                self._text_bytes += size
+        return text
+
+    def content_hash(self, path: PathLike) -> str:
+        p = _norm(path)
+        h = self._hashes.get(p)
+        if h is None:
+            h = hashlib.sha256(self.read_text(p).encode("utf-8", errors="ignore")).hexdigest()
+            self._hashes[p] = h
+            self.stats["hashes"] += 1
+        return h
+
+    def snapshot(self) -> Dict[str, Any]:
+        listing = self.listings.snapshot()
+        canonical = self.canonical_paths.snapshot()
+        return {
+            **self.stats,
+            "cached_text_bytes": self._text_bytes,
+            "dir_listing_cache": listing,
+            "canonical_path_cache": canonical,
+            "avoided_syscalls_total": int(self.stats["avoided_stat_calls"])
+            + int(listing["avoided_stat_calls"])
+            + int(canonical["avoided_lstat_calls"]),
+        }
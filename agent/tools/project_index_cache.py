@@ -0,0 +1,145 @@
+"""项目索引磁盘缓存。
+
+持久化 ImportProjectIndex（alias 映射、模块导出符号索引）与 RouteConstantResolver（路由常量表）的中间结果，
+使大型且未变化的工程在启动时无需重新遍历目录、读取文件。
+
+失效规则：
+- 每个文件按 (size, mtime_ns) 单独失效，只重新读取发生变化的文件；
+- 文件 stat 直接取自 ProjectFileTable 的遍历结果，校验缓存不再额外触发系统调用；
+- 写回前删除文件表中已不存在的文件（被删除或重命名）对应的条目，缓存不会随历史文件无限增长。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CACHE_VERSION = 1
+
+Stat = Optional[List[int]]
+
+
+def file_stat(path: Path) -> Stat:
+    """返回 [size, mtime_ns]；文件不存在时返回 None。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [int(st.st_size), int(st.st_mtime_ns)]
+
+
+class ProjectIndexCache:
+    """按 section 组织的 JSON 缓存文件，并统计复用/重建情况。"""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._sections: Dict[str, Any] = {}
+        self._dirty = False
+        # ImportResolver 与 RouteConstantResolver 可能在不同线程中同时读写缓存。
+        self._lock = threading.RLock()
+        self.stats: Dict[str, int] = {
+            "section_hits": 0,
+            "section_misses": 0,
+            "files_reused": 0,
+            "files_reread": 0,
+            "files_pruned": 0,
+        }
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.is_file():
+            return
+        try:
+            obj = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as ex:
+            print(f"[ProjectIndexCache] Failed to load cache, rebuild: {ex}")
+            return
+        if isinstance(obj, dict) and int(obj.get("version") or 0) == CACHE_VERSION:
+            self._sections = dict(obj.get("sections") or {})
+
+    def save(self) -> None:
+        """有变更时原子写回缓存文件。"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # 临时文件名唯一：批量运行时多个进程可能同时写回同一项目的缓存。
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.path.parent, prefix=self.path.name + ".", suffix=".tmp", delete=False
+            ) as f:
+                f.write(json.dumps({"version": CACHE_VERSION, "sections": self._sections}, ensure_ascii=False))
+            os.replace(f.name, self.path)
+            self._dirty = False
+
+    def get(self, section: str, key: str) -> Any:
+        with self._lock:
+            entry = (self._sections.get(section) or {}).get(key)
+            self.stats["section_hits" if entry is not None else "section_misses"] += 1
+            return entry
+
+    def put(self, section: str, key: str, value: Any) -> None:
+        with self._lock:
+            self._sections.setdefault(section, {})[key] = value
+            self._dirty = True
+
+    @staticmethod
+    def stats_match(stats: Dict[str, Stat]) -> bool:
+        """缓存记录的所有文件 stat 均与当前一致时返回 True。"""
+        return all(file_stat(Path(p)) == (list(s) if s is not None else None) for p, s in (stats or {}).items())
+
+    def file_entry(
+        self,
+        section: str,
+        path: Path,
+        compute: Callable[[Path], Any],
+        *,
+        stat: Stat = None,
+    ) -> Tuple[Any, bool]:
+        """
+        读取单文件缓存值；(size, mtime_ns) 变化时调用 compute 重新计算。
+
+        Args:
+            stat: 调用方已知的 [size, mtime_ns]（如来自文件表）；缺省时现场 stat。
+
+        Returns:
+            (value, reused)。
+        """
+        key = str(path)
+        st = list(stat) if stat is not None else file_stat(path)
+        with self._lock:
+            entry = (self._sections.get(section) or {}).get(key)
+            if isinstance(entry, dict) and st is not None and entry.get("stat") == st:
+                self.stats["files_reused"] += 1
+                return entry.get("value"), True
+            self.stats["files_reread"] += 1
+        # compute 在锁外执行（读文件、解析），避免其他线程等待 IO。
+        value = compute(path)
+        self.put(section, key, {"stat": st, "value": value})
+        return value, False
+
+    def prune_files(self, exists: Callable[[str], bool]) -> int:
+        """删除 exists(path) 为 False 的单文件条目，返回删除条数。"""
+        removed = 0
+        with self._lock:
+            for entries in self._sections.values():
+                if not isinstance(entries, dict):
+                    continue
+                stale = [
+                    k for k, v in entries.items()
+                    if isinstance(v, dict) and "stat" in v and "value" in v and not exists(k)
+                ]
+                for k in stale:
+                    del entries[k]
+                removed += len(stale)
+            if removed:
+                self.stats["files_pruned"] += removed
+                self._dirty = True
+        return removed
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"path": str(self.path), **self.stats}
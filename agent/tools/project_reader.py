@@ -2,13 +2,16 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any, List
+from typing import Any, List, Optional
+
+from agent.tools.project_file_table import ProjectFileTable
 
 
 class ProjectReader:
-    def __init__(self, *, ets_root: str) -> None:
+    def __init__(self, *, ets_root: str, file_table: Optional[ProjectFileTable] = None) -> None:
         # ets_root 是本项目主模块源码根目录
         self.ets_root = Path(ets_root)
+        self.file_table = file_table
 
     @staticmethod
     def load_main_pages(main_pages_json_path: str) -> List[str]:
@@ -23,7 +26,8 @@ class ProjectReader:
             return [str(x) for x in data if str(x).strip()]
         raise ValueError("Unsupported mainPages.json format.")
 
-    @staticmethod
-    def read_source_file(file_path: str) -> str:
-        """读取源码文件文本。"""
+    def read_source_file(self, file_path: str) -> str:
+        """读取源码文件文本（有文件表时经文件表读取并缓存）。"""
+        if self.file_table is not None:
+            return self.file_table.read_text(file_path)
         return Path(file_path).read_text(encoding="utf-8", errors="ignore")
@@ -1,40 +1,15 @@
 from __future__ import annotations
 
 import re
+import threading
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from agent.tools.ast_cache import AstCache
+from agent.tools.project_file_table import FileEntry, ProjectFileTable
+from agent.tools.project_index_cache import ProjectIndexCache
 from agent.utils.route_utils import normalize_path, strip_ets
 
-try:
-    from tree_sitter import Language, Parser  # type: ignore
-    from tree_sitter_typescript import language_typescript  # type: ignore
-except Exception:  # pragma: no cover - optional dependency
-    Language = None  # type: ignore
-    Parser = None  # type: ignore
-    language_typescript = None  # type: ignore
-
-
-def _build_ts_parser() -> Optional[Any]:
-    """构造 TS/ArkTS AST 解析器。"""
-    if Parser is None or language_typescript is None:
-        return None
-    try:
-        parser = Parser()
-        ts_lang = language_typescript()
-        if Language is not None:
-            try:
-                ts_lang = Language(ts_lang)  # tree-sitter>=0.25: capsule -> Language
-            except Exception:
-                pass
-        if hasattr(parser, "language"):
-            parser.language = ts_lang
-        else:
-            parser.set_language(ts_lang)
-        return parser
-    except Exception:
-        return None
-
 
 class RouteConstantResolver:
     def __init__(
@@ -43,6 +18,9 @@ class RouteConstantResolver:
         ets_root: str,
         max_files: int = 120,
         max_chars_per_file: int = 40000,
+        index_cache: Optional[ProjectIndexCache] = None,
+        file_table: Optional[ProjectFileTable] = None,
+        ast_cache: Optional[AstCache] = None,
     ) -> None:
         """初始化路由常量解析器。"""
         self.ets_root = Path(ets_root)
@@ -51,34 +29,33 @@ class RouteConstantResolver:
         self.full_map: Dict[str, str] = {}
         self.short_map: Dict[str, str] = {}
         self._cache: Dict[str, Dict[str, str]] = {}
-        self._ts_parser = _build_ts_parser()
+        # 保护 _cache 的按需填充（tool-calling 会在工作线程中调用 resolve_target_by_symbol）。
+        self._cache_lock = threading.Lock()
+        self._ast_cache = ast_cache if ast_cache is not None else AstCache()
+        self._index_cache = index_cache
+        self._files = file_table if file_table is not None else ProjectFileTable()
+        # 常量解析结果依赖读取上限，缓存 section 随之区分。
+        self._parse_section = f"route_const_parse:{self.max_chars_per_file}"
 
     def build(self) -> tuple[Dict[str, str], Dict[str, str]]:
         # 扫描候选常量文件并构建 symbol.member -> page_path 映射
         full_map: Dict[str, str] = {}
         short_map: Dict[str, str] = {}
         short_seen: Dict[str, int] = {}
-        if not self.ets_root.exists():
+        if not self._files.is_dir(self.ets_root):
             self.full_map = full_map
             self.short_map = short_map
             return full_map, short_map
 
-        candidates: List[Path] = []
-        for p in self.ets_root.rglob("*"):
-            if not p.is_file():
-                continue
-            if p.suffix.lower() not in {".ets", ".ts"}:
-                continue
-            head = self._read_text_limit(p, limit_chars=8192).lower()
-            if not head:
-                continue
-            if any(k in head for k in ("pages/", "router", "route", "urlconstants", "pageconstants")):
-                candidates.append(p)
+        candidates: List[FileEntry] = []
+        for f in self._files.files_under(self.ets_root, suffixes={".ets", ".ts"}):
+            if self._is_candidate_file(f):
+                candidates.append(f)
                 if len(candidates) >= self.max_files:
                     break
 
         for f in candidates:
-            parsed = self._parse_file_constants(str(f))
+            parsed = self._parse_file_constants_cached(f.path)
             for k, v in parsed.items():
                 if "." not in k:
                     continue
@@ -89,6 +66,38 @@ class RouteConstantResolver:
         self.short_map = short_map
         return full_map, short_map
 
+    def _is_candidate_file(self, entry: FileEntry) -> bool:
+        """文件头部包含路由相关关键字时视为候选常量文件。"""
+        path = Path(entry.path)
+        if self._index_cache is not None:
+            hit, _ = self._index_cache.file_entry(
+                "route_const_candidate",
+                path,
+                self._head_has_route_keyword,
+                stat=entry.stat,
+            )
+            return bool(hit)
+        return self._head_has_route_keyword(path)
+
+    def _head_has_route_keyword(self, path: Path) -> bool:
+        head = self._read_text_limit(path, limit_chars=8192).lower()
+        if not head:
+            return False
+        return any(k in head for k in ("pages/", "router", "route", "urlconstants", "pageconstants"))
+
+    def _parse_file_constants_cached(self, file_path: str) -> Dict[str, str]:
+        """带磁盘缓存的 _parse_file_constants（按文件 size/mtime 失效）。"""
+        if self._index_cache is None:
+            return self._parse_file_constants(file_path)
+        entry = self._files.get(file_path)
+        parsed, _ = self._index_cache.file_entry(
+            self._parse_section,
+            Path(file_path),
+            lambda p: self._parse_file_constants(str(p)),
+            stat=entry.stat if entry is not None else None,
+        )
+        return dict(parsed or {})
+
     def resolve_target(self, target: str) -> str:
         """把 target 文本按常量映射解析成页面路径。"""
         t = self._strip_wrappers(target)
@@ -175,20 +184,17 @@ class RouteConstantResolver:
 
     def _resolve_from_symbol_file(self, file_path: str, *, symbol: str, key: str) -> str:
         """在符号定义文件中解析 symbol.key 的字符串值。"""
-        fp = str(Path(file_path).resolve())
-        parsed = self._cache.get(fp)
-        if parsed is None:
-            parsed = self._parse_file_constants(fp)
-            self._cache[fp] = parsed
+        fp = self._files.canonical(file_path)
+        with self._cache_lock:
+            parsed = self._cache.get(fp)
+            if parsed is None:
+                parsed = self._parse_file_constants_cached(fp)
+                self._cache[fp] = parsed
         return parsed.get(f"{symbol}.{key}", "")
 
-    @staticmethod
-    def _read_text_limit(path: Path, *, limit_chars: int) -> str:
-        """按字符上限读取文件。"""
-        try:
-            return path.read_text(encoding="utf-8", errors="ignore")[: max(0, int(limit_chars))]
-        except Exception:
-            return ""
+    def _read_text_limit(self, path: Path, *, limit_chars: int) -> str:
+        """按字符上限读取文件（经文件表读取并缓存）。"""
+        return self._files.read_text(path)[: max(0, int(limit_chars))]
 
     @staticmethod
     def _add_const(
@@ -220,15 +226,10 @@ class RouteConstantResolver:
 
     def _parse_file_constants_ast(self, src: str) -> Dict[str, str]:
         """使用 AST 解析 enum/object/class static 常量。"""
-        if self._ts_parser is None:
-            return {}
-        src_bytes = src.encode("utf-8", errors="ignore")
-        try:
-            tree = self._ts_parser.parse(src_bytes)
-        except Exception:
-            return {}
-        if tree is None or tree.root_node is None:
+        parsed = self._ast_cache.parse(src)
+        if parsed is None:
             return {}
+        tree, src_bytes = parsed.tree, parsed.src_bytes
 
         out: Dict[str, str] = {}
         stack = [tree.root_node]
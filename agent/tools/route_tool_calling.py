@@ -1,18 +1,36 @@
 from __future__ import annotations
+import asyncio
 import json
 import re
-from typing import Any, Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 from langchain_core.tools import StructuredTool
-from langchain_openai import ChatOpenAI
+from llm_rate_limit import ainvoke_with_rate_limit_retry
 from llm_usage import extract_token_usage
 
 from agent.tools.import_resolver import ImportResolver
 from agent.tools.route_constant_resolver import RouteConstantResolver
+from agent.utils.llm_cache import LLMResponseCache
 from agent.utils.llm_json import parse_llm_json_list
 from agent.utils.route_utils import is_invalid_target, normalize_path, strip_ets
 
+_BRACKET_MEMBER_RE = re.compile(r"""^([A-Za-z_$][\w$]*)\s*\[\s*['"]([\w$]+)['"]\s*\]$""")
+_TYPE_CAST_RE = re.compile(r"\s+as\s+[\w$.<>\[\]| ]+$")
+_WORD_RE = re.compile(r"[A-Za-z_$][\w$]*")
+
+TOOL_CALLING_SYSTEM_PROMPT = (
+    "You are a route-repair assistant.\n"
+    "Each unresolved navigation edge has an edge_id and the file_id of the file it comes from. "
+    "Direct lookups of the raw target_expr already failed.\n"
+    "Call resolve_many with rewritten target expressions and/or import module paths; "
+    "put every edge you want to try into as few resolve_many calls as possible.\n"
+    "Return ONLY a JSON array, where each item has: edge_id, target, target_expr. "
+    "Omit edges that cannot be resolved."
+)
+
 
 def target_looks_resolved(target: str) -> bool:
     """判断 target 是否已被解析为有效页面路径。"""
@@ -20,21 +38,142 @@ def target_looks_resolved(target: str) -> bool:
     return bool(t) and ("/" in t) and (not is_invalid_target(t))
 
 
+def target_expr_variants(target_expr: str) -> List[str]:
+    """
+    target_expr 的等价改写（按优先级去重）：原文、去掉括号 / 类型断言 / `.toString()` / `this.` 前缀、
+    无插值模板字符串取内容、`Sym['Key']` 转 `Sym.Key`、多段成员链取末两段。
+    """
+    te = (target_expr or "").strip()
+    out: List[str] = [te] if te else []
+    t = te
+    while t.startswith("(") and t.endswith(")"):
+        t = t[1:-1].strip()
+    t = _TYPE_CAST_RE.sub("", t)
+    if t.endswith(".toString()"):
+        t = t[: -len(".toString()")]
+    if len(t) >= 2 and t.startswith("`") and t.endswith("`") and "${" not in t:
+        t = t[1:-1].strip()
+    if t.startswith("this."):
+        t = t[len("this.") :]
+    m = _BRACKET_MEMBER_RE.match(t)
+    if m:
+        t = f"{m.group(1)}.{m.group(2)}"
+    candidates = [t]
+    parts = t.split(".")
+    if len(parts) > 2 and all(_WORD_RE.fullmatch(p.strip()) for p in parts):
+        candidates.append(".".join(parts[-2:]))
+    for c in candidates:
+        if c and c not in out:
+            out.append(c)
+    return out
+
+
+@dataclass
+class _BatchFile:
+    imports: Dict[str, str]
+    resolved_imports: Dict[str, str]
+    # 回填后按源码做弱证据过滤用。
+    code: str = ""
+
+
+@dataclass
+class _PendingEdge:
+    file_path: str
+    edge: Dict[str, Any]
+
+
+@dataclass
+class ToolCallingBatch:
+    """
+    一个 main page 内各文件确定性解析后仍未解析的边；页面结束时合并为一次 tool-calling 会话。
+
+    edge_id / file_id 只在会话内使用，补出的边按 edge_id 回到所属文件。
+    """
+
+    files: Dict[str, _BatchFile] = field(default_factory=dict)
+    edges: Dict[str, _PendingEdge] = field(default_factory=dict)
+
+    def add(
+        self,
+        *,
+        file_path: str,
+        imports: Dict[str, str],
+        resolved_imports: Dict[str, str],
+        code: str,
+        edges: List[Dict[str, Any]],
+    ) -> None:
+        if not edges:
+            return
+        self.files.setdefault(
+            file_path,
+            _BatchFile(imports=dict(imports or {}), resolved_imports=dict(resolved_imports or {}), code=code),
+        )
+        for e in edges:
+            self.edges[f"e{len(self.edges) + 1}"] = _PendingEdge(file_path=file_path, edge=dict(e))
+
+    def code_of(self, file_path: str) -> str:
+        entry = self.files.get(file_path)
+        return entry.code if entry is not None else ""
+
+    def prompt_payload(self) -> Dict[str, Any]:
+        """会话输入：每个文件只带未解析表达式引用到的 import，边以 edge_id / file_id 标识。"""
+        file_ids = {fp: f"f{i}" for i, fp in enumerate(self.files, 1)}
+        words: Dict[str, Set[str]] = {fp: set() for fp in self.files}
+        for pending in self.edges.values():
+            words[pending.file_path].update(_WORD_RE.findall(pending.edge.get("target_expr") or ""))
+        files: Dict[str, Any] = {}
+        for fp, entry in self.files.items():
+            used = words[fp]
+            files[file_ids[fp]] = {
+                "file_path": fp,
+                "imports": {k: v for k, v in entry.imports.items() if k in used},
+                "resolved_imports": {k: v for k, v in entry.resolved_imports.items() if k in used},
+            }
+        return {
+            "files": files,
+            "unresolved_edges": [
+                {
+                    "edge_id": edge_id,
+                    "file_id": file_ids[pending.file_path],
+                    "component_type": pending.edge.get("component_type"),
+                    "event": pending.edge.get("event"),
+                    "target": pending.edge.get("target"),
+                    "target_expr": pending.edge.get("target_expr"),
+                }
+                for edge_id, pending in self.edges.items()
+            ],
+        }
+
+
 class RouteToolCallingResolver:
-    """对 LLM 初次抽取的未解析边执行一次工具调用补解析。"""
+    """对 LLM 初次抽取的未解析边先做确定性解析，剩余边再执行工具调用补解析（可按 main page 合并会话）。"""
 
     def __init__(
         self,
         *,
-        llm: ChatOpenAI,
+        llm: BaseChatModel,
         import_resolver: ImportResolver,
         route_const_resolver: RouteConstantResolver,
         token_reporter: Optional[Callable[[str, int, int, int], None]] = None,
+        rate_limit_retries: int = 2,
+        llm_cache: Optional[LLMResponseCache] = None,
     ) -> None:
         self.llm = llm
         self.import_resolver = import_resolver
         self.route_const_resolver = route_const_resolver
         self._token_reporter = token_reporter
+        self._rate_limit_retries = int(rate_limit_retries)
+        self._llm_cache = llm_cache
+        self.stats: Dict[str, int] = {
+            "edges_seen": 0,
+            "resolved_deterministic": 0,
+            "recovered_deterministic": 0,
+            "deferred_edges": 0,
+            "sessions": 0,
+            "llm_requests": 0,
+            "tool_calls": 0,
+            "patched_edges": 0,
+        }
 
     def _report_usage(self, *, stage: str, msg: Any) -> None:
         """上报本次 LLM 交互 token。"""
@@ -54,13 +193,86 @@ class RouteToolCallingResolver:
         resolved_imports: Dict[str, str],
         llm_edges: List[Dict[str, Any]],
         actionable_census_calls: Optional[List[Dict[str, str]]] = None,
+        code: str = "",
+        batch: Optional[ToolCallingBatch] = None,
     ) -> List[Dict[str, Any]]:
+        """
+        先对全部候选边执行确定性解析（与工具实现相同的查找），剩余边交给 LLM 工具调用会话。
+
+        batch 不为 None 时剩余边登记到 batch，由调用方在 main page 结束时统一 resolve_batch；
+        否则立即为本文件开一次会话。返回值只包含已解析（及本文件会话补出）的边。
+        """
         seeded_edges = self._build_seed_edges_from_census(actionable_census_calls or [])
         candidate_edges = [*(llm_edges or []), *seeded_edges]
+        # 解析器的公开方法持锁，确定性查找可放到工作线程，不阻塞其他 main page 的 LLM 请求。
+        resolved_directly, unresolved, recovered = await asyncio.to_thread(
+            self._resolve_deterministic,
+            candidate_edges,
+            file_path=file_path,
+            imports=imports,
+            resolved_imports=resolved_imports,
+        )
+        self.stats["edges_seen"] += len(candidate_edges)
+        self.stats["resolved_deterministic"] += len(resolved_directly)
+        self.stats["recovered_deterministic"] += recovered
+
+        if not unresolved:
+            print(
+                "[RouteStructureAgent] Tool-calling supplement skipped: "
+                f"no unresolved edges, resolved={len(resolved_directly)}, recovered={recovered}"
+            )
+            return resolved_directly
+
+        if batch is not None:
+            batch.add(
+                file_path=file_path,
+                imports=imports,
+                resolved_imports=resolved_imports,
+                code=code,
+                edges=unresolved,
+            )
+            self.stats["deferred_edges"] += len(unresolved)
+            print(
+                "[RouteStructureAgent] Tool-calling supplement deferred to page batch: "
+                f"unresolved_edges={len(unresolved)}, resolved={len(resolved_directly)}, file: {file_path}"
+            )
+            return resolved_directly
+
+        single = ToolCallingBatch()
+        single.add(
+            file_path=file_path,
+            imports=imports,
+            resolved_imports=resolved_imports,
+            code=code,
+            edges=unresolved,
+        )
+        patched = (await self.resolve_batch(single)).get(file_path, [])
+        merged = [*resolved_directly, *patched]
+        print(
+            "[RouteStructureAgent] Tool-calling supplement done: "
+            f"seeded={len(seeded_edges)}, resolved={len(resolved_directly)}, "
+            f"patched={len(patched)}, total={len(merged)}"
+        )
+        return merged
+
+    def _resolve_deterministic(
+        self,
+        edges: List[Dict[str, Any]],
+        *,
+        file_path: str,
+        imports: Dict[str, str],
+        resolved_imports: Dict[str, str],
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]:
+        """
+        不经 LLM 解析候选边。
 
+        Returns:
+            (已解析边, 仍未解析的边, 其中只有改写/补解析 import 后才解析成功的边数)。
+        """
+        resolved_out: List[Dict[str, Any]] = []
         unresolved: List[Dict[str, Any]] = []
-        resolved_directly: List[Dict[str, Any]] = []
-        for e in candidate_edges:
+        recovered = 0
+        for e in edges:
             raw_target = str(e.get("target") or "").strip()
             target_expr = str(e.get("target_expr") or raw_target).strip()
             resolved = self.route_const_resolver.resolve_target_by_symbol(
@@ -69,8 +281,17 @@ class RouteToolCallingResolver:
                 imports=imports,
                 resolved_imports=resolved_imports,
             )
+            if not target_looks_resolved(resolved):
+                resolved = self._resolve_target_expr(
+                    target_expr=target_expr,
+                    imports=imports,
+                    resolved_imports=resolved_imports,
+                    file_path=file_path,
+                )
+                if target_looks_resolved(resolved):
+                    recovered += 1
             if target_looks_resolved(resolved):
-                resolved_directly.append({**e, "target": resolved})
+                resolved_out.append({**e, "target": resolved})
                 continue
             if not target_expr:
                 continue
@@ -83,43 +304,34 @@ class RouteToolCallingResolver:
                     "target_expr": target_expr,
                 }
             )
+        return resolved_out, unresolved, recovered
 
-        if not unresolved:
-            print(
-                "[RouteStructureAgent] Tool-calling supplement skipped: "
-                f"no unresolved edges, resolved={len(resolved_directly)}"
-            )
-            return resolved_directly
+    async def resolve_batch(self, batch: ToolCallingBatch) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        为 batch 内全部未解析边开一次 tool-calling 会话（最多 4 轮），结果按 edge_id 回填到各自文件。
 
-        print(f"[RouteStructureAgent] Tool-calling supplement start: unresolved_edges={len(unresolved)}")
-        tools = self._build_tools(file_path=file_path, imports=imports, resolved_imports=resolved_imports)
+        Returns:
+            file_path -> 补出的边（call_id / component_type / event 取自登记时的边）。
+        """
+        if not batch.edges:
+            return {}
+        print(
+            "[RouteStructureAgent] Tool-calling supplement start: "
+            f"unresolved_edges={len(batch.edges)}, files={len(batch.files)}"
+        )
+        tools = self._build_tools(batch)
         tool_llm = self.llm.bind_tools(tools)
+        self.stats["sessions"] += 1
 
         messages: List[Any] = [
-            SystemMessage(
-                content=(
-                    "You are a route-repair assistant.\n"
-                    "Given unresolved navigation edges, call tools to resolve import paths and target expressions.\n"
-                    "Return ONLY a JSON array, where each item has: component_type, event, target, target_expr."
-                )
-            ),
-            HumanMessage(
-                content=json.dumps(
-                    {
-                        "file_path": file_path,
-                        "imports": imports,
-                        "resolved_imports": resolved_imports,
-                        "unresolved_edges": unresolved,
-                    },
-                    ensure_ascii=False,
-                )
-            ),
+            SystemMessage(content=TOOL_CALLING_SYSTEM_PROMPT),
+            HumanMessage(content=json.dumps(batch.prompt_payload(), ensure_ascii=False)),
         ]
 
         final_text = "[]"
+        tool_names = [t.name for t in tools]
         for _ in range(4):
-            ai_msg = await tool_llm.ainvoke(messages)
-            self._report_usage(stage="tool_calling", msg=ai_msg)
+            ai_msg = await self._ainvoke_tool_llm(tool_llm, messages, tool_names=tool_names)
             if not isinstance(ai_msg, AIMessage):
                 final_text = str(getattr(ai_msg, "content", "") or "[]")
                 break
@@ -128,62 +340,111 @@ class RouteToolCallingResolver:
                 break
 
             messages.append(ai_msg)
-            for tc in ai_msg.tool_calls:
-                out = self._run_tool_call(
-                    tc=tc,
-                    file_path=file_path,
-                    imports=imports,
-                    resolved_imports=resolved_imports,
-                )
+            outputs = await asyncio.to_thread(self._run_tool_calls, list(ai_msg.tool_calls), batch)
+            self.stats["tool_calls"] += len(outputs)
+            for tc, out in zip(ai_msg.tool_calls, outputs):
                 messages.append(ToolMessage(content=str(out), tool_call_id=str(tc.get("id") or "")))
 
-        patched = parse_llm_json_list(final_text)
-        if not patched:
+        patched: Dict[str, List[Dict[str, Any]]] = {}
+        for item in parse_llm_json_list(final_text):
+            pending = batch.edges.get(str(item.get("edge_id") or "").strip())
+            target = str(item.get("target") or "").strip()
+            if pending is None or not target:
+                continue
+            edge = {
+                **pending.edge,
+                "target": target,
+                "target_expr": str(item.get("target_expr") or pending.edge["target_expr"]).strip(),
+            }
+            patched.setdefault(pending.file_path, []).append(edge)
+        count = sum(len(v) for v in patched.values())
+        self.stats["patched_edges"] += count
+        if not count:
             print("[RouteStructureAgent] Tool-calling supplement result is empty.")
-        merged = [*resolved_directly, *patched]
         print(
-            "[RouteStructureAgent] Tool-calling supplement done: "
-            f"seeded={len(seeded_edges)}, resolved={len(resolved_directly)}, "
-            f"patched={len(patched)}, total={len(merged)}"
+            "[RouteStructureAgent] Tool-calling batch done: "
+            f"unresolved={len(batch.edges)}, files={len(batch.files)}, patched={count}"
         )
-        return merged
+        return patched
 
-    def _build_tools(
-        self,
-        *,
-        file_path: str,
-        imports: Dict[str, str],
-        resolved_imports: Dict[str, str],
-    ) -> List[StructuredTool]:
-        """构造供 LLM 调用的最小工具集。"""
+    def snapshot(self) -> Dict[str, int]:
+        """tool-calling 统计：确定性解析数、会话数、LLM 请求数与工具调用数。"""
+        return dict(self.stats)
 
-        def _tool_resolve_import_path(module_path: str, symbol_alias: str = "") -> str:
-            return self._resolve_import_path(
-                module_path=module_path,
-                symbol_alias=symbol_alias,
-                file_path=file_path,
-            )
+    async def _ainvoke_tool_llm(self, tool_llm: Any, messages: List[Any], *, tool_names: List[str]) -> Any:
+        """tool-calling 单轮调用：先查缓存，未命中再请求并写回。"""
+        cache_key = ""
+        if self._llm_cache is not None:
+            cache_key = self._llm_cache.make_key(messages, tools=tool_names)
+            cached = self._llm_cache.get(cache_key, stage="tool_calling")
+            if cached is not None:
+                print("[RouteStructureAgent] LLM cache hit | tool_calling")
+                return cached
+        ai_msg = await ainvoke_with_rate_limit_retry(tool_llm, messages, retries=self._rate_limit_retries)
+        self.stats["llm_requests"] += 1
+        self._report_usage(stage="tool_calling", msg=ai_msg)
+        if self._llm_cache is not None and cache_key and hasattr(ai_msg, "type"):
+            self._llm_cache.put(cache_key, stage="tool_calling", message=ai_msg)
+        return ai_msg
 
-        def _tool_resolve_target_expr(target_expr: str) -> str:
-            return self._resolve_target_expr(
-                target_expr=target_expr,
-                imports=imports,
-                resolved_imports=resolved_imports,
-            )
+    def _build_tools(self, batch: ToolCallingBatch) -> List[StructuredTool]:
+        """构造供 LLM 调用的向量化工具：一次调用解析多条边。"""
+
+        def _tool_resolve_many(requests: List[Dict[str, str]]) -> str:
+            return self._resolve_many(requests, batch)
 
         return [
             StructuredTool.from_function(
-                func=_tool_resolve_import_path,
-                name="resolve_import_path",
-                description="Resolve an import path or symbol alias to an absolute .ets file path.",
-            ),
-            StructuredTool.from_function(
-                func=_tool_resolve_target_expr,
-                name="resolve_target_expr",
-                description="Resolve a route target_expr into a page path (for example, pages/xx).",
+                func=_tool_resolve_many,
+                name="resolve_many",
+                description=(
+                    "Resolve many edges at once. Each request is an object with edge_id and target_expr "
+                    "(a rewritten route expression such as RoutePath.Detail), optionally module_path and "
+                    "symbol_alias to resolve an import of that edge's file first. Returns a JSON array of "
+                    "{edge_id, target, import_file}; target is a page path (for example, pages/xx) or empty."
+                ),
             ),
         ]
 
+    def _resolve_many(self, requests: List[Dict[str, str]], batch: ToolCallingBatch) -> str:
+        """工具实现：逐条按所属文件的 import 上下文解析。"""
+        results: List[Dict[str, str]] = []
+        for req in requests or []:
+            if not isinstance(req, dict):
+                continue
+            edge_id = str(req.get("edge_id") or "").strip()
+            pending = batch.edges.get(edge_id)
+            if pending is None:
+                results.append({"edge_id": edge_id, "target": "", "import_file": "", "error": "unknown edge_id"})
+                continue
+            ctx = batch.files[pending.file_path]
+            resolved_imports = dict(ctx.resolved_imports)
+            import_file = ""
+            module_path = str(req.get("module_path") or "").strip()
+            symbol_alias = str(req.get("symbol_alias") or "").strip()
+            if module_path:
+                import_file = self._resolve_import_path(
+                    module_path=module_path,
+                    symbol_alias=symbol_alias,
+                    file_path=pending.file_path,
+                )
+                if import_file and symbol_alias:
+                    resolved_imports[symbol_alias] = import_file
+            target = self._resolve_target_expr(
+                target_expr=str(req.get("target_expr") or pending.edge["target_expr"]),
+                imports=ctx.imports,
+                resolved_imports=resolved_imports,
+                file_path=pending.file_path,
+            )
+            results.append(
+                {
+                    "edge_id": edge_id,
+                    "target": target if target_looks_resolved(target) else "",
+                    "import_file": import_file,
+                }
+            )
+        return json.dumps(results, ensure_ascii=False)
+
     def _resolve_import_path(self, *, module_path: str, symbol_alias: str, file_path: str) -> str:
         """工具实现：解析 import 到实际文件。"""
         mp = normalize_path(module_path)
@@ -206,21 +467,42 @@ class RouteToolCallingResolver:
         target_expr: str,
         imports: Dict[str, str],
         resolved_imports: Dict[str, str],
+        file_path: str = "",
     ) -> str:
-        """工具实现：解析 target_expr 到页面路径。"""
-        te = (target_expr or "").strip()
-        if not te:
-            return ""
-        try:
-            out = self.route_const_resolver.resolve_target_by_symbol(
-                target=te,
-                target_expr=te,
-                imports=imports,
-                resolved_imports=resolved_imports,
-            )
-            return str(out or "")
-        except Exception:
-            return ""
+        """
+        工具实现：解析 target_expr 到页面路径。
+
+        依次尝试 target_expr 的等价改写（见 target_expr_variants）；符号已导入但 import 未解析时，
+        先按 file_path 解析该 import 再查符号定义文件。
+        """
+        for te in target_expr_variants(target_expr):
+            try:
+                out = self.route_const_resolver.resolve_target_by_symbol(
+                    target=te,
+                    target_expr=te,
+                    imports=imports,
+                    resolved_imports=resolved_imports,
+                )
+                if target_looks_resolved(out):
+                    return str(out)
+                symbol, _ = self.route_const_resolver._split_symbol_member(te)
+                module = (imports or {}).get(symbol, "") if symbol else ""
+                if not module or not file_path or symbol in (resolved_imports or {}):
+                    continue
+                symbol_file = self._resolve_import_path(module_path=module, symbol_alias=symbol, file_path=file_path)
+                if not symbol_file:
+                    continue
+                out = self.route_const_resolver.resolve_target_by_symbol(
+                    target=te,
+                    target_expr=te,
+                    imports=imports,
+                    resolved_imports={**(resolved_imports or {}), symbol: symbol_file},
+                )
+                if target_looks_resolved(out):
+                    return str(out)
+            except Exception:
+                continue
+        return ""
 
     @staticmethod
     def _extract_target_expr_from_snippet(snippet: str) -> str:
@@ -260,30 +542,17 @@ class RouteToolCallingResolver:
             print(f"[RouteStructureAgent] Seed edges built from census: count={len(seeds)}")
         return seeds
 
-    def _run_tool_call(
-        self,
-        *,
-        tc: Dict[str, Any],
-        file_path: str,
-        imports: Dict[str, str],
-        resolved_imports: Dict[str, str],
-    ) -> str:
-        """执行一次模型工具调用。"""
-        name = str(tc.get("name") or "")
-        args = tc.get("args") or {}
-        try:
-            if name == "resolve_import_path":
-                return self._resolve_import_path(
-                    module_path=str(args.get("module_path") or ""),
-                    symbol_alias=str(args.get("symbol_alias") or ""),
-                    file_path=file_path,
-                )
-            if name == "resolve_target_expr":
-                return self._resolve_target_expr(
-                    target_expr=str(args.get("target_expr") or ""),
-                    imports=imports,
-                    resolved_imports=resolved_imports,
-                )
-        except Exception:
-            return ""
-        return ""
+    def _run_tool_calls(self, tool_calls: List[Dict[str, Any]], batch: ToolCallingBatch) -> List[str]:
+        """执行一轮模型工具调用（在工作线程中运行，不阻塞事件循环）。"""
+        outputs: List[str] = []
+        for tc in tool_calls:
+            name = str(tc.get("name") or "")
+            args = tc.get("args") or {}
+            try:
+                if name == "resolve_many":
+                    outputs.append(self._resolve_many(list(args.get("requests") or []), batch))
+                    continue
+            except Exception:
+                pass
+            outputs.append("")
+        return outputs
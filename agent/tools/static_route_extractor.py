@@ -0,0 +1,291 @@
+"""确定性静态路由抽取（不调用 LLM）。
+
+基于共享 AST 缓存识别最常见、可无歧义判定的写法：
+
+    Button('Go')
+      .width(100)
+      .onClick(() => {
+        router.pushUrl({ url: 'pages/Detail' })      // 或 url: RoutePath.Detail
+      })
+
+判定条件（任一不满足即视为“歧义调用”，交给 census/construct）：
+- 调用形如 router.pushUrl/replaceUrl/push/replace，router 为 '@ohos.router' 等模块导入的符号；
+- 第一个参数为对象字面量，url/uri 为普通字符串字面量，或可由 RouteConstantResolver 解析为页面路径的常量；
+- 调用所在的最内层函数是某个 `.onXxx(...)` 的第一个参数（中间没有 setTimeout、回调等函数边界）；
+- `.onXxx` 所在的链式调用以 `Component(...)` 起始（首字母大写的标识符），链上不含 ERROR 节点。
+
+ArkTS 的尾随闭包（`Row() { ... }.onClick(...)`）会被 TS 语法误解析，链首不是组件调用，因此天然落入歧义。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from agent.tools.ast_cache import AstCache
+from agent.tools.route_constant_resolver import RouteConstantResolver
+from agent.utils.route_utils import is_invalid_target, normalize_path, strip_ets
+
+_ROUTE_METHODS = {"pushUrl", "replaceUrl", "push", "replace"}
+_ROUTER_MODULES = {"@ohos.router", "@system.router", "@kit.ArkUI"}
+_EVENT_RE = re.compile(r"^on[A-Z]\w*$")
+_COMPONENT_RE = re.compile(r"^[A-Z]\w*$")
+_FUNCTION_NODES = {"arrow_function", "function_expression", "function", "function_declaration", "method_definition"}
+# 与 RouteStructureAgent 准入门一致的调用计数（含 back），用于发现 AST 因语法错误漏掉的调用。
+_ROUTER_CALL_RE = re.compile(r"""\brouter\s*\.\s*(pushUrl|replaceUrl|push|replace|back)\s*\(""")
+
+
+@dataclass
+class StaticRouteCall:
+    """一个被 AST 识别到的 router 调用。"""
+
+    method: str
+    snippet: str
+    target_expr: str = ""
+    # 静态解析成功时填写；否则 reason 说明落入歧义的原因。
+    component_type: str = ""
+    event: str = ""
+    target: str = ""
+    reason: str = ""
+
+    @property
+    def resolved(self) -> bool:
+        return bool(self.target) and not self.reason
+
+
+@dataclass
+class StaticExtraction:
+    """单文件静态抽取结果。"""
+
+    calls: List[StaticRouteCall] = field(default_factory=list)
+    back_calls: int = 0
+    # 正则计数（去注释后），大于 AST 识别数时说明有调用落在无法解析的区域。
+    lexical_calls: int = 0
+
+    @property
+    def resolved_calls(self) -> List[StaticRouteCall]:
+        return [c for c in self.calls if c.resolved]
+
+    @property
+    def total_actionable(self) -> int:
+        return max(len(self.calls), self.lexical_calls - self.back_calls)
+
+    @property
+    def ambiguous_count(self) -> int:
+        return self.total_actionable - len(self.resolved_calls)
+
+    @property
+    def fully_resolved(self) -> bool:
+        """全部调用均已静态判定（仅含 back 的文件同样无需 LLM，也不产生边）。"""
+        return (self.total_actionable > 0 or self.back_calls > 0) and self.ambiguous_count == 0
+
+    def edges(self) -> List[Dict[str, str]]:
+        return [
+            {
+                "component_type": c.component_type,
+                "event": c.event,
+                "target": c.target,
+                "target_expr": c.target_expr,
+                "method": c.method,
+            }
+            for c in self.resolved_calls
+        ]
+
+
+class StaticRouteExtractor:
+    """字面量 / 常量路由调用的确定性抽取器。"""
+
+    def __init__(self, *, ast_cache: AstCache, route_const_resolver: RouteConstantResolver) -> None:
+        self._ast_cache = ast_cache
+        self._route_const_resolver = route_const_resolver
+
+    def extract(
+        self,
+        code: str,
+        *,
+        imports: Dict[str, str],
+        resolved_imports: Dict[str, str],
+    ) -> StaticExtraction:
+        """
+        抽取文件中可静态判定的路由边。
+
+        Args:
+            code: 文件源码。
+            imports: ImportResolver.extract_imports 的结果（符号 -> 模块）。
+            resolved_imports: 符号 -> 已解析文件，用于常量 target 解析。
+
+        Returns:
+            StaticExtraction；AST 不可用时 calls 为空，所有调用按歧义处理。
+        """
+        out = StaticExtraction()
+        runtime = re.sub(r"/\*[\s\S]*?\*/", "", code or "")
+        runtime = re.sub(r"(?m)^\s*//.*$", "", runtime)
+        methods = _ROUTER_CALL_RE.findall(runtime)
+        out.lexical_calls = len(methods)
+        out.back_calls = sum(1 for m in methods if m == "back")
+
+        parsed = self._ast_cache.parse(code or "")
+        if parsed is None:
+            return out
+        src = parsed.src_bytes
+        router_names = self._router_names(imports)
+        stack = [parsed.tree.root_node]
+        while stack:
+            node = stack.pop()
+            stack.extend(reversed(node.children))
+            if node.type != "call_expression":
+                continue
+            method = self._router_method(node, src, router_names)
+            if not method:
+                continue
+            call = StaticRouteCall(method=method, snippet=self._text(node, src))
+            self._resolve_call(call, node, src, imports=imports, resolved_imports=resolved_imports)
+            out.calls.append(call)
+        return out
+
+    @staticmethod
+    def _text(node: Any, src: bytes) -> str:
+        return src[node.start_byte : node.end_byte].decode("utf-8", errors="ignore")
+
+    @staticmethod
+    def _router_names(imports: Dict[str, str]) -> set:
+        """router 模块在本文件中的符号名（默认导入可改名；@kit.ArkUI 只认 router）。"""
+        names = {"router"}
+        for sym, mod in (imports or {}).items():
+            mod = str(mod or "").strip()
+            if mod in _ROUTER_MODULES and (mod != "@kit.ArkUI" or sym == "router"):
+                names.add(sym)
+        return names
+
+    def _router_method(self, node: Any, src: bytes, router_names: set) -> str:
+        fn = node.child_by_field_name("function")
+        if fn is None or fn.type != "member_expression":
+            return ""
+        obj = fn.child_by_field_name("object")
+        prop = fn.child_by_field_name("property")
+        if obj is None or prop is None or obj.type != "identifier":
+            return ""
+        if self._text(obj, src) not in router_names:
+            return ""
+        method = self._text(prop, src)
+        return method if method in _ROUTE_METHODS else ""
+
+    def _resolve_call(
+        self,
+        call: StaticRouteCall,
+        node: Any,
+        src: bytes,
+        *,
+        imports: Dict[str, str],
+        resolved_imports: Dict[str, str],
+    ) -> None:
+        target_node = self._url_value_node(node, src)
+        if target_node is None:
+            call.reason = "non_literal_options"
+            return
+        call.target_expr = self._text(target_node, src).strip()
+        target = self._resolve_target(target_node, src, imports=imports, resolved_imports=resolved_imports)
+        if not target:
+            call.reason = "unresolved_target"
+            return
+
+        event_call = self._enclosing_event_call(node, src)
+        if event_call is None:
+            call.reason = "no_direct_event"
+            return
+        event_member = event_call.child_by_field_name("function")
+        component = self._chain_component(event_member.child_by_field_name("object"), src)
+        if not component:
+            call.reason = "no_component"
+            return
+        call.event = self._text(event_member.child_by_field_name("property"), src)
+        call.component_type = component
+        call.target = target
+
+    def _url_value_node(self, node: Any, src: bytes) -> Optional[Any]:
+        args = node.child_by_field_name("arguments")
+        named = [c for c in (args.named_children if args is not None else []) if c.type != "comment"]
+        if not named or named[0].type != "object":
+            return None
+        for pair in named[0].named_children:
+            if pair.type != "pair":
+                continue
+            key = pair.child_by_field_name("key")
+            if key is not None and self._text(key, src).strip("'\"") in {"url", "uri"}:
+                return pair.child_by_field_name("value")
+        return None
+
+    def _resolve_target(
+        self,
+        node: Any,
+        src: bytes,
+        *,
+        imports: Dict[str, str],
+        resolved_imports: Dict[str, str],
+    ) -> str:
+        if node.type == "string":
+            value = self._text(node, src).strip()[1:-1].strip()
+            target = strip_ets(normalize_path(value))
+        elif node.type in {"member_expression", "identifier"}:
+            expr = self._text(node, src).strip()
+            target = self._route_const_resolver.resolve_target_by_symbol(
+                target=expr,
+                target_expr=expr,
+                imports=imports,
+                resolved_imports=resolved_imports,
+            )
+            target = strip_ets(normalize_path(target))
+            if target == normalize_path(expr):
+                return ""
+        else:
+            return ""
+        if not target or "/" not in target or is_invalid_target(target):
+            return ""
+        return target
+
+    def _enclosing_event_call(self, node: Any, src: bytes) -> Optional[Any]:
+        """返回 router 调用所在最内层函数对应的 `.onXxx(fn)` 调用；中间有 ERROR 或函数边界不匹配时返回 None。"""
+        cur = node.parent
+        while cur is not None and cur.type not in _FUNCTION_NODES:
+            if cur.type == "ERROR":
+                return None
+            cur = cur.parent
+        if cur is None or cur.type not in {"arrow_function", "function_expression", "function"}:
+            return None
+        args = cur.parent
+        if args is None or args.type != "arguments":
+            return None
+        first = next((c for c in args.named_children if c.type != "comment"), None)
+        if first is None or first != cur:
+            return None
+        event_call = args.parent
+        if event_call is None or event_call.type != "call_expression":
+            return None
+        member = event_call.child_by_field_name("function")
+        if member is None or member.type != "member_expression":
+            return None
+        prop = member.child_by_field_name("property")
+        if prop is None or not _EVENT_RE.match(self._text(prop, src)):
+            return None
+        return event_call
+
+    def _chain_component(self, node: Any, src: bytes) -> str:
+        """沿 `.attr(...)` 链向下找到链首 `Component(...)`，返回组件名；链首不是组件调用时返回空。"""
+        cur = node
+        while cur is not None:
+            if cur.type == "ERROR" or cur.has_error:
+                return ""
+            if cur.type == "member_expression":
+                cur = cur.child_by_field_name("object")
+                continue
+            if cur.type != "call_expression":
+                return ""
+            fn = cur.child_by_field_name("function")
+            if fn is None:
+                return ""
+            if fn.type == "identifier":
+                name = self._text(fn, src)
+                return name if _COMPONENT_RE.match(name) else ""
+            cur = fn
+        return ""
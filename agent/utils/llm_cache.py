@@ -0,0 +1,174 @@
+"""LLM 响应磁盘缓存（SQLite，内容寻址）。
+
+缓存键 = sha256(provider + model + chatOptions + system prompt 哈希 + 其余消息哈希 + 工具列表)。
+命中时直接回放 AIMessage（含 tool_calls / usage 元数据），不消耗 token；
+总大小超过上限时按最近访问时间淘汰。多个进程可共用同一缓存文件，总大小在写事务内按 SQLite 中的数据重新统计。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8", errors="ignore")).hexdigest()
+
+
+def _message_fingerprint(message: Any) -> Dict[str, Any]:
+    """把 (role, content) 元组或 LangChain 消息转换为稳定的可哈希结构（忽略 id/usage 等易变字段）。"""
+    if isinstance(message, BaseMessage):
+        row: Dict[str, Any] = {
+            "role": message.type,
+            "content": _sha256(json.dumps(message.content, ensure_ascii=False, sort_keys=True)),
+        }
+        tool_calls = getattr(message, "tool_calls", None) or []
+        if tool_calls:
+            row["tool_calls"] = [
+                {"name": tc.get("name"), "args": tc.get("args"), "id": tc.get("id")} for tc in tool_calls
+            ]
+        tool_call_id = getattr(message, "tool_call_id", None)
+        if tool_call_id:
+            row["tool_call_id"] = tool_call_id
+        return row
+    if isinstance(message, (tuple, list)) and len(message) == 2:
+        return {"role": str(message[0]), "content": _sha256(str(message[1]))}
+    return {"role": "raw", "content": _sha256(str(message))}
+
+
+def _message_role(message: Any) -> str:
+    if isinstance(message, BaseMessage):
+        return message.type
+    if isinstance(message, (tuple, list)) and len(message) == 2:
+        return str(message[0])
+    return ""
+
+
+class LLMResponseCache:
+    """按 provider/model/chatOptions/prompt 内容寻址的 LLM 响应缓存。"""
+
+    def __init__(
+        self,
+        *,
+        path: str,
+        provider_config: dict,
+        model_name: str,
+        max_bytes: int = 512 * 1024 * 1024,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(1, int(max_bytes))
+        self._namespace = {
+            "provider": str(provider_config.get("baseURL") or ""),
+            "model": str(model_name or ""),
+            "chat_options": dict(provider_config.get("chatOptions") or {}),
+        }
+        # 批量运行时多个进程共用同一个缓存文件，写锁等待放宽到 30 秒。
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._evicted = 0
+        self._stage_stats: Dict[str, Dict[str, int]] = {}
+
+    def make_key(self, messages: Sequence[Any], *, tools: Optional[List[str]] = None) -> str:
+        """生成缓存键：system prompt 与其余消息分别哈希后与命名空间一起再哈希。"""
+        system = [m for m in messages if _message_role(m) == "system"]
+        rest = [m for m in messages if _message_role(m) != "system"]
+        key_obj = {
+            **self._namespace,
+            "system": _sha256(json.dumps([_message_fingerprint(m) for m in system], sort_keys=True)),
+            "user": _sha256(json.dumps([_message_fingerprint(m) for m in rest], sort_keys=True)),
+            "tools": sorted(tools or []),
+        }
+        return _sha256(json.dumps(key_obj, ensure_ascii=False, sort_keys=True))
+
+    def _stats_for(self, stage: str) -> Dict[str, int]:
+        return self._stage_stats.setdefault(stage or "unknown", {"hits": 0, "misses": 0, "writes": 0})
+
+    def get(self, key: str, *, stage: str) -> Optional[BaseMessage]:
+        """读取缓存；命中时刷新访问时间。"""
+        row = self._conn.execute("SELECT payload FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        stats = self._stats_for(stage)
+        if row is None:
+            stats["misses"] += 1
+            return None
+        try:
+            msg = messages_from_dict([json.loads(row[0])])[0]
+        except Exception:
+            stats["misses"] += 1
+            return None
+        stats["hits"] += 1
+        self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+        return msg
+
+    def put(self, key: str, *, stage: str, message: BaseMessage) -> None:
+        """写入缓存并按需淘汰。"""
+        try:
+            payload = json.dumps(messages_to_dict([message])[0], ensure_ascii=False)
+        except Exception:
+            return
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+        # INSERT 开启写事务，淘汰前的统计与删除都在同一事务内，其它进程的写入不会被漏算。
+        self._conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, stage, payload, size, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, stage, payload, size, now, now),
+        )
+        self._stats_for(stage)["writes"] += 1
+        self._evict_if_needed()
+        self._conn.commit()
+
+    def _totals(self) -> tuple[int, int]:
+        """缓存文件中的 (总字节数, 条目数)；多个进程共用时以数据库为准，不依赖进程内计数。"""
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM llm_cache").fetchone()
+        return int(row[0] or 0), int(row[1] or 0)
+
+    def _evict_if_needed(self) -> None:
+        """超过容量上限时按最近访问时间淘汰，直到回落到上限的 90%（须在写事务内调用）。"""
+        total, _ = self._totals()
+        if total <= self.max_bytes:
+            return
+        goal = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at ASC").fetchall()
+        for key, size in rows:
+            if total <= goal:
+                break
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            total -= int(size or 0)
+            self._evicted += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        total, entries = self._totals()
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "evicted": self._evicted,
+            "stages": {k: dict(v) for k, v in sorted(self._stage_stats.items())},
+        }
+
+    def close(self) -> None:
+        try:
+            self._conn.close()
+        except Exception:
+            pass
@@ -4,6 +4,8 @@ import json
 import re
 from typing import Any, Dict, List
 
+from agent.utils.llm_stream import decode_json_list_prefix
+
 
 def parse_llm_json_list(text: str) -> List[Dict[str, Any]]:
     """把 LLM 输出解析为 JSON 对象数组，兼容 ```json 包裹与轻微噪声。"""
@@ -17,10 +19,32 @@ def parse_llm_json_list(text: str) -> List[Dict[str, Any]]:
         return [x for x in v if isinstance(x, dict)] if isinstance(v, list) else []
     except Exception:
         m = re.search(r"(\[\s*{[\s\S]*?}\s*\])", t)
-        if not m:
-            return []
+        if m:
+            try:
+                v = json.loads(m.group(1))
+                return [x for x in v if isinstance(x, dict)] if isinstance(v, list) else []
+            except Exception:
+                pass
+        # 尾部截断或个别元素损坏：保留已完整的元素。
+        return decode_json_list_prefix(t)
+
+
+def parse_llm_json_object(text: str) -> Dict[str, Any]:
+    """把 LLM 输出解析为 JSON 对象，兼容 ```json 包裹与前后噪声；失败时返回空字典。"""
+    t = (text or "").strip()
+    t = re.sub(r"^```(?:\s*json)?\s*\n?", "", t, flags=re.IGNORECASE)
+    t = re.sub(r"\n?```\s*$", "", t, flags=re.IGNORECASE).strip()
+    if not t:
+        return {}
+    try:
+        v = json.loads(t)
+        return v if isinstance(v, dict) else {}
+    except Exception:
+        start, end = t.find("{"), t.rfind("}")
+        if start < 0 or end <= start:
+            return {}
         try:
-            v = json.loads(m.group(1))
-            return [x for x in v if isinstance(x, dict)] if isinstance(v, list) else []
+            v = json.loads(t[start : end + 1])
+            return v if isinstance(v, dict) else {}
         except Exception:
-            return []
+            return {}
@@ -0,0 +1,147 @@
+"""流式 LLM 输出的增量 JSON 数组解码。
+
+模型按 token 流式返回 `[{...}, {...}]` 时，每个顶层元素的括号一闭合就解析并交给调用方，不必等整个响应结束；
+尾部截断或格式损坏只影响最后一个元素。数组起点的识别与 parse_llm_json_list 的兜底规则一致：
+第一个其后紧跟 `{` 或 `]` 的 `[`，之前的 ```json 包裹与说明文字忽略。
+
+解码器同时判断输出是否已明显偏离约定格式（迟迟没有数组、连续多个元素不符合 schema、单个元素过大），
+调用方据此提前取消流，避免为无效输出继续付费。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+_WS = " \t\r\n"
+
+
+class JsonArrayStreamDecoder:
+    """按片段喂入文本，返回新完成的对象元素。"""
+
+    def __init__(
+        self,
+        *,
+        looks_valid: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        max_invalid_items: int = 3,
+        max_preamble_chars: int = 2000,
+        max_item_chars: int = 20000,
+    ) -> None:
+        self._looks_valid = looks_valid
+        self.max_invalid_items = max(1, int(max_invalid_items))
+        self.max_preamble_chars = max(1, int(max_preamble_chars))
+        self.max_item_chars = max(1, int(max_item_chars))
+        self.text = ""
+        self.started = False
+        self.closed = False
+        # 非空表示已偏离格式：no_array / invalid_items / item_too_large。
+        self.off_schema = ""
+        self.items = 0
+        self.invalid_items = 0
+        self._consecutive_invalid = 0
+        self._pos = 0
+        self._item_start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        """数组已闭合或已判定偏离格式，无需继续读取。"""
+        return self.closed or bool(self.off_schema)
+
+    def feed(self, piece: str) -> List[Dict[str, Any]]:
+        if self.done or not piece:
+            return []
+        self.text += piece
+        if not self.started and not self._find_start():
+            return []
+        return self._scan()
+
+    def _find_start(self) -> bool:
+        t = self.text
+        k = t.find("[", self._pos)
+        while k >= 0:
+            j = k + 1
+            while j < len(t) and t[j] in _WS:
+                j += 1
+            if j >= len(t):
+                # 后续字符未到，下次从这个 `[` 重新判断。
+                self._pos = k
+                return False
+            if t[j] in "{]":
+                self.started = True
+                self._pos = k + 1
+                self._depth = 1
+                return True
+            k = t.find("[", k + 1)
+        self._pos = len(t)
+        if len(t) > self.max_preamble_chars:
+            self.off_schema = "no_array"
+        return False
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        t = self.text
+        i = self._pos
+        while i < len(t):
+            ch = t[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+                if self._item_start < 0:
+                    self._item_start = i
+            elif ch in "{[":
+                if self._depth == 1 and self._item_start < 0:
+                    self._item_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_item(t, i, out)
+                    self.closed = True
+                    i += 1
+                    break
+            elif ch == "," and self._depth == 1:
+                self._finish_item(t, i, out)
+            elif ch not in _WS and self._item_start < 0 and self._depth == 1:
+                self._item_start = i
+            i += 1
+            if self.off_schema:
+                break
+        self._pos = i
+        if self._item_start >= 0 and not self.closed and i - self._item_start > self.max_item_chars:
+            self.off_schema = "item_too_large"
+        return out
+
+    def _finish_item(self, t: str, end: int, out: List[Dict[str, Any]]) -> None:
+        start, self._item_start = self._item_start, -1
+        if start < 0:
+            return
+        raw = t[start:end].strip()
+        try:
+            value = json.loads(raw)
+        except Exception:
+            value = None
+        if isinstance(value, dict):
+            out.append(value)
+            self.items += 1
+            if self._looks_valid is None or self._looks_valid(value):
+                self._consecutive_invalid = 0
+                return
+        self.invalid_items += 1
+        self._consecutive_invalid += 1
+        if self._consecutive_invalid >= self.max_invalid_items:
+            self.off_schema = "invalid_items"
+
+
+def decode_json_list_prefix(text: str) -> List[Dict[str, Any]]:
+    """一次性解码：返回数组中所有完整的对象元素（尾部截断 / 损坏的元素被跳过）。"""
+    decoder = JsonArrayStreamDecoder(max_invalid_items=1 << 30, max_preamble_chars=1 << 30, max_item_chars=1 << 30)
+    return decoder.feed(text or "")
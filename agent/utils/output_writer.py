@@ -54,6 +54,27 @@ def sync_test_ptg_ets(ptg_obj: Dict[str, List[Dict[str, Any]]], *, repo_root: Pa
         print(f"[Workflow] Failed to write test/PTG.ets: {ex}")
 
 
+# 可选运行统计：(snapshot 键, 日志标签)，为空时不打印。
+_OPTIONAL_SUMMARIES = [
+    ("rate_limiter", "Rate limiter"),
+    ("llm_cache", "LLM cache"),
+    ("whole_project", "Whole-project"),
+    ("project_index_cache", "Project index cache"),
+    ("file_table", "File table"),
+    ("ast_cache", "AST cache"),
+    ("census_batch", "Census batch"),
+    ("fused_census", "Census+construct"),
+    ("static_fast_path", "Static fast path"),
+    ("chunking", "Long-file chunking"),
+    ("construct_compaction", "Construct prompt compaction"),
+    ("intra_file_fan_out", "Intra-file fan-out"),
+    ("refine_slicing", "Refine component slicing"),
+    ("tool_calling", "Tool-calling"),
+    ("llm_streaming", "LLM streaming"),
+    ("state_timing", "State timing"),
+]
+
+
 def finalize_validated_outputs(
     *,
     validated_ptg: Dict[str, List[Dict[str, Any]]],
@@ -62,8 +83,9 @@ def finalize_validated_outputs(
     project_name: str,
     model_name: str,
     repo_root: Path,
+    sync_ptg_ets: bool = True,
 ) -> str:
-    """打印汇总信息并将 validated_ptg 统一落盘。"""
+    """打印汇总信息并将 validated_ptg 统一落盘；sync_ptg_ets 为 False 时不改写 test/PTG.ets（批量运行）。"""
     unresolved_summary = snapshot.get("unresolved_imports_summary") or []
     if unresolved_summary:
         print(
@@ -72,6 +94,12 @@ def finalize_validated_outputs(
         )
     else:
         print("[RouteStructureAgent] Unresolved imports summary: []")
+    ambiguous_summary = snapshot.get("ambiguous_symbols_summary") or []
+    if ambiguous_summary:
+        print(
+            "[RouteStructureAgent] Ambiguous symbols summary (top 20): "
+            + json.dumps(ambiguous_summary, ensure_ascii=False)
+        )
 
     token_usage = snapshot.get("token_usage") or {}
     print(
@@ -88,6 +116,10 @@ def finalize_validated_outputs(
         f"constructed_edges={int(state_summary.get('constructed_edges') or 0)}, "
         f"invalid_target_dropped={int(state_summary.get('invalid_target_dropped') or 0)}"
     )
+    for key, label in _OPTIONAL_SUMMARIES:
+        value = snapshot.get(key) or {}
+        if value:
+            print(f"[RouteStructureAgent] {label} summary: " + json.dumps(value, ensure_ascii=False))
 
     stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     out_dir = Path(output_dir) / _safe_dir(project_name)
@@ -96,6 +128,7 @@ def finalize_validated_outputs(
     out_path = out_dir / f"ptg_route_structure_{model_token}_{stamp}.json"
     out_path.write_text(json.dumps(validated_ptg, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"[Workflow] Validated PTG saved: {str(out_path)}")
-    sync_test_ptg_ets(validated_ptg, repo_root=repo_root)
+    if sync_ptg_ets:
+        sync_test_ptg_ets(validated_ptg, repo_root=repo_root)
     return str(out_path)
 
@@ -0,0 +1,159 @@
+"""增量分析用的运行清单（manifest）。
+
+记录上一次 whole_project 运行中每个文件的内容哈希、直接依赖、census 调用与已过滤的边，
+以及路由常量表、system prompt 与抽取配置的哈希。失效按文件判断：下次运行时文件自身或任一直接依赖的内容变化
+才重新调用 LLM，其余文件复用记录（不沿依赖图向上传播）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MANIFEST_VERSION = 2
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8", errors="ignore")).hexdigest()
+
+
+def json_hash(obj: Any) -> str:
+    return content_hash(json.dumps(obj, ensure_ascii=False, sort_keys=True))
+
+
+@dataclass
+class FileRecord:
+    """单文件的分析记录。"""
+
+    hash: str
+    deps: List[str] = field(default_factory=list)
+    admissible: bool = False
+    census_calls: List[Dict[str, Any]] = field(default_factory=list)
+    edges: List[Dict[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class RunManifest:
+    """一次运行的完整清单。"""
+
+    model: str = ""
+    main_pages_hash: str = ""
+    route_const_hash: str = ""
+    # system prompt 文本与影响抽取结果的配置（provider baseURL / chatOptions、各抽取模式开关）。
+    prompts_hash: str = ""
+    settings_hash: str = ""
+    files: Dict[str, FileRecord] = field(default_factory=dict)
+    # 直接依赖（含未进入闭包的常量/工具文件）的内容哈希。
+    file_hashes: Dict[str, str] = field(default_factory=dict)
+
+    def is_compatible(
+        self,
+        *,
+        model: str,
+        main_pages_hash: str,
+        route_const_hash: str,
+        prompts_hash: str,
+        settings_hash: str,
+    ) -> bool:
+        """模型、main_pages、路由常量表、prompt 与抽取配置均未变化时，文件级记录才可复用。"""
+        return (
+            self.model == model
+            and self.main_pages_hash == main_pages_hash
+            and self.route_const_hash == route_const_hash
+            and self.prompts_hash == prompts_hash
+            and self.settings_hash == settings_hash
+        )
+
+    def reusable_record(
+        self,
+        fp: str,
+        *,
+        file_hash: str,
+        deps: List[str],
+        dep_hashes: Dict[str, str],
+    ) -> Optional[FileRecord]:
+        """文件自身与全部直接依赖都未变化时返回旧记录，否则返回 None。"""
+        rec = self.files.get(fp)
+        if rec is None or rec.hash != file_hash or list(rec.deps) != list(deps):
+            return None
+        for dep in deps:
+            old = self.previous_hash(dep)
+            if not old or old != dep_hashes.get(dep):
+                return None
+        return rec
+
+    def previous_hash(self, fp: str) -> str:
+        rec = self.files.get(fp)
+        return rec.hash if rec is not None else self.file_hashes.get(fp, "")
+
+    def to_json_obj(self) -> Dict[str, Any]:
+        return {
+            "version": MANIFEST_VERSION,
+            "model": self.model,
+            "main_pages_hash": self.main_pages_hash,
+            "route_const_hash": self.route_const_hash,
+            "prompts_hash": self.prompts_hash,
+            "settings_hash": self.settings_hash,
+            "files": {
+                fp: {
+                    "hash": rec.hash,
+                    "deps": list(rec.deps),
+                    "admissible": rec.admissible,
+                    "census_calls": rec.census_calls,
+                    "edges": rec.edges,
+                }
+                for fp, rec in sorted(self.files.items())
+            },
+            "file_hashes": dict(sorted(self.file_hashes.items())),
+        }
+
+    @classmethod
+    def from_json_obj(cls, obj: Dict[str, Any]) -> Optional["RunManifest"]:
+        if not isinstance(obj, dict) or int(obj.get("version") or 0) != MANIFEST_VERSION:
+            return None
+        files: Dict[str, FileRecord] = {}
+        for fp, row in (obj.get("files") or {}).items():
+            if not isinstance(row, dict):
+                continue
+            files[str(fp)] = FileRecord(
+                hash=str(row.get("hash") or ""),
+                deps=[str(x) for x in (row.get("deps") or [])],
+                admissible=bool(row.get("admissible", False)),
+                census_calls=list(row.get("census_calls") or []),
+                edges=[dict(e) for e in (row.get("edges") or []) if isinstance(e, dict)],
+            )
+        return cls(
+            model=str(obj.get("model") or ""),
+            main_pages_hash=str(obj.get("main_pages_hash") or ""),
+            route_const_hash=str(obj.get("route_const_hash") or ""),
+            prompts_hash=str(obj.get("prompts_hash") or ""),
+            settings_hash=str(obj.get("settings_hash") or ""),
+            files=files,
+            file_hashes={str(k): str(v) for k, v in (obj.get("file_hashes") or {}).items()},
+        )
+
+    @classmethod
+    def load(cls, path: str) -> Optional["RunManifest"]:
+        """读取清单；不存在或格式不兼容时返回 None。"""
+        p = Path(path)
+        if not p.is_file():
+            return None
+        try:
+            return cls.from_json_obj(json.loads(p.read_text(encoding="utf-8")))
+        except Exception as ex:
+            print(f"[RunManifest] Failed to load manifest, full run: {ex}")
+            return None
+
+    def save(self, path: str) -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=p.parent, prefix=p.name + ".", suffix=".tmp", delete=False
+        ) as f:
+            f.write(json.dumps(self.to_json_obj(), ensure_ascii=False))
+        os.replace(f.name, p)
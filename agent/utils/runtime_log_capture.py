@@ -8,17 +8,19 @@ from typing import List, Optional, TextIO
 
 
 class _TeeStream:
-    """将输出同时写入原始流与内存缓冲。"""
+    """将输出同时写入原始流与内存缓冲（echo 为 False 时只写缓冲）。"""
 
-    def __init__(self, origin: TextIO, chunks: List[str]) -> None:
+    def __init__(self, origin: TextIO, chunks: List[str], echo: bool = True) -> None:
         self._origin = origin
         self._chunks = chunks
+        self._echo = echo
 
     def write(self, data: str) -> int:
         s = str(data or "")
         if s:
             self._chunks.append(s)
-            self._origin.write(s)
+            if self._echo:
+                self._origin.write(s)
         return len(s)
 
     def flush(self) -> None:
@@ -45,12 +47,15 @@ class RuntimeLogCapture:
         project_name: str,
         model_name: str,
         prefix: str = "agent_workflow_log",
+        echo: bool = True,
     ) -> None:
         self.enabled = bool(enabled)
         self.output_dir = Path(output_dir)
         self.project_name = project_name
         self.model_name = model_name
         self.prefix = prefix
+        # 批量运行时各项目进程只写自己的日志文件，不输出到控制台。
+        self.echo = bool(echo)
         self._chunks: List[str] = []
         self._stdout_origin: Optional[TextIO] = None
         self._stderr_origin: Optional[TextIO] = None
@@ -61,8 +66,8 @@ class RuntimeLogCapture:
             return
         self._stdout_origin = sys.stdout
         self._stderr_origin = sys.stderr
-        sys.stdout = _TeeStream(self._stdout_origin, self._chunks)  # type: ignore[assignment]
-        sys.stderr = _TeeStream(self._stderr_origin, self._chunks)  # type: ignore[assignment]
+        sys.stdout = _TeeStream(self._stdout_origin, self._chunks, self.echo)  # type: ignore[assignment]
+        sys.stderr = _TeeStream(self._stderr_origin, self._chunks, self.echo)  # type: ignore[assignment]
         self._started = True
 
     def stop_and_save(self) -> str:
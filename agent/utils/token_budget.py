@@ -0,0 +1,30 @@
+"""跨进程共享的 token 预算。
+
+批量运行时每个项目在独立进程中运行，各自的 AgentGoal.token_budget_total 只能约束本进程；
+共享计数放在 multiprocessing.Value 中，由进程池 initializer 传给各工作进程。
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from typing import Any, Optional
+
+
+class SharedTokenBudget:
+    """多个 agent（可跨进程）共同消耗的 token 总预算；total <= 0 表示只计数不限制。"""
+
+    def __init__(self, total: int = 0, counter: Optional[Any] = None) -> None:
+        self.total = int(total or 0)
+        self.counter = counter if counter is not None else multiprocessing.Value("q", 0)
+
+    def add(self, tokens: int) -> None:
+        if int(tokens or 0) <= 0:
+            return
+        with self.counter.get_lock():
+            self.counter.value += int(tokens)
+
+    def used(self) -> int:
+        return int(self.counter.value)
+
+    def exhausted(self) -> bool:
+        return self.total > 0 and self.used() >= self.total
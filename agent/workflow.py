@@ -1,6 +1,9 @@
 import json
+import re
 import sys
+import time
 from pathlib import Path
+from typing import Any, Dict, Optional
 
 from dotenv import load_dotenv
 
@@ -14,9 +17,41 @@ from agent.route_validation_agent import RouteValidationAgent
 from agent.tools.project_reader import ProjectReader
 from agent.utils.output_writer import finalize_validated_outputs
 from agent.utils.runtime_log_capture import RuntimeLogCapture
+from agent.utils.token_budget import SharedTokenBudget
+from llm_cassette import cassette_mode
 
 ENABLE_SAVE_RUN_LOG = True
 RUN_LOG_OUTPUT_DIR = str(_REPO_ROOT / "agent" / "result" / "_logs")
+CACHE_DIR = _REPO_ROOT / "agent" / "result" / "_cache"
+# 同时分析的 main page 数量；1 为顺序执行。
+MAIN_PAGE_CONCURRENCY = 1
+# 单个文件内 census 分块与跨文件 trigger refine 请求的并发上限；1 为逐个等待。
+INTRA_FILE_CONCURRENCY = 4
+# per_main_page | whole_project（每个文件只做一次 LLM 抽取，边归属到所有可达的 main page）
+ANALYSIS_MODE = "per_main_page"
+# 增量模式：读取上次运行清单，仅对变更文件及其直接依赖方重跑 LLM（自动使用 whole_project）。
+ENABLE_INCREMENTAL = False
+# 多文件批量 census 的单次请求估算 token 上限；0 表示逐文件 census。
+CENSUS_BATCH_MAX_TOKENS = 0
+# 行数不超过该值的小文件用一次调用同时完成 census 与构边；0 表示始终两阶段。
+FUSED_CENSUS_MAX_LINES = 0
+# 静态快速路径：off | shadow（照常走 LLM，报告静态解析率与一致率）| on（可静态判定的调用不走 LLM）。
+STATIC_FAST_PATH = "off"
+# 长文件分块：lines（固定行窗口）| syntax（按语法单元打包）；先用 bench/chunking_bench.py 对比块数与 token。
+CHUNK_STRATEGY = "lines"
+# 构边 prompt 压缩（引用到的路由常量 + 相对文件 ID + census 调用所在语法区域）；先用 bench/prompt_compaction_ab.py 确认边一致。
+COMPACT_CONSTRUCT_PROMPT = False
+# trigger refine 只发送组件中与回调相关的区域；同样先用 bench/prompt_compaction_ab.py --arm refine 确认 component/event 一致。
+SLICE_REFINE_COMPONENT = False
+# tool-calling 补解析会话粒度：file（每个文件一次）| page（确定性解析后的剩余边每个 main page 只开一次会话）。
+TOOL_CALLING_SCOPE = "file"
+# census / 构边改用流式接口并增量解析 JSON 数组；输出明显偏离格式时提前取消请求。
+STREAM_LLM_JSON = False
+# 项目索引（alias / 模块导出 / 路由常量）磁盘缓存：大型工程未变化时启动无需重新扫描。
+ENABLE_PROJECT_INDEX_CACHE = True
+# LLM 响应磁盘缓存：项目与 prompt 未变化时重跑不再消耗 token。
+ENABLE_LLM_CACHE = False
+LLM_CACHE_PATH = str(CACHE_DIR / "llm_cache.sqlite3")
 
 
 def _parse_args(argv: list[str]) -> tuple[str, str]:
@@ -33,31 +68,101 @@ def _parse_args(argv: list[str]) -> tuple[str, str]:
     return provider, project
 
 
-def main() -> None:
-    load_dotenv(dotenv_path=_REPO_ROOT / ".env")
+def _scaled_llm_config(llm_cfg: dict, rate_limit_share: float) -> dict:
+    """按份额缩放 provider 限流（批量运行时同一 provider 的多个进程分摊 rpm / tpm）。"""
+    share = float(rate_limit_share or 1.0)
+    if share >= 1.0:
+        return llm_cfg
+    out = dict(llm_cfg)
+    limits = dict(out.get("rateLimit") or {})
+    for k in ("rpm", "tpm"):
+        if float(limits.get(k) or 0) > 0:
+            limits[k] = max(1.0, float(limits[k]) * share)
+    out["rateLimit"] = limits
+    return out
+
+
+def build_structure_config(llm_cfg: dict, proj: dict, *, disk_caches: bool = True) -> RouteStructureAgentConfig:
+    """
+    按本文件的运行选项构造 RouteStructureAgentConfig。
+
+    disk_caches 为 False 时不使用 LLM 缓存、增量清单与项目索引缓存（基准测试每次都从冷启动开始）。
+    """
+    # 录制 / 回放 cassette 时不读 LLM 缓存与增量清单，保证每次 LLM 调用都经过模型，回放结果可复现。
+    use_llm_cache = disk_caches and ENABLE_LLM_CACHE and not cassette_mode()
+    use_incremental = disk_caches and ENABLE_INCREMENTAL and not cassette_mode()
+    use_index_cache = disk_caches and ENABLE_PROJECT_INDEX_CACHE
+    # 增量清单按模型区分：批量运行同一项目的多个 provider 时各自复用自己的清单，互不覆盖。
+    model_token = re.sub(r"[^A-Za-z0-9._-]+", "_", str(llm_cfg["model"])).strip("._-") or "model"
+    return RouteStructureAgentConfig(
+        project_name=proj["projectName"],
+        project_path=proj["projectPath"],
+        main_pages_json_path=proj["projectMainPagePath"],
+        llm_provider_config=llm_cfg,
+        llm_model_name=llm_cfg["model"],
+        import_alias_map=proj.get("importAliasMap"),
+        main_page_concurrency=MAIN_PAGE_CONCURRENCY,
+        intra_file_concurrency=INTRA_FILE_CONCURRENCY,
+        analysis_mode=ANALYSIS_MODE,
+        census_batch_max_tokens=CENSUS_BATCH_MAX_TOKENS,
+        fused_census_max_lines=FUSED_CENSUS_MAX_LINES,
+        static_fast_path=STATIC_FAST_PATH,
+        chunk_strategy=CHUNK_STRATEGY,
+        compact_construct_prompt=COMPACT_CONSTRUCT_PROMPT,
+        slice_refine_component=SLICE_REFINE_COMPONENT,
+        tool_calling_scope=TOOL_CALLING_SCOPE,
+        stream_llm_json=STREAM_LLM_JSON,
+        incremental_manifest_path=(
+            str(CACHE_DIR / f"{proj['projectName']}_{model_token}_manifest.json") if use_incremental else ""
+        ),
+        llm_cache_path=LLM_CACHE_PATH if use_llm_cache else "",
+        project_index_cache_path=(
+            str(CACHE_DIR / f"{proj['projectName']}_index.json") if use_index_cache else ""
+        ),
+    )
 
-    provider, project_key = _parse_args(sys.argv[1:])
 
-    llm_cfg = get_llm_config(provider)
+def run_project(
+    provider: str,
+    project_key: str,
+    *,
+    echo_log: bool = True,
+    sync_ptg_ets: bool = True,
+    rate_limit_share: float = 1.0,
+    shared_budget: Optional[SharedTokenBudget] = None,
+) -> Dict[str, Any]:
+    """
+    跑一个 provider / project 组合：结构抽取 -> 校验 -> 落盘。
+
+    Args:
+        echo_log: 运行日志是否同时输出到控制台（批量运行时关闭，只写日志文件）。
+        sync_ptg_ets: 是否同步 test/PTG.ets（批量运行时关闭，避免多个项目互相覆盖）。
+        rate_limit_share: 本进程可用的 provider 限流份额。
+        shared_budget: 多个项目共同消耗的 token 预算。
+
+    Returns:
+        汇总：校验报告、输出路径、日志路径、PTG、token 用量、耗时与边数。
+    """
+    llm_cfg = _scaled_llm_config(get_llm_config(provider), rate_limit_share)
     proj = get_project_config(project_key)
 
     structure_agent = RouteStructureAgent(
-        config=RouteStructureAgentConfig(
-            project_name=proj["projectName"],
-            project_path=proj["projectPath"],
-            main_pages_json_path=proj["projectMainPagePath"],
-            llm_provider_config=llm_cfg,
-            llm_model_name=llm_cfg["model"],
-            import_alias_map=proj.get("importAliasMap"),
-        )
+        config=build_structure_config(llm_cfg, proj),
+        shared_budget=shared_budget,
     )
     log_capture = RuntimeLogCapture(
         enabled=ENABLE_SAVE_RUN_LOG,
         output_dir=RUN_LOG_OUTPUT_DIR,
         project_name=structure_agent.config.project_name,
         model_name=structure_agent.config.llm_model_name,
+        echo=echo_log,
     )
-    log_path = ""
+    result: Dict[str, Any] = {
+        "provider": provider,
+        "project": proj["projectName"],
+        "model": structure_agent.config.llm_model_name,
+    }
+    t0 = time.perf_counter()
     try:
         log_capture.start()
 
@@ -68,15 +173,17 @@ def main() -> None:
 
         validator = RouteValidationAgent(main_pages=main_pages)
         validated_ptg, report = validator.validate_and_rewrite(ptg)
+        snapshot = structure_agent.get_finalize_snapshot()
         output_path = finalize_validated_outputs(
             validated_ptg=validated_ptg,
-            snapshot=structure_agent.get_finalize_snapshot(),
+            snapshot=snapshot,
             output_dir=structure_agent.config.output_dir,
             project_name=structure_agent.config.project_name,
             model_name=structure_agent.config.llm_model_name,
             repo_root=_REPO_ROOT,
+            sync_ptg_ets=sync_ptg_ets,
         )
-
+        # 在日志捕获结束前输出，运行日志中保留完整报告。
         print(
             json.dumps(
                 {"report": report, "output_path": output_path, "ptg": validated_ptg},
@@ -84,10 +191,31 @@ def main() -> None:
                 indent=2,
             )
         )
+        result.update(
+            {
+                "report": report,
+                "output_path": output_path,
+                "ptg": validated_ptg,
+                "token_usage": dict(snapshot.get("token_usage") or {}),
+                "edges_raw": (
+                    sum(len(v) for v in ptg.values() if isinstance(v, list)) if isinstance(ptg, dict) else 0
+                ),
+            }
+        )
     finally:
+        result["wall_seconds"] = round(time.perf_counter() - t0, 3)
         log_path = log_capture.stop_and_save()
-        if log_path:
+        result["log_path"] = log_path
+        if log_path and echo_log:
             print(f"[Workflow] Run log saved: {log_path}")
+    return result
+
+
+def main() -> None:
+    load_dotenv(dotenv_path=_REPO_ROOT / ".env")
+
+    provider, project_key = _parse_args(sys.argv[1:])
+    run_project(provider, project_key)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+"""
+长文件分块对比：固定行窗口（chunk_size_lines / chunk_overlap_lines）与语法分块（chunk_target_tokens）。
+
+不调用 LLM。遍历项目 ets 目录下超过 chunk_trigger_lines 的文件，分别统计两种策略的块数、估算 token，
+以及行窗口切断的 `.onXxx(...)` 闭包数（闭包起止落在不同块中且没有任何一块完整包含它）。
+
+用法:
+    python bench/chunking_bench.py [project ...] [--target-tokens 3000]
+
+未指定 project 时使用 config.PROJECT_CONFIG 中的全部项目。
+"""
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from config import PROJECT_CONFIG, get_project_config
+from agent.route_structure_agent import RouteStructureAgentConfig
+from agent.tools.code_chunker import SyntaxChunker, scan_line_depths
+from llm_usage import estimate_tokens
+
+_DEFAULTS = {f.name: f.default for f in fields(RouteStructureAgentConfig)}
+_EVENT_RE = re.compile(r"\.on[A-Z]\w*\s*\(")
+
+
+def _line_windows(lines: List[str]) -> List[Tuple[int, int]]:
+    size = max(50, int(_DEFAULTS["chunk_size_lines"]))
+    overlap = max(0, min(int(_DEFAULTS["chunk_overlap_lines"]), size - 1))
+    return [(i, min(len(lines), i + size)) for i in range(0, len(lines), max(1, size - overlap))]
+
+
+def _event_spans(code: str) -> List[Tuple[int, int]]:
+    """`.onXxx(` 所在行到其括号闭合行的区间。"""
+    lines = code.split("\n")
+    depths = scan_line_depths(code)
+    spans: List[Tuple[int, int]] = []
+    for i, line in enumerate(lines):
+        if not _EVENT_RE.search(line):
+            continue
+        j = i
+        while j < len(lines) - 1 and depths[j].end > depths[i].start:
+            j += 1
+        spans.append((i, j + 1))
+    return spans
+
+
+def _cut(spans: List[Tuple[int, int]], ranges: List[Tuple[int, int]]) -> int:
+    return sum(1 for s, e in spans if not any(a <= s and e <= b for a, b in ranges))
+
+
+def bench_project(proj: Dict[str, Any], target_tokens: int) -> Dict[str, Any]:
+    ets_root = Path(proj["projectPath"]) / "src" / "main" / "ets"
+    trigger = int(_DEFAULTS["chunk_trigger_lines"])
+    chunker = SyntaxChunker(token_target=target_tokens, overlap_lines=int(_DEFAULTS["chunk_overlap_lines"]))
+    row = {"files": 0, "lines": {"chunks": 0, "tokens": 0, "cut_closures": 0}}
+    row["syntax"] = {"chunks": 0, "tokens": 0, "cut_closures": 0}
+    for path in sorted(ets_root.rglob("*.ets")):
+        code = path.read_text(encoding="utf-8", errors="ignore")
+        lines = code.splitlines()
+        if len(lines) <= trigger:
+            continue
+        row["files"] += 1
+        spans = _event_spans(code)
+        windows = _line_windows(lines)
+        row["lines"]["chunks"] += len(windows)
+        row["lines"]["tokens"] += sum(estimate_tokens("\n".join(lines[a:b])) for a, b in windows)
+        row["lines"]["cut_closures"] += _cut(spans, windows)
+        chunks = chunker.split(code)
+        row["syntax"]["chunks"] += len(chunks)
+        row["syntax"]["tokens"] += sum(estimate_tokens(c.text) for c in chunks)
+        row["syntax"]["cut_closures"] += _cut(spans, [(c.start_line, c.end_line) for c in chunks])
+    return row
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("projects", nargs="*")
+    ap.add_argument("--target-tokens", type=int, default=int(_DEFAULTS["chunk_target_tokens"]))
+    args = ap.parse_args()
+
+    report: Dict[str, Any] = {}
+    for name in args.projects or list(PROJECT_CONFIG.keys()):
+        proj = get_project_config(name)
+        if not Path(proj["projectPath"]).is_dir():
+            report[name] = {"error": f"project not found: {proj['projectPath']}"}
+            continue
+        report[name] = bench_project(proj, args.target_tokens)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+文件表基准：对比“各解析器各自遍历/读取文件系统”（before）与“共享 ProjectFileTable”（after）
+在同一组访问模式下的系统调用次数与耗时。
+
+访问模式（与解析器对文件系统的实际用法一致，不含 AST 解析本身）：
+1. 路由常量候选扫描：遍历 ets_root 下全部 .ets/.ts 并读取文件头；
+2. 模块导出索引：对每个模块目录列出 .ets（上限 800）并读取全文；
+3. 符号文件名兜底：对 N 个未解析符号在模块目录下按文件名查找；
+4. 可读性检查：对每个源码文件做一次存在性判断。
+
+合成工程中另有指向上级目录的符号链接环与 oh_modules 式的链接目录；报告的 consistent 字段校验文件表与
+rglob 收录的文件集合一致（不进入链接目录、不重复收录），不一致时退出码为 1。
+
+用法:
+    python bench/file_table_bench.py [ets_root] [--modules 8] [--dirs 6] [--files 40] [--symbols 200]
+
+未指定 ets_root 时在临时目录生成合成工程。
+"""
+
+import argparse
+import builtins
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from agent.tools.project_file_table import ProjectFileTable
+
+_ROUTE_KEYWORDS = ("pages/", "router", "route", "urlconstants", "pageconstants")
+
+
+@contextmanager
+def count_syscalls() -> Iterator[Dict[str, int]]:
+    """统计 os.stat / os.lstat / os.scandir / open 调用次数。"""
+    counts = {"stat": 0, "scandir": 0, "open": 0}
+    originals = {
+        "stat": os.stat,
+        "lstat": os.lstat,
+        "scandir": os.scandir,
+        "io_open": io.open,
+        "open": builtins.open,
+    }
+
+    def _wrap(name, fn):
+        def inner(*args, **kwargs):
+            counts[name] += 1
+            return fn(*args, **kwargs)
+
+        return inner
+
+    os.stat = _wrap("stat", originals["stat"])
+    os.lstat = _wrap("stat", originals["lstat"])
+    os.scandir = _wrap("scandir", originals["scandir"])
+    io.open = _wrap("open", originals["io_open"])
+    builtins.open = _wrap("open", originals["open"])
+    try:
+        yield counts
+    finally:
+        os.stat = originals["stat"]
+        os.lstat = originals["lstat"]
+        os.scandir = originals["scandir"]
+        io.open = originals["io_open"]
+        builtins.open = originals["open"]
+
+
+def generate_project(root: Path, *, modules: int, dirs: int, files: int, seed: int = 7) -> Path:
+    """生成合成 ets 目录：modules 个模块，每个模块 dirs 个子目录，每个子目录 files 个文件。"""
+    rnd = random.Random(seed)
+    ets_root = root / "entry" / "src" / "main" / "ets"
+    for m in range(modules):
+        for d in range(dirs):
+            base = ets_root / f"module{m}" / f"dir{d}"
+            base.mkdir(parents=True, exist_ok=True)
+            for f in range(files):
+                name = f"Comp{m}_{d}_{f}"
+                body = [f"import router from '@ohos.router';" if rnd.random() < 0.3 else "import { x } from './x';"]
+                body.append(f"@Component\nexport struct {name} {{\n  build() {{\n    Column() {{}}\n  }}\n}}\n")
+                body.append("// filler\n" * rnd.randint(10, 60))
+                (base / f"{name}.ets").write_text("\n".join(body), encoding="utf-8")
+    _add_symlinks(ets_root, modules)
+    return ets_root
+
+
+def _add_symlinks(ets_root: Path, modules: int) -> None:
+    """符号链接环（指向上级目录）与 oh_modules 式的模块链接；平台不支持符号链接时跳过。"""
+    links = [(ets_root / "module0" / "dir0" / "up", "../.."), (ets_root / "module0" / "dir0" / "root", "../../..")]
+    if modules > 1:
+        links.append((ets_root / "oh_modules" / "@ohos" / "module1", "../../module1"))
+    for link, target in links:
+        link.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.symlink(target, link, target_is_directory=True)
+        except (OSError, NotImplementedError):
+            continue
+
+
+def run_before(ets_root: Path, module_dirs: List[Path], symbols: List[str]) -> None:
+    for p in ets_root.rglob("*"):
+        if not p.is_file() or p.suffix.lower() not in {".ets", ".ts"}:
+            continue
+        head = p.read_text(encoding="utf-8", errors="ignore")[:8192].lower()
+        any(k in head for k in _ROUTE_KEYWORDS)
+
+    for m in module_dirs:
+        if not m.exists() or not m.is_dir():
+            continue
+        for f in list(m.rglob("*.ets"))[:800]:
+            f.read_text(encoding="utf-8", errors="ignore")
+
+    for i, sym in enumerate(symbols):
+        m = module_dirs[i % len(module_dirs)]
+        for p in m.rglob("*.ets"):
+            if p.stem == sym:
+                break
+
+    for p in ets_root.rglob("*.ets"):
+        p.exists() and p.is_file()
+
+
+def run_after(ets_root: Path, module_dirs: List[Path], symbols: List[str]) -> ProjectFileTable:
+    table = ProjectFileTable([ets_root])
+    for f in table.files_under(ets_root, suffixes={".ets", ".ts"}):
+        head = table.read_text(f.path)[:8192].lower()
+        any(k in head for k in _ROUTE_KEYWORDS)
+
+    for m in module_dirs:
+        for f in table.files_under(m, suffixes={".ets"})[:800]:
+            table.read_text(f.path)
+
+    for i, sym in enumerate(symbols):
+        table.find_by_stem(sym, under=module_dirs[i % len(module_dirs)], suffix=".ets")
+
+    for f in table.files_under(ets_root, suffixes={".ets"}):
+        table.is_file(f.path)
+    return table
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("ets_root", nargs="?", default="")
+    ap.add_argument("--modules", type=int, default=8)
+    ap.add_argument("--dirs", type=int, default=6)
+    ap.add_argument("--files", type=int, default=40)
+    ap.add_argument("--symbols", type=int, default=200)
+    args = ap.parse_args()
+
+    tmp = None
+    if args.ets_root:
+        ets_root = Path(args.ets_root).resolve()
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix="file_table_bench_")
+        ets_root = generate_project(Path(tmp.name), modules=args.modules, dirs=args.dirs, files=args.files)
+
+    module_dirs = sorted(p for p in ets_root.iterdir() if p.is_dir()) or [ets_root]
+    all_stems = sorted({p.stem for p in ets_root.rglob("*.ets")})
+    rnd = random.Random(11)
+    # 一半命中、一半未命中（未命中时旧实现需完整 rglob 一次模块目录）
+    symbols = [rnd.choice(all_stems) if i % 2 == 0 and all_stems else f"Missing{i}" for i in range(args.symbols)]
+
+    with count_syscalls() as before_counts:
+        t0 = time.perf_counter()
+        run_before(ets_root, module_dirs, symbols)
+        before_seconds = time.perf_counter() - t0
+
+    with count_syscalls() as after_counts:
+        t0 = time.perf_counter()
+        table = run_after(ets_root, module_dirs, symbols)
+        after_seconds = time.perf_counter() - t0
+    # DirEntry.stat 无法被拦截，按文件表内部计数补上。
+    after_counts["stat"] += int(table.stats["stat_calls"])
+    rglob_files = sorted(str(p) for p in ets_root.rglob("*") if p.is_file())
+    table_files = sorted(f.path for f in table.files_under(ets_root))
+
+    report = {
+        "ets_root": str(ets_root),
+        "files": table.stats["files"],
+        "dirs": table.stats["dirs"],
+        "symbols": len(symbols),
+        "before": {**before_counts, "total": sum(before_counts.values()), "seconds": round(before_seconds, 4)},
+        "after": {**after_counts, "total": sum(after_counts.values()), "seconds": round(after_seconds, 4)},
+        "file_table": table.snapshot(),
+        "consistent": rglob_files == table_files,
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if tmp is not None:
+        tmp.cleanup()
+    if not report["consistent"]:
+        print(f"[FileTableBench] File set differs from rglob: rglob={len(rglob_files)}, table={len(table_files)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
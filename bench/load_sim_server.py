@@ -0,0 +1,452 @@
+"""
+本地 OpenAI 兼容负载模拟服务：实现 ChatOpenAI 用到的 chat-completions 子集（含流式与 tool-calling），
+用于在笔记本上按真实规模压测并发、限流与重试。
+
+响应来源（按顺序）：
+1. --cassette 指定的 LLM 录制文件（llm_cassette.py），按请求内容命中时原样返回；
+2. 规则响应：census / 构边 / refine 等由 bench/sim_responder.py 按 prompt 中的路由调用生成；
+   tool-calling 会话第一轮调用 resolve_many（target_expr 去掉 `this.` 并取成员链最后两段），
+   第二轮把工具返回的非空 target 作为补出的边。
+
+可注入的故障与分布：
+- 首 token 延迟（对数正态抖动）与每个输出 token 的延迟；
+- 服务端 RPM 上限（超出返回 429）与随机 429，均带 retry-after 头；
+- 随机 500、随机挂起（超过客户端 timeout 即为超时）、随机截断 JSON（finish_reason=length）；
+- usage：prompt / completion token 按文本估算，completion 可额外加上 --extra-completion-tokens。
+
+用法:
+    python bench/load_sim_server.py [--port 8765] [--latency-ms 800] [--latency-sigma 0.4] [--rpm 120]
+        [--rate-429 0.02] [--error-rate 0] [--timeout-rate 0.01] [--hang-seconds 600] [--truncate-rate 0.02]
+        [--ms-per-token 5] [--extra-completion-tokens 0] [--cassette PATH] [--seed 0]
+
+然后把 config.LLM_CONFIG 中某个 provider 的 baseURL 指向 http://127.0.0.1:8765/v1，
+其 apiKeyEnv 对应的环境变量设为任意非空值即可运行 agent/workflow.py 或 agent/batch_workflow.py。
+模拟挂起时请同时调低该 provider 的 chatOptions.timeout。GET /stats 返回累计统计。
+"""
+
+import argparse
+import collections
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from bench.sim_responder import simulate_response
+from llm_cassette import Cassette, CassetteMissError, request_key
+from llm_usage import estimate_tokens
+
+_STREAM_CHUNK_CHARS = 16
+_WORD_CHAIN_RE = re.compile(r"[A-Za-z_$][\w$]*(?:\s*\.\s*[A-Za-z_$][\w$]*)*")
+
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 800.0
+    latency_sigma: float = 0.4
+    ms_per_token: float = 0.0
+    rpm: int = 0
+    rate_429: float = 0.0
+    retry_after_seconds: float = 1.0
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    hang_seconds: float = 600.0
+    truncate_rate: float = 0.0
+    extra_completion_tokens: int = 0
+    seed: int = 0
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = collections.Counter()
+        self.inflight = 0
+        self.max_inflight = 0
+
+    def bump(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.counts[key] += int(value)
+
+    def enter(self) -> None:
+        with self._lock:
+            self.inflight += 1
+            self.max_inflight = max(self.max_inflight, self.inflight)
+
+    def leave(self) -> None:
+        with self._lock:
+            self.inflight -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**dict(sorted(self.counts.items())), "inflight": self.inflight, "max_inflight": self.max_inflight}
+
+
+class _RpmWindow:
+    """60 秒滑动窗口的请求数上限；rpm <= 0 时不限。"""
+
+    def __init__(self, rpm: int) -> None:
+        self.rpm = int(rpm)
+        self._lock = threading.Lock()
+        self._times: Deque[float] = collections.deque()
+
+    def admit(self) -> float:
+        """放行返回 0，否则返回窗口内最早请求过期前需等待的秒数。"""
+        if self.rpm <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            while self._times and now - self._times[0] >= 60.0:
+                self._times.popleft()
+            if len(self._times) >= self.rpm:
+                return max(0.001, 60.0 - (now - self._times[0]))
+            self._times.append(now)
+            return 0.0
+
+
+def _text_of(content: Any) -> str:
+    if isinstance(content, list):
+        return "".join(str(p.get("text") or "") if isinstance(p, dict) else str(p) for p in content)
+    return str(content or "")
+
+
+def to_langchain_messages(messages: List[Dict[str, Any]]) -> List[BaseMessage]:
+    """把请求体中的 OpenAI 消息转换为 LangChain 消息（用于计算 cassette 请求键）。"""
+    out: List[BaseMessage] = []
+    for m in messages or []:
+        role = str(m.get("role") or "")
+        content = _text_of(m.get("content"))
+        if role in ("system", "developer"):
+            out.append(SystemMessage(content=content))
+        elif role == "assistant":
+            calls = []
+            for tc in m.get("tool_calls") or []:
+                fn = tc.get("function") or {}
+                try:
+                    args = json.loads(fn.get("arguments") or "{}")
+                except Exception:
+                    args = {}
+                calls.append({"name": fn.get("name"), "args": args, "id": tc.get("id")})
+            out.append(AIMessage(content=content, tool_calls=calls))
+        elif role == "tool":
+            out.append(ToolMessage(content=content, tool_call_id=str(m.get("tool_call_id") or "")))
+        else:
+            out.append(HumanMessage(content=content))
+    return out
+
+
+def _rewrite_target_expr(expr: str) -> str:
+    """规则化补解析：去掉 `this.` 与下标引号，取成员链最后两段。"""
+    expr = re.sub(r"\[\s*['\"]([\w$]+)['\"]\s*\]", r".\1", str(expr or "")).replace("this.", "")
+    chains = _WORD_CHAIN_RE.findall(expr)
+    if not chains:
+        return expr
+    parts = [p.strip() for p in chains[0].split(".")]
+    return ".".join(parts[-2:])
+
+
+def rule_tool_round(messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """tool-calling 会话的规则响应：返回 (content, OpenAI 格式的 tool_calls)。"""
+    names = {str((t.get("function") or {}).get("name") or "") for t in tools or []}
+    tool_msgs = [m for m in messages if m.get("role") == "tool"]
+    if tool_msgs:
+        edges = []
+        for m in tool_msgs:
+            try:
+                rows = json.loads(_text_of(m.get("content")))
+            except Exception:
+                continue
+            for row in rows if isinstance(rows, list) else []:
+                if isinstance(row, dict) and row.get("target"):
+                    edges.append({"edge_id": row.get("edge_id"), "target": row["target"], "target_expr": ""})
+        return json.dumps(edges, ensure_ascii=False), []
+    user = next((_text_of(m.get("content")) for m in messages if m.get("role") == "user"), "")
+    try:
+        payload = json.loads(user)
+    except Exception:
+        payload = {}
+    unresolved = payload.get("unresolved_edges") if isinstance(payload, dict) else None
+    if "resolve_many" not in names or not unresolved:
+        return "[]", []
+    requests = [
+        {"edge_id": e.get("edge_id"), "target_expr": _rewrite_target_expr(str(e.get("target_expr") or ""))}
+        for e in unresolved
+        if isinstance(e, dict)
+    ]
+    call = {
+        "id": f"call_{uuid.uuid4().hex[:12]}",
+        "type": "function",
+        "function": {"name": "resolve_many", "arguments": json.dumps({"requests": requests}, ensure_ascii=False)},
+    }
+    return "", [call]
+
+
+class LoadSimServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], faults: FaultConfig, cassette: Optional[Cassette]) -> None:
+        super().__init__(address, _Handler)
+        self.faults = faults
+        self.cassette = cassette
+        self.stats = _Stats()
+        self.rpm = _RpmWindow(faults.rpm)
+        self._rng = random.Random(faults.seed)
+        self._rng_lock = threading.Lock()
+
+    def roll(self, p: float) -> bool:
+        if p <= 0:
+            return False
+        with self._rng_lock:
+            return self._rng.random() < p
+
+    def latency_seconds(self) -> float:
+        f = self.faults
+        with self._rng_lock:
+            # 对数正态抖动，均值为 1。
+            jitter = math.exp(self._rng.gauss(-f.latency_sigma**2 / 2, f.latency_sigma)) if f.latency_sigma > 0 else 1.0
+        return max(0.0, f.latency_ms) * jitter / 1000.0
+
+    def cut_point(self, n: int) -> int:
+        with self._rng_lock:
+            return self._rng.randint(max(1, n // 4), max(1, 3 * n // 4)) if n > 1 else 0
+
+    def plan(self, body: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]], Optional[Dict[str, Any]], str]:
+        """返回 (content, tool_calls, 命中的录制条目, 来源)。"""
+        messages = body.get("messages") or []
+        tools = body.get("tools") or []
+        if self.cassette is not None:
+            lc_messages = to_langchain_messages(messages)
+            key = request_key(str(body.get("model") or ""), lc_messages, tools=tools or None, stop=body.get("stop"))
+            try:
+                row = self.cassette.replay(key, lc_messages)
+            except CassetteMissError:
+                row = None
+            if row is not None:
+                calls = [
+                    {
+                        "id": tc.get("id"),
+                        "type": "function",
+                        "function": {"name": tc.get("name"), "arguments": json.dumps(tc.get("args") or {})},
+                    }
+                    for tc in row.get("tool_calls") or []
+                ]
+                return str(row.get("content") or ""), calls, row, "cassette"
+        if tools:
+            content, calls = rule_tool_round(messages, tools)
+            return content, calls, None, "rule_tool"
+        system = "\n".join(_text_of(m.get("content")) for m in messages if m.get("role") in ("system", "developer"))
+        user = "\n".join(_text_of(m.get("content")) for m in messages if m.get("role") not in ("system", "developer"))
+        return simulate_response(system, user), [], None, "rule"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: LoadSimServer
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        pass
+
+    # ---------- 基础输出 ----------
+
+    def _send_json(self, status: int, obj: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, obj: Any) -> None:
+        text = obj if isinstance(obj, str) else json.dumps(obj, ensure_ascii=False)
+        data = f"data: {text}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    # ---------- 路由 ----------
+
+    def do_GET(self) -> None:
+        path = self.path.rstrip("/")
+        if path.endswith("/stats"):
+            self._send_json(200, self.server.stats.snapshot())
+        elif path.endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "load-sim", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"not found: {self.path}"}})
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"not found: {self.path}"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except Exception:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+        srv = self.server
+        srv.stats.bump("requests")
+        srv.stats.enter()
+        try:
+            self._complete(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端超时或取消流后断开。
+            srv.stats.bump("client_disconnects")
+        finally:
+            srv.stats.leave()
+
+    def _complete(self, body: Dict[str, Any]) -> None:
+        srv, f = self.server, self.server.faults
+        wait = srv.rpm.admit()
+        if wait > 0 or srv.roll(f.rate_429):
+            srv.stats.bump("rate_limited")
+            retry_after = max(wait, f.retry_after_seconds, 0.0)
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached (simulated)", "type": "rate_limit_error",
+                           "code": "rate_limit_exceeded"}},
+                {"retry-after": f"{retry_after:.3f}", "retry-after-ms": str(int(retry_after * 1000))},
+            )
+            return
+        if srv.roll(f.error_rate):
+            srv.stats.bump("server_errors")
+            self._send_json(500, {"error": {"message": "Internal server error (simulated)", "type": "server_error"}})
+            return
+        if srv.roll(f.timeout_rate):
+            srv.stats.bump("hangs")
+            time.sleep(max(0.0, f.hang_seconds))
+            self._send_json(504, {"error": {"message": "Gateway timeout (simulated)", "type": "timeout"}})
+            return
+
+        content, tool_calls, recorded, source = srv.plan(body)
+        chunks = (recorded or {}).get("chunks")
+        srv.stats.bump(f"source_{source}")
+        finish = "tool_calls" if tool_calls else "stop"
+        if content and not tool_calls and srv.roll(f.truncate_rate):
+            srv.stats.bump("truncated")
+            content = content[: srv.cut_point(len(content))]
+            chunks, finish = None, "length"
+
+        prompt = sum(estimate_tokens(_text_of(m.get("content"))) for m in body.get("messages") or [])
+        prompt += estimate_tokens(json.dumps(body.get("tools") or [])) if body.get("tools") else 0
+        completion = estimate_tokens(content) + sum(
+            estimate_tokens(tc["function"]["arguments"]) for tc in tool_calls
+        ) + max(0, int(f.extra_completion_tokens))
+        recorded_usage = (recorded or {}).get("usage") or {}
+        if recorded_usage:
+            # 回放录制条目时沿用真实 provider 报告的用量。
+            prompt = int(recorded_usage.get("input_tokens") or prompt)
+            completion = int(recorded_usage.get("output_tokens") or completion)
+        usage = {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+        srv.stats.bump("prompt_tokens", prompt)
+        srv.stats.bump("completion_tokens", completion)
+
+        model = str(body.get("model") or "load-sim")
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:24]}", "created": int(time.time()), "model": model}
+        first_token = srv.latency_seconds()
+        per_token = max(0.0, f.ms_per_token) / 1000.0
+
+        if not body.get("stream"):
+            time.sleep(first_token + per_token * completion)
+            message: Dict[str, Any] = {"role": "assistant", "content": content if not tool_calls else (content or None)}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            self._send_json(
+                200,
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+                    "usage": usage,
+                },
+            )
+            return
+
+        srv.stats.bump("streams")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        chunk_base = {**base, "object": "chat.completion.chunk"}
+        time.sleep(first_token)
+        self._write_chunk({**chunk_base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""},
+                                                      "finish_reason": None}]})
+        pieces = chunks if chunks is not None else [
+            content[i : i + _STREAM_CHUNK_CHARS] for i in range(0, len(content), _STREAM_CHUNK_CHARS)
+        ]
+        for piece in pieces:
+            time.sleep(per_token * estimate_tokens(piece))
+            self._write_chunk({**chunk_base, "choices": [{"index": 0, "delta": {"content": piece},
+                                                          "finish_reason": None}]})
+        for i, tc in enumerate(tool_calls):
+            self._write_chunk({**chunk_base, "choices": [{"index": 0, "delta": {"tool_calls": [{**tc, "index": i}]},
+                                                          "finish_reason": None}]})
+        self._write_chunk({**chunk_base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self._write_chunk({**chunk_base, "choices": [], "usage": usage})
+        self._write_chunk("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=800.0, help="平均首 token 延迟")
+    ap.add_argument("--latency-sigma", type=float, default=0.4, help="延迟的对数正态抖动（0 为固定延迟）")
+    ap.add_argument("--ms-per-token", type=float, default=0.0, help="每个输出 token 的延迟")
+    ap.add_argument("--rpm", type=int, default=0, help="服务端每分钟请求上限，超出返回 429；0 表示不限")
+    ap.add_argument("--rate-429", type=float, default=0.0, help="随机返回 429 的概率")
+    ap.add_argument("--retry-after", type=float, default=1.0, help="429 响应的最小 retry-after 秒数")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="随机返回 500 的概率")
+    ap.add_argument("--timeout-rate", type=float, default=0.0, help="随机挂起的概率")
+    ap.add_argument("--hang-seconds", type=float, default=600.0, help="挂起时长（应大于客户端 timeout）")
+    ap.add_argument("--truncate-rate", type=float, default=0.0, help="随机截断响应文本的概率")
+    ap.add_argument("--extra-completion-tokens", type=int, default=0, help="每个响应额外计入的 completion token")
+    ap.add_argument("--cassette", default="", help="优先从该 LLM 录制文件回放")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    faults = FaultConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        ms_per_token=args.ms_per_token,
+        rpm=args.rpm,
+        rate_429=args.rate_429,
+        retry_after_seconds=args.retry_after,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        truncate_rate=args.truncate_rate,
+        extra_completion_tokens=args.extra_completion_tokens,
+        seed=args.seed,
+    )
+    cassette = Cassette(Path(args.cassette), "replay") if args.cassette else None
+    server = LoadSimServer((args.host, args.port), faults, cassette)
+    print(f"[LoadSim] Listening on http://{args.host}:{args.port}/v1 | faults={json.dumps(asdict(faults))}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[LoadSim] Stats: {json.dumps(server.stats.snapshot())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,625 @@
+"""
+确定性热路径微基准：每次文件访问都会执行的导入解析、常量索引、预处理、census 去重、PTG 写入与校验。
+
+每个用例按规模 s / m / l / xl（输入量约为 1 / 10 / 100 / 1000 倍）分别测量：
+- 先执行 --warmup 次预热，再自动确定每轮调用次数（单轮不短于 --min-round-ms），共测 --rounds 轮；
+- 报告每次调用的 min / median / mean / stdev / max 与每个输入单位的耗时；
+- 相邻规模之间计算缩放指数 log(t2/t1) / log(n2/n1)：线性约为 1，超过 --cliff-exponent 即标记为缩放悬崖；
+- 按已测规模外推的单次调用耗时超过 --max-call-seconds 时跳过更大的规模（结果中记为 skipped）。
+
+用例：
+- import.extract_ast / import.extract_regex：ImportResolver 的 AST 与正则提取（AST 每次冷解析，不命中缓存）；
+- import.resolve_files：resolve_imports_to_files（相对路径、模块 alias 与符号反查混合，模块索引已预热）；
+- import.module_export_map：ImportProjectIndex.build_module_export_map（每次重建模块索引，文件文本已缓存）；
+- route_const.build：RouteConstantResolver.build（每次新建解析器与 AST 缓存，文件文本已缓存）；
+- structure.admission_code：_to_runtime_code_for_admission；
+- structure.split_chunks_syntax / structure.split_chunks_lines：_split_code_chunks 的两种策略；
+- structure.dedupe_census：_normalize_and_dedupe_census_calls（约 20% 重复调用）；
+- memory.add_edge：PTGMemory.add_edge（8 个页面，约 10% 重复边）；
+- validation.validate_and_rewrite：RouteValidationAgent.validate_and_rewrite（含无效目标与重复边）。
+
+输入与合成工程由固定种子生成，同一 commit 上多次运行的输入完全一致。结果写成 JSON（含当前 commit），
+可用 --baseline 与之前的结果对比：任一用例的 median 比基线慢超过 --max-regression 时退出码为 1。
+
+用法:
+    python bench/microbench.py [--cases import.,memory.] [--sizes s,m,l,xl] [--warmup 1] [--rounds 5]
+        [--min-round-ms 50] [--max-call-seconds 5] [--cliff-exponent 1.3] [--out PATH] [--baseline PATH]
+        [--max-regression 0.2]
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from config import get_llm_config
+from agent.memory import PTGMemory
+from agent.route_structure_agent import RouteStructureAgent, RouteStructureAgentConfig
+from agent.route_validation_agent import RouteValidationAgent
+from agent.tools.ast_cache import AstCache
+from agent.tools.import_project_index import ImportProjectIndex
+from agent.tools.import_resolver import ImportResolver
+from agent.tools.project_file_table import ProjectFileTable
+from agent.tools.project_reader import ProjectReader
+from agent.tools.route_constant_resolver import RouteConstantResolver
+from bench.pipeline_bench import _git_commit
+from bench.sim_responder import SimulatedChatModel
+
+_RESULT_DIR = _REPO_ROOT / "agent" / "result" / "_bench"
+SIZES: Dict[str, int] = {"s": 1, "m": 10, "l": 100, "xl": 1000}
+_SEED = 20240601
+# 校准每轮调用次数时的上限，避免极快的用例循环过久。
+_MAX_NUMBER = 1 << 16
+
+
+class _ColdAstCache(AstCache):
+    """每次都重新解析的 AstCache，用于测量冷路径（与首次访问文件时一致）。"""
+
+    def parse(self, source_code: str) -> Any:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        return super().parse(source_code)
+
+
+# ---------- 输入生成 ----------
+
+
+def _ets_source(rng: random.Random, *, imports: int, lines: int) -> str:
+    """生成带 import / export-from、注释、嵌套组件与路由调用的 .ets 源码。"""
+    out: List[str] = []
+    for i in range(imports):
+        kind = i % 5
+        if kind == 0:
+            out.append(f"import {{ Comp{i}, helper{i} as h{i} }} from '@ohos/feat{i % 7}';")
+        elif kind == 1:
+            out.append(f"import Default{i} from '../common/Mod{i}';")
+        elif kind == 2:
+            out.append(f"import * as ns{i} from './util/ns{i}';")
+        elif kind == 3:
+            out.append(f"import {{\n  A{i},\n  B{i},\n}} from '@app/shared/src/main/ets/M{i}';")
+        else:
+            out.append(f"export {{ Re{i} }} from './re/Re{i}';")
+    out.append("")
+    out.append("@Entry\n@Component\nstruct GeneratedPage {")
+    out.append("  @State idx: number = 0;")
+    out.append("  build() {\n    Column() {")
+    body = 0
+    while body < lines:
+        r = rng.random()
+        if r < 0.1:
+            out.append("      // navigation section " + str(body))
+        elif r < 0.15:
+            out.append("      /* block comment\n         spanning lines */")
+        elif r < 0.3:
+            out.append(
+                f"      Button('go{body}').onClick(() => {{\n"
+                f"        router.pushUrl({{ url: RouteConst.PAGE_{body % 97} }})\n"
+                "      })"
+            )
+            body += 2
+        elif r < 0.4:
+            out.append(f"      Row() {{\n        Text('item {body}').fontSize(14)\n      }}")
+            body += 2
+        else:
+            out.append(f"      Text(this.title{body % 13}).width('100%').margin({{ top: {body % 24} }})")
+        body += 1
+    out.append("    }\n  }\n}")
+    return "\n".join(out) + "\n"
+
+
+def _census_calls(rng: random.Random, n: int) -> List[Dict[str, str]]:
+    calls: List[Dict[str, str]] = []
+    for i in range(n):
+        j = rng.randrange(max(1, int(n * 0.8)))
+        calls.append(
+            {
+                "call_id": f"c{i + 1}",
+                "method": "pushUrl",
+                "line_hint": f"around line {j}",
+                "snippet": f"router.pushUrl({{ url:  RouteConst.PAGE_{j} }})",
+                "component_hint": "Button" if rng.random() < 0.7 else "",
+                "event_hint": "onClick" if rng.random() < 0.8 else "",
+                "needs_cross_file_resolution": "false",
+            }
+        )
+    return calls
+
+
+def _edges(rng: random.Random, n: int) -> List[Tuple[str, str, str, str]]:
+    out: List[Tuple[str, str, str, str]] = []
+    for i in range(n):
+        j = rng.randrange(max(1, int(n * 0.9)))
+        out.append((f"pages/Page{i % 8}", "Button", "onClick", f"pages/Target{j}"))
+    return out
+
+
+def _ptg(rng: random.Random, pages: int) -> Dict[str, Any]:
+    ptg: Dict[str, Any] = {}
+    for p in range(pages):
+        edges: List[Any] = []
+        for e in range(8):
+            r = rng.random()
+            target = f"pages/Page{rng.randrange(pages)}.ets"
+            if r < 0.1:
+                target = "this.nextPage"
+            elif r < 0.15:
+                target = ""
+            edges.append({"component": {"type": "router.pushUrl" if r > 0.9 else "Button"}, "event": "onClick",
+                          "target": f"'{target}'"})
+            if r < 0.2:
+                edges.append(dict(edges[-1]))
+        if rng.random() < 0.02:
+            edges.append("not an edge")
+        ptg[f"pages/Page{p}.ets"] = edges
+    return ptg
+
+
+def write_project(root: Path, scale: int) -> Path:
+    """生成合成工程，返回 entry 模块目录。规模随 scale 线性增长。"""
+    rng = random.Random(_SEED + scale)
+    entry = root / "entry"
+    ets = entry / "src" / "main" / "ets"
+    pages = max(4, 4 * scale)
+    for d in ("pages", "constants"):
+        (ets / d).mkdir(parents=True, exist_ok=True)
+    for i in range(pages):
+        (ets / "pages" / f"Page{i}.ets").write_text(_ets_source(rng, imports=3, lines=20), encoding="utf-8")
+    members = 20 * scale
+    for c in range(4):
+        statics = [f"  static readonly PAGE_{k}: string = 'pages/Page{k % pages}';" for k in range(members)]
+        enums = [f"  R{k} = 'pages/Page{k % pages}'" for k in range(members)]
+        (ets / "constants" / f"RouteConst{c}.ets").write_text(
+            f"export class RouteConst{c} {{\n" + "\n".join(statics) + "\n}\n"
+            f"export enum RouteEnum{c} {{\n" + ",\n".join(enums) + "\n}\n",
+            encoding="utf-8",
+        )
+    feature = root / "features" / "feat0" / "src" / "main" / "ets"
+    comps = 8 * scale
+    for j in range(comps):
+        sub = feature / "components" / f"g{j % 16}"
+        sub.mkdir(parents=True, exist_ok=True)
+        (sub / f"Comp{j}.ets").write_text(
+            f"@Component\nexport struct Comp{j} {{\n  build() {{\n    Text('{j}')\n  }}\n}}\n"
+            f"export function helper{j}(): number {{\n  return {j};\n}}\n",
+            encoding="utf-8",
+        )
+    (feature / "Index.ets").write_text(
+        "\n".join(f"export {{ Comp{j} }} from './components/g{j % 16}/Comp{j}';" for j in range(min(comps, 64))) + "\n",
+        encoding="utf-8",
+    )
+    profile = entry / "src" / "main" / "resources" / "base" / "profile"
+    profile.mkdir(parents=True, exist_ok=True)
+    (profile / "main_pages.json").write_text(
+        json.dumps({"src": [f"pages/Page{i}" for i in range(min(pages, 8))]}), encoding="utf-8"
+    )
+    return entry
+
+
+def _visitor_imports(scale: int) -> Dict[str, str]:
+    """resolve_imports_to_files 的输入：相对路径、模块 alias + 符号反查与无法解析的 import 混合。"""
+    rng = random.Random(_SEED * 3 + scale)
+    out: Dict[str, str] = {}
+    for i in range(5 * scale):
+        kind = i % 4
+        if kind == 0:
+            out[f"RouteConst{i % 4}_{i}"] = f"../constants/RouteConst{i % 4}"
+        elif kind == 1:
+            out[f"Comp{rng.randrange(8 * scale)}"] = "@ohos/feat0"
+        elif kind == 2:
+            out[f"Page{i}"] = f"./Page{rng.randrange(max(4, 4 * scale))}"
+        else:
+            out[f"Missing{i}"] = f"@ohos/missing{i % 5}"
+    return out
+
+
+# ---------- 用例 ----------
+
+
+@dataclass
+class Case:
+    name: str
+    # (ctx, size) -> (被测函数, 输入单位数, 输入单位名)
+    build: Callable[["BenchContext", str], Tuple[Callable[[], Any], int, str]]
+    needs_ast: bool = False
+
+
+class BenchContext:
+    """按规模懒生成合成工程与共享对象（同一规模的用例共用一份工程与文件表）。"""
+
+    def __init__(self, tmp_root: Path) -> None:
+        self.tmp_root = tmp_root
+        self._projects: Dict[str, Path] = {}
+        self._tables: Dict[str, ProjectFileTable] = {}
+        self._resolvers: Dict[str, ImportResolver] = {}
+        self._agent: Optional[RouteStructureAgent] = None
+
+    def rng(self, name: str, size: str) -> random.Random:
+        return random.Random(f"{_SEED}:{name}:{size}")
+
+    def project(self, size: str) -> Path:
+        if size not in self._projects:
+            self._projects[size] = write_project(self.tmp_root / size, SIZES[size])
+        return self._projects[size]
+
+    def ets_root(self, size: str) -> Path:
+        return self.project(size) / "src" / "main" / "ets"
+
+    def file_table(self, size: str) -> ProjectFileTable:
+        if size not in self._tables:
+            root = self.project(size).parent
+            self._tables[size] = ProjectFileTable([root])
+        return self._tables[size]
+
+    def resolver(self, size: str) -> ImportResolver:
+        if size not in self._resolvers:
+            table = self.file_table(size)
+            self._resolvers[size] = ImportResolver(
+                reader=ProjectReader(ets_root=str(self.ets_root(size)), file_table=table),
+                file_table=table,
+                ast_cache=_ColdAstCache(),
+            )
+        return self._resolvers[size]
+
+    def agent(self) -> RouteStructureAgent:
+        """私有方法的宿主：在最小规模工程上构造、注入模拟模型（不会发起 LLM 请求）。"""
+        if self._agent is None:
+            entry = self.project("s")
+            main_pages = entry / "src" / "main" / "resources" / "base" / "profile" / "main_pages.json"
+            cfg = get_llm_config("deepseek")
+            self._agent = RouteStructureAgent(
+                RouteStructureAgentConfig(
+                    project_name="microbench",
+                    project_path=str(entry),
+                    main_pages_json_path=str(main_pages),
+                    llm_provider_config=cfg,
+                    llm_model_name=cfg["model"],
+                ),
+                llm=SimulatedChatModel(),
+            )
+        return self._agent
+
+
+def _case_extract_ast(ctx: BenchContext, size: str) -> Tuple[Callable[[], Any], int, str]:
+    scale = SIZES[size]
+    code = _ets_source(ctx.rng("extract", size), imports=5 * scale, lines=40 * scale)
+    resolver = ctx.resolver("s")
+    return (lambda: resolver._extract_imports_uncached(code)), len(code.splitlines()), "line"
+
+
+def _case_extract_regex(ctx: BenchContext, size: str) -> Tuple[Callable[[], Any], int, str]:
+    scale = SIZES[size]
+    code = _ets_source(ctx.rng("extract", size), imports=5 * scale, lines=40 * scale)
+    resolver = ctx.resolver("s")
+    return (lambda: resolver._extract_imports_regex(code)), len(code.splitlines()), "line"
+
+
+def _case_resolve_files(ctx: BenchContext, size: str) -> Tuple[Callable[[], Any], int, str]:
+    resolver = ctx.resolver(size)
+    imports = _visitor_imports(SIZES[size])
+    current = str(ctx.ets_root(size) / "pages" / "Page0.ets")
+
+    def run() -> Any:
+        return resolver.resolve_imports_to_files(imports=imports, current_file_path=current)
+
+    return run, len(imports), "import"
+
+
+def _case_module_export_map(ctx: BenchContext, size: str) -> Tuple[Callable[[], Any], int, str]:
+    table = ctx.file_table(size)
+    index = ImportProjectIndex(ets_root=str(ctx.ets_root(size)), file_table=table)
+    module_dir = str(ctx.project(size).parent / "features" / "feat0" / "src" / "main" / "ets")
+
+    def run() -> Any:
+        index._module_indexes.clear()
+        return index.build_module_export_map(module_dir)
+
+    return run, len(table.files_under(module_dir, suffixes={".ets"})), "file"
+
+
+def _case_route_const_build(ctx: BenchContext, size: str) -> Tuple[Callable[[], Any], int, str]:
+    table = ctx.file_table(size)
+    ets_root = str(ctx.ets_root(size))
+
+    def run() -> Any:
+        return RouteConstantResolver(ets_root=ets_root, file_table=table, ast_cache=_ColdAstCache()).build()
+
+    # 常量数受 max_files / max_chars_per_file 截断，输入单位取 build 扫描的文件数。
+    return run, len(table.files_under(ets_root, suffixes={".ets", ".ts"})), "file"
+
+
+def _case_admission(ctx: BenchContext, size: str) -> Tuple[Callable[[], Any], int, str]:
+    code = _ets_source(ctx.rng("admission", size), imports=5 * SIZES[size], lines=40 * SIZES[size])
+    return (lambda: RouteStructureAgent._to_runtime_code_for_admission(code)), len(code.splitlines()), "line"
+
+
+def _chunk_case(strategy: str) -> Callable[[BenchContext, str], Tuple[Callable[[], Any], int, str]]:
+    def build(ctx: BenchContext, size: str) -> Tuple[Callable[[], Any], int, str]:
+        agent = ctx.agent()
+        code = _ets_source(ctx.rng("chunks", size), imports=5 * SIZES[size], lines=400 * SIZES[size])
+
+        def run() -> Any:
+            agent.config.chunk_strategy = strategy
+            return agent._split_code_chunks(code)
+
+        return run, len(code.splitlines()), "line"
+
+    return build
+
+
+def _case_dedupe(ctx: BenchContext, size: str) -> Tuple[Callable[[], Any], int, str]:
+    agent = ctx.agent()
+    calls = _census_calls(ctx.rng("dedupe", size), 20 * SIZES[size])
+
+    def run() -> Any:
+        return agent._normalize_and_dedupe_census_calls(file_key="pages/Bench.ets", calls=calls)
+
+    return run, len(calls), "call"
+
+
+def _case_add_edge(ctx: BenchContext, size: str) -> Tuple[Callable[[], Any], int, str]:
+    edges = _edges(ctx.rng("edges", size), 50 * SIZES[size])
+
+    def run() -> Any:
+        memory = PTGMemory()
+        for src, comp, event, target in edges:
+            memory.add_edge(source_page=src, component_type=comp, event=event, target=target)
+        return memory
+
+    return run, len(edges), "edge"
+
+
+def _case_validate(ctx: BenchContext, size: str) -> Tuple[Callable[[], Any], int, str]:
+    pages = 10 * SIZES[size]
+    ptg = _ptg(ctx.rng("validate", size), pages)
+    agent = RouteValidationAgent(main_pages=[f"pages/Page{i}" for i in range(0, pages, 3)])
+    return (lambda: agent.validate_and_rewrite(ptg)), sum(len(v) for v in ptg.values()), "edge"
+
+
+CASES: List[Case] = [
+    Case("import.extract_ast", _case_extract_ast, needs_ast=True),
+    Case("import.extract_regex", _case_extract_regex),
+    Case("import.resolve_files", _case_resolve_files),
+    Case("import.module_export_map", _case_module_export_map),
+    Case("route_const.build", _case_route_const_build, needs_ast=True),
+    Case("structure.admission_code", _case_admission),
+    Case("structure.split_chunks_syntax", _chunk_case("syntax")),
+    Case("structure.split_chunks_lines", _chunk_case("lines")),
+    Case("structure.dedupe_census", _case_dedupe),
+    Case("memory.add_edge", _case_add_edge),
+    Case("validation.validate_and_rewrite", _case_validate),
+]
+
+
+# ---------- 测量 ----------
+
+
+def measure(fn: Callable[[], Any], *, warmup: int, rounds: int, min_round_seconds: float) -> Dict[str, Any]:
+    """预热后按单轮最短时长校准调用次数，返回每次调用耗时（秒）的统计。"""
+
+    def timed(number: int) -> float:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - t0
+
+    for _ in range(max(0, warmup)):
+        fn()
+    number = 1
+    while number < _MAX_NUMBER:
+        elapsed = timed(number)
+        if elapsed >= min_round_seconds:
+            break
+        number = min(_MAX_NUMBER, number * max(2, int(min_round_seconds / max(elapsed, 1e-9) * 1.2)))
+    samples = [timed(number) / number for _ in range(max(1, rounds))]
+    return {
+        "number": number,
+        "rounds": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "max": max(samples),
+    }
+
+
+def scaling(rows: Dict[str, Dict[str, Any]], cliff_exponent: float) -> List[Dict[str, Any]]:
+    """相邻规模之间的缩放指数；单次调用耗时过短（< 20µs）的一对不判定悬崖，避免计时噪声误报。"""
+    ordered = sorted((r for r in rows.values() if "median" in r), key=lambda r: r["n"])
+    out: List[Dict[str, Any]] = []
+    for a, b in zip(ordered, ordered[1:]):
+        if a["n"] <= 0 or b["n"] <= a["n"] or a["median"] <= 0:
+            continue
+        exponent = math.log(b["median"] / a["median"]) / math.log(b["n"] / a["n"])
+        out.append(
+            {
+                "from": a["size"],
+                "to": b["size"],
+                "exponent": round(exponent, 3),
+                "cliff": exponent > cliff_exponent and b["median"] >= 2e-5,
+            }
+        )
+    return out
+
+
+def _predicted_seconds(rows: Dict[str, Dict[str, Any]], size: str) -> float:
+    """按已测规模的最后一次缩放指数（至少按线性）外推 size 的单次调用耗时；无法外推时为 0。"""
+    done = [r for r in rows.values() if "median" in r]
+    if not done:
+        return 0.0
+    last = done[-1]
+    exponent = 1.0
+    if len(done) >= 2 and done[-2]["median"] > 0 and done[-1]["n"] > done[-2]["n"]:
+        exponent = math.log(last["median"] / done[-2]["median"]) / math.log(last["n"] / done[-2]["n"])
+    return last["median"] * (SIZES[size] / SIZES[last["size"]]) ** max(1.0, exponent)
+
+
+def run_case(case: Case, ctx: BenchContext, sizes: List[str], args: argparse.Namespace) -> Dict[str, Any]:
+    rows: Dict[str, Dict[str, Any]] = {}
+    for size in sizes:
+        predicted = _predicted_seconds(rows, size)
+        if predicted > args.max_call_seconds:
+            rows[size] = {"size": size, "skipped": f"predicted {predicted:.1f}s per call > --max-call-seconds"}
+            continue
+        try:
+            with open(os.devnull, "w", encoding="utf-8") as sink, contextlib.redirect_stdout(sink):
+                fn, n, unit = case.build(ctx, size)
+                stats = measure(fn, warmup=args.warmup, rounds=args.rounds, min_round_seconds=args.min_round_ms / 1000)
+        except Exception as ex:
+            rows[size] = {"size": size, "error": f"{type(ex).__name__}: {ex}"}
+            continue
+        rows[size] = {
+            "size": size,
+            "n": n,
+            "unit": unit,
+            **{k: (round(v, 9) if isinstance(v, float) else v) for k, v in stats.items()},
+            "per_unit_us": round(stats["median"] / max(1, n) * 1e6, 4),
+        }
+    return {"sizes": rows, "scaling": scaling(rows, args.cliff_exponent)}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[Dict[str, Any]]:
+    """逐 (用例, 规模) 对比 median，返回慢于基线超过阈值的项。"""
+    regressions: List[Dict[str, Any]] = []
+    for name, cur in (current.get("cases") or {}).items():
+        base_sizes = ((baseline.get("cases") or {}).get(name) or {}).get("sizes") or {}
+        for size, row in (cur.get("sizes") or {}).items():
+            base = base_sizes.get(size) or {}
+            old, new = float(base.get("median") or 0), float(row.get("median") or 0)
+            if old <= 0 or new <= 0 or base.get("n") != row.get("n"):
+                continue
+            change = (new - old) / old
+            if change > max_regression:
+                regressions.append(
+                    {"case": name, "size": size, "baseline": old, "current": new, "change": round(change, 4)}
+                )
+    return regressions
+
+
+def _fmt_seconds(s: float) -> str:
+    if s >= 1:
+        return f"{s:.3f}s"
+    if s >= 1e-3:
+        return f"{s * 1e3:.3f}ms"
+    return f"{s * 1e6:.2f}us"
+
+
+def _print_table(report: Dict[str, Any]) -> None:
+    header = f"{'case':<34} {'size':<4} {'n':>8} {'median':>11} {'stdev%':>7} {'per_unit':>11} {'exp':>6}"
+    print(header)
+    print("-" * len(header))
+    for name, res in report["cases"].items():
+        if "skipped" in res:
+            print(f"{name:<34} skipped: {res['skipped']}")
+            continue
+        exps = {s["to"]: s for s in res["scaling"]}
+        for size, r in res["sizes"].items():
+            if "error" in r:
+                print(f"{name:<34} {size:<4} error: {r['error']}")
+                continue
+            if "skipped" in r:
+                print(f"{name:<34} {size:<4} skipped: {r['skipped']}")
+                continue
+            s = exps.get(size)
+            exp = "" if s is None else f"{s['exponent']:.2f}" + ("!" if s["cliff"] else "")
+            noise = r["stdev"] / r["median"] * 100 if r["median"] else 0.0
+            print(
+                f"{name:<34} {size:<4} {r['n']:>8} {_fmt_seconds(r['median']):>11} {noise:>6.1f}% "
+                f"{r['per_unit_us']:>9.3f}us {exp:>6}"
+            )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cases", default="", help="逗号分隔的用例名前缀；默认全部")
+    ap.add_argument("--sizes", default="s,m,l,xl", help="逗号分隔的规模：s / m / l / xl")
+    ap.add_argument("--warmup", type=int, default=1, help="每个用例每个规模的预热调用次数")
+    ap.add_argument("--rounds", type=int, default=5, help="测量轮数")
+    ap.add_argument("--min-round-ms", type=float, default=50.0, help="单轮最短时长，不足时增加每轮调用次数")
+    ap.add_argument("--max-call-seconds", type=float, default=5.0, help="外推的单次调用耗时超过该值时跳过该规模")
+    ap.add_argument("--cliff-exponent", type=float, default=1.3, help="相邻规模缩放指数超过该值时标记为悬崖")
+    ap.add_argument("--out", default="", help="结果 JSON 路径；默认写入 agent/result/_bench")
+    ap.add_argument("--baseline", default="", help="对比的基线结果 JSON")
+    ap.add_argument("--max-regression", type=float, default=0.2, help="median 允许的相对变慢比例")
+    args = ap.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        raise SystemExit(f"Unknown sizes {unknown}. Supported: {', '.join(SIZES)}")
+    sizes.sort(key=lambda s: SIZES[s])
+    prefixes = [p.strip() for p in args.cases.split(",") if p.strip()]
+    cases = [c for c in CASES if not prefixes or any(c.name.startswith(p) for p in prefixes)]
+    ast_available = AstCache().available
+
+    report: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "settings": {
+            "sizes": sizes,
+            "warmup": args.warmup,
+            "rounds": args.rounds,
+            "min_round_ms": args.min_round_ms,
+            "max_call_seconds": args.max_call_seconds,
+            "cliff_exponent": args.cliff_exponent,
+            "ast_available": ast_available,
+        },
+        "cases": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="microbench_") as tmp:
+        ctx = BenchContext(Path(tmp))
+        for case in cases:
+            if case.needs_ast and not ast_available:
+                report["cases"][case.name] = {"skipped": "tree-sitter not installed"}
+                continue
+            print(f"[MicroBench] Running {case.name} ...", flush=True)
+            report["cases"][case.name] = run_case(case, ctx, sizes, args)
+
+    regressions: List[Dict[str, Any]] = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.max_regression)
+        report["baseline"] = {"path": args.baseline, "commit": baseline.get("commit", ""), "regressions": regressions}
+    cliffs = [
+        {"case": name, **s}
+        for name, res in report["cases"].items()
+        for s in res.get("scaling") or []
+        if s["cliff"]
+    ]
+    report["cliffs"] = cliffs
+
+    out_path = Path(args.out) if args.out else (
+        _RESULT_DIR / f"microbench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    _print_table(report)
+    print(f"[MicroBench] Report saved: {str(out_path)}")
+    for c in cliffs:
+        print(f"[MicroBench] Scaling cliff: {c['case']} {c['from']} -> {c['to']} exponent={c['exponent']}")
+    for r in regressions:
+        print(
+            f"[MicroBench] Regression: {r['case']}[{r['size']}] "
+            f"{_fmt_seconds(r['baseline'])} -> {_fmt_seconds(r['current'])} ({r['change']:+.1%})"
+        )
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
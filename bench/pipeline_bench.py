@@ -0,0 +1,298 @@
+"""
+端到端流水线基准：用模拟 LLM（bench/sim_responder.py）运行 RouteStructureAgent + RouteValidationAgent。
+
+每个项目在独立的子进程中运行（峰值 RSS 只反映该项目），配置取自 agent/workflow.py 的运行选项，
+但不使用任何磁盘缓存，每次都从冷启动开始。报告每个项目的：
+- 墙钟时间（结构抽取 / 校验分开计），各状态累计耗时（get_finalize_snapshot 的 state_timing）；
+- LLM 调用数与 prompt / completion token（模拟模型按 prompt 长度与响应文本估算）；
+- 峰值 RSS、分析的文件数与每秒文件数、原始边数与校验后边数；
+- bench/synth_project.py 生成的工程另附与真值 PTG 对比的 precision / recall。
+
+结果写成 JSON（含当前 commit），可用 --baseline 与之前的结果对比：任一项目的指标比基线差超过阈值时退出码为 1。
+
+用法:
+    python bench/pipeline_bench.py [project|path ...] [--latency-ms 800] [--latency-sigma 0.3]
+        [--ms-per-token 0] [--extra-completion-tokens 0] [--extra-completion-sigma 0] [--seed 0]
+        [--repeat 1] [--out PATH] [--baseline PATH] [--max-regression 0.1] [--metric-threshold tokens_total=0]
+
+project 可以是 config.PROJECT_CONFIG 中的名称，也可以是模块目录（含 src/main/ets 与
+src/main/resources/base/profile/main_pages.json，例如 bench/synth_project.py 生成的 entry 目录）。
+未指定时使用 PROJECT_CONFIG 中目录存在的全部项目。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from config import PROJECT_CONFIG, get_llm_config, get_project_config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_RESULT_DIR = _REPO_ROOT / "agent" / "result" / "_bench"
+_MAIN_PAGES_REL = Path("src") / "main" / "resources" / "base" / "profile" / "main_pages.json"
+
+# 参与回归判定的指标与默认阈值（相对基线的恶化比例）；None 表示使用 --max-regression。
+REGRESSION_METRICS: Dict[str, Any] = {
+    "wall_seconds": None,
+    "files_per_second": None,
+    "peak_rss_mb": None,
+    "llm_calls": 0.0,
+    "tokens_total": 0.02,
+}
+_HIGHER_IS_BETTER = {"files_per_second"}
+
+
+def _resolve_project(name: str) -> Dict[str, Any]:
+    """config 中的项目名，或模块目录路径。"""
+    for key in PROJECT_CONFIG:
+        if key.lower() == name.lower():
+            return dict(get_project_config(key))
+    path = Path(name).resolve()
+    if not (path / _MAIN_PAGES_REL).is_file():
+        raise SystemExit(f'Unknown project "{name}": not in PROJECT_CONFIG and {path / _MAIN_PAGES_REL} not found')
+    return {
+        "projectName": path.parent.name if path.name == "entry" else path.name,
+        "projectPath": str(path),
+        "projectMainPagePath": str(path / _MAIN_PAGES_REL),
+        "importAliasMap": {"@/": "src/main/ets", "@entry/": "src/main/ets"},
+    }
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    # Linux 为 KB，macOS 为字节。
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _bench_one(proj: Dict[str, Any], sim: Dict[str, Any], provider: str) -> Dict[str, Any]:
+    """子进程入口：运行一个项目并返回指标。"""
+    from agent.route_structure_agent import RouteStructureAgent
+    from agent.route_validation_agent import RouteValidationAgent
+    from agent.tools.project_reader import ProjectReader
+    from agent.workflow import build_structure_config
+    from bench.sim_responder import SimulatedChatModel
+    from bench.synth_project import find_ground_truth, score_ptg
+
+    llm_cfg = get_llm_config(provider)
+    model = SimulatedChatModel(**sim)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        agent = RouteStructureAgent(build_structure_config(llm_cfg, proj, disk_caches=False), llm=model)
+        ptg = agent.run_sync()
+        t1 = time.perf_counter()
+        main_pages = [str(x) for x in ProjectReader.load_main_pages(proj["projectMainPagePath"]) if str(x).strip()]
+        validated, _report = RouteValidationAgent(main_pages=main_pages).validate_and_rewrite(ptg)
+        t2 = time.perf_counter()
+        snapshot = agent.get_finalize_snapshot()
+
+    usage = snapshot.get("token_usage") or {}
+    timing = snapshot.get("state_timing") or {}
+    files = int((timing.get("entries") or {}).get("EXPAND_IMPORTS") or 0)
+    wall = t2 - t0
+    row: Dict[str, Any] = {
+        "wall_seconds": round(wall, 3),
+        "structure_seconds": round(t1 - t0, 3),
+        "validation_seconds": round(t2 - t1, 3),
+        "state_seconds": dict(timing.get("seconds") or {}),
+        "llm_calls": int(model.requests),
+        "tokens_prompt": int(usage.get("prompt") or 0),
+        "tokens_completion": int(usage.get("completion") or 0),
+        "tokens_total": int(usage.get("total") or 0),
+        "peak_rss_mb": _peak_rss_mb(),
+        "files_analyzed": files,
+        "files_per_second": round(files / wall, 2) if wall > 0 else 0.0,
+        "edges_raw": sum(len(v) for v in ptg.values()) if isinstance(ptg, dict) else 0,
+        "edges_validated": sum(len(v) for v in validated.values()),
+    }
+    truth_path = find_ground_truth(proj["projectPath"])
+    if truth_path is not None:
+        row["ground_truth"] = score_ptg(validated, json.loads(truth_path.read_text(encoding="utf-8")))
+    return row
+
+
+def run_project(proj: Dict[str, Any], sim: Dict[str, Any], provider: str, repeat: int) -> Dict[str, Any]:
+    """在新的子进程中运行 repeat 次，取墙钟时间居中的一次。"""
+    runs: List[Dict[str, Any]] = []
+    for _ in range(max(1, int(repeat))):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            runs.append(pool.submit(_bench_one, proj, sim, provider).result())
+    runs.sort(key=lambda r: r["wall_seconds"])
+    row = dict(runs[len(runs) // 2])
+    if len(runs) > 1:
+        row["wall_seconds_runs"] = [r["wall_seconds"] for r in runs]
+    return row
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "-C", str(_REPO_ROOT), "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        return out.stdout.strip()
+    except Exception:
+        return ""
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    thresholds: Dict[str, float],
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """逐项目对比指标，返回 (超过阈值的回归, 提示信息)。"""
+    regressions: List[Dict[str, Any]] = []
+    notes: List[str] = []
+    base_projects = baseline.get("projects") or {}
+    if (baseline.get("sim") or {}) != (current.get("sim") or {}):
+        notes.append("simulated LLM settings differ from the baseline; timing comparison may be meaningless")
+    for name, cur in (current.get("projects") or {}).items():
+        base = base_projects.get(name)
+        if not base or "error" in base or "error" in cur:
+            notes.append(f"{name}: no comparable baseline")
+            continue
+        if base.get("edges_validated") != cur.get("edges_validated"):
+            notes.append(f"{name}: edges_validated {base.get('edges_validated')} -> {cur.get('edges_validated')}")
+        for metric, limit in thresholds.items():
+            old, new = float(base.get(metric) or 0), float(cur.get(metric) or 0)
+            if old <= 0:
+                continue
+            change = (old - new) / old if metric in _HIGHER_IS_BETTER else (new - old) / old
+            if change > limit:
+                regressions.append(
+                    {"project": name, "metric": metric, "baseline": old, "current": new, "change": round(change, 4)}
+                )
+    return regressions, notes
+
+
+def _print_table(report: Dict[str, Any]) -> None:
+    header = (
+        f"{'project':<28} {'wall_s':>8} {'struct_s':>9} {'valid_s':>8} {'calls':>6} "
+        f"{'tokens':>9} {'rss_mb':>8} {'files':>6} {'files/s':>8} {'edges':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name, r in report["projects"].items():
+        if "error" in r:
+            print(f"{name:<28} error: {r['error']}")
+            continue
+        print(
+            f"{name:<28} {r['wall_seconds']:>8} {r['structure_seconds']:>9} {r['validation_seconds']:>8} "
+            f"{r['llm_calls']:>6} {r['tokens_total']:>9} {r['peak_rss_mb']:>8} {r['files_analyzed']:>6} "
+            f"{r['files_per_second']:>8} {r['edges_validated']:>6}"
+        )
+        gt = r.get("ground_truth")
+        if gt:
+            print(
+                f"{'':<28} ground truth: edges P={gt['edges']['precision']} R={gt['edges']['recall']}, "
+                f"page links P={gt['page_links']['precision']} R={gt['page_links']['recall']}"
+            )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("projects", nargs="*")
+    ap.add_argument("--provider", default="deepseek", help="只用于取模型名等配置，不会请求该 provider")
+    ap.add_argument("--latency-ms", type=float, default=800.0, help="每个请求的平均首 token 延迟")
+    ap.add_argument("--latency-sigma", type=float, default=0.3, help="延迟的对数正态抖动（0 为固定延迟）")
+    ap.add_argument("--ms-per-token", type=float, default=0.0, help="每个输出 token 的额外延迟")
+    ap.add_argument("--extra-completion-tokens", type=int, default=0, help="每个响应额外计入的平均 completion token")
+    ap.add_argument("--extra-completion-sigma", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=1, help="每个项目运行次数，取墙钟时间居中的一次")
+    ap.add_argument("--out", default="", help="结果 JSON 路径；默认写入 agent/result/_bench")
+    ap.add_argument("--baseline", default="", help="对比的基线结果 JSON")
+    ap.add_argument("--max-regression", type=float, default=0.1, help="时间 / 吞吐 / 内存指标允许的相对恶化比例")
+    ap.add_argument("--metric-threshold", action="append", default=[], help="覆盖单个指标的阈值，如 tokens_total=0")
+    args = ap.parse_args()
+
+    names = args.projects or [
+        k for k, v in PROJECT_CONFIG.items() if (Path(v["projectPath"]) / "src" / "main" / "ets").is_dir()
+    ]
+    if not names:
+        raise SystemExit("No project to benchmark: none of PROJECT_CONFIG exists locally; pass a module directory.")
+    sim = {
+        "latency_ms": args.latency_ms,
+        "latency_sigma": args.latency_sigma,
+        "ms_per_output_token": args.ms_per_token,
+        "extra_completion_tokens": args.extra_completion_tokens,
+        "extra_completion_sigma": args.extra_completion_sigma,
+        "seed": args.seed,
+    }
+    report: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "provider": args.provider,
+        "sim": sim,
+        "repeat": max(1, args.repeat),
+        "projects": {},
+    }
+    for name in names:
+        proj = _resolve_project(name)
+        print(f"[PipelineBench] Running {proj['projectName']} ...", flush=True)
+        try:
+            report["projects"][proj["projectName"]] = run_project(proj, sim, args.provider, args.repeat)
+        except Exception as ex:
+            report["projects"][proj["projectName"]] = {"error": f"{type(ex).__name__}: {ex}"}
+
+    ok = [r for r in report["projects"].values() if "error" not in r]
+    wall = sum(r["wall_seconds"] for r in ok)
+    files = sum(r["files_analyzed"] for r in ok)
+    report["totals"] = {
+        "wall_seconds": round(wall, 3),
+        "llm_calls": sum(r["llm_calls"] for r in ok),
+        "tokens_total": sum(r["tokens_total"] for r in ok),
+        "peak_rss_mb": max((r["peak_rss_mb"] for r in ok), default=0.0),
+        "files_analyzed": files,
+        "files_per_second": round(files / wall, 2) if wall > 0 else 0.0,
+    }
+
+    thresholds = {k: (args.max_regression if v is None else v) for k, v in REGRESSION_METRICS.items()}
+    for item in args.metric_threshold:
+        key, _, value = item.partition("=")
+        thresholds[key.strip()] = float(value)
+    regressions: List[Dict[str, Any]] = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions, notes = compare(report, baseline, thresholds)
+        report["baseline"] = {"path": args.baseline, "commit": baseline.get("commit", ""), "regressions": regressions}
+        for note in notes:
+            print(f"[PipelineBench] Note: {note}")
+
+    out_path = Path(args.out) if args.out else (
+        _RESULT_DIR / f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    _print_table(report)
+    print(f"[PipelineBench] Report saved: {str(out_path)}")
+    for r in regressions:
+        print(
+            f"[PipelineBench] Regression: {r['project']} {r['metric']} "
+            f"{r['baseline']} -> {r['current']} ({r['change']:+.1%})"
+        )
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+prompt 压缩 A/B：同一项目先以默认配置（A 组）、再开启压缩（B 组）运行 RouteStructureAgent，对比最终 PTG 边集合与估算 token。
+
+--arm 选择 B 组开启的压缩：
+- construct：compact_construct_prompt（构边 prompt 只带引用常量、短文件 ID、census 调用所在区域）；
+- refine：slice_refine_component（trigger refine 只发送组件中与回调相关的区域），另外对比每个调用 refine 后的 component_hint/event_hint；
+- both：两者同时开启。
+
+两组均启用 LLM 响应缓存（A 组与日常运行共用缓存，通常不再消耗 token；B 组的 prompt 不同，首次运行会调用 LLM）。
+边集合按 (源页面, 组件类型, 事件, 目标) 比较；任一项目不一致时退出码为 1，并列出只出现在一侧的边。
+
+用法:
+    python bench/prompt_compaction_ab.py [project ...] [--arm construct|refine|both] [--provider deepseek]
+
+未指定 project 时使用 config.PROJECT_CONFIG 中的全部项目。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from config import PROJECT_CONFIG, get_llm_config, get_project_config
+
+_CACHE_DIR = _REPO_ROOT / "agent" / "result" / "_cache"
+
+EdgeKey = Tuple[str, str, str, str]
+_ARMS = {
+    "construct": {"compact_construct_prompt": True},
+    "refine": {"slice_refine_component": True},
+    "both": {"compact_construct_prompt": True, "slice_refine_component": True},
+}
+
+
+def _edge_set(ptg: Dict[str, List[Dict[str, Any]]]) -> Set[EdgeKey]:
+    out: Set[EdgeKey] = set()
+    for page, edges in (ptg or {}).items():
+        for e in edges or []:
+            component = e.get("component") or {}
+            out.add((page, str(component.get("type") or ""), str(e.get("event") or ""), str(e.get("target") or "")))
+    return out
+
+
+def run_arm(
+    proj: Dict[str, Any],
+    provider: str,
+    *,
+    overrides: Dict[str, Any],
+) -> Tuple[Set[EdgeKey], Dict[str, Any], Dict[str, Tuple[str, str]]]:
+    """运行一组，返回 (边集合, 快照, refine 结果 {文件#call_id: (component_hint, event_hint)})。"""
+    from agent.route_structure_agent import RouteStructureAgent, RouteStructureAgentConfig
+
+    llm_cfg = get_llm_config(provider)
+    agent = RouteStructureAgent(
+        RouteStructureAgentConfig(
+            project_name=proj["projectName"],
+            project_path=proj["projectPath"],
+            main_pages_json_path=proj["projectMainPagePath"],
+            llm_provider_config=llm_cfg,
+            llm_model_name=llm_cfg["model"],
+            import_alias_map=proj.get("importAliasMap"),
+            llm_cache_path=str(_CACHE_DIR / "llm_cache.sqlite3"),
+            **overrides,
+        )
+    )
+    refined: Dict[str, Tuple[str, str]] = {}
+    original = agent._refine_cross_file_census_calls
+
+    async def _record(**kw: Any) -> List[Dict[str, str]]:
+        traced = await original(**kw)
+        for call in traced:
+            if call.get("resolution_kind") == "cross_file_refine" or call.get("needs_cross_file_resolution"):
+                key = f"{kw.get('file_path')}#{call.get('call_id')}"
+                refined[key] = (str(call.get("component_hint") or ""), str(call.get("event_hint") or ""))
+        return traced
+
+    agent._refine_cross_file_census_calls = _record
+    with contextlib.redirect_stdout(io.StringIO()):
+        ptg = agent.run_sync()
+        snapshot = agent.get_finalize_snapshot()
+    return _edge_set(ptg), snapshot, refined
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("projects", nargs="*")
+    ap.add_argument("--arm", choices=sorted(_ARMS), default="construct")
+    ap.add_argument("--provider", default="deepseek")
+    args = ap.parse_args()
+
+    report: Dict[str, Any] = {}
+    mismatched = 0
+    for name in args.projects or list(PROJECT_CONFIG.keys()):
+        proj = get_project_config(name)
+        if not Path(proj["projectPath"]).is_dir():
+            report[name] = {"error": f"project not found: {proj['projectPath']}"}
+            continue
+        edges_a, snap_a, refined_a = run_arm(proj, args.provider, overrides={})
+        edges_b, snap_b, refined_b = run_arm(proj, args.provider, overrides=_ARMS[args.arm])
+        only_a = sorted(edges_a - edges_b)
+        only_b = sorted(edges_b - edges_a)
+        refine_diff = {k: [refined_a.get(k), refined_b.get(k)] for k in sorted(set(refined_a) | set(refined_b))
+                       if refined_a.get(k) != refined_b.get(k)}
+        mismatched += 1 if (only_a or only_b or refine_diff) else 0
+        report[name] = {
+            "arm": args.arm,
+            "edges_full": len(edges_a),
+            "edges_compact": len(edges_b),
+            "same_edges": not only_a and not only_b,
+            "only_full": [list(x) for x in only_a],
+            "only_compact": [list(x) for x in only_b],
+            "refined_calls": len(refined_a),
+            "refine_hint_mismatches": refine_diff,
+            "token_usage_full": snap_a.get("token_usage") or {},
+            "token_usage_compact": snap_b.get("token_usage") or {},
+            "construct_compaction": snap_b.get("construct_compaction") or {},
+            "refine_slicing": snap_b.get("refine_slicing") or {},
+        }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+模拟 LLM：按 RouteStructureAgent 的 prompt 生成格式正确的响应，用于离线基准测试。
+
+响应由源码中的路由调用（router.pushUrl / NavPathStack.pushPath 等）直接推出：
+- census / 批量 census / census+构边：每个调用一行，组件与事件取调用之前最近的 `Xxx(` 与 `.onXxx(`；
+- trigger refine：原样返回 census 的 component_hint / event_hint；
+- 构边：target_expr 取 `url:` / `name:` / 首个参数，字面量直接作为 target，其余查 route_constant_map；
+- tool-calling 补解析：返回空数组（不发起工具调用）。
+
+延迟与 token 用量可配置：每个请求的首 token 延迟为 latency_ms 乘以对数正态抖动（latency_sigma），
+之后每个输出 token 再等待 ms_per_output_token；completion token 在响应文本估算值之上加上
+extra_completion_tokens（同样带对数正态抖动，模拟模型的冗余输出）。抖动按 seed 与请求内容确定，
+同一请求在任意并发顺序下得到相同的延迟与用量。
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from llm_usage import estimate_tokens
+
+_ROUTE_CALL_RE = re.compile(
+    r"\b(?:router|\w*[Ss]tack)\s*\.\s*"
+    r"(pushUrl|replaceUrl|pushNamedRoute|replaceNamedRoute|pushPathByName|pushPath|replacePathByName|replacePath)"
+    r"\s*\("
+)
+_CODE_RE = re.compile(r"<code>\n([\s\S]*?)\n</code>")
+_FILE_RE = re.compile(r'<file id="([^"]+)"[^>]*>\n<code>\n([\s\S]*?)\n</code>')
+_CONTEXT_RE = re.compile(r"Context \(JSON\):\n(.*)\n")
+_EVENT_RE = re.compile(r"\.(on[A-Z]\w*)\s*\(")
+_COMPONENT_RE = re.compile(r"(?<![\w.$])([A-Z]\w*)\s*\(")
+_TARGET_RES = (
+    re.compile(r"\burl\s*:\s*([^,}\n]+)"),
+    re.compile(r"\bname\s*:\s*([^,}\n]+)"),
+    re.compile(r"^\s*\(\s*([^,)\n]+)"),
+)
+_NOT_COMPONENTS = {"ForEach", "LazyForEach", "Repeat", "If", "Array", "Object", "String", "Number", "JSON", "Promise"}
+# 向前查找组件与事件的字符窗口。
+_LOOKBEHIND_CHARS = 1200
+
+
+def _trigger_hints(code: str, pos: int) -> Tuple[str, str]:
+    window = code[max(0, pos - _LOOKBEHIND_CHARS) : pos]
+    events = _EVENT_RE.findall(window)
+    components = [c for c in _COMPONENT_RE.findall(window) if c not in _NOT_COMPONENTS]
+    return (components[-1] if components else "__Common__"), (events[-1] if events else "onClick")
+
+
+def census_rows(code: str) -> List[Dict[str, Any]]:
+    """源码中的每个路由调用一行 census。"""
+    rows: List[Dict[str, Any]] = []
+    for i, m in enumerate(_ROUTE_CALL_RE.finditer(code or ""), 1):
+        line_start = code.rfind("\n", 0, m.start()) + 1
+        line_end = code.find("\n", m.start())
+        line = code[line_start : line_end if line_end >= 0 else len(code)].strip()
+        component, event = _trigger_hints(code, m.start())
+        rows.append(
+            {
+                "call_id": f"c{i}",
+                "method": m.group(1),
+                "line_hint": f"around line {code.count(chr(10), 0, m.start()) + 1}",
+                "snippet": line[:200],
+                "component_hint": component,
+                "event_hint": event,
+                "needs_cross_file_resolution": False,
+                "component_ref_symbol": "",
+                "callback_ref": "",
+                "cross_file_reason": "",
+            }
+        )
+    return rows
+
+
+def _target_of(snippet: str, route_constant_map: Dict[str, str]) -> Tuple[str, str]:
+    """返回 (target, target_expr)；无法识别目标时均为空。"""
+    m = _ROUTE_CALL_RE.search(snippet or "")
+    tail = snippet[m.end() - 1 :] if m else str(snippet or "")
+    for pattern in _TARGET_RES:
+        t = pattern.search(tail)
+        if not t:
+            continue
+        expr = t.group(1).strip().rstrip(")").strip()
+        if expr[:1] in "'\"`" and expr[-1:] == expr[:1]:
+            return expr[1:-1], expr
+        return str(route_constant_map.get(expr) or expr), expr
+    return "", ""
+
+
+def edges_for(calls: List[Dict[str, Any]], route_constant_map: Dict[str, str]) -> List[Dict[str, Any]]:
+    edges: List[Dict[str, Any]] = []
+    for call in calls:
+        target, expr = _target_of(str(call.get("snippet") or ""), route_constant_map)
+        if not target:
+            continue
+        edges.append(
+            {
+                "call_id": str(call.get("call_id") or ""),
+                "component_type": str(call.get("component_hint") or "__Common__"),
+                "event": str(call.get("event_hint") or "onClick"),
+                "target": target,
+                "target_expr": expr,
+            }
+        )
+    return edges
+
+
+def _context(user: str) -> Dict[str, Any]:
+    m = _CONTEXT_RE.search(user)
+    try:
+        return json.loads(m.group(1)) if m else {}
+    except Exception:
+        return {}
+
+
+def simulate_response(system: str, user: str) -> str:
+    """按 user prompt 的任务类型生成响应文本。"""
+    if "route-repair assistant" in system:
+        return "[]"
+    if user.startswith("Task: Build a router/navigation call census for EACH file section"):
+        rows = []
+        for file_id, code in _FILE_RE.findall(user):
+            rows.extend({"file_id": file_id, **row} for row in census_rows(code))
+        return json.dumps(rows, ensure_ascii=False)
+    if user.startswith("Task: Build a router/navigation call census"):
+        m = _CODE_RE.search(user)
+        return json.dumps(census_rows(m.group(1) if m else ""), ensure_ascii=False)
+    if user.startswith("Task: In one pass"):
+        m = _CODE_RE.search(user)
+        rows = census_rows(m.group(1) if m else "")
+        rc_map = dict(_context(user).get("route_constant_map") or {})
+        payload = {"census": rows, "edges": edges_for(rows, rc_map)}
+        return "```json\n" + json.dumps(payload, ensure_ascii=False) + "\n```"
+    if user.startswith("Task: Refine one router census call"):
+        call = dict(_context(user).get("call") or {})
+        row = {
+            "call_id": str(call.get("call_id") or ""),
+            "component_hint": str(call.get("component_hint") or "__Common__"),
+            "event_hint": str(call.get("event_hint") or "onClick"),
+            "resolved": True,
+            "reason": "simulated",
+        }
+        return json.dumps([row], ensure_ascii=False)
+    if user.startswith("Task: Construct navigation edges"):
+        ctx = _context(user)
+        calls = [c for c in ctx.get("census_calls") or [] if isinstance(c, dict)]
+        return json.dumps(edges_for(calls, dict(ctx.get("route_constant_map") or {})), ensure_ascii=False)
+    return "[]"
+
+
+def _split_messages(messages: List[BaseMessage]) -> Tuple[str, str]:
+    system = "\n".join(str(m.content) for m in messages if m.type == "system")
+    user = "\n".join(str(m.content) for m in messages if m.type != "system")
+    return system, user
+
+
+class SimulatedChatModel(BaseChatModel):
+    """按 prompt 生成响应、按配置分布模拟延迟与 token 用量的聊天模型。"""
+
+    latency_ms: float = 0.0
+    latency_sigma: float = 0.0
+    ms_per_output_token: float = 0.0
+    extra_completion_tokens: int = 0
+    extra_completion_sigma: float = 0.0
+    stream_chunk_chars: int = 16
+    seed: int = 0
+    requests: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Any:
+        return self
+
+    def _jitter(self, rng: random.Random, sigma: float) -> float:
+        # 对数正态抖动，均值为 1。
+        return math.exp(rng.gauss(-sigma * sigma / 2, sigma)) if sigma > 0 else 1.0
+
+    def _plan(self, messages: List[BaseMessage]) -> Tuple[str, Dict[str, int], float, float]:
+        """返回 (响应文本, usage, 首 token 延迟秒, 每输出 token 延迟秒)。"""
+        system, user = _split_messages(messages)
+        text = simulate_response(system, user)
+        digest = hashlib.sha256(f"{self.seed}\n{system}\n{user}".encode("utf-8", errors="ignore")).hexdigest()
+        rng = random.Random(int(digest[:16], 16))
+        prompt = estimate_tokens(system) + estimate_tokens(user)
+        extra = int(round(max(0, self.extra_completion_tokens) * self._jitter(rng, self.extra_completion_sigma)))
+        completion = estimate_tokens(text) + extra
+        usage = {"input_tokens": prompt, "output_tokens": completion, "total_tokens": prompt + completion}
+        first = max(0.0, self.latency_ms) * self._jitter(rng, self.latency_sigma) / 1000.0
+        self.requests += 1
+        return text, usage, first, max(0.0, self.ms_per_output_token) / 1000.0
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text, usage, first, per_token = self._plan(messages)
+        time.sleep(first + per_token * usage["output_tokens"])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text, usage, first, per_token = self._plan(messages)
+        await asyncio.sleep(first + per_token * usage["output_tokens"])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    def _chunks(self, text: str) -> List[str]:
+        n = max(1, int(self.stream_chunk_chars))
+        return [text[i : i + n] for i in range(0, len(text), n)]
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        text, usage, first, per_token = self._plan(messages)
+        time.sleep(first)
+        for piece in self._chunks(text):
+            time.sleep(per_token * estimate_tokens(piece))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        text, usage, first, per_token = self._plan(messages)
+        await asyncio.sleep(first)
+        for piece in self._chunks(text):
+            await asyncio.sleep(per_token * estimate_tokens(piece))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
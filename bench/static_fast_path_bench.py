@@ -0,0 +1,142 @@
+"""
+静态快速路径基准：逐项目统计可由 AST 直接判定的路由调用占比，并可选地与 LLM 路径对比一致性。
+
+默认模式（不调用 LLM）：遍历项目 ets 目录下含路由调用的文件，运行 StaticRouteExtractor，
+输出每个项目的静态解析率、可完全跳过 LLM 的文件数与歧义原因分布。
+
+--shadow 模式：以 static_fast_path="shadow" 运行 RouteStructureAgent（启用 LLM 响应缓存，已跑过的项目不再消耗 token），
+输出静态边与 LLM 最终边的一致率；存在不一致时退出码为 1。
+
+用法:
+    python bench/static_fast_path_bench.py [project ...] [--shadow] [--provider deepseek]
+
+未指定 project 时使用 config.PROJECT_CONFIG 中的全部项目。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from config import PROJECT_CONFIG, get_llm_config, get_project_config
+from agent.tools.ast_cache import AstCache
+from agent.tools.import_resolver import ImportResolver
+from agent.tools.project_file_table import ProjectFileTable
+from agent.tools.project_reader import ProjectReader
+from agent.tools.route_constant_resolver import RouteConstantResolver
+from agent.tools.static_route_extractor import StaticRouteExtractor
+
+_CACHE_DIR = _REPO_ROOT / "agent" / "result" / "_cache"
+
+
+def _ets_root(proj: Dict[str, Any]) -> Path:
+    return Path(proj["projectPath"]) / "src" / "main" / "ets"
+
+
+def scan_project(proj: Dict[str, Any]) -> Dict[str, Any]:
+    """只做静态抽取，统计静态解析率。"""
+    ets_root = _ets_root(proj)
+    project_root = Path(proj["projectPath"])
+    alias_map = {k: str((project_root / v).resolve()) for k, v in (proj.get("importAliasMap") or {}).items()}
+    table = ProjectFileTable([ets_root])
+    ast_cache = AstCache()
+    with contextlib.redirect_stdout(io.StringIO()):
+        consts = RouteConstantResolver(ets_root=str(ets_root), file_table=table, ast_cache=ast_cache)
+        consts.build()
+        imports = ImportResolver(
+            reader=ProjectReader(ets_root=str(ets_root), file_table=table),
+            import_alias_map=alias_map,
+            file_table=table,
+            ast_cache=ast_cache,
+        )
+        extractor = StaticRouteExtractor(ast_cache=ast_cache, route_const_resolver=consts)
+
+        files = calls = static_calls = skippable = 0
+        reasons: Dict[str, int] = {}
+        for entry in table.files_under(ets_root, suffixes={".ets"}):
+            code = table.read_text(entry.path)
+            if "router" not in code:
+                continue
+            imps = imports.extract_imports(code)
+            resolved = imports.resolve_imports_to_files(imports=imps, current_file_path=entry.path)
+            result = extractor.extract(code, imports=imps, resolved_imports=resolved)
+            if result.total_actionable == 0 and result.back_calls == 0:
+                continue
+            files += 1
+            calls += result.total_actionable
+            static_calls += len(result.resolved_calls)
+            skippable += 1 if result.fully_resolved else 0
+            for c in result.calls:
+                if c.reason:
+                    reasons[c.reason] = reasons.get(c.reason, 0) + 1
+            missed = result.total_actionable - len(result.calls)
+            if missed > 0:
+                reasons["not_in_ast"] = reasons.get("not_in_ast", 0) + missed
+    return {
+        "files_with_router_calls": files,
+        "files_llm_skippable": skippable,
+        "calls_total": calls,
+        "calls_static": static_calls,
+        "static_resolution_ratio": round(static_calls / calls, 4) if calls else 0.0,
+        "ambiguous_reasons": reasons,
+    }
+
+
+def shadow_project(proj: Dict[str, Any], provider: str) -> Dict[str, Any]:
+    """以 shadow 模式运行完整抽取，返回静态边与 LLM 边的对比结果。"""
+    from agent.route_structure_agent import RouteStructureAgent, RouteStructureAgentConfig
+
+    llm_cfg = get_llm_config(provider)
+    agent = RouteStructureAgent(
+        RouteStructureAgentConfig(
+            project_name=proj["projectName"],
+            project_path=proj["projectPath"],
+            main_pages_json_path=proj["projectMainPagePath"],
+            llm_provider_config=llm_cfg,
+            llm_model_name=llm_cfg["model"],
+            import_alias_map=proj.get("importAliasMap"),
+            llm_cache_path=str(_CACHE_DIR / "llm_cache.sqlite3"),
+            static_fast_path="shadow",
+        )
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.run_sync()
+        snapshot = agent.get_finalize_snapshot()
+    return snapshot.get("static_fast_path") or {}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("projects", nargs="*")
+    ap.add_argument("--shadow", action="store_true")
+    ap.add_argument("--provider", default="deepseek")
+    args = ap.parse_args()
+
+    names: List[str] = args.projects or list(PROJECT_CONFIG.keys())
+    report: Dict[str, Any] = {}
+    disagreements = 0
+    for name in names:
+        proj = get_project_config(name)
+        if not _ets_root(proj).is_dir():
+            report[name] = {"error": f"ets root not found: {_ets_root(proj)}"}
+            continue
+        row = scan_project(proj)
+        if args.shadow:
+            shadow = shadow_project(proj, args.provider)
+            row["shadow"] = shadow.get("shadow") or {}
+            disagreements += int(row["shadow"].get("static_edges") or 0) - int(row["shadow"].get("agree") or 0)
+        report[name] = row
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if disagreements:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,757 @@
+"""
+合成 ArkTS 工程生成器：按种子生成 HarmonyOS 多模块工程（5k～50k 个 .ets 文件），并写出已知的真值 PTG，
+用于在不调用 LLM 的情况下对遍历、导入解析与路由常量索引做规模测试。
+
+生成的工程包含：
+- 根目录 build-profile.json5（modules 列表）与各模块 oh-package.json5（@ohos/<module> 依赖 alias）；
+- entry 模块：EntryAbility 与全部页面（entry/src/main/resources/base/profile/main_pages.json 登记）；
+- common 模块与若干 feature_<domain> 模块：barrel index.ets 再导出（一半 feature 为两级 barrel），
+  路由常量 class（static readonly）与 enum，多层嵌套的 @Component（部分文件含非导出的内部 struct），
+  以及逐个 import 串成的工具函数 / model 深链；
+- 路由调用写在 Button / Text / Image / ListItem / Search / Toggle 等组件的事件回调中，目标表达式为字面量、
+  class 常量或 enum 成员，组件间 import 混用相对路径、@ohos/<module> barrel 与 @ohos/<module>/src/main/ets/... 深路径。
+
+真值 PTG（ground_truth_ptg.json）按“页面渲染的组件”传递闭包计算：页面本身与其渲染的组件（递归）中的
+全部路由调用归属该页面，按 (组件, 事件, 目标) 去重，格式与流水线输出一致。barrel 中未被使用的再导出
+不计入真值，因此按 import 闭包遍历时多出的边会体现在 precision 上；路由常量定义在 feature 模块中，
+只扫描 entry 的常量索引无法解析它们，未解析的目标同样会拉低 precision / recall。
+
+同一组参数与种子生成的文件内容逐字节一致；synth_manifest.json 记录参数与规模统计。
+
+用法:
+    python bench/synth_project.py OUT_DIR [--files 5000] [--features 0] [--pages-ratio 0.03]
+        [--component-depth 8] [--import-chain 12] [--seed 0] [--force]
+    python bench/synth_project.py OUT_DIR --score PTG.json
+
+生成后可直接运行 `python bench/pipeline_bench.py OUT_DIR/entry`（模拟 LLM，报告中附真值对比），
+或用 --score 对任意 PTG 结果计算 precision / recall。
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from agent.utils.route_utils import normalize_path, strip_ets
+
+GROUND_TRUTH_NAME = "ground_truth_ptg.json"
+MANIFEST_NAME = "synth_manifest.json"
+
+_DOMAINS = [
+    "order", "cart", "product", "user", "search", "settings", "message", "payment", "address", "coupon",
+    "live", "video", "community", "wallet", "help", "membership", "delivery", "review", "store", "news",
+]
+_NOUNS = [
+    "Item", "Summary", "Header", "Banner", "List", "Detail", "Profile", "Price", "Tag", "Action",
+    "Entry", "Status", "Filter", "Review", "Gallery", "Badge", "Menu", "Footer", "Notice", "Option",
+]
+_KINDS = ["Card", "Row", "View", "Panel", "Cell", "Bar", "Section", "Tile"]
+_PAGE_NOUNS = ["Detail", "List", "Edit", "Result", "Home", "Manage", "Preview", "Confirm", "History", "Center"]
+# (组件, 事件)：路由调用所在的触发组件。
+_TRIGGERS = [
+    ("Button", "onClick"),
+    ("Button", "onClick"),
+    ("Text", "onClick"),
+    ("Image", "onClick"),
+    ("Row", "onClick"),
+    ("Column", "onClick"),
+    ("ListItem", "onClick"),
+    ("Search", "onSubmit"),
+    ("Toggle", "onChange"),
+]
+
+
+@dataclass
+class _Nav:
+    component: str
+    event: str
+    target: str
+    # literal / class / enum
+    expr_kind: str
+    method: str
+
+
+@dataclass
+class _Page:
+    route: str
+    name: str
+    domain: str
+    children: List[str] = field(default_factory=list)
+    navs: List[_Nav] = field(default_factory=list)
+
+
+@dataclass
+class _Comp:
+    name: str
+    module: str
+    rel: str
+    level: int
+    children: List[str] = field(default_factory=list)
+    navs: List[_Nav] = field(default_factory=list)
+    inner_navs: List[_Nav] = field(default_factory=list)
+    has_inner: bool = False
+    helper: str = ""
+
+
+@dataclass
+class _Module:
+    name: str
+    domain: str
+    # 相对工程根目录的模块目录
+    dir: str
+    comps: List[str] = field(default_factory=list)
+    helpers: List[str] = field(default_factory=list)
+    models: List[str] = field(default_factory=list)
+    two_level_barrel: bool = False
+
+
+def _camel(domain: str) -> str:
+    return domain[:1].upper() + domain[1:]
+
+
+def _upper_snake(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).upper()
+
+
+def _routes_symbols(module: _Module) -> Tuple[str, str]:
+    """(class 常量名, enum 名)。"""
+    if module.name == "common":
+        return "RouteConst", "RoutePath"
+    return f"{_camel(module.domain)}Routes", f"{_camel(module.domain)}RoutePath"
+
+
+def _rel_import(from_file: str, to_file: str) -> str:
+    rel = os.path.relpath(strip_ets(to_file), os.path.dirname(from_file)).replace(os.sep, "/")
+    return rel if rel.startswith(".") else f"./{rel}"
+
+
+class SynthProject:
+    """按参数与种子构建工程模型（页面、组件、模块、导入关系），再渲染为文件。"""
+
+    def __init__(
+        self,
+        *,
+        files: int,
+        features: int = 0,
+        pages_ratio: float = 0.03,
+        component_depth: int = 8,
+        import_chain: int = 12,
+        seed: int = 0,
+    ) -> None:
+        self.files = max(200, int(files))
+        self.features = int(features) or max(4, min(60, self.files // 800))
+        self.pages_ratio = float(pages_ratio)
+        self.component_depth = max(2, int(component_depth))
+        self.import_chain = max(1, int(import_chain))
+        self.seed = int(seed)
+        self.rng = random.Random(self.seed)
+        self.modules: Dict[str, _Module] = {}
+        self.pages: List[_Page] = []
+        self.comps: Dict[str, _Comp] = {}
+        self._names: Set[str] = set()
+        self._render_rng = random.Random(self.seed + 1)
+        self._build_model()
+
+    # ---------- 模型 ----------
+
+    def _unique(self, base: str) -> str:
+        name, i = base, 2
+        while name in self._names:
+            name, i = f"{base}{i}", i + 1
+        self._names.add(name)
+        return name
+
+    def _build_model(self) -> None:
+        rng = self.rng
+        self.modules["common"] = _Module(name="common", domain="home", dir="common")
+        for k in range(self.features):
+            base = _DOMAINS[k % len(_DOMAINS)]
+            domain = base if k < len(_DOMAINS) else f"{base}{k // len(_DOMAINS)}"
+            name = f"feature_{domain}"
+            self.modules[name] = _Module(name=name, domain=domain, dir=f"features/{name}", two_level_barrel=k % 2 == 1)
+        features = [m for m in self.modules.values() if m.name != "common"]
+
+        # 页面：Index 与 home 域页面的常量放在 common，其余按 feature 分域。
+        n_pages = max(8, int(self.files * self.pages_ratio))
+        self.pages.append(_Page(route="pages/Index", name="Index", domain="home"))
+        for i in range(1, n_pages):
+            module = self.modules["common"] if i % 10 == 0 else features[i % len(features)]
+            noun = rng.choice(_PAGE_NOUNS)
+            name = self._unique(f"{_camel(module.domain)}{noun}Page")
+            self.pages.append(_Page(route=f"pages/{module.domain}/{name}", name=name, domain=module.domain))
+
+        # 组件：按层级分布，层级 l 的组件只渲染 l+1 层的组件（common 组件为叶子）。
+        n_comps = int(self.files * 0.45)
+        n_common = max(4, n_comps // 20)
+        depth = self.component_depth
+        for i in range(n_comps):
+            module = self.modules["common"] if i < n_common else features[i % len(features)]
+            level = depth if module.name == "common" else (i // len(features)) % depth
+            name = self._unique(f"{_camel(module.domain)}{rng.choice(_NOUNS)}{rng.choice(_KINDS)}")
+            group = rng.choice(_NOUNS).lower()
+            comp = _Comp(name=name, module=module.name, rel=f"components/{group}/{name}.ets", level=level)
+            comp.has_inner = rng.random() < 0.15
+            self.comps[name] = comp
+            module.comps.append(name)
+
+        by_level: Dict[Tuple[str, int], List[str]] = {}
+        for c in self.comps.values():
+            by_level.setdefault((c.module, c.level), []).append(c.name)
+        common_comps = list(self.modules["common"].comps)
+
+        for c in self.comps.values():
+            if c.module == "common":
+                continue
+            if c.level < depth - 1:
+                for _ in range(rng.randint(1, 3)):
+                    r = rng.random()
+                    if r < 0.8:
+                        pool = by_level.get((c.module, c.level + 1)) or []
+                    elif r < 0.95:
+                        other = rng.choice(features).name
+                        pool = by_level.get((other, c.level + 1)) or []
+                    else:
+                        pool = common_comps
+                    if pool:
+                        child = rng.choice(pool)
+                        if child not in c.children:
+                            c.children.append(child)
+            elif rng.random() < 0.5:
+                c.children.append(rng.choice(common_comps))
+
+        # 路由调用。
+        for c in self.comps.values():
+            if rng.random() < 0.35:
+                c.navs = [self._nav() for _ in range(rng.randint(1, 2))]
+            if c.has_inner and rng.random() < 0.5:
+                c.inner_navs = [self._nav()]
+        for p in self.pages:
+            p.navs = [self._nav(exclude=p.route) for _ in range(rng.randint(1, 3))]
+            home = self.modules.get(f"feature_{p.domain}")
+            for _ in range(rng.randint(2, 5)):
+                module = home if home is not None and rng.random() < 0.7 else rng.choice(features)
+                pool = by_level.get((module.name, 0)) or []
+                if pool:
+                    child = rng.choice(pool)
+                    if child not in p.children:
+                        p.children.append(child)
+
+        # 剩余文件数分给工具函数与 model（每个模块串成若干条 import 深链）。
+        fixed = 1 + len(self.pages) + len(self.comps) + sum(
+            2 + (1 if m.two_level_barrel else 0) for m in self.modules.values()
+        )
+        rest = max(0, self.files - fixed)
+        modules = list(self.modules.values())
+        for i in range(rest):
+            module = modules[i % len(modules)]
+            if i % 4 == 3:
+                module.models.append(f"{_camel(module.domain)}Model{len(module.models)}")
+            else:
+                module.helpers.append(f"{module.domain}Helper{len(module.helpers)}")
+        for c in self.comps.values():
+            helpers = self.modules[c.module].helpers
+            if helpers and rng.random() < 0.6:
+                c.helper = rng.choice(helpers)
+
+    def _nav(self, exclude: str = "") -> _Nav:
+        rng = self.rng
+        page = rng.choice(self.pages)
+        while page.route == exclude and len(self.pages) > 1:
+            page = rng.choice(self.pages)
+        component, event = rng.choice(_TRIGGERS)
+        r = rng.random()
+        kind = "literal" if r < 0.4 else ("class" if r < 0.8 else "enum")
+        method = "replaceUrl" if rng.random() < 0.15 else "pushUrl"
+        return _Nav(component=component, event=event, target=page.route, expr_kind=kind, method=method)
+
+    # ---------- 真值 ----------
+
+    def ground_truth(self) -> Dict[str, List[Dict[str, Any]]]:
+        """页面 -> 页面及其渲染组件（递归）中的路由边，按 (组件, 事件, 目标) 去重。"""
+        ptg: Dict[str, List[Dict[str, Any]]] = {}
+        for page in self.pages:
+            edges: List[Dict[str, Any]] = []
+            seen: Set[Tuple[str, str, str]] = set()
+
+            def add(navs: List[_Nav]) -> None:
+                for n in navs:
+                    key = (n.component, n.event, n.target)
+                    if key not in seen:
+                        seen.add(key)
+                        edges.append({"component": {"type": n.component}, "event": n.event, "target": n.target})
+
+            add(page.navs)
+            visited: Set[str] = set()
+            stack = list(reversed(page.children))
+            while stack:
+                name = stack.pop()
+                if name in visited:
+                    continue
+                visited.add(name)
+                comp = self.comps[name]
+                add(comp.navs)
+                add(comp.inner_navs)
+                stack.extend(reversed(comp.children))
+            ptg[page.route] = edges
+        return ptg
+
+    def closure_sizes(self) -> List[int]:
+        sizes: List[int] = []
+        for page in self.pages:
+            visited: Set[str] = set()
+            stack = list(page.children)
+            while stack:
+                name = stack.pop()
+                if name not in visited:
+                    visited.add(name)
+                    stack.extend(self.comps[name].children)
+            sizes.append(len(visited))
+        return sizes
+
+    # ---------- 渲染 ----------
+
+    def _ets_root(self, module: _Module) -> str:
+        return f"{module.dir}/src/main/ets"
+
+    def _comp_path(self, comp: _Comp) -> str:
+        return f"{self._ets_root(self.modules[comp.module])}/{comp.rel}"
+
+    def _page_path(self, page: _Page) -> str:
+        return f"entry/src/main/ets/{page.route}.ets"
+
+    def _route_module(self, target: str) -> _Module:
+        domain = target.split("/")[1] if target.count("/") >= 2 else "home"
+        return self.modules.get(f"feature_{domain}") or self.modules["common"]
+
+    def _target_expr(self, nav: _Nav, imports: Dict[str, str], cur_file: str, cur_module: str) -> str:
+        if nav.expr_kind == "literal":
+            return f"'{nav.target}'"
+        module = self._route_module(nav.target)
+        cls, enum = _routes_symbols(module)
+        page_name = nav.target.rsplit("/", 1)[-1]
+        symbol = cls if nav.expr_kind == "class" else enum
+        if module.name == cur_module:
+            routes_file = f"{self._ets_root(module)}/constants/{cls}.ets"
+            imports.setdefault(symbol, _rel_import(cur_file, routes_file))
+        else:
+            imports.setdefault(symbol, f"@ohos/{module.name}")
+        return f"{cls}.{_upper_snake(page_name)}" if nav.expr_kind == "class" else f"{enum}.{page_name}"
+
+    def _nav_block(self, nav: _Nav, expr: str, indent: str, label: str) -> List[str]:
+        call = f"router.{nav.method}({{ url: {expr} }});"
+        handler = "() => {" if nav.event == "onClick" else "(value: string) => {" if nav.event == "onSubmit" else (
+            "(isOn: boolean) => {"
+        )
+        opener = {
+            "Button": f"Button('{label}')",
+            "Text": f"Text('{label}')",
+            "Image": "Image($r('app.media.icon'))",
+            "Row": "Row() {",
+            "Column": "Column() {",
+            "ListItem": "ListItem() {",
+            "Search": "Search({ placeholder: '" + label + "' })",
+            "Toggle": "Toggle({ type: ToggleType.Switch, isOn: false })",
+        }[nav.component]
+        lines = [indent + opener]
+        # 容器组件的属性方法与闭合括号对齐，其余组件缩进一级。
+        attr = indent
+        if opener.endswith("{"):
+            lines += [f"{indent}  Text('{label}')", indent + "}"]
+        else:
+            attr = indent + "  "
+        lines += [
+            f"{attr}.margin({{ top: 8 }})",
+            f"{attr}.{nav.event}({handler}",
+            f"{attr}  {call}",
+            f"{attr}}})",
+        ]
+        return lines
+
+    def _import_lines(self, imports: Dict[str, str], router_style: int) -> List[str]:
+        by_module: Dict[str, List[str]] = {}
+        for symbol, module in imports.items():
+            by_module.setdefault(module, []).append(symbol)
+        lines = ["import router from '@ohos.router';" if router_style == 0 else "import { router } from '@kit.ArkUI';"]
+        for module, symbols in by_module.items():
+            lines.append(f"import {{ {', '.join(symbols)} }} from '{module}';")
+        return lines
+
+    def _child_import(self, child: _Comp, cur_file: str, cur_module: str) -> str:
+        if child.module == cur_module:
+            return _rel_import(cur_file, self._comp_path(child))
+        if self._render_rng.random() < 0.1:
+            return f"@ohos/{child.module}/src/main/ets/{strip_ets(child.rel)}"
+        return f"@ohos/{child.module}"
+
+    def render_comp(self, comp: _Comp) -> str:
+        path = self._comp_path(comp)
+        imports: Dict[str, str] = {}
+        for child in comp.children:
+            imports[child] = self._child_import(self.comps[child], path, comp.module)
+        if comp.helper:
+            module = self.modules[comp.module]
+            imports[comp.helper] = _rel_import(path, f"{self._ets_root(module)}/utils/{_camel(comp.helper)}.ets")
+        body: List[str] = []
+        for i, nav in enumerate(comp.navs):
+            expr = self._target_expr(nav, imports, path, comp.module)
+            body += self._nav_block(nav, expr, "      ", f"{comp.name} action {i}")
+        inner: List[str] = []
+        for i, nav in enumerate(comp.inner_navs):
+            expr = self._target_expr(nav, imports, path, comp.module)
+            inner += self._nav_block(nav, expr, "      ", f"{comp.name} more {i}")
+
+        title = f"{comp.helper}(this.title)" if comp.helper else "this.title"
+        lines = self._import_lines(imports, len(comp.name) % 2) + [
+            "",
+            "@Component",
+            f"export struct {comp.name} {{",
+            "  @Prop title: string = '';",
+            "  @State expanded: boolean = false;",
+            "",
+            "  build() {",
+            "    Column({ space: 8 }) {",
+            f"      Text({title})",
+            "        .fontSize(16)",
+            "        .fontWeight(FontWeight.Medium)",
+        ]
+        lines += [f"      {child}({{ title: this.title }})" for child in comp.children]
+        lines += body
+        if comp.has_inner:
+            lines.append(f"      {comp.name}Inner()")
+        lines += [
+            "    }",
+            "    .width('100%')",
+            "    .padding(12)",
+            "  }",
+            "}",
+        ]
+        if comp.has_inner:
+            lines += [
+                "",
+                "@Component",
+                f"struct {comp.name}Inner {{",
+                "  build() {",
+                "    Row() {",
+                "      Text('more')",
+                *inner,
+                "    }",
+                "  }",
+                "}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def render_page(self, page: _Page) -> str:
+        path = self._page_path(page)
+        imports: Dict[str, str] = {}
+        for child in page.children:
+            imports[child] = self._child_import(self.comps[child], path, "entry")
+        body: List[str] = []
+        for i, nav in enumerate(page.navs):
+            expr = self._target_expr(nav, imports, path, "entry")
+            body += self._nav_block(nav, expr, "      ", f"{page.name} go {i}")
+        lines = self._import_lines(imports, len(page.name) % 2) + [
+            "",
+            "@Entry",
+            "@Component",
+            f"struct {page.name} {{",
+            "  @State loading: boolean = false;",
+            "",
+            "  build() {",
+            "    Column() {",
+            f"      Text('{page.name}')",
+            "        .fontSize(20)",
+        ]
+        lines += [f"      {child}({{ title: '{child}' }})" for child in page.children]
+        lines += body
+        lines += ["    }", "    .width('100%')", "    .height('100%')", "  }", "}"]
+        return "\n".join(lines) + "\n"
+
+    def render_routes(self, module: _Module) -> str:
+        cls, enum = _routes_symbols(module)
+        pages = [p for p in self.pages if self._route_module(p.route).name == module.name]
+        lines = [f"export class {cls} {{"]
+        lines += [f"  static readonly {_upper_snake(p.name)}: string = '{p.route}';" for p in pages]
+        lines += ["}", "", f"export enum {enum} {{"]
+        lines += [f"  {p.name} = '{p.route}'," for p in pages]
+        lines += ["}"]
+        return "\n".join(lines) + "\n"
+
+    def render_barrels(self, module: _Module) -> Dict[str, str]:
+        """模块 barrel：index.ets（两级时再加 components/index.ets）。"""
+        root = self._ets_root(module)
+        cls, enum = _routes_symbols(module)
+        comp_lines = [
+            f"export {{ {name} }} from './{strip_ets(self.comps[name].rel)}';" for name in module.comps
+        ]
+        if not module.two_level_barrel:
+            top = [f"export {{ {cls}, {enum} }} from './constants/{cls}';", *comp_lines]
+            return {f"{root}/index.ets": "\n".join(top) + "\n"}
+        nested = [line.replace("'./components/", "'./") for line in comp_lines]
+        top = [f"export {{ {cls}, {enum} }} from './constants/{cls}';", "export * from './components/index';"]
+        return {f"{root}/index.ets": "\n".join(top) + "\n", f"{root}/components/index.ets": "\n".join(nested) + "\n"}
+
+    def render_helpers(self, module: _Module) -> Dict[str, str]:
+        """工具函数按 import_chain 长度串成链：HelperN 导入 HelperN+1（链尾导入一个 model）。"""
+        root = self._ets_root(module)
+        out: Dict[str, str] = {}
+        for i, name in enumerate(module.helpers):
+            path = f"{root}/utils/{_camel(name)}.ets"
+            lines: List[str] = []
+            chain_next = i + 1 if (i + 1) % self.import_chain != 0 and i + 1 < len(module.helpers) else -1
+            model = module.models[i % len(module.models)] if module.models else ""
+            if chain_next >= 0:
+                nxt = module.helpers[chain_next]
+                lines.append(f"import {{ {nxt} }} from './{_camel(nxt)}';")
+                expr = f"{nxt}(value)"
+            elif model:
+                lines.append(f"import {{ {model} }} from '../model/{model}';")
+                expr = f"new {model}(value).label"
+            else:
+                expr = "value"
+            lines += [
+                "",
+                f"export function {name}(value: string): string {{",
+                f"  return {expr}.trim();",
+                "}",
+            ]
+            out[path] = "\n".join(lines) + "\n"
+        for name in module.models:
+            out[f"{root}/model/{name}.ets"] = (
+                f"export class {name} {{\n"
+                "  label: string;\n\n"
+                "  constructor(label: string) {\n"
+                "    this.label = label;\n"
+                "  }\n"
+                "}\n"
+            )
+        return out
+
+    def render_configs(self) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        modules = [{"name": "entry", "srcPath": "./entry"}] + [
+            {"name": m.name, "srcPath": f"./{m.dir}"} for m in self.modules.values()
+        ]
+        out["build-profile.json5"] = json.dumps(
+            {"app": {"products": [{"name": "default", "signingConfig": "default"}]}, "modules": modules},
+            indent=2,
+        ) + "\n"
+        out["oh-package.json5"] = json.dumps({"name": "synth_app", "version": "1.0.0", "dependencies": {}}, indent=2)
+        out["oh-package.json5"] += "\n"
+        deps = {f"@ohos/{m.name}": f"file:../{m.dir}" for m in self.modules.values()}
+        out["entry/oh-package.json5"] = json.dumps(
+            {"name": "entry", "version": "1.0.0", "main": "", "dependencies": deps}, indent=2
+        ) + "\n"
+        for m in self.modules.values():
+            up = "../" * m.dir.count("/")
+            mdeps = {f"@ohos/{o.name}": f"file:../{up}{o.dir}" for o in self.modules.values() if o.name != m.name}
+            out[f"{m.dir}/oh-package.json5"] = json.dumps(
+                {
+                    "name": f"@ohos/{m.name}",
+                    "version": "1.0.0",
+                    "main": "src/main/ets/index.ets",
+                    "dependencies": mdeps,
+                },
+                indent=2,
+            ) + "\n"
+            out[f"{m.dir}/src/main/module.json5"] = json.dumps(
+                {"module": {"name": m.name, "type": "har", "deviceTypes": ["phone"]}}, indent=2
+            ) + "\n"
+        out["entry/src/main/module.json5"] = json.dumps(
+            {
+                "module": {
+                    "name": "entry",
+                    "type": "entry",
+                    "mainElement": "EntryAbility",
+                    "pages": "$profile:main_pages",
+                }
+            },
+            indent=2,
+        ) + "\n"
+        out["entry/src/main/resources/base/profile/main_pages.json"] = json.dumps(
+            {"src": [p.route for p in self.pages]}, indent=2
+        ) + "\n"
+        out["entry/src/main/ets/entryability/EntryAbility.ets"] = (
+            "import { UIAbility } from '@kit.AbilityKit';\n"
+            "import { window } from '@kit.ArkUI';\n\n"
+            "export default class EntryAbility extends UIAbility {\n"
+            "  onWindowStageCreate(windowStage: window.WindowStage): void {\n"
+            "    windowStage.loadContent('pages/Index');\n"
+            "  }\n"
+            "}\n"
+        )
+        return out
+
+    def render(self) -> Dict[str, str]:
+        """相对路径 -> 文件内容（按路径排序后写出，保证输出顺序稳定）。"""
+        # 渲染期间的随机选择使用独立的 RNG，重复渲染结果一致。
+        self._render_rng = random.Random(self.seed + 1)
+        out = self.render_configs()
+        for module in self.modules.values():
+            cls, _ = _routes_symbols(module)
+            out[f"{self._ets_root(module)}/constants/{cls}.ets"] = self.render_routes(module)
+            out.update(self.render_barrels(module))
+            out.update(self.render_helpers(module))
+        for comp in self.comps.values():
+            out[self._comp_path(comp)] = self.render_comp(comp)
+        for page in self.pages:
+            out[self._page_path(page)] = self.render_page(page)
+        return dict(sorted(out.items()))
+
+    def manifest(self, files: Dict[str, str]) -> Dict[str, Any]:
+        closure = sorted(self.closure_sizes())
+        navs = [n for c in self.comps.values() for n in (*c.navs, *c.inner_navs)] + [
+            n for p in self.pages for n in p.navs
+        ]
+        ets = [p for p in files if p.endswith(".ets")]
+        return {
+            "params": {
+                "files": self.files,
+                "features": self.features,
+                "pages_ratio": self.pages_ratio,
+                "component_depth": self.component_depth,
+                "import_chain": self.import_chain,
+                "seed": self.seed,
+            },
+            "entry": "entry",
+            "ground_truth": GROUND_TRUTH_NAME,
+            "counts": {
+                "ets_files": len(ets),
+                "modules": len(self.modules) + 1,
+                "pages": len(self.pages),
+                "components": len(self.comps),
+                "helpers": sum(len(m.helpers) for m in self.modules.values()),
+                "models": sum(len(m.models) for m in self.modules.values()),
+                "route_calls": len(navs),
+                "route_calls_by_expr": {
+                    k: sum(1 for n in navs if n.expr_kind == k) for k in ("literal", "class", "enum")
+                },
+                "files_per_module": {
+                    m.dir: sum(1 for p in ets if p.startswith(m.dir + "/")) for m in self.modules.values()
+                },
+            },
+            "page_component_closure": {
+                "min": closure[0] if closure else 0,
+                "median": closure[len(closure) // 2] if closure else 0,
+                "max": closure[-1] if closure else 0,
+            },
+        }
+
+
+def write_project(out_dir: Path, project: SynthProject, *, force: bool = False) -> Dict[str, Any]:
+    """写出工程、真值 PTG 与 manifest，返回 manifest。"""
+    if out_dir.exists() and any(out_dir.iterdir()):
+        if not (force and (out_dir / MANIFEST_NAME).is_file()):
+            raise SystemExit(
+                f"{out_dir} is not empty; pass --force to replace a previously generated project "
+                f"(only directories containing {MANIFEST_NAME} are replaced)"
+            )
+        shutil.rmtree(out_dir)
+    files = project.render()
+    for rel, text in files.items():
+        path = out_dir / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="\n") as fh:
+            fh.write(text)
+    truth = project.ground_truth()
+    (out_dir / GROUND_TRUTH_NAME).write_text(json.dumps(truth, ensure_ascii=False, indent=2), encoding="utf-8")
+    manifest = project.manifest(files)
+    manifest["counts"]["ground_truth_edges"] = sum(len(v) for v in truth.values())
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return manifest
+
+
+def _edge_keys(ptg: Any, *, with_trigger: bool) -> Set[Tuple[str, ...]]:
+    keys: Set[Tuple[str, ...]] = set()
+    for src, edges in (ptg.items() if isinstance(ptg, dict) else []):
+        s = strip_ets(normalize_path(str(src)))
+        for e in edges if isinstance(edges, list) else []:
+            if not isinstance(e, dict):
+                continue
+            t = strip_ets(normalize_path(str(e.get("target") or "")).strip("'\""))
+            if with_trigger:
+                keys.add((s, str((e.get("component") or {}).get("type") or ""), str(e.get("event") or ""), t))
+            else:
+                keys.add((s, t))
+    return keys
+
+
+def score_ptg(predicted: Any, truth: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """对比 PTG 与真值：edges 按 (页面, 组件, 事件, 目标)，page_links 只按 (页面, 目标)。"""
+    out: Dict[str, Any] = {}
+    for label, with_trigger in (("edges", True), ("page_links", False)):
+        pred, gold = _edge_keys(predicted, with_trigger=with_trigger), _edge_keys(truth, with_trigger=with_trigger)
+        tp = len(pred & gold)
+        precision = tp / len(pred) if pred else 0.0
+        recall = tp / len(gold) if gold else 0.0
+        out[label] = {
+            "truth": len(gold),
+            "predicted": len(pred),
+            "true_positive": tp,
+            "precision": round(precision, 4),
+            "recall": round(recall, 4),
+            "f1": round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        }
+    pred_pages = {strip_ets(normalize_path(str(k))) for k in (predicted if isinstance(predicted, dict) else {})}
+    out["missing_pages"] = len([p for p in truth if p not in pred_pages])
+    return out
+
+
+def find_ground_truth(project_path: str) -> Optional[Path]:
+    """模块目录（如 OUT_DIR/entry）所在的生成工程中的真值文件；不是生成的工程时返回 None。"""
+    path = Path(project_path).resolve().parent / GROUND_TRUTH_NAME
+    return path if path.is_file() else None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("out_dir")
+    ap.add_argument("--files", type=int, default=5000, help="目标 .ets 文件数（最少 200）")
+    ap.add_argument("--features", type=int, default=0, help="feature 模块数；0 表示按文件数自动确定")
+    ap.add_argument("--pages-ratio", type=float, default=0.03, help="页面数占文件数的比例")
+    ap.add_argument("--component-depth", type=int, default=8, help="组件嵌套层数")
+    ap.add_argument("--import-chain", type=int, default=12, help="工具函数 import 链的最大长度")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--force", action="store_true", help="覆盖之前生成的工程")
+    ap.add_argument("--score", default="", help="不生成，改为用 OUT_DIR 中的真值对该 PTG JSON 打分")
+    args = ap.parse_args()
+
+    out_dir = Path(args.out_dir).resolve()
+    if args.score:
+        truth = json.loads((out_dir / GROUND_TRUTH_NAME).read_text(encoding="utf-8"))
+        predicted = json.loads(Path(args.score).read_text(encoding="utf-8"))
+        print(json.dumps(score_ptg(predicted, truth), ensure_ascii=False, indent=2))
+        return
+
+    t0 = time.perf_counter()
+    project = SynthProject(
+        files=args.files,
+        features=args.features,
+        pages_ratio=args.pages_ratio,
+        component_depth=args.component_depth,
+        import_chain=args.import_chain,
+        seed=args.seed,
+    )
+    manifest = write_project(out_dir, project, force=args.force)
+    counts = manifest["counts"]
+    print(
+        f"[SynthProject] Generated {counts['ets_files']} .ets files in {time.perf_counter() - t0:.1f}s: "
+        f"modules={counts['modules']}, pages={counts['pages']}, components={counts['components']}, "
+        f"route_calls={counts['route_calls']}, ground_truth_edges={counts['ground_truth_edges']}"
+    )
+    print(f"[SynthProject] Entry module: {out_dir / 'entry'}")
+    print(f"[SynthProject] Ground truth: {out_dir / GROUND_TRUTH_NAME}")
+
+
+if __name__ == "__main__":
+    main()
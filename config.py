@@ -10,6 +10,10 @@ LLM_CONFIG = {
             "timeout": 180,
             "max_retries": 2,
         },
+        "rateLimit": {
+            "rpm": 60,
+            "tpm": 0,
+        },
     },
     "gpt": {
         "baseURL": "https://api.gptsapi.net/v1",
@@ -22,6 +26,10 @@ LLM_CONFIG = {
             "timeout": 180,
             "max_retries": 2,
         },
+        "rateLimit": {
+            "rpm": 60,
+            "tpm": 0,
+        },
     },
     "claude": {
         "baseURL": "https://api.gptsapi.net/v1",
@@ -34,6 +42,10 @@ LLM_CONFIG = {
             "timeout": 180,
             "max_retries": 2,
         },
+        "rateLimit": {
+            "rpm": 60,
+            "tpm": 0,
+        },
     },
 }
 
@@ -5,6 +5,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Awaitable, Callable, Optional
 
+from llm_rate_limit import ainvoke_with_rate_limit_retry
 from llm_usage import extract_token_usage
 from llm.prompt.prompt import GLOBAL_PROMPT, RESTRICTIVE_PROMPT, TASK_PROMPT
 from llm.prompt.preprocess_prompt import get_preprocess_prompt
@@ -109,7 +110,8 @@ async def preprocess_prompt(llm: ChatOpenAI, code: str, model: str) -> str:
     prompt = get_preprocess_prompt(code)
     try:
         started_at = time.perf_counter()
-        msg = await llm.ainvoke([("user", prompt)])
+        # 与 agent 共享同一 provider 限流器，429 时等待冷却后重试
+        msg = await ainvoke_with_rate_limit_retry(llm, [("user", prompt)])
         duration_ms = int((time.perf_counter() - started_at) * 1000)
 
         result = str(getattr(msg, "content", "") or "")
@@ -192,7 +194,7 @@ async def run_long_prompt_conversation(options: dict) -> dict[str, Any]:
     full_prompt = "\n\n".join([filled_global, TASK_PROMPT, filled_restrict, *[f"<context_chunk {i+1}/{len(context_chunks)}>\n{c}\n</context_chunk>" for i, c in enumerate(context_chunks)]])
     full_prompt_path = write_full_prompt_to_file(full_prompt, project_name=project_name, model=model)
 
-    resp = await llm.ainvoke(messages)
+    resp = await ainvoke_with_rate_limit_retry(llm, messages)
     prompt_tokens, completion_tokens, total_tokens = extract_token_usage(resp)
     raw = str(getattr(resp, "content", "") or "")
     saved = write_ptg_result_to_file(raw, project_name=project_name, model_name=model)
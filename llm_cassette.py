@@ -0,0 +1,376 @@
+"""LLM 交互录制 / 回放（cassette）。
+
+record 模式下，build_chat_model 返回的模型照常请求 provider，同时把每次请求的响应
+（文本、tool_calls、usage 元数据；流式请求另存各分片文本）追加写入 cassette 文件；
+replay 模式下不访问网络、不需要 API key，按请求内容从 cassette 中取出响应原样返回。
+两种模式都通过环境变量开启，agent/workflow.py 与 llm/workflow.py 无需改动::
+
+    LLM_CASSETTE_MODE=record LLM_CASSETTE_PATH=run.jsonl.gz python agent/workflow.py --deepseek --HarmoneyOpenEye
+    LLM_CASSETTE_MODE=replay LLM_CASSETTE_PATH=run.jsonl.gz python agent/workflow.py --deepseek --HarmoneyOpenEye
+
+请求键 = sha256(model + 全部消息（角色、内容、tool_calls、tool_call_id）+ 工具定义 + stop)。
+同一请求出现多次时按出现顺序依次回放，超出录制次数后重复最后一条。
+文件为 JSON Lines（首行为格式头），路径以 .gz 结尾时 gzip 压缩。
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict
+
+CASSETTE_MODE_ENV = "LLM_CASSETTE_MODE"
+CASSETTE_PATH_ENV = "LLM_CASSETTE_PATH"
+DEFAULT_CASSETTE_PATH = Path(__file__).resolve().parent / "agent" / "result" / "_cassettes" / "llm_cassette.jsonl.gz"
+CASSETTE_MODES = ("record", "replay")
+_FORMAT = {"format": "llm-cassette", "version": 1}
+# 回放没有录制分片的响应时，流式输出按该长度切片。
+_REPLAY_CHUNK_CHARS = 64
+
+
+class CassetteMissError(RuntimeError):
+    """replay 模式下请求不在 cassette 中。"""
+
+
+def cassette_mode() -> str:
+    """当前 cassette 模式：record / replay；未开启时为空字符串。"""
+    mode = str(os.environ.get(CASSETTE_MODE_ENV) or "").strip().lower()
+    if mode in ("", "off", "none"):
+        return ""
+    if mode not in CASSETTE_MODES:
+        raise RuntimeError(f"Unsupported {CASSETTE_MODE_ENV}={mode!r}; expected one of {', '.join(CASSETTE_MODES)}")
+    return mode
+
+
+def cassette_path() -> Path:
+    return Path(str(os.environ.get(CASSETTE_PATH_ENV) or "").strip() or DEFAULT_CASSETTE_PATH)
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8", errors="ignore")).hexdigest()
+
+
+def _message_row(message: BaseMessage) -> Dict[str, Any]:
+    row: Dict[str, Any] = {"role": message.type, "content": message.content}
+    tool_calls = getattr(message, "tool_calls", None) or []
+    if tool_calls:
+        row["tool_calls"] = [{"name": tc.get("name"), "args": tc.get("args"), "id": tc.get("id")} for tc in tool_calls]
+    tool_call_id = getattr(message, "tool_call_id", None)
+    if tool_call_id:
+        row["tool_call_id"] = tool_call_id
+    return row
+
+
+def request_key(model: str, messages: Sequence[BaseMessage], *, tools: Any = None, stop: Any = None) -> str:
+    """请求键：只取决于模型与请求内容（忽略消息 id、usage 等易变字段）。"""
+    key_obj = {
+        "model": str(model or ""),
+        "messages": [_message_row(m) for m in messages],
+        "tools": tools or [],
+        "stop": list(stop or []),
+    }
+    return _sha256(json.dumps(key_obj, ensure_ascii=False, sort_keys=True, default=str))
+
+
+def _response_row(message: BaseMessage, chunks: Optional[List[str]]) -> Dict[str, Any]:
+    """只保留回放需要的字段：文本、tool_calls、usage 与 finish_reason。"""
+    row: Dict[str, Any] = {"content": message.content}
+    tool_calls = getattr(message, "tool_calls", None) or []
+    if tool_calls:
+        row["tool_calls"] = [{"name": tc.get("name"), "args": tc.get("args"), "id": tc.get("id")} for tc in tool_calls]
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        row["usage"] = dict(usage)
+    finish_reason = (getattr(message, "response_metadata", None) or {}).get("finish_reason")
+    if finish_reason:
+        row["finish_reason"] = finish_reason
+    if chunks is not None:
+        row["chunks"] = chunks
+    return row
+
+
+def _response_message(row: Dict[str, Any], model: str) -> AIMessage:
+    meta: Dict[str, Any] = {"model_name": model}
+    if row.get("finish_reason"):
+        meta["finish_reason"] = row["finish_reason"]
+    return AIMessage(
+        content=row.get("content") or "",
+        tool_calls=[{**tc, "type": "tool_call"} for tc in row.get("tool_calls") or []],
+        usage_metadata=row.get("usage"),
+        response_metadata=meta,
+    )
+
+
+def _open_text(path: Path, mode: str) -> Any:
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Cassette:
+    """一个 cassette 文件；同一进程内同一路径共用一个实例。"""
+
+    def __init__(self, path: Path, mode: str) -> None:
+        self.path = Path(path)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        self.recorded = 0
+        self.replayed = 0
+        self._fh: Any = None
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = _open_text(self.path, "w")
+            self._fh.write(json.dumps(_FORMAT) + "\n")
+            self._fh.flush()
+            atexit.register(self.close)
+        else:
+            self._load()
+
+    def _load(self) -> None:
+        if not self.path.is_file():
+            raise RuntimeError(f"Cassette not found: {self.path}")
+        with _open_text(self.path, "r") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("format") != _FORMAT["format"]:
+                raise RuntimeError(f"Not an LLM cassette: {self.path}")
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                self._entries.setdefault(row["key"], []).append(row["response"])
+        print(f"[Cassette] Replay: {self.path} ({sum(len(v) for v in self._entries.values())} interactions)")
+
+    def record(self, key: str, model: str, message: BaseMessage, chunks: Optional[List[str]] = None) -> None:
+        line = json.dumps(
+            {"key": key, "model": model, "response": _response_row(message, chunks)},
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        with self._lock:
+            if self._fh is None:
+                return
+            # 每条交互写入后立即 flush，运行中断时已录制的部分仍可回放。
+            self._fh.write(line + "\n")
+            self._fh.flush()
+            self.recorded += 1
+
+    def replay(self, key: str, messages: Sequence[BaseMessage]) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._entries.get(key)
+            if not rows:
+                last = str(messages[-1].content if messages else "")[:200]
+                raise CassetteMissError(f"Request not in cassette {self.path}: key={key[:16]}, last_message={last!r}")
+            idx = self._served.get(key, 0)
+            self._served[key] = idx + 1
+            self.replayed += 1
+            return rows[min(idx, len(rows) - 1)]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+_CASSETTES: Dict[str, Cassette] = {}
+_CASSETTES_LOCK = threading.Lock()
+
+
+def get_cassette(path: Path, mode: str) -> Cassette:
+    key = f"{mode}:{Path(path).resolve()}"
+    with _CASSETTES_LOCK:
+        cassette = _CASSETTES.get(key)
+        if cassette is None:
+            cassette = Cassette(path, mode)
+            _CASSETTES[key] = cassette
+        return cassette
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    可替换 ChatOpenAI 的聊天模型：record 模式委托给 inner 并录制，replay 模式从 cassette 回放。
+
+    限流器与回调挂在本模型上（inner 不再重复限流）；replay 模式下两者均不设置。
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model_name: str
+    cassette: Any
+    inner: Optional[BaseChatModel] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "cassette": str(self.cassette.path), "mode": self.cassette.mode}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _key(self, messages: Sequence[BaseMessage], stop: Any, kwargs: Dict[str, Any]) -> str:
+        return request_key(self.model_name, messages, tools=kwargs.get("tools"), stop=stop)
+
+    def _replay_result(self, messages: Sequence[BaseMessage], stop: Any, kwargs: Dict[str, Any]) -> ChatResult:
+        row = self.cassette.replay(self._key(messages, stop, kwargs), messages)
+        return ChatResult(generations=[ChatGeneration(message=_response_message(row, self.model_name))])
+
+    def _replay_chunks(
+        self,
+        messages: Sequence[BaseMessage],
+        stop: Any,
+        kwargs: Dict[str, Any],
+    ) -> List[ChatGenerationChunk]:
+        row = self.cassette.replay(self._key(messages, stop, kwargs), messages)
+        full = _response_message(row, self.model_name)
+        content = str(full.content or "")
+        pieces = row.get("chunks")
+        if pieces is None:
+            pieces = [content[i : i + _REPLAY_CHUNK_CHARS] for i in range(0, len(content), _REPLAY_CHUNK_CHARS)]
+        out = [ChatGenerationChunk(message=AIMessageChunk(content=p)) for p in pieces]
+        # 录制时流被提前关闭则没有 usage 分片，回放保持一致。
+        if full.tool_calls or full.usage_metadata or not out:
+            out.append(
+                ChatGenerationChunk(
+                    message=AIMessageChunk(
+                        content="",
+                        tool_call_chunks=[
+                            {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                            for i, tc in enumerate(full.tool_calls)
+                        ],
+                        usage_metadata=full.usage_metadata,
+                        response_metadata=full.response_metadata,
+                    )
+                )
+            )
+        return out
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.inner is None:
+            return self._replay_result(messages, stop, kwargs)
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        self.cassette.record(self._key(messages, stop, kwargs), self.model_name, result.generations[0].message)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.inner is None:
+            return self._replay_result(messages, stop, kwargs)
+        result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+        self.cassette.record(self._key(messages, stop, kwargs), self.model_name, result.generations[0].message)
+        return result
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        if self.inner is None:
+            yield from self._replay_chunks(messages, stop, kwargs)
+            return
+        recorder = _StreamRecorder(self, self._key(messages, stop, kwargs))
+        try:
+            for chunk in self.inner._stream(messages, stop=stop, **kwargs):
+                recorder.add(chunk)
+                yield chunk
+        except GeneratorExit:
+            recorder.save()
+            raise
+        recorder.save()
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.inner is None:
+            for chunk in self._replay_chunks(messages, stop, kwargs):
+                yield chunk
+            return
+        recorder = _StreamRecorder(self, self._key(messages, stop, kwargs))
+        stream = self.inner._astream(messages, stop=stop, **kwargs)
+        try:
+            async for chunk in stream:
+                recorder.add(chunk)
+                yield chunk
+        except GeneratorExit:
+            # 调用方提前关闭流（如 JSON 数组已闭合）：按已收到的分片录制，回放时在同一位置结束。
+            recorder.save()
+            raise
+        finally:
+            await stream.aclose()
+        recorder.save()
+
+
+class _StreamRecorder:
+    """累积流式分片，流结束或被关闭时录制一次。"""
+
+    def __init__(self, model: CassetteChatModel, key: str) -> None:
+        self._model = model
+        self._key = key
+        self._pieces: List[str] = []
+        self._final: Any = None
+        self._saved = False
+
+    def add(self, chunk: ChatGenerationChunk) -> None:
+        message = chunk.message
+        self._final = message if self._final is None else self._final + message
+        if isinstance(message.content, str) and message.content:
+            self._pieces.append(message.content)
+
+    def save(self) -> None:
+        if self._saved or self._final is None:
+            return
+        self._saved = True
+        self._model.cassette.record(self._key, self._model.model_name, self._final, self._pieces)
+
+
+def wrap_with_cassette(
+    inner: Optional[BaseChatModel],
+    *,
+    model_name: str,
+    mode: str,
+    path: Optional[Path] = None,
+    rate_limiter: Any = None,
+    callbacks: Optional[List[Any]] = None,
+) -> CassetteChatModel:
+    """构造 cassette 模型；replay 模式下 inner 为 None。"""
+    cassette = get_cassette(path or cassette_path(), mode)
+    return CassetteChatModel(
+        model_name=model_name,
+        cassette=cassette,
+        inner=inner if mode == "record" else None,
+        rate_limiter=rate_limiter if mode == "record" else None,
+        callbacks=callbacks if mode == "record" else None,
+    )
@@ -0,0 +1,257 @@
+"""按 provider 共享的自适应限流器。
+
+- 令牌桶：按 RPM 控制请求速率，按 TPM 在调用结束后扣减 token 额度（额度为负时等待回补）；
+- 自适应：遇到 HTTP 429 / rate limit 错误时乘性降速并冷却，之后每次成功调用加性恢复；
+- 共享：同一 baseURL + apiKeyEnv 的所有模型实例（agent / tool-calling / llm 旧流程）共用一个限流器。
+
+LLM_CONFIG 配置示例::
+
+    "rateLimit": {
+        "rpm": 60,             # 每分钟请求数上限，<=0 表示不限
+        "tpm": 0,              # 每分钟 token 上限，<=0 表示不限
+        "backoffFactor": 0.5,  # 429 后速率乘以该系数
+        "recoveryRpm": 1,      # 每次成功调用恢复的 RPM
+        "minRpm": 1,           # 降速下限
+    }
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from llm_usage import extract_token_usage
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """判断异常是否属于限流（HTTP 429 / rate limit）。"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    if type(error).__name__ == "RateLimitError":
+        return True
+    text = str(error or "").lower()
+    return "rate limit" in text or "rate_limit" in text or "too many requests" in text or "error code: 429" in text
+
+
+def _retry_after_seconds(error: BaseException) -> float:
+    """读取 Retry-After 响应头（秒），不存在时返回 0。"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after") or 0))
+    except Exception:
+        return 0.0
+
+
+class _RateLimitCallback(BaseCallbackHandler):
+    """把调用结果（token 用量 / 429）回报给限流器。"""
+
+    run_inline = True
+
+    def __init__(self, limiter: "AdaptiveRateLimiter") -> None:
+        self._limiter = limiter
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        total = 0
+        llm_output = getattr(response, "llm_output", None) or {}
+        token_usage = llm_output.get("token_usage") if isinstance(llm_output, dict) else None
+        if isinstance(token_usage, dict):
+            total = int(token_usage.get("total_tokens") or 0)
+        if total <= 0:
+            for gens in getattr(response, "generations", None) or []:
+                for g in gens or []:
+                    total += extract_token_usage(getattr(g, "message", None))[2]
+        self._limiter.record_success(total_tokens=total)
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        if is_rate_limit_error(error):
+            self._limiter.record_rate_limited(retry_after=_retry_after_seconds(error))
+
+
+class AdaptiveRateLimiter(BaseRateLimiter):
+    """RPM/TPM 令牌桶 + AIMD 自适应限流器（线程安全，可跨事件循环使用）。"""
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        rpm: float = 0,
+        tpm: float = 0,
+        backoff_factor: float = 0.5,
+        recovery_rpm: float = 1.0,
+        min_rpm: float = 1.0,
+    ) -> None:
+        self.name = name
+        self.max_rpm = max(0.0, float(rpm or 0))
+        self.tpm = max(0.0, float(tpm or 0))
+        self.backoff_factor = min(0.95, max(0.05, float(backoff_factor)))
+        self.recovery_rpm = max(0.0, float(recovery_rpm))
+        self.min_rpm = max(0.1, float(min_rpm))
+
+        # max_rpm 为 0 时按“不限速”运行，直到第一次 429 才以 429 前的观测速率为基准进入自适应。
+        self._rpm = self.max_rpm
+        self._req_tokens = 1.0
+        self._tpm_credit = self.tpm
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._recent_starts: List[float] = []
+        self._lock = threading.Lock()
+        self._callback = _RateLimitCallback(self)
+
+        self.acquired = 0
+        self.waited_seconds = 0.0
+        self.rate_limited = 0
+
+    @property
+    def callback_handler(self) -> BaseCallbackHandler:
+        return self._callback
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._last_refill)
+        self._last_refill = now
+        if self._rpm > 0:
+            burst = max(1.0, self._rpm / 60.0)
+            self._req_tokens = min(burst, self._req_tokens + elapsed * self._rpm / 60.0)
+        if self.tpm > 0:
+            self._tpm_credit = min(self.tpm, self._tpm_credit + elapsed * self.tpm / 60.0)
+
+    def _try_acquire(self) -> float:
+        """尝试取得一次请求配额；成功返回 0，否则返回建议等待秒数。"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self.tpm > 0 and self._tpm_credit < 0:
+                return -self._tpm_credit * 60.0 / self.tpm
+            if self._rpm > 0:
+                if self._req_tokens < 1.0:
+                    return (1.0 - self._req_tokens) * 60.0 / self._rpm
+                self._req_tokens -= 1.0
+            self.acquired += 1
+            self._recent_starts.append(now)
+            self._recent_starts = [t for t in self._recent_starts if now - t <= 60.0]
+            return 0.0
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                return True
+            if not blocking:
+                return False
+            wait = min(wait, 5.0)
+            with self._lock:
+                self.waited_seconds += wait
+            time.sleep(wait)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                return True
+            if not blocking:
+                return False
+            wait = min(wait, 5.0)
+            with self._lock:
+                self.waited_seconds += wait
+            await asyncio.sleep(wait)
+
+    def record_success(self, *, total_tokens: int = 0) -> None:
+        """成功调用：扣减 TPM 额度，并加性恢复速率。"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tpm > 0 and total_tokens > 0:
+                self._tpm_credit -= float(total_tokens)
+            if self._rpm > 0 and self.recovery_rpm > 0:
+                ceiling = self.max_rpm if self.max_rpm > 0 else float("inf")
+                self._rpm = min(ceiling, self._rpm + self.recovery_rpm)
+                if self.max_rpm <= 0 and self._rpm >= 10_000:
+                    self._rpm = 0.0
+
+    def record_tokens(self, total_tokens: int) -> None:
+        """只扣减 TPM 额度：回调拿不到 usage 时（如被取消的流式请求）由调用方按估算值补记。"""
+        if self.tpm <= 0 or total_tokens <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tpm_credit -= float(total_tokens)
+
+    def record_rate_limited(self, *, retry_after: float = 0.0) -> None:
+        """命中限流：乘性降速，并至少冷却一个请求间隔（或 Retry-After）。"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate_limited += 1
+            base = self._rpm if self._rpm > 0 else max(self.min_rpm, float(len(self._recent_starts)))
+            self._rpm = max(self.min_rpm, base * self.backoff_factor)
+            self._req_tokens = 0.0
+            cooldown = max(float(retry_after or 0), 60.0 / self._rpm)
+            self._blocked_until = max(self._blocked_until, now + cooldown)
+            rpm_now = self._rpm
+        print(
+            f"[RateLimiter] {self.name}: rate limited, backoff to rpm={rpm_now:.1f}, cooldown={cooldown:.1f}s"
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_rpm": self.max_rpm,
+                "current_rpm": round(self._rpm, 2),
+                "tpm": self.tpm,
+                "acquired": self.acquired,
+                "waited_seconds": round(self.waited_seconds, 3),
+                "rate_limited": self.rate_limited,
+            }
+
+
+_LIMITERS: Dict[str, AdaptiveRateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def _provider_key(config: dict) -> str:
+    return f"{str(config.get('baseURL') or '').strip()}|{str(config.get('apiKeyEnv') or '').strip()}"
+
+
+def get_rate_limiter(config: dict) -> AdaptiveRateLimiter:
+    """按 provider（baseURL + apiKeyEnv）获取进程内共享的限流器。"""
+    key = _provider_key(config)
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            opts = dict(config.get("rateLimit") or {})
+            limiter = AdaptiveRateLimiter(
+                name=key,
+                rpm=float(opts.get("rpm", 0) or 0),
+                tpm=float(opts.get("tpm", 0) or 0),
+                backoff_factor=float(opts.get("backoffFactor", 0.5)),
+                recovery_rpm=float(opts.get("recoveryRpm", 1)),
+                min_rpm=float(opts.get("minRpm", 1)),
+            )
+            _LIMITERS[key] = limiter
+        return limiter
+
+
+async def ainvoke_with_rate_limit_retry(runnable: Any, messages: Any, *, retries: int = 2) -> Any:
+    """
+    调用 runnable.ainvoke，遇到限流错误时重试。
+
+    限流器已在 on_llm_error 中记录 429 并进入冷却，重试时 aacquire 会自动等待。
+    """
+    attempt = 0
+    while True:
+        try:
+            return await runnable.ainvoke(messages)
+        except Exception as ex:
+            if attempt >= max(0, int(retries)) or not is_rate_limit_error(ex):
+                raise
+            attempt += 1
+            print(f"[RateLimiter] Rate limited, retry {attempt}/{retries}: {ex}")
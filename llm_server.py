@@ -1,8 +1,17 @@
 import os
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 
+from llm_cassette import cassette_mode, wrap_with_cassette
+from llm_rate_limit import get_rate_limiter
+
+
+def build_chat_model(config: dict, model_name: str) -> BaseChatModel:
+    # LLM_CASSETTE_MODE=replay：从录制文件回放，不访问网络，也不需要 API key
+    mode = cassette_mode()
+    if mode == "replay":
+        return wrap_with_cassette(None, model_name=model_name, mode=mode)
 
-def build_chat_model(config: dict, model_name: str) -> ChatOpenAI:
     api_key = os.environ.get(config["apiKeyEnv"])
     if not api_key:
         raise RuntimeError(f"Missing env {config['apiKeyEnv']}")
@@ -15,6 +24,29 @@ def build_chat_model(config: dict, model_name: str) -> ChatOpenAI:
     timeout = int(options.get("timeout", 180))
     max_retries = int(options.get("max_retries", 2))
     stream_usage = bool(options.get("stream_usage", True))
+    # 同一 provider 的所有模型实例共享限流器，429 时自适应降速
+    limiter = get_rate_limiter(config)
+
+    if mode == "record":
+        # 录制时限流器与回调挂在外层模型上，内层 ChatOpenAI 只负责请求
+        inner = ChatOpenAI(
+            api_key=api_key,
+            model=model_name,
+            base_url=config.get("baseURL", ""),
+            temperature=temperature,
+            top_p=top_p,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            max_retries=max_retries,
+            stream_usage=stream_usage,
+        )
+        return wrap_with_cassette(
+            inner,
+            model_name=model_name,
+            mode=mode,
+            rate_limiter=limiter,
+            callbacks=[limiter.callback_handler],
+        )
 
     return ChatOpenAI(
         api_key=api_key,
@@ -26,4 +58,6 @@ def build_chat_model(config: dict, model_name: str) -> ChatOpenAI:
         timeout=timeout,
         max_retries=max_retries,
         stream_usage=stream_usage,
+        rate_limiter=limiter,
+        callbacks=[limiter.callback_handler],
     )
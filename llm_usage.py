@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import re
 from typing import Any, Tuple
 
+# CJK 字符通常各占约 1 个 token；其余文本按约 4 字符 / token 估算。
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
 
 def extract_token_usage(msg: Any) -> Tuple[int, int, int]:
     """从 LangChain 消息对象中提取 token 使用量。
@@ -31,3 +35,11 @@ def extract_token_usage(msg: Any) -> Tuple[int, int, int]:
 
     return prompt_tokens, completion_tokens, total_tokens
 
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本 token 数（不依赖具体 tokenizer），用于请求打包与预算控制。"""
+    t = text or ""
+    if not t:
+        return 0
+    cjk = len(_CJK_RE.findall(t))
+    return cjk + (len(t) - cjk + 3) // 4